@@ -4,18 +4,22 @@
 import base64
 import curses
 import html as html_lib
+import http.client
 import json
 import os
 import re
 import shutil
 import subprocess
+import tarfile
 import tempfile
 import textwrap
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
 from html.parser import HTMLParser
 from pathlib import Path
 
@@ -136,7 +140,12 @@ TEXT = {'app_name': 'DedSec Market',
                           '\n'
                           'Error:\n'
                           '{output}',
- 'update_item': 'Updating {current}/{total}: {name}',
+ 'update_all_status': 'Updating installed apps: {done}/{total} finished',
+ 'checking_for_updates': 'Checking for updates...',
+ 'already_up_to_date': 'Already up to date ({commit}).',
+ 'remote_head_failed': 'Could not read the latest version from GitHub.\n{output}',
+ 'applying_changes': 'Applying Changed Files',
+ 'update_success_incremental': 'Update completed. {count} changed file(s) were applied in:\n{path}',
  'download_output': 'Git: {message}',
  'python_missing': 'Python was not found.',
  'bash_missing': 'Bash was not found.',
@@ -146,9 +155,14 @@ APP_NAME = TEXT["app_name"]
 DATA_DIR = Path.home() / APP_NAME
 CACHE_DIR = DATA_DIR / "cache"
 STATE_FILE = DATA_DIR / "state.json"
+GIT_STORE = DATA_DIR / "objects.git"
 USER_AGENT = "DedSec-Market-Termux/1.3"
-GITHUB_API = "https://api.github.com"
+GITHUB_API = os.environ.get("DEDSEC_MARKET_API", "https://api.github.com").rstrip("/")
 CACHE_TTL_SECONDS = 1800
+HTTP_TIMEOUT_SECONDS = 20
+METADATA_WORKERS = 8
+UPDATE_WORKERS = 3
+GIT_GC_INTERVAL_SECONDS = 7 * 24 * 3600
 PARSER_VERSION = 8
 
 REPOSITORIES = [
@@ -159,6 +173,10 @@ REPOSITORIES = [
 ]
 
 SESSION_CACHE = {}
+METADATA_LOCK = threading.Condition()
+METADATA_INFLIGHT = set()
+STATE_LOCK = threading.RLock()
+GIT_STORE_LOCK = threading.Lock()
 
 
 class MarketError(Exception):
@@ -221,7 +239,8 @@ def atomic_write_json(path, data):
 
 def save_state(state):
     ensure_data_dir()
-    atomic_write_json(STATE_FILE, state)
+    with STATE_LOCK:
+        atomic_write_json(STATE_FILE, state)
 
 
 def parse_repo_url(url):
@@ -935,54 +954,150 @@ def human_cache_age(cached):
     return tr("hours_ago", count=hours)
 
 
-def github_request(url, not_found_ok=False):
-    request = urllib.request.Request(
-        url,
-        headers={"Accept": "application/vnd.github+json", "User-Agent": USER_AGENT},
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=20) as response:
-            body = response.read()
-            return json.loads(body.decode("utf-8", errors="replace"))
-    except urllib.error.HTTPError as e:
-        if not_found_ok and e.code == 404:
-            return None
-        try:
-            body = e.read().decode("utf-8", errors="replace")
-            payload = json.loads(body)
-            message = payload.get("message", str(e))
-        except Exception:
-            message = str(e)
-        raise MarketError(tr("github_request_failed", message=message))
-    except urllib.error.URLError as e:
-        raise MarketError(tr("network_error", reason=e.reason))
+class GitHubClient:
+    """Keep-alive HTTP(S) client with one persistent connection per thread."""
 
+    def __init__(self, base_url, timeout=HTTP_TIMEOUT_SECONDS):
+        parsed = urllib.parse.urlparse(base_url)
+        self.scheme = parsed.scheme or "https"
+        self.host = parsed.netloc
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.local = threading.local()
 
-def github_readme(owner, repo):
-    url = f"{GITHUB_API}/repos/{owner}/{repo}/readme"
-    request = urllib.request.Request(
-        url,
-        headers={"Accept": "application/vnd.github+json", "User-Agent": USER_AGENT},
-    )
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            if self.scheme == "https":
+                conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, timeout=self.timeout)
+            self.local.conn = conn
+        return conn
+
+    def reset(self):
+        conn = getattr(self.local, "conn", None)
+        self.local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def get(self, path, etag=None):
+        headers = {"Accept": "application/vnd.github+json", "User-Agent": USER_AGENT}
+        if etag:
+            headers["If-None-Match"] = etag
+        target = self.prefix + path
+        redirects = 0
+        while True:
+            conn = self.connection()
+            reused = conn.sock is not None
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                self.reset()
+                if reused:
+                    # The server may have dropped an idle keep-alive socket; retry once on a fresh one.
+                    continue
+                raise MarketError(tr("network_error", reason=e))
+            location = response.getheader("Location")
+            if response.status in (301, 302, 307, 308) and location and redirects < 3:
+                moved = urllib.parse.urlparse(location)
+                if moved.netloc and moved.netloc != self.host:
+                    raise MarketError(tr("github_request_failed", message=f"{response.status} {location}"))
+                target = moved.path + (f"?{moved.query}" if moved.query else "")
+                redirects += 1
+                continue
+            return response.status, response.getheader("ETag"), body
+
+
+GITHUB_CLIENT = GitHubClient(GITHUB_API)
+
+
+def github_request(url, not_found_ok=False, etag=None, failure_key="github_request_failed"):
+    """Return (status, etag, payload); status 304 means the cached copy for ``etag`` is still current."""
+    if url.startswith(GITHUB_API):
+        url = url[len(GITHUB_API):]
+    status, new_etag, body = GITHUB_CLIENT.get(url, etag)
+    if status == 304:
+        return status, etag, None
+    if status == 404 and not_found_ok:
+        return status, None, None
     try:
-        with urllib.request.urlopen(request, timeout=20) as response:
-            payload = json.loads(response.read().decode("utf-8", errors="replace"))
-            content = payload.get("content", "")
-            if payload.get("encoding") == "base64" and content:
-                return base64.b64decode(content).decode("utf-8", errors="replace")
-            return ""
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            return ""
-        try:
-            body = e.read().decode("utf-8", errors="replace")
-            payload = json.loads(body)
-            message = payload.get("message", str(e))
-        except Exception:
-            message = str(e)
-        raise MarketError(tr("readme_fetch_failed", message=message))
-    except urllib.error.URLError as e:
-        raise MarketError(tr("network_error", reason=e.reason))
+        payload = json.loads(body.decode("utf-8", errors="replace"))
+    except Exception:
+        payload = None
+    if status >= 400:
+        message = payload.get("message") if isinstance(payload, dict) else None
+        raise MarketError(tr(failure_key, message=message or f"HTTP {status}"))
+    return status, new_etag, payload
+
+
+def decode_readme(payload):
+    if not isinstance(payload, dict):
+        return ""
+    content = payload.get("content", "")
+    if payload.get("encoding") == "base64" and content:
+        return base64.b64decode(content).decode("utf-8", errors="replace")
+    return ""
+
+
+def extract_repo_fields(payload):
+    payload = payload if isinstance(payload, dict) else {}
+    return {
+        "full_name": payload.get("full_name"),
+        "owner_login": (payload.get("owner") or {}).get("login"),
+        "description": payload.get("description") or "",
+        "stars": int(payload.get("stargazers_count", 0) or 0),
+        "forks": int(payload.get("forks_count", 0) or 0),
+        "watchers": int(payload.get("subscribers_count", payload.get("watchers_count", 0)) or 0),
+        "issues_count": int(payload.get("open_issues_count", 0) or 0),
+        "default_branch": payload.get("default_branch") or "main",
+    }
+
+
+def extract_contributors(payload):
+    if not isinstance(payload, list):
+        return []
+    return [person.get("login") for person in payload if isinstance(person, dict) and person.get("login")]
+
+
+def extract_issue_titles(payload):
+    if not isinstance(payload, list):
+        return []
+    titles = []
+    for item in payload:
+        if not isinstance(item, dict) or "pull_request" in item:
+            continue
+        title = item.get("title")
+        if title:
+            titles.append(title)
+    return titles
+
+
+def extract_release(payload):
+    if not isinstance(payload, dict):
+        return None
+    return {
+        "tag": payload.get("tag_name") or tr("unknown"),
+        "name": payload.get("name") or tr("unnamed_release"),
+        "published_at": payload.get("published_at") or tr("unknown"),
+        "notes": summarize_release_body(payload.get("body", "")),
+        "url": payload.get("html_url") or "",
+    }
+
+
+# (key, path suffix, 404 allowed, error text key, extractor). Only the extracted
+# data is cached next to each ETag, so a 304 can be rebuilt without the raw body.
+METADATA_ENDPOINTS = [
+    ("repo", "", False, "github_request_failed", extract_repo_fields),
+    ("contributors", "/contributors?per_page=100", False, "github_request_failed", extract_contributors),
+    ("issues", "/issues?state=open&per_page=20", False, "github_request_failed", extract_issue_titles),
+    ("release", "/releases/latest", True, "github_request_failed", extract_release),
+    ("readme", "/readme", True, "readme_fetch_failed", decode_readme),
+]
+
+METADATA_POOL = None
 
 
 def summarize_release_body(body):
@@ -1001,72 +1116,126 @@ def summarize_release_body(body):
     return summary or tr("no_release_notes")
 
 
-def get_repo_info(app, refresh=False):
-    slug = app["slug"]
-    if slug in SESSION_CACHE and not refresh:
-        return SESSION_CACHE[slug]
-    cached = load_cached_info(slug)
-    if cached and cache_is_fresh(cached) and not refresh:
-        cached["_source"] = tr("cache_with_age", age=human_cache_age(cached))
-        SESSION_CACHE[slug] = cached
-        return cached
-    owner, repo = app["owner"], app["repo"]
+def metadata_pool():
+    global METADATA_POOL
+    if METADATA_POOL is None:
+        METADATA_POOL = ThreadPoolExecutor(max_workers=METADATA_WORKERS, thread_name_prefix="market-http")
+    return METADATA_POOL
+
+
+def fetch_endpoint(app, endpoint, previous):
+    key, suffix, not_found_ok, failure_key, extract = endpoint
+    previous = previous if isinstance(previous, dict) and "data" in previous else {}
+    status, etag, payload = github_request(
+        f"/repos/{app['owner']}/{app['repo']}{suffix}",
+        not_found_ok=not_found_ok,
+        etag=previous.get("etag"),
+        failure_key=failure_key,
+    )
+    if status == 304 and previous:
+        return previous
+    if status == 404:
+        return {"etag": None, "data": extract(None)}
+    return {"etag": etag, "data": extract(payload)}
+
+
+def build_repo_info(app, endpoints):
+    repo_fields = endpoints["repo"]["data"]
+    readme_text = endpoints["readme"]["data"]
+    return {
+        "slug": app["slug"],
+        "display_name": app["display_name"],
+        "url": app["url"],
+        "full_name": repo_fields.get("full_name") or app["slug"],
+        "creator": repo_fields.get("owner_login") or app["owner"],
+        "description": extract_language_summary(readme_text, repo_fields.get("description", ""), LANG),
+        "stars": repo_fields["stars"],
+        "forks": repo_fields["forks"],
+        "watchers": repo_fields["watchers"],
+        "issues_count": repo_fields["issues_count"],
+        "issues": endpoints["issues"]["data"],
+        "contributors": endpoints["contributors"]["data"],
+        "default_branch": repo_fields["default_branch"],
+        "release": endpoints["release"]["data"],
+        "_source": tr("live_cached_now"),
+        "_endpoints": endpoints,
+    }
+
+
+def claim_repo_infos(apps, refresh, wait):
+    """Reserve apps for fetching so foreground loads and prefetches never fetch the same app twice."""
+    ready, claimed = {}, []
+    with METADATA_LOCK:
+        for app in apps:
+            slug = app["slug"]
+            while wait and slug in METADATA_INFLIGHT:
+                METADATA_LOCK.wait()
+            if slug in SESSION_CACHE and not refresh:
+                ready[slug] = SESSION_CACHE[slug]
+            elif slug not in METADATA_INFLIGHT:
+                METADATA_INFLIGHT.add(slug)
+                claimed.append(app)
+    return ready, claimed
+
+
+def get_repo_infos(apps, refresh=False, wait=True):
+    """Load metadata for several apps, fetching every stale endpoint of every app concurrently.
+
+    Returns a dict of slug -> info or the exception that prevented loading it. With ``wait=False``
+    apps already being fetched elsewhere are skipped instead of waited for.
+    """
+    results, claimed = claim_repo_infos(apps, refresh, wait)
     try:
-        repo_data = github_request(f"{GITHUB_API}/repos/{owner}/{repo}")
-        contributors = github_request(f"{GITHUB_API}/repos/{owner}/{repo}/contributors?per_page=100")
-        issues_data = github_request(f"{GITHUB_API}/repos/{owner}/{repo}/issues?state=open&per_page=20")
-        release_data = github_request(f"{GITHUB_API}/repos/{owner}/{repo}/releases/latest", not_found_ok=True)
-        readme_text = github_readme(owner, repo)
-        creator = repo_data.get("owner", {}).get("login") or owner
-        contributor_names = []
-        if isinstance(contributors, list):
-            for person in contributors:
-                login = person.get("login")
-                if login:
-                    contributor_names.append(login)
-        issue_titles = []
-        if isinstance(issues_data, list):
-            for item in issues_data:
-                if "pull_request" in item:
-                    continue
-                title = item.get("title")
-                if title:
-                    issue_titles.append(title)
-        release_info = None
-        if isinstance(release_data, dict):
-            release_info = {
-                "tag": release_data.get("tag_name") or tr("unknown"),
-                "name": release_data.get("name") or tr("unnamed_release"),
-                "published_at": release_data.get("published_at") or tr("unknown"),
-                "notes": summarize_release_body(release_data.get("body", "")),
-                "url": release_data.get("html_url") or "",
+        pending = []
+        for app in claimed:
+            slug = app["slug"]
+            cached = load_cached_info(slug)
+            if cached and cache_is_fresh(cached) and not refresh:
+                cached["_source"] = tr("cache_with_age", age=human_cache_age(cached))
+                SESSION_CACHE[slug] = results[slug] = cached
+                continue
+            previous = (cached or {}).get("_endpoints") or {}
+            futures = {
+                endpoint[0]: metadata_pool().submit(fetch_endpoint, app, endpoint, previous.get(endpoint[0]))
+                for endpoint in METADATA_ENDPOINTS
             }
-        info = {
-            "slug": slug,
-            "display_name": app["display_name"],
-            "url": app["url"],
-            "full_name": repo_data.get("full_name", slug),
-            "creator": creator,
-            "description": extract_language_summary(readme_text, repo_data.get("description", ""), LANG),
-            "stars": int(repo_data.get("stargazers_count", 0)),
-            "forks": int(repo_data.get("forks_count", 0)),
-            "watchers": int(repo_data.get("subscribers_count", repo_data.get("watchers_count", 0))),
-            "issues_count": int(repo_data.get("open_issues_count", 0)),
-            "issues": issue_titles,
-            "contributors": contributor_names,
-            "default_branch": repo_data.get("default_branch", "main"),
-            "release": release_info,
-            "_source": tr("live_cached_now"),
-        }
-        save_cached_info(slug, info)
-        SESSION_CACHE[slug] = info
-        return info
-    except Exception:
-        if cached:
-            cached["_source"] = tr("cache_fallback_with_age", age=human_cache_age(cached))
-            SESSION_CACHE[slug] = cached
-            return cached
-        raise
+            pending.append((app, cached, futures))
+        for app, cached, futures in pending:
+            slug = app["slug"]
+            try:
+                endpoints = {key: future.result() for key, future in futures.items()}
+                info = build_repo_info(app, endpoints)
+                save_cached_info(slug, info)
+                SESSION_CACHE[slug] = results[slug] = info
+            except Exception as e:
+                if cached:
+                    cached["_source"] = tr("cache_fallback_with_age", age=human_cache_age(cached))
+                    SESSION_CACHE[slug] = results[slug] = cached
+                else:
+                    results[slug] = e
+    finally:
+        with METADATA_LOCK:
+            for app in claimed:
+                METADATA_INFLIGHT.discard(app["slug"])
+            METADATA_LOCK.notify_all()
+    return results
+
+
+def get_repo_info(app, refresh=False):
+    info = get_repo_infos([app], refresh=refresh)[app["slug"]]
+    if isinstance(info, Exception):
+        raise info
+    return info
+
+
+def prefetch_repo_infos(apps):
+    """Warm SESSION_CACHE for ``apps`` on a background thread."""
+    pending = [app for app in apps if app["slug"] not in SESSION_CACHE]
+    if not pending:
+        return None
+    thread = threading.Thread(target=get_repo_infos, args=(pending,), kwargs={"wait": False}, daemon=True)
+    thread.start()
+    return thread
 
 
 def suggested_install_path(app):
@@ -1112,29 +1281,152 @@ def unique_backup_path(path):
         counter += 1
 
 
-def clone_repo_to_temp(app, progress_callback=None):
+def store_ref(app, kind):
+    return f"refs/market/{app['owner']}/{app['repo']}/{kind}"
+
+
+def git_store_command(*args):
+    return ["git", "--literal-pathspecs", f"--git-dir={GIT_STORE}", *args]
+
+
+def ensure_git_store():
+    if (GIT_STORE / "HEAD").exists():
+        return
+    code, output = run_command(["git", "init", "--bare", "--quiet", str(GIT_STORE)])
+    if code != 0:
+        raise MarketError(tr("download_repo_failed", output=output or tr("unknown")))
+
+
+def remote_head(app):
+    ensure_git()
+    code, output = run_command(["git", "ls-remote", app["url"], "HEAD"])
+    match = re.search(r"^([0-9a-f]{40,64})\s+HEAD$", output, flags=re.MULTILINE) if code == 0 else None
+    if not match:
+        limited_output = "\n".join(output.splitlines()[-30:])
+        raise MarketError(tr("remote_head_failed", output=limited_output or tr("unknown")))
+    return match.group(1)
+
+
+def fetch_app_commit(app, progress_callback=None, expected=None):
+    """Bring the remote HEAD of ``app`` into the shared object store and return its commit id.
+
+    Objects already in the store are never downloaded again, and when ``expected`` is already
+    present the network is skipped entirely.
+    """
     ensure_git()
     ensure_data_dir()
     report_progress(progress_callback, 0, tr("starting_download"))
-    temp_dir = Path(
-        tempfile.mkdtemp(prefix="download_", dir=str(DATA_DIR))
-    )
+    remote_ref = store_ref(app, "remote")
+    # git locks the store's shallow file during a fetch, so fetches into it take turns.
+    with GIT_STORE_LOCK:
+        ensure_git_store()
+        code, output = 1, ""
+        if expected:
+            code, output = run_command(git_store_command("update-ref", remote_ref, expected))
+        if code != 0:
+            command = git_store_command(
+                "fetch", "--depth", "1", "--no-tags", "--progress", app["url"], f"+HEAD:{remote_ref}"
+            )
+            code, output = run_git_clone(command, progress_callback=progress_callback)
+        if code == 0:
+            code, commit = run_command(git_store_command("rev-parse", "--verify", remote_ref + "^{commit}"))
+    if code != 0:
+        limited_output = "\n".join(output.splitlines()[-30:])
+        raise MarketError(tr("download_repo_failed", output=limited_output or tr("unknown")))
+    report_progress(progress_callback, 100, tr("download_repository"))
+    return commit
+
+
+def mark_installed_commit(app, commit):
+    # Keeps the installed commit reachable so the next update can diff against it.
+    with GIT_STORE_LOCK:
+        run_command(git_store_command("update-ref", store_ref(app, "installed"), commit))
+
+
+def forget_app_refs(app):
+    """Delete the store refs of an uninstalled app so its objects become unreachable."""
+    with GIT_STORE_LOCK:
+        if not (GIT_STORE / "HEAD").exists():
+            return
+        for kind in ("remote", "installed"):
+            run_command(git_store_command("update-ref", "-d", store_ref(app, kind)))
+
+
+def prune_git_store(state, force=False):
+    """Repack the shared store and drop objects that no ref points at any more.
+
+    Runs after every uninstall and otherwise at most once per GIT_GC_INTERVAL_SECONDS,
+    since updates move the remote refs forward and leave the old commits behind.
+    """
+    now = int(time.time())
+    if not force and now - int(state.get("git_gc_at") or 0) < GIT_GC_INTERVAL_SECONDS:
+        return
+    try:
+        with GIT_STORE_LOCK:
+            if not (GIT_STORE / "HEAD").exists():
+                return
+            code, _output = run_command(git_store_command("gc", "--quiet", "--prune=now"))
+    except OSError:
+        return
+    if code == 0:
+        with STATE_LOCK:
+            state["git_gc_at"] = now
+            save_state(state)
+
+
+def export_commit(commit, destination, paths=None):
+    """Write the files of ``commit`` (only ``paths`` when given) from the store into ``destination``."""
+    destination.mkdir(parents=True, exist_ok=True)
+    groups = [None] if paths is None else [paths[i:i + 500] for i in range(0, len(paths), 500)]
+    extract_options = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+    for group in groups:
+        command = git_store_command("archive", "--format=tar", commit)
+        if group is not None:
+            command += ["--", *group]
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+            try:
+                with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                    archive.extractall(str(destination), **extract_options)
+            except (tarfile.TarError, OSError) as e:
+                process.kill()
+                process.wait()
+                raise MarketError(tr("download_repo_failed", output=e)) from e
+            finally:
+                process.stdout.close()
+            if process.wait() != 0:
+                errors.seek(0)
+                output = errors.read().decode("utf-8", errors="replace").strip()
+                raise MarketError(tr("download_repo_failed", output=output[-2000:] or tr("unknown")))
+
+
+def changed_paths(old_commit, new_commit):
+    """Return (changed, deleted) paths between two commits, or None when no diff is available."""
+    if not old_commit:
+        return None
+    code, output = run_command(git_store_command("diff", "--no-renames", "--name-status", "-z", old_commit, new_commit))
+    if code != 0:
+        return None
+    fields = output.split("\0")
+    changed, deleted = [], []
+    for index in range(0, len(fields) - 1, 2):
+        status, path = fields[index], fields[index + 1]
+        (deleted if status.startswith("D") else changed).append(path)
+    return changed, deleted
+
+
+def export_repo_to_temp(app, progress_callback=None, expected=None):
+    report_progress(progress_callback, 0, tr("starting_download"))
+    commit = fetch_app_commit(app, scale_progress_callback(progress_callback, 0, 90), expected)
+    temp_dir = Path(tempfile.mkdtemp(prefix="download_", dir=str(DATA_DIR)))
     clone_path = temp_dir / app["repo"]
-    command = ["git", "clone", "--depth", "1", "--progress", app["url"], str(clone_path)]
     try:
-        code, output = run_git_clone(command, progress_callback=progress_callback)
+        export_commit(commit, clone_path)
     except BaseException:
         shutil.rmtree(temp_dir, ignore_errors=True)
         raise
-    if code != 0 or not clone_path.is_dir():
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        limited_output = "\n".join(output.splitlines()[-30:])
-        raise MarketError(tr("download_repo_failed", output=limited_output or tr("unknown")))
-    git_dir = clone_path / ".git"
-    if git_dir.exists():
-        shutil.rmtree(git_dir, ignore_errors=True)
     report_progress(progress_callback, 100, tr("download_repository"))
-    return temp_dir, clone_path
+    return temp_dir, clone_path, commit
 
 
 def install_app(app, state, progress_callback=None):
@@ -1144,7 +1436,7 @@ def install_app(app, state, progress_callback=None):
     base_path = suggested_install_path(app)
     install_path = validate_install_path(app, unique_install_path(base_path), must_exist=False)
     report_progress(progress_callback, 0, tr("preparing_installation"))
-    temp_dir, clone_path = clone_repo_to_temp(
+    temp_dir, clone_path, commit = export_repo_to_temp(
         app,
         scale_progress_callback(progress_callback, 2, 88),
     )
@@ -1153,19 +1445,23 @@ def install_app(app, state, progress_callback=None):
         report_progress(progress_callback, 92, tr("installing_files"))
         shutil.move(str(clone_path), str(install_path))
         moved = True
-        state["installed"][slug] = {
-            "display_name": app["display_name"],
-            "path": str(install_path),
-            "repo_url": app["url"],
-            "installed_at": int(time.time()),
-        }
-        save_state(state)
+        with STATE_LOCK:
+            state["installed"][slug] = {
+                "display_name": app["display_name"],
+                "path": str(install_path),
+                "repo_url": app["url"],
+                "installed_at": int(time.time()),
+                "commit": commit,
+            }
+            save_state(state)
+        mark_installed_commit(app, commit)
         report_progress(progress_callback, 98, tr("cleaning_temporary_files"))
         shutil.rmtree(temp_dir, ignore_errors=True)
         report_progress(progress_callback, 100, tr("operation_complete"))
         return install_path
     except BaseException as e:
-        state["installed"].pop(slug, None)
+        with STATE_LOCK:
+            state["installed"].pop(slug, None)
         if moved and install_path.exists():
             shutil.rmtree(install_path, ignore_errors=True)
         if isinstance(e, (KeyboardInterrupt, SystemExit)):
@@ -1177,6 +1473,69 @@ def install_app(app, state, progress_callback=None):
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+def path_exists(path):
+    return path.exists() or path.is_symlink()
+
+
+def apply_changed_files(path, stage_path, changed, deleted, backup_path, progress_callback=None):
+    """Swap changed files into ``path``, keeping every replaced file in ``backup_path``.
+
+    Returns an undo function that puts the installation back exactly as it was.
+    """
+    backed_up = []
+    placed = []
+    seen = set()
+
+    def undo():
+        for rel in reversed(placed):
+            target = path / rel
+            if target.is_dir() and not target.is_symlink():
+                shutil.rmtree(target)
+            elif path_exists(target):
+                target.unlink()
+        for slot, rel in reversed(list(enumerate(backed_up))):
+            target = path / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(backup_path / str(slot), target)
+
+    try:
+        backup_path.mkdir(parents=True)
+        # Deleted paths go first so a file replaced by a directory (or the reverse) has room.
+        for rel in deleted + changed:
+            target = path / rel
+            if rel in seen or not path_exists(target):
+                continue
+            seen.add(rel)
+            # Numbered slots, because "dir/file" and a later "dir" would collide in a mirrored tree.
+            os.replace(target, backup_path / str(len(backed_up)))
+            backed_up.append(rel)
+        total = max(1, len(changed))
+        for index, rel in enumerate(changed):
+            source = stage_path / rel
+            if not path_exists(source):
+                continue
+            target = path / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+            placed.append(rel)
+            report_progress(progress_callback, (index + 1) * 100 / total, tr("applying_changes"))
+    except BaseException:
+        undo()
+        raise
+    return undo
+
+
+def remove_empty_parents(path, deleted):
+    for rel in deleted:
+        parent = (path / rel).parent
+        while parent != path and parent.is_dir():
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+
 def update_app(app, state, progress_callback=None):
     slug = app["slug"]
     item = state["installed"].get(slug)
@@ -1185,36 +1544,69 @@ def update_app(app, state, progress_callback=None):
     path = validate_install_path(app, item["path"], must_exist=True)
     old_item = dict(item)
     report_progress(progress_callback, 0, tr("preparing_update"))
-    temp_dir, clone_path = clone_repo_to_temp(
-        app,
-        scale_progress_callback(progress_callback, 2, 84),
-    )
+    report_progress(progress_callback, 1, tr("checking_for_updates"))
+    head = remote_head(app)
+    if head == item.get("commit"):
+        report_progress(progress_callback, 100, tr("operation_complete"))
+        return tr("already_up_to_date", commit=head[:7])
+    commit = fetch_app_commit(app, scale_progress_callback(progress_callback, 2, 70), expected=head)
+    plan = changed_paths(item.get("commit"), commit)
+    temp_dir = Path(tempfile.mkdtemp(prefix="update_", dir=str(DATA_DIR)))
     backup_path = unique_backup_path(path)
+    undo = None
     old_moved = False
     new_moved = False
     try:
-        report_progress(progress_callback, 88, tr("replacing_files"))
-        shutil.move(str(path), str(backup_path))
-        old_moved = True
-        shutil.move(str(clone_path), str(path))
-        new_moved = True
-        item["updated_at"] = int(time.time())
-        item["last_update_mode"] = "full_redownload_atomic_replace"
-        save_state(state)
+        if plan is not None:
+            changed, deleted = plan
+            stage_path = temp_dir / app["repo"]
+            report_progress(progress_callback, 74, tr("download_repository"))
+            export_commit(commit, stage_path, changed)
+            report_progress(progress_callback, 80, tr("replacing_files"))
+            undo = apply_changed_files(
+                path, stage_path, changed, deleted, backup_path,
+                scale_progress_callback(progress_callback, 80, 95),
+            )
+            mode = "incremental_git_apply"
+            message = tr("update_success_incremental", count=len(changed) + len(deleted), path=path)
+        else:
+            clone_path = temp_dir / app["repo"]
+            report_progress(progress_callback, 74, tr("download_repository"))
+            export_commit(commit, clone_path)
+            report_progress(progress_callback, 88, tr("replacing_files"))
+            shutil.move(str(path), str(backup_path))
+            old_moved = True
+            shutil.move(str(clone_path), str(path))
+            new_moved = True
+            mode = "full_redownload_atomic_replace"
+            message = tr("update_success_replaced", path=path)
+        with STATE_LOCK:
+            item["updated_at"] = int(time.time())
+            item["last_update_mode"] = mode
+            item["commit"] = commit
+            save_state(state)
+        mark_installed_commit(app, commit)
         report_progress(progress_callback, 97, tr("cleaning_temporary_files"))
+        if plan is not None:
+            remove_empty_parents(path, plan[1])
         shutil.rmtree(backup_path, ignore_errors=True)
         report_progress(progress_callback, 100, tr("operation_complete"))
-        return tr("update_success_replaced", path=path)
+        return message
     except BaseException as e:
-        item.clear()
-        item.update(old_item)
+        with STATE_LOCK:
+            item.clear()
+            item.update(old_item)
         restore_error = None
         try:
             report_progress(progress_callback, 90, tr("restoring_files"))
+            if undo is not None:
+                undo()
             if new_moved and path.exists():
                 shutil.rmtree(path, ignore_errors=True)
             if old_moved and backup_path.exists():
                 shutil.move(str(backup_path), str(path))
+            if path.exists():
+                shutil.rmtree(backup_path, ignore_errors=True)
         except BaseException as restore_exception:
             restore_error = restore_exception
 
@@ -1235,26 +1627,38 @@ def update_all_installed(state, progress_callback=None):
     installed_slugs = [slug for slug in state["installed"] if slug in APP_MAP]
     if not installed_slugs:
         return [tr("no_installed_apps")]
+    apps = [APP_MAP[slug] for slug in installed_slugs]
+    total = len(apps)
+    progress = {app["slug"]: 0 for app in apps}
+    progress_lock = threading.Lock()
+
+    def item_progress(app):
+        def update(percent, status):
+            with progress_lock:
+                progress[app["slug"]] = max(0, min(100, percent))
+        return update
+
+    def combined_progress(done):
+        with progress_lock:
+            snapshot = dict(progress)
+        lines = [tr("update_all_status", done=done, total=total)]
+        lines.extend(f"{app['display_name']}: {int(snapshot[app['slug']])}%" for app in apps)
+        report_progress(progress_callback, sum(snapshot.values()) / total, "\n".join(lines))
+
+    # Workers only record their percentages; the display is redrawn from this thread.
+    with ThreadPoolExecutor(max_workers=min(UPDATE_WORKERS, total), thread_name_prefix="market-update") as pool:
+        futures = {pool.submit(update_app, app, state, item_progress(app)): app for app in apps}
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.2)
+            combined_progress(total - len(pending))
     results = []
-    total = len(installed_slugs)
-    for index, slug in enumerate(installed_slugs):
-        app = APP_MAP[slug]
-
-        def item_progress(percent, status, index=index, app=app):
-            overall = ((index + max(0, min(100, percent)) / 100.0) / total) * 100.0
-            prefix = tr(
-                "update_item",
-                current=index + 1,
-                total=total,
-                name=app["display_name"],
-            )
-            report_progress(progress_callback, overall, f"{prefix}\n{status}")
-
+    for future, app in futures.items():
         try:
-            message = update_app(app, state, item_progress)
-            results.append(f"• {app['display_name']}: {message}")
+            results.append(f"• {app['display_name']}: {future.result()}")
         except Exception as e:
             results.append(f"• {app['display_name']}: {e}")
+    prune_git_store(state)
     report_progress(progress_callback, 100, tr("operation_complete"))
     return results
 
@@ -1269,8 +1673,14 @@ def delete_app(app, state):
         if not path.is_dir():
             raise MarketError(tr("unsafe_install_path", path=path))
         shutil.rmtree(path)
-    state["installed"].pop(slug, None)
-    save_state(state)
+    with STATE_LOCK:
+        state["installed"].pop(slug, None)
+        save_state(state)
+    try:
+        forget_app_refs(app)
+    except OSError:
+        pass
+    prune_git_store(state, force=True)
     return path
 
 
@@ -1560,6 +1970,7 @@ def main_menu(stdscr, state):
 def app_list_screen(stdscr, state, title, apps, allow_search=True):
     selected = 0
     query = ""
+    prefetched = set()
     while True:
         if allow_search and query:
             filtered = [app for app in apps if query.lower() in app["display_name"].lower() or query.lower() in app["slug"].lower()]
@@ -1581,6 +1992,10 @@ def app_list_screen(stdscr, state, title, apps, allow_search=True):
             if selected >= max_rows:
                 start = selected - max_rows + 1
             visible = filtered[start:start + max_rows]
+            unseen = [app for app in visible if app["slug"] not in prefetched]
+            if unseen:
+                prefetched.update(app["slug"] for app in unseen)
+                prefetch_repo_infos(unseen)
             for idx, app in enumerate(visible):
                 actual = start + idx
                 installed = app["slug"] in state["installed"]
@@ -1737,6 +2152,7 @@ def app_detail_screen(stdscr, state, app):
             try:
                 progress = make_progress_callback(stdscr, tr("updating_repository"))
                 output = update_app(app, state, progress)
+                prune_git_store(state)
                 prompt_message(stdscr, app["display_name"], output or tr("updated_successfully"))
             except Exception as e:
                 prompt_message(stdscr, app["display_name"], str(e))
@@ -26,6 +26,7 @@ import time
 import urllib.parse
 import urllib.request
 import zipfile
+from array import array
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
@@ -77,6 +78,9 @@ DEFAULT_ADMIN_USERNAME = "admin"
 DEFAULT_ADMIN_PASSWORD = "password"
 MAX_UPLOAD_BYTES = 30 * 1024 * 1024 * 1024
 UPLOAD_CHUNK_BYTES = 16 * 1024 * 1024
+UPLOAD_PARALLEL_CHUNKS = 4
+UPLOAD_COPY_BYTES = 4 * 1024 * 1024
+UPLOAD_STATE_PERSIST_SECONDS = 5.0
 UPLOAD_REQUEST_OVERHEAD_BYTES = 4 * 1024 * 1024
 SESSION_SECONDS = 12 * 60 * 60
 HOME = Path.home()
@@ -375,6 +379,9 @@ TEXT: Dict[str, Dict[str, str]] = {'en': {'management': 'Management',
         'download_logs_zip': 'Download logs as ZIP',
         'log_export_help': 'Choose a date range to view and download all matching daily logs as TXT files inside one ZIP. Exporting never deletes logs.',
         'no_logs_in_range': 'No log records exist in the selected date range.',
+        'newer_logs': 'Newer',
+        'older_logs': 'Older',
+        'log_page': 'Page',
         'current_log_file': 'Current-day detailed log',
         'daily_log_files': 'Daily consolidated TXT logs',
         'request_label': 'Request',
@@ -1150,20 +1157,43 @@ def server_internal_dir() -> Path:
 
 
 
-def audit_log_path() -> Path:
+# The audit log is stored as one append-only JSONL segment per local day
+# (audit-YYYY-MM-DD.jsonl). Each segment has a hidden sidecar index holding
+# the byte offset of every record, so counts come from the index size and a
+# page of records is read with one seek instead of parsing whole days.
+AUDIT_PAGE_SIZE = 100
+AUDIT_SEGMENT_RE = re.compile(r"^audit-(\d{4}-\d{2}-\d{2})\.jsonl$")
+AUDIT_OFFSETS_CACHE: Dict[str, Tuple[int, array]] = {}
+AUDIT_FINALIZED_DAY: Dict[str, dt.date] = {}
+
+
+def audit_logs_dir() -> Path:
     directory = server_internal_dir() / "logs"
     directory.mkdir(parents=True, exist_ok=True)
     with contextlib.suppress(Exception):
         directory.chmod(0o700)
-    return directory / "audit.jsonl"
+    return directory
 
 
-def audit_history_path() -> Path:
-    return audit_log_path().parent / ".history.jsonl"
+def audit_segment_path(day: dt.date) -> Path:
+    return audit_logs_dir() / f"audit-{day.isoformat()}.jsonl"
+
+
+def audit_log_path() -> Path:
+    return audit_segment_path(dt.datetime.now().astimezone().date())
+
+
+def audit_legacy_paths() -> List[Path]:
+    directory = audit_logs_dir()
+    return [directory / ".history.jsonl", directory / "audit.jsonl"]
 
 
 def audit_daily_path(day: dt.date) -> Path:
-    return audit_log_path().parent / day.strftime("%d-%m-%Y.txt")
+    return audit_logs_dir() / day.strftime("%d-%m-%Y.txt")
+
+
+def _audit_index_path(segment: Path) -> Path:
+    return segment.with_name(f".{segment.stem}.idx")
 
 
 def _atomic_text_write(path: Path, text: str) -> None:
@@ -1301,35 +1331,211 @@ def _write_jsonl_records(path: Path, records: List[Dict[str, Any]]) -> None:
     _atomic_text_write(path, content)
 
 
-def consolidate_previous_audit_logs() -> None:
+def _audit_line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _audit_index_matches(segment: Path, offsets: array, size: int) -> bool:
+    if not offsets:
+        return size == 0
+    if offsets[0] != 0 or offsets[-1] >= size:
+        return False
+    # Only the last record is checked: it must be complete and there must be
+    # nothing after it. Earlier offsets were valid when they were appended.
+    try:
+        with segment.open("rb") as handle:
+            if offsets[-1]:
+                handle.seek(offsets[-1] - 1)
+                if handle.read(1) != b"\n":
+                    return False
+            else:
+                handle.seek(0)
+            tail = handle.read(size - offsets[-1])
+    except OSError:
+        return False
+    return tail.endswith(b"\n") and tail.count(b"\n") == 1
+
+
+def _rebuild_audit_index(segment: Path, size: int) -> array:
+    offsets = array("Q")
+    position = 0
+    with segment.open("rb") as handle:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+    if position < size:
+        # Torn last line from an interrupted write; drop it.
+        with segment.open("r+b") as handle:
+            handle.truncate(position)
+    temporary = _audit_index_path(segment).with_suffix(f".tmp-{os.getpid()}-{secrets.token_hex(3)}")
+    with temporary.open("wb") as handle:
+        handle.write(offsets.tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, _audit_index_path(segment))
+    return offsets
+
+
+def _audit_segment_offsets(segment: Path) -> array:
+    """Return the start offset of every complete record in a day segment."""
     with AUDIT_LOCK:
-        live_path = audit_log_path()
-        live_records = _read_jsonl_records(live_path)
-        if not live_records:
-            return
-        today = dt.datetime.now().astimezone().date()
-        previous = [item for item in live_records if _audit_day(item) < today]
-        if not previous:
+        try:
+            size = segment.stat().st_size
+        except OSError:
+            return array("Q")
+        key = str(segment)
+        cached = AUDIT_OFFSETS_CACHE.get(key)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        offsets = array("Q")
+        raw = b""
+        with contextlib.suppress(OSError):
+            raw = _audit_index_path(segment).read_bytes()
+        if len(raw) % offsets.itemsize == 0:
+            offsets.frombytes(raw)
+        if len(raw) % offsets.itemsize or not _audit_index_matches(segment, offsets, size):
+            offsets = _rebuild_audit_index(segment, size)
+            with contextlib.suppress(OSError):
+                size = segment.stat().st_size
+        AUDIT_OFFSETS_CACHE[key] = (size, offsets)
+        return offsets
+
+
+def _append_audit_records(day: dt.date, records: List[Dict[str, Any]], durable: bool = False) -> None:
+    if not records:
+        return
+    segment = audit_segment_path(day)
+    with AUDIT_LOCK:
+        offsets = _audit_segment_offsets(segment)
+        added = array("Q")
+        with segment.open("ab") as handle:
+            position = handle.tell()
+            for record in records:
+                line = _audit_line(record)
+                handle.write(line)
+                added.append(position)
+                position += len(line)
+            if durable:
+                handle.flush()
+                os.fsync(handle.fileno())
+        with _audit_index_path(segment).open("ab") as handle:
+            handle.write(added.tobytes())
+        offsets.extend(added)
+        AUDIT_OFFSETS_CACHE[str(segment)] = (position, offsets)
+
+
+def _read_audit_segment(day: dt.date, first: int = 0, last: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Parse records first..last-1 (in append order) of one day segment."""
+    segment = audit_segment_path(day)
+    with AUDIT_LOCK:
+        offsets = _audit_segment_offsets(segment)
+        count = len(offsets)
+        last = count if last is None else max(0, min(count, last))
+        first = max(0, min(first, last))
+        if first == last:
+            return []
+        start = offsets[first]
+        end = offsets[last] if last < count else AUDIT_OFFSETS_CACHE[str(segment)][0]
+    output: List[Dict[str, Any]] = []
+    try:
+        with segment.open("rb") as handle:
+            handle.seek(start)
+            chunk = handle.read(end - start)
+    except OSError:
+        return output
+    for line in chunk.splitlines():
+        try:
+            item = json.loads(line.decode("utf-8", errors="replace"))
+        except Exception:
+            continue
+        if isinstance(item, dict):
+            item["id"] = _audit_record_id(item)
+            output.append(item)
+    return output
+
+
+def audit_segment_days(start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> List[dt.date]:
+    days: List[dt.date] = []
+    try:
+        names = [item.name for item in audit_logs_dir().iterdir()]
+    except OSError:
+        return days
+    for name in names:
+        match = AUDIT_SEGMENT_RE.match(name)
+        if not match:
+            continue
+        try:
+            day = dt.date.fromisoformat(match.group(1))
+        except ValueError:
+            continue
+        if (start is None or day >= start) and (end is None or day <= end):
+            days.append(day)
+    return sorted(days)
+
+
+def audit_day_count(day: dt.date) -> int:
+    return len(_audit_segment_offsets(audit_segment_path(day)))
+
+
+def _migrate_legacy_audit_logs() -> None:
+    """Move records from the old audit.jsonl/.history.jsonl pair into day segments once."""
+    legacy = [path for path in audit_legacy_paths() if path.exists()]
+    if not legacy:
+        return
+    records: Dict[str, Dict[str, Any]] = {}
+    for path in legacy:
+        for item in _read_jsonl_records(path):
+            records[_audit_record_id(item)] = item
+    grouped: Dict[dt.date, List[Dict[str, Any]]] = {}
+    for item in sorted(records.values(), key=lambda item: str(item.get("timestamp", ""))):
+        grouped.setdefault(_audit_day(item), []).append(item)
+    for day, items in grouped.items():
+        # A previous migration may have been interrupted after some days.
+        existing = {item["id"] for item in _read_audit_segment(day)}
+        _append_audit_records(day, [item for item in items if item["id"] not in existing], durable=True)
+    for path in legacy:
+        path.unlink(missing_ok=True)
+
+
+def _write_audit_daily_text(day: dt.date) -> None:
+    labels = _audit_txt_labels()
+    records = _read_audit_segment(day)
+    heading = (
+        f"{APP_NAME} — {ACTIVE_PROFILE.get('name', ACTIVE_PROFILE.get('id', labels['server']))}\n"
+        f"{labels['daily_log']}: {day.strftime('%d/%m/%Y')}\n"
+        f"{labels['records']}: {len(records)}\n\n"
+    )
+    _atomic_text_write(audit_daily_path(day), heading + "".join(format_audit_record_text(item) for item in records))
+
+
+def finalize_previous_audit_days() -> None:
+    """Migrate legacy logs and render the readable TXT file of every finished day.
+
+    Runs its directory scan at most once per log directory per day; finished
+    days are only re-rendered when their segment is newer than the TXT file.
+    """
+    today = dt.datetime.now().astimezone().date()
+    with AUDIT_LOCK:
+        directory = audit_logs_dir()
+        key = str(directory)
+        if AUDIT_FINALIZED_DAY.get(key) == today:
             return
-        current = [item for item in live_records if _audit_day(item) >= today]
-        history = _read_jsonl_records(audit_history_path())
-        merged: Dict[str, Dict[str, Any]] = {_audit_record_id(item): item for item in history}
-        for item in previous:
-            merged[_audit_record_id(item)] = item
-        history_records = sorted(merged.values(), key=lambda item: str(item.get("timestamp", "")))
-        _write_jsonl_records(audit_history_path(), history_records)
-        affected_days = sorted({_audit_day(item) for item in previous})
-        for day in affected_days:
-            day_records = [item for item in history_records if _audit_day(item) == day]
-            labels = _audit_txt_labels()
-            heading = (
-                f"{APP_NAME} — {ACTIVE_PROFILE.get('name', ACTIVE_PROFILE.get('id', labels['server']))}\n"
-                f"{labels['daily_log']}: {day.strftime('%d/%m/%Y')}\n"
-                f"{labels['records']}: {len(day_records)}\n\n"
-            )
-            body = heading + "".join(format_audit_record_text(item) for item in day_records)
-            _atomic_text_write(audit_daily_path(day), body)
-        _write_jsonl_records(live_path, current)
+        _migrate_legacy_audit_logs()
+        for day in audit_segment_days(end=today - dt.timedelta(days=1)):
+            try:
+                segment_mtime = audit_segment_path(day).stat().st_mtime
+            except OSError:
+                continue
+            try:
+                text_mtime = audit_daily_path(day).stat().st_mtime
+            except OSError:
+                text_mtime = 0.0
+            if segment_mtime > text_mtime:
+                _write_audit_daily_text(day)
+        AUDIT_FINALIZED_DAY[key] = today
 
 
 def upload_work_dir() -> Path:
@@ -1361,6 +1567,99 @@ def disk_allows_upload(target: Path, expected_total: int, already_written: int =
         return False
 
 
+# Upload sessions live in memory while chunks arrive; the JSON state next to
+# the part file is only rewritten every few seconds so a server restart can
+# resume from the received-chunks bitmap.
+UPLOAD_SESSIONS: Dict[str, Dict[str, Any]] = {}
+UPLOAD_SESSIONS_LOCK = threading.Lock()
+
+
+def _upload_bitmap_has(bitmap: bytearray, index: int) -> bool:
+    return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+
+def _persist_upload_session(upload_id: str, upload: Dict[str, Any], force: bool = False) -> None:
+    now = time.monotonic()
+    if not force and now - upload["persisted_at"] < UPLOAD_STATE_PERSIST_SECONDS:
+        return
+    upload["persisted_at"] = now
+    state = {key: upload[key] for key in ("destination", "file_name", "total_size", "total_chunks", "owner", "created_at", "preallocated")}
+    state["received"] = base64.b64encode(bytes(upload["received"])).decode("ascii")
+    _atomic_json_write(upload_work_dir() / f"{upload_id}.json", state)
+
+
+def _load_upload_state(upload_id: str) -> Optional[Dict[str, Any]]:
+    work = upload_work_dir()
+    state_path = work / f"{upload_id}.json"
+    part_path = work / f"{upload_id}.part"
+    if not state_path.exists() or not part_path.exists():
+        return None
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    total_chunks = int(state["total_chunks"])
+    received = bytearray((total_chunks + 7) // 8)
+    if "received" in state:
+        stored = base64.b64decode(str(state["received"]))
+        received[:len(stored)] = stored[:len(received)]
+    else:
+        # Older sequential uploads recorded only the next expected chunk.
+        for index in range(min(total_chunks, int(state.get("next_index", 0)))):
+            received[index >> 3] |= 1 << (index & 7)
+    state["received"] = received
+    state["received_count"] = sum(1 for index in range(total_chunks) if _upload_bitmap_has(received, index))
+    state.setdefault("preallocated", False)
+    return state
+
+
+def _open_upload_session(upload_id: str, directory: Path, file_name: str, total_size: int, total_chunks: int) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, int]]]:
+    """Return (session, None) or (None, (message, status)) for an upload id."""
+    with UPLOAD_SESSIONS_LOCK:
+        upload = UPLOAD_SESSIONS.get(upload_id)
+        if upload is not None and not (upload_work_dir() / f"{upload_id}.part").exists():
+            # Removed by cleanup_stale_uploads after sitting idle.
+            UPLOAD_SESSIONS.pop(upload_id, None)
+            upload = None
+        if upload is None:
+            upload = _load_upload_state(upload_id)
+            if upload is None:
+                destination = unique_destination(directory, file_name)
+                if not disk_allows_upload(directory, total_size, 0):
+                    audit_event("upload_rejected", f"{file_name}: storage threshold", success=False)
+                    return None, (tr("storage_too_full"), 507)
+                part_path = upload_work_dir() / f"{upload_id}.part"
+                preallocated = False
+                with part_path.open("wb") as output:
+                    if hasattr(os, "posix_fallocate") and total_size:
+                        with contextlib.suppress(OSError):
+                            os.posix_fallocate(output.fileno(), 0, total_size)
+                            preallocated = True
+                    output.truncate(total_size)
+                upload = {
+                    "destination": relative_path(destination),
+                    "file_name": file_name,
+                    "total_size": total_size,
+                    "total_chunks": total_chunks,
+                    "owner": current_admin(),
+                    "created_at": _utc_now(),
+                    "preallocated": preallocated,
+                    "received": bytearray((total_chunks + 7) // 8),
+                    "received_count": 0,
+                }
+            upload.update(lock=threading.Lock(), in_flight=set(), persisted_at=0.0, finished=False)
+            UPLOAD_SESSIONS[upload_id] = upload
+            _persist_upload_session(upload_id, upload, force=True)
+    if upload["owner"] != current_admin() or upload["total_size"] != total_size or upload["total_chunks"] != total_chunks:
+        return None, (tr("upload_failed"), 409)
+    return upload, None
+
+
+def _drop_upload_session(upload_id: str) -> None:
+    with UPLOAD_SESSIONS_LOCK:
+        UPLOAD_SESSIONS.pop(upload_id, None)
+    work = upload_work_dir()
+    (work / f"{upload_id}.part").unlink(missing_ok=True)
+    (work / f"{upload_id}.json").unlink(missing_ok=True)
+
+
 def session_registry_path() -> Path:
     return server_internal_dir() / "sessions.json"
 
@@ -1422,7 +1721,7 @@ def _request_files_summary() -> List[Dict[str, Any]]:
 
 def audit_event(event: str, detail: Any = "", *, success: bool = True, actor: str = "", extra: Optional[Dict[str, Any]] = None) -> None:
     try:
-        consolidate_previous_audit_logs()
+        finalize_previous_audit_days()
         in_request = has_request_context()
         current_role = role() if in_request else "system"
         current_actor = current_admin() if in_request and current_role == "admin" else current_role
@@ -1455,57 +1754,94 @@ def audit_event(event: str, detail: Any = "", *, success: bool = True, actor: st
         if extra:
             for key, value in extra.items():
                 record[str(key)[:80]] = value
-        with AUDIT_LOCK:
-            path = audit_log_path()
-            with path.open("a", encoding="utf-8") as handle:
-                handle.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        _append_audit_records(_audit_day(record), [record])
     except Exception:
         pass
 
 
+def iter_audit_events(start: dt.date, end: dt.date, newest_first: bool = False) -> Iterable[Dict[str, Any]]:
+    """Yield events day by day; only the segments inside the range are opened."""
+    finalize_previous_audit_days()
+    days = audit_segment_days(start, end)
+    for day in (reversed(days) if newest_first else days):
+        records = _read_audit_segment(day)
+        yield from (reversed(records) if newest_first else records)
+
+
 def read_audit_events(limit: int = 0) -> List[Dict[str, Any]]:
-    consolidate_previous_audit_logs()
-    records = _read_jsonl_records(audit_history_path()) + _read_jsonl_records(audit_log_path())
-    unique: Dict[str, Dict[str, Any]] = {}
-    for item in records:
-        unique[_audit_record_id(item)] = item
-    events = sorted(unique.values(), key=lambda item: str(item.get("timestamp", "")), reverse=True)
-    return events if limit <= 0 else events[:max(1, limit)]
+    events: List[Dict[str, Any]] = []
+    for item in iter_audit_events(DATE_RANGE_MIN, dt.date.max, newest_first=True):
+        events.append(item)
+        if 0 < limit <= len(events):
+            break
+    return events
 
 
 def audit_events_in_range(start: dt.date, end: dt.date) -> List[Dict[str, Any]]:
-    return [item for item in read_audit_events() if start <= _audit_day(item) <= end]
+    return list(iter_audit_events(start, end, newest_first=True))
+
+
+def audit_events_page(start: dt.date, end: dt.date, page: int, page_size: int = AUDIT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], int]:
+    """Return one newest-first page of events in the range and the total count.
+
+    Day counts come from the segment indexes, so days before the requested
+    page are skipped without being read.
+    """
+    finalize_previous_audit_days()
+    days = audit_segment_days(start, end)
+    counts = {day: audit_day_count(day) for day in days}
+    total = sum(counts.values())
+    skip = max(0, page) * page_size
+    needed = page_size
+    events: List[Dict[str, Any]] = []
+    for day in reversed(days):
+        if needed <= 0:
+            break
+        count = counts[day]
+        if skip >= count:
+            skip -= count
+            continue
+        last = count - skip
+        first = max(0, last - needed)
+        chunk = _read_audit_segment(day, first, last)
+        events.extend(reversed(chunk))
+        needed -= last - first
+        skip = 0
+    return events, total
 
 
 def create_logs_export(start: dt.date, end: dt.date) -> Optional[Path]:
-    events = audit_events_in_range(start, end)
-    if not events:
+    finalize_previous_audit_days()
+    days = [day for day in audit_segment_days(start, end) if audit_day_count(day)]
+    if not days:
         return None
     export_dir = server_internal_dir() / "log-exports"
     export_dir.mkdir(parents=True, exist_ok=True)
     cleanup_stale_uploads()
     filename = f"DedSec-Server-Logs_{start.strftime('%d-%m-%Y')}_to_{end.strftime('%d-%m-%Y')}.zip"
     destination = export_dir / filename
-    grouped: Dict[dt.date, List[Dict[str, Any]]] = {}
-    for item in events:
-        grouped.setdefault(_audit_day(item), []).append(item)
+    labels = _audit_txt_labels()
+    total = 0
     with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
-        for day in sorted(grouped):
-            records = sorted(grouped[day], key=lambda item: str(item.get("timestamp", "")))
-            labels = _audit_txt_labels()
+        for day in days:
+            # One day in memory at a time; the archive member is streamed.
+            records = _read_audit_segment(day)
+            total += len(records)
             header = (
                 f"{APP_NAME} — {ACTIVE_PROFILE.get('name', ACTIVE_PROFILE.get('id', labels['server']))}\n"
                 f"{labels['daily_log']}: {day.strftime('%d/%m/%Y')}\n"
                 f"{labels['records']}: {len(records)}\n\n"
             )
-            archive.writestr(day.strftime("%d-%m-%Y.txt"), header + "".join(format_audit_record_text(item) for item in records))
-        labels = _audit_txt_labels()
+            with archive.open(day.strftime("%d-%m-%Y.txt"), "w", force_zip64=True) as member:
+                member.write(header.encode("utf-8"))
+                for item in records:
+                    member.write(format_audit_record_text(item).encode("utf-8"))
         summary = (
             f"{APP_NAME} — {labels['log_export']}\n"
             f"{labels['server']}: {ACTIVE_PROFILE.get('name', ACTIVE_PROFILE.get('id', labels['server']))}\n"
             f"{labels['requested_range']}: {start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}\n"
-            f"{labels['daily_files']}: {len(grouped)}\n"
-            f"{labels['total_records']}: {len(events)}\n"
+            f"{labels['daily_files']}: {len(days)}\n"
+            f"{labels['total_records']}: {total}\n"
             f"{labels['not_deleted']}\n"
         )
         archive.writestr("README.txt", summary)
@@ -1631,9 +1967,13 @@ VALID_CATEGORIES = {"all", "folders", *CATEGORY_EXTENSIONS.keys(), "other"}
 
 
 def entry_category(path: Path) -> str:
-    if path.is_dir():
+    return category_for_name(path.name, path.is_dir())
+
+
+def category_for_name(name: str, is_dir: bool) -> str:
+    if is_dir:
         return "folders"
-    suffix = path.suffix.lower()
+    suffix = Path(name).suffix.lower()
     for category, extensions in CATEGORY_EXTENSIONS.items():
         if suffix in extensions:
             return category
@@ -1781,6 +2121,146 @@ def format_iso_datetime(value: Any) -> str:
         return raw
 
 
+# Name/metadata index of the whole share, used by searches instead of walking
+# the tree on every query. Routes that change the tree keep it current and a
+# background rescan picks up changes made outside the server.
+SEARCH_INDEX_RESCAN_SECONDS = 300
+SEARCH_INDEX_LOCK = threading.RLock()
+SEARCH_INDEX: Dict[str, Any] = {"root": None, "entries": {}, "rescanning": False, "replay": [], "thread": None}
+
+
+def _search_index_item(path: Path, root: Path) -> Optional[Tuple[Dict[str, Any], bool]]:
+    """Return (entry, descend) for one path, or None if it is outside the share."""
+    resolved = path.resolve(strict=True) if path.is_symlink() else path
+    relative_parts = resolved.relative_to(root).parts
+    if relative_parts and relative_parts[0] == INTERNAL_DIR_NAME:
+        return None
+    stat = resolved.stat()
+    is_dir = resolved.is_dir()
+    item_size = 0 if is_dir else stat.st_size
+    entry = {
+        "name": path.name,
+        "rel": Path(*relative_parts).as_posix() if relative_parts else "",
+        "is_dir": is_dir,
+        "category": category_for_name(path.name, is_dir),
+        "size": item_size,
+        "size_text": "—" if is_dir else human_size(item_size),
+        "modified": stat.st_mtime,
+        "modified_text": format_time(stat.st_mtime),
+        "fold": path.name.casefold(),
+    }
+    # Symlinked folders are listed but not descended into, like rglob.
+    return entry, is_dir and resolved is path
+
+
+def _scan_search_tree(start: Path, root: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    pending = [start]
+    while pending:
+        directory = pending.pop()
+        try:
+            iterator = os.scandir(directory)
+        except OSError:
+            continue
+        with iterator:
+            for item in iterator:
+                path = Path(item.path)
+                try:
+                    result = _search_index_item(path, root)
+                except (OSError, ValueError):
+                    continue
+                if result is None:
+                    continue
+                entry, descend = result
+                entries[path.relative_to(root).as_posix()] = entry
+                if descend:
+                    pending.append(path)
+
+
+def _drop_search_tree(entries: Dict[str, Dict[str, Any]], relative: str) -> None:
+    prefix = relative + "/"
+    for key in [key for key in entries if key == relative or key.startswith(prefix)]:
+        del entries[key]
+
+
+def _put_search_tree(entries: Dict[str, Dict[str, Any]], relative: str, root: Path) -> None:
+    _drop_search_tree(entries, relative)
+    path = root / relative
+    try:
+        result = _search_index_item(path, root)
+    except (OSError, ValueError):
+        return
+    if result is None:
+        return
+    entry, descend = result
+    entries[relative] = entry
+    if descend:
+        _scan_search_tree(path, root, entries)
+
+
+def _apply_search_change(change: Any) -> None:
+    with SEARCH_INDEX_LOCK:
+        if SEARCH_INDEX["root"] != ACTIVE_ROOT:
+            return
+        change(SEARCH_INDEX["entries"])
+        if SEARCH_INDEX["rescanning"]:
+            # Replayed on top of the rescan result so it is not lost.
+            SEARCH_INDEX["replay"].append(change)
+
+
+def search_index_refresh(path: Path) -> None:
+    """Re-index a path (and its subtree) after it was created, moved or renamed."""
+    root = ACTIVE_ROOT
+    try:
+        relative = path.relative_to(root).as_posix()
+    except ValueError:
+        return
+    _apply_search_change(lambda entries: _put_search_tree(entries, relative, root))
+
+
+def search_index_forget(relative: str) -> None:
+    key = relative.strip("/")
+    if key:
+        _apply_search_change(lambda entries: _drop_search_tree(entries, key))
+
+
+def _rescan_search_index() -> None:
+    root = ACTIVE_ROOT
+    with SEARCH_INDEX_LOCK:
+        SEARCH_INDEX["rescanning"] = True
+        SEARCH_INDEX["replay"] = []
+    entries: Dict[str, Dict[str, Any]] = {}
+    try:
+        _scan_search_tree(root, root, entries)
+    finally:
+        with SEARCH_INDEX_LOCK:
+            if SEARCH_INDEX["root"] == root:
+                for change in SEARCH_INDEX["replay"]:
+                    change(entries)
+                SEARCH_INDEX["entries"] = entries
+            SEARCH_INDEX["rescanning"] = False
+            SEARCH_INDEX["replay"] = []
+
+
+def _search_index_worker() -> None:
+    while True:
+        time.sleep(SEARCH_INDEX_RESCAN_SECONDS)
+        with contextlib.suppress(Exception):
+            _rescan_search_index()
+
+
+def search_index_entries() -> List[Dict[str, Any]]:
+    """Return the indexed entries of the active share, building the index on first use."""
+    with SEARCH_INDEX_LOCK:
+        if SEARCH_INDEX["root"] != ACTIVE_ROOT:
+            SEARCH_INDEX["root"] = ACTIVE_ROOT
+            SEARCH_INDEX["entries"] = {}
+            _rescan_search_index()
+        if SEARCH_INDEX["thread"] is None:
+            SEARCH_INDEX["thread"] = threading.Thread(target=_search_index_worker, name="dedsec-search-index", daemon=True)
+            SEARCH_INDEX["thread"].start()
+        return list(SEARCH_INDEX["entries"].values())
+
+
 def iter_entries(
     current: Path,
     query: str,
@@ -1792,12 +2272,6 @@ def iter_entries(
     limit: int = 2000,
 ) -> List[Dict[str, Any]]:
     query_fold = query.casefold().strip()
-    candidates: Iterable[Path]
-    if query_fold:
-        candidates = ACTIVE_ROOT.rglob("*")
-    else:
-        candidates = current.iterdir()
-
     minimum_mb, maximum_mb = parse_size_range(size_filter)
     minimum_bytes = minimum_mb * 1024 * 1024
     maximum_bytes = maximum_mb * 1024 * 1024
@@ -1806,7 +2280,31 @@ def iter_entries(
     start_timestamp = dt.datetime.combine(start_date, dt.time.min).timestamp()
     end_timestamp = dt.datetime.combine(end_date + dt.timedelta(days=1), dt.time.min).timestamp()
 
+    def keep(is_dir: bool, item_size: int, modified: float) -> bool:
+        if is_dir:
+            if size_range_active:
+                return False
+        else:
+            if item_size < minimum_bytes:
+                return False
+            if maximum_mb < SIZE_RANGE_MAX_MB and item_size > maximum_bytes:
+                return False
+        return start_timestamp <= modified < end_timestamp
+
     entries: List[Dict[str, Any]] = []
+    if query_fold:
+        # Searches run against the index: no filesystem access per query.
+        for item in search_index_entries():
+            if query_fold not in item["fold"]:
+                continue
+            if category != "all" and item["category"] != category:
+                continue
+            if not keep(item["is_dir"], item["size"], item["modified"]):
+                continue
+            entries.append({key: value for key, value in item.items() if key != "fold"})
+        candidates: Iterable[Path] = ()
+    else:
+        candidates = current.iterdir()
     for path in candidates:
         if len(entries) >= limit:
             break
@@ -1823,17 +2321,7 @@ def iter_entries(
             stat = resolved.stat()
             is_dir = resolved.is_dir()
             item_size = 0 if is_dir else stat.st_size
-
-            if is_dir:
-                if size_range_active:
-                    continue
-            else:
-                if item_size < minimum_bytes:
-                    continue
-                if maximum_mb < SIZE_RANGE_MAX_MB and item_size > maximum_bytes:
-                    continue
-
-            if stat.st_mtime < start_timestamp or stat.st_mtime >= end_timestamp:
+            if not keep(is_dir, item_size, stat.st_mtime):
                 continue
 
             entries.append(
@@ -1860,7 +2348,7 @@ def iter_entries(
     key_function = sort_keys.get(sort_by, sort_keys["name"])
     entries.sort(key=key_function, reverse=(order == "desc"))
     entries.sort(key=lambda item: not item["is_dir"])
-    return entries
+    return entries[:limit]
 
 
 def safe_next_url(value: str) -> str:
@@ -2399,7 +2887,20 @@ def logs():
         date_from, date_to = parse_date_range(raw_range)
     else:
         date_from, date_to = DATE_RANGE_MIN, today
-    events = audit_events_in_range(date_from, date_to)
+    try:
+        page = max(0, int(request.args.get("page", "0")))
+    except ValueError:
+        page = 0
+    events, total = audit_events_page(date_from, date_to, page)
+    page_count = max(1, (total + AUDIT_PAGE_SIZE - 1) // AUDIT_PAGE_SIZE)
+    if page >= page_count:
+        page = page_count - 1
+        events, total = audit_events_page(date_from, date_to, page)
+    pager = ""
+    if page_count > 1:
+        newer = f'<a class="btn" href="{h(url_for("logs", date_from=date_from.isoformat(), date_to=date_to.isoformat(), page=page - 1))}">{h(tr("newer_logs"))}</a>' if page > 0 else ""
+        older = f'<a class="btn" href="{h(url_for("logs", date_from=date_from.isoformat(), date_to=date_to.isoformat(), page=page + 1))}">{h(tr("older_logs"))}</a>' if page + 1 < page_count else ""
+        pager = f'<div class="actions">{newer}<span class="muted">{h(tr("log_page"))} {page + 1} / {page_count} · {total}</span>{older}</div>'
     cards = []
     for item in events:
         ok = bool(item.get("success", False))
@@ -2436,6 +2937,7 @@ def logs():
           <div class="actions"><button class="btn" type="submit">{h(tr('apply_filters'))}</button><button class="btn primary" type="submit" formmethod="post" formaction="{h(url_for('download_logs'))}">{h(tr('download_logs_zip'))}</button></div>
         </form>
         <div class="record-grid logs-grid">{cards_html}</div>
+        {pager}
       </section>
     ''')
     return render_page(tr("logs"), content)
@@ -2763,6 +3265,7 @@ def new_folder():
                 flash(tr("already_exists"), "error")
             else:
                 destination.mkdir(parents=False)
+                search_index_refresh(destination)
                 audit_event("folder_created", relative_path(destination))
                 flash(tr("folder_done"), "")
                 return redirect(url_for("browse", path=current_rel))
@@ -2809,23 +3312,45 @@ def upload_page():
     script = f"""
       (function(){{
         const picker=document.getElementById('filePicker'),button=document.getElementById('uploadButton'),bar=document.getElementById('uploadBar'),status=document.getElementById('uploadStatus'),list=document.getElementById('uploadList');
-        const endpoint={json.dumps(url_for('upload_file'))},csrf={json.dumps(csrf_token())},path={json.dumps(current_rel)},returnUrl={json.dumps(url_for('browse', path=current_rel))};
+        const endpoint={json.dumps(url_for('upload_file'))},statusEndpoint={json.dumps(url_for('upload_status'))},csrf={json.dumps(csrf_token())},path={json.dumps(current_rel)},returnUrl={json.dumps(url_for('browse', path=current_rel))};
         const maxBytes={MAX_UPLOAD_BYTES},chunkBytes={UPLOAD_CHUNK_BYTES},tooLarge={json.dumps(tr('too_large'))},uploadFailed={json.dumps(tr('upload_failed'))};
-        function uploadId(){{
-          if(window.crypto&&typeof window.crypto.randomUUID==='function')return window.crypto.randomUUID().replace(/-/g,'');
-          return Date.now().toString(36)+Math.random().toString(36).slice(2)+Math.random().toString(36).slice(2);
+        function uploadId(file){{
+          // Stable per file and folder, so a retried upload resumes the same server session.
+          const text=path+'\n'+file.name+'\n'+file.size+'\n'+file.lastModified;let a=0x811c9dc5,b=0x01000193;
+          for(let i=0;i<text.length;i++){{const c=text.charCodeAt(i);a=Math.imul(a^c,0x01000193)>>>0;b=Math.imul(b^c,0x5bd1e995)>>>0;}}
+          return 'u'+a.toString(16).padStart(8,'0')+b.toString(16).padStart(8,'0')+file.size.toString(36);
+        }}
+        function post(url,data,onprogress){{
+          return new Promise((resolve,reject)=>{{
+            const xhr=new XMLHttpRequest();xhr.open('POST',url);if(onprogress)xhr.upload.onprogress=onprogress;
+            xhr.onload=()=>{{if(xhr.status>=200&&xhr.status<300){{try{{resolve(JSON.parse(xhr.responseText));}}catch(e){{resolve({{}});}}}}else reject(xhr.responseText||uploadFailed);}};
+            xhr.onerror=()=>reject(uploadFailed);xhr.send(data);
+          }});
+        }}
+        function fields(file,id,totalChunks){{
+          const data=new FormData();data.append('csrf',csrf);data.append('path',path);data.append('upload_id',id);data.append('file_name',file.name);data.append('total_chunks',String(totalChunks));data.append('total_size',String(file.size));return data;
         }}
         async function sendFile(file,fileIndex,fileCount,row){{
           if(file.size>maxBytes)throw new Error(file.name+': '+tooLarge);
-          const id=uploadId(),totalChunks=Math.max(1,Math.ceil(file.size/chunkBytes));
-          for(let index=0;index<totalChunks;index++){{
-            await new Promise((resolve,reject)=>{{
-              const start=index*chunkBytes,end=Math.min(file.size,start+chunkBytes),blob=file.slice(start,end),xhr=new XMLHttpRequest(),data=new FormData();
-              data.append('csrf',csrf);data.append('path',path);data.append('upload_id',id);data.append('file_name',file.name);data.append('chunk_index',String(index));data.append('total_chunks',String(totalChunks));data.append('total_size',String(file.size));data.append('file',blob,file.name+'.part');
-              xhr.open('POST',endpoint);
-              xhr.upload.onprogress=e=>{{if(e.lengthComputable){{const fileProgress=(index+(e.loaded/e.total))/totalChunks;const overall=((fileIndex+fileProgress)/fileCount)*100;bar.style.width=overall.toFixed(1)+'%';row.children[1].textContent=Math.floor(fileProgress*100)+'%';}}}};
-              xhr.onload=()=>{{if(xhr.status>=200&&xhr.status<300)resolve();else reject(xhr.responseText||uploadFailed);}};xhr.onerror=()=>reject(uploadFailed);xhr.send(data);
-            }});
+          const id=uploadId(file),totalChunks=Math.max(1,Math.ceil(file.size/chunkBytes));
+          for(let attempt=0;;attempt++){{
+            // The status call returns the missing chunks, so a reconnect only resends those.
+            const status=await post(statusEndpoint,fields(file,id,totalChunks));
+            const queue=status.missing||[],loaded={{}};let done=totalChunks-queue.length,failure=null;
+            const report=()=>{{let partial=0;for(const key in loaded)partial+=loaded[key];const fileProgress=Math.min(1,(done+partial)/totalChunks);bar.style.width=(((fileIndex+fileProgress)/fileCount)*100).toFixed(1)+'%';row.children[1].textContent=Math.floor(fileProgress*100)+'%';}};
+            const worker=async()=>{{
+              while(queue.length&&!failure){{
+                const index=queue.shift(),start=index*chunkBytes,data=fields(file,id,totalChunks);
+                data.append('chunk_index',String(index));data.append('file',file.slice(start,Math.min(file.size,start+chunkBytes)),file.name+'.part');
+                try{{await post(endpoint,data,e=>{{if(e.lengthComputable){{loaded[index]=e.loaded/e.total;report();}}}});delete loaded[index];done++;report();}}
+                catch(error){{failure=error;}}
+              }}
+            }};
+            report();
+            await Promise.all(Array.from({{length:Math.max(1,Math.min(status.parallel||1,queue.length))}},worker));
+            if(!failure)return;
+            if(attempt>=4)throw failure;
+            await new Promise(resolve=>setTimeout(resolve,1000*(attempt+1)));
           }}
         }}
         button.addEventListener('click',async()=>{{const files=[...picker.files];if(!files.length)return;if(!confirm({json.dumps(tr('confirm_upload'))}))return;button.disabled=true;list.innerHTML='';
@@ -2837,95 +3362,122 @@ def upload_page():
     return render_page(tr("upload"), content, extra_script=script)
 
 
-@app.post("/api/upload")
-def upload_file():
-    require_role(admin=True)
-    if not verify_csrf():
-        abort(400)
-    cleanup_stale_uploads()
-    uploaded = request.files.get("file")
-    if uploaded is None:
-        abort(400)
+def _upload_request_fields() -> Tuple[str, Path, str, int, int]:
     upload_id = str(request.form.get("upload_id", "")).strip()
     if not re.fullmatch(r"[A-Za-z0-9_-]{12,96}", upload_id):
         abort(400)
     try:
-        chunk_index = int(request.form.get("chunk_index", "-1"))
         total_chunks = int(request.form.get("total_chunks", "0"))
         total_size = int(request.form.get("total_size", "-1"))
     except (TypeError, ValueError):
         abort(400)
     if total_size < 0 or total_size > MAX_UPLOAD_BYTES:
         audit_event("upload_rejected", request.form.get("file_name", ""), success=False)
-        return tr("too_large"), 413
+        abort(make_response(tr("too_large"), 413))
     expected_chunks = max(1, (total_size + UPLOAD_CHUNK_BYTES - 1) // UPLOAD_CHUNK_BYTES)
-    if total_chunks != expected_chunks or chunk_index < 0 or chunk_index >= total_chunks:
+    if total_chunks != expected_chunks:
         abort(400)
-
-    work = upload_work_dir()
-    state_path = work / f"{upload_id}.json"
-    part_path = work / f"{upload_id}.part"
     try:
         directory = safe_path(request.form.get("path", ""))
         if not directory.is_dir():
             raise ValueError
         file_name = validate_entry_name(Path(request.form.get("file_name", "")).name)
-        if state_path.exists():
-            state = json.loads(state_path.read_text(encoding="utf-8"))
-        else:
-            if chunk_index != 0:
+    except (ValueError, OSError):
+        abort(400)
+    return upload_id, directory, file_name, total_size, total_chunks
+
+
+@app.post("/api/upload/status")
+def upload_status():
+    """Open or resume an upload session and report which chunks are still missing."""
+    require_role(admin=True)
+    if not verify_csrf():
+        abort(400)
+    cleanup_stale_uploads()
+    upload_id, directory, file_name, total_size, total_chunks = _upload_request_fields()
+    try:
+        upload, error = _open_upload_session(upload_id, directory, file_name, total_size, total_chunks)
+    except (ValueError, OSError, json.JSONDecodeError, KeyError):
+        return tr("action_failed"), 400
+    if upload is None:
+        return error
+    with upload["lock"]:
+        missing = [index for index in range(total_chunks) if not _upload_bitmap_has(upload["received"], index)]
+    return jsonify(ok=True, missing=missing, parallel=UPLOAD_PARALLEL_CHUNKS)
+
+
+@app.post("/api/upload")
+def upload_file():
+    require_role(admin=True)
+    if not verify_csrf():
+        abort(400)
+    uploaded = request.files.get("file")
+    if uploaded is None:
+        abort(400)
+    upload_id, directory, file_name, total_size, total_chunks = _upload_request_fields()
+    try:
+        chunk_index = int(request.form.get("chunk_index", "-1"))
+    except (TypeError, ValueError):
+        abort(400)
+    if chunk_index < 0 or chunk_index >= total_chunks:
+        abort(400)
+
+    work = upload_work_dir()
+    part_path = work / f"{upload_id}.part"
+    try:
+        upload, error = _open_upload_session(upload_id, directory, file_name, total_size, total_chunks)
+        if upload is None:
+            return error
+        with upload["lock"]:
+            if upload["finished"]:
+                return jsonify(ok=True, complete=True, name=Path(upload["destination"]).name)
+            if _upload_bitmap_has(upload["received"], chunk_index):
+                return jsonify(ok=True, complete=False, duplicate=True)
+            if chunk_index in upload["in_flight"]:
                 return tr("upload_failed"), 409
-            destination = unique_destination(directory, file_name)
-            if not disk_allows_upload(directory, total_size, 0):
+            upload["in_flight"].add(chunk_index)
+            already_written = upload["received_count"] * UPLOAD_CHUNK_BYTES
+        try:
+            # A preallocated part file already holds its space; sparse ones
+            # are re-checked so the disk cannot fill up mid-upload.
+            if not upload["preallocated"] and not disk_allows_upload(directory, total_size, already_written):
+                _drop_upload_session(upload_id)
                 audit_event("upload_rejected", f"{file_name}: storage threshold", success=False)
                 return tr("storage_too_full"), 507
-            state = {
-                "destination": relative_path(destination),
-                "file_name": file_name,
-                "total_size": total_size,
-                "total_chunks": total_chunks,
-                "next_index": 0,
-                "owner": current_admin(),
-                "created_at": _utc_now(),
-            }
-            _atomic_json_write(state_path, state)
-
-        if state.get("owner") != current_admin() or int(state.get("total_size", -1)) != total_size or int(state.get("total_chunks", 0)) != total_chunks or int(state.get("next_index", -1)) != chunk_index:
-            return tr("upload_failed"), 409
-        already_written = part_path.stat().st_size if part_path.exists() else 0
-        if not disk_allows_upload(directory, total_size, already_written):
-            part_path.unlink(missing_ok=True)
-            state_path.unlink(missing_ok=True)
-            audit_event("upload_rejected", f"{file_name}: storage threshold", success=False)
-            return tr("storage_too_full"), 507
-
-        with part_path.open("ab") as output:
-            while True:
-                data = uploaded.stream.read(1024 * 1024)
-                if not data:
-                    break
-                output.write(data)
-        written = part_path.stat().st_size
-        if written > total_size or written > MAX_UPLOAD_BYTES:
-            part_path.unlink(missing_ok=True)
-            state_path.unlink(missing_ok=True)
-            audit_event("upload_rejected", file_name, success=False)
-            return tr("too_large"), 413
-
-        state["next_index"] = chunk_index + 1
-        _atomic_json_write(state_path, state)
-        complete = state["next_index"] == total_chunks
-        if complete:
-            if written != total_size:
-                part_path.unlink(missing_ok=True)
-                state_path.unlink(missing_ok=True)
+            offset = chunk_index * UPLOAD_CHUNK_BYTES
+            expected = min(UPLOAD_CHUNK_BYTES, total_size - offset)
+            written = 0
+            with part_path.open("r+b") as output:
+                output.seek(offset)
+                while written <= expected:
+                    data = uploaded.stream.read(UPLOAD_COPY_BYTES)
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected:
+                        break
+                    output.write(data)
+            if written != expected:
                 return tr("upload_failed"), 400
-            destination = safe_path(str(state["destination"]), must_exist=False)
+        finally:
+            with upload["lock"]:
+                upload["in_flight"].discard(chunk_index)
+
+        with upload["lock"]:
+            if not _upload_bitmap_has(upload["received"], chunk_index):
+                upload["received"][chunk_index >> 3] |= 1 << (chunk_index & 7)
+                upload["received_count"] += 1
+            complete = upload["received_count"] == total_chunks and not upload["finished"]
+            if not complete:
+                _persist_upload_session(upload_id, upload)
+                return jsonify(ok=True, complete=False, received=upload["received_count"])
+            upload["finished"] = True
+            destination = safe_path(str(upload["destination"]), must_exist=False)
             os.replace(part_path, destination)
-            state_path.unlink(missing_ok=True)
-            audit_event("file_uploaded", f"{relative_path(destination)} ({written} bytes)")
-            return jsonify(ok=True, complete=True, name=destination.name)
-        return jsonify(ok=True, complete=False, next_index=state["next_index"])
+        _drop_upload_session(upload_id)
+        search_index_refresh(destination)
+        audit_event("file_uploaded", f"{relative_path(destination)} ({total_size} bytes)")
+        return jsonify(ok=True, complete=True, name=destination.name)
     except (ValueError, OSError, json.JSONDecodeError, KeyError):
         return tr("action_failed"), 400
 
@@ -2960,24 +3512,21 @@ def move_entry():
                 shutil.move(str(source), str(destination))
                 new_rel = relative_path(destination)
                 move_comment_tree(old_rel, new_rel)
+                search_index_forget(old_rel)
+                search_index_refresh(destination)
                 audit_event("entry_moved", f"{old_rel} -> {new_rel}")
                 flash(tr("move_done"), "")
                 return redirect(url_for("browse", path=destination_rel))
         except (ValueError, OSError):
             flash(tr("action_failed"), "error")
     folder_paths = [""]
-    for candidate in ACTIVE_ROOT.rglob("*"):
-        try:
-            if not candidate.is_dir():
-                continue
-            candidate_parts = candidate.relative_to(ACTIVE_ROOT).parts
-            if candidate_parts and candidate_parts[0] == INTERNAL_DIR_NAME:
-                continue
-            if source.is_dir() and _path_is_within(candidate, source):
-                continue
-            folder_paths.append(relative_path(candidate))
-        except (OSError, ValueError):
+    source_rel = relative_path(source)
+    for item in search_index_entries():
+        if not item["is_dir"]:
+            continue
+        if source.is_dir() and (item["rel"] == source_rel or item["rel"].startswith(source_rel + "/")):
             continue
+        folder_paths.append(item["rel"])
     folder_paths = sorted(set(folder_paths), key=lambda value: (value.count("/"), value.casefold()))
     folder_options = "".join(
         f'<option value="{h(value)}"{" selected" if value == parent_rel else ""}>{h("/" + value if value else tr("root"))}</option>'
@@ -3022,6 +3571,8 @@ def rename_entry():
                 source.rename(destination)
                 new_rel = relative_path(destination)
                 move_comment_tree(old_rel, new_rel)
+                search_index_forget(old_rel)
+                search_index_refresh(destination)
                 audit_event("entry_renamed", f"{old_rel} -> {new_rel}")
                 flash(tr("rename_done"), "")
                 return redirect(url_for("browse", path=parent_rel))
@@ -3058,6 +3609,7 @@ def delete_entry():
         else:
             target.unlink()
         delete_comment_tree(target_rel)
+        search_index_forget(target_rel)
         audit_event("entry_deleted", target_rel)
         flash(tr("delete_done"), "")
     except (ValueError, OSError):
@@ -3083,6 +3635,7 @@ def bulk_delete():
             else:
                 target.unlink()
             delete_comment_tree(target_rel)
+            search_index_forget(target_rel)
             deleted += 1
         except (ValueError, OSError):
             continue
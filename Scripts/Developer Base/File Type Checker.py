@@ -10,14 +10,29 @@ import struct
 import platform
 import shutil
 import json
+import mmap
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+try:
+    import numpy  # Optional: much faster byte histograms
+except ImportError:
+    numpy = None
+
 # --- Configuration ---
 FOLDER_NAME = "File Type Checker"
 MAX_FILE_SIZE_LIMIT = 50 * 1024 * 1024 * 1024  # 50 GB Limit
 ANALYSIS_RAM_LIMIT = 200 * 1024 * 1024         # Only load 200MB into RAM for pattern scanning
 QUARANTINE_THRESHOLD = 7
 VIRUSTOTAL_API_KEY = "" 
+SCAN_WINDOW = 4 * 1024 * 1024                  # Bytes hashed/counted/matched per step of the single pass
+SCAN_OVERLAP = 4096                            # Pattern matches may span two windows
+TAIL_SCAN_SIZE = 10 * 1024 * 1024              # Tail region pattern-scanned on large files
+HIGH_ENTROPY = 7.4
+ENTROPY_SAMPLE = 100000                        # Leading bytes used for the entropy figure
+SCAN_CACHE_VERSION = 2
+SCAN_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "file_type_checker", "results.json")
 
 # --- Cross-Platform Setup ---
 def get_target_dir():
@@ -80,6 +95,39 @@ def get_file_mime(filepath, data_head):
         
     return "unknown/data", "Unknown Binary"
 
+# --- Pattern Set (one regex per pattern, so overlapping hits all count) ---
+STRING_PATTERNS = {
+    "IPv4": rb'(?i:\b(?:\d{1,3}\.){3}\d{1,3}\b)',
+    "Email": rb'(?i:[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+    "URL": rb'(?i:http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+)',
+    "Bitcoin Wallet": rb'(?i:\b(?:bc1|[13])[a-zA-Z0-9]{25,39}\b)',
+    "Private Key": rb'(?i:-----BEGIN (?:RSA|DSA|EC|OPENSSH|PGP) PRIVATE KEY-----)',
+    "PowerShell Obfuscation": rb'(?i:FromBase64String|::Decode|GNwZW|SUVY|IgB8AC|cwB3AGkAdABjAGgA)',
+    "WebShell": rb'(?i:passthru|exec|shell_exec|eval\(base64_decode)',
+    "WinAPI (Malware)": rb'(?i:VirtualAlloc|CreateRemoteThread|WriteProcessMemory|ShellExecute|URLDownloadToFile)',
+    # Case-sensitive structure keywords
+    "PDF": rb'/JavaScript|/JS|/OpenAction|/Launch|/URI|/SubmitForm',
+    "VBA": rb'Attribute VB_Name',
+}
+SCAN_PATTERNS = {name: re.compile(pattern) for name, pattern in STRING_PATTERNS.items()}
+PDF_TRIGGERS = {'/JavaScript': 5, '/JS': 5, '/OpenAction': 4, '/Launch': 6, '/URI': 2, '/SubmitForm': 3}
+
+def byte_histogram(window):
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(window, dtype=numpy.uint8), minlength=256).tolist()
+    counts = Counter(window)
+    return [counts.get(x, 0) for x in range(256)]
+
+def histogram_entropy(histogram):
+    total = sum(histogram)
+    if not total: return 0
+    entropy = 0
+    for count in histogram:
+        if count:
+            p_x = count / total
+            entropy -= p_x * math.log(p_x, 2)
+    return entropy
+
 # --- Analysis Core ---
 class GlobalStats:
     total = 0
@@ -95,42 +143,57 @@ class AdvancedAnalyzer:
         self.warnings = []
         self.hidden_data = [] 
         self.indicators = [] 
-        self.data = b"" # Analysis Buffer (Partial)
+        self.data = b"" # File contents (mmap) while the analysis runs
         self.vt_result = "N/A"
         self.is_quarantined = False
         self.is_partial_read = False
-        
-        # --- SMART LOADING (Optimized for 50GB files) ---
-        try:
-            with open(filepath, 'rb') as f:
-                if self.size <= ANALYSIS_RAM_LIMIT:
-                    # Small file: Read all
-                    self.data = f.read()
-                else:
-                    # Large file: Read Head + Tail only
-                    self.is_partial_read = True
-                    head_size = ANALYSIS_RAM_LIMIT - (10 * 1024 * 1024) # Reserve 10MB for tail
-                    self.data = f.read(head_size)
-                    
-                    try:
-                        f.seek(- (10 * 1024 * 1024), 2) # Go to end minus 10MB
-                        self.data += f.read()
-                    except: pass # File might be smaller than we thought if seek fails
-                    
-                    self.warnings.append(f"Large File ({self.size/1024/1024/1024:.2f} GB). Analyzed Head/Tail only to save RAM.")
-        except Exception as e:
-            self.warnings.append(f"Read Error: {str(e)}")
+        self.sha256 = "HASH_ERROR"
+        self.peak_entropy = 0
+        self.matches = {} # Pattern name -> [count, unique samples]
+
+    def scan(self):
+        # --- SINGLE PASS: hash, histogram, windowed entropy and patterns ---
+        # Large files are still hashed and counted in full; only the pattern
+        # scan is limited to Head/Tail like before.
+        head_end = self.size
+        tail_start = self.size
+        if self.size > ANALYSIS_RAM_LIMIT:
+            self.is_partial_read = True
+            head_end = ANALYSIS_RAM_LIMIT - TAIL_SCAN_SIZE
+            tail_start = self.size - TAIL_SCAN_SIZE
+            self.warnings.append(f"Large File ({self.size/1024/1024/1024:.2f} GB). Pattern scan covered Head/Tail only.")
+        digest = hashlib.sha256()
+        # Views are released on exit; an mmap can't be closed while one is exported.
+        with memoryview(self.data) as view:
+            for offset in range(0, self.size, SCAN_WINDOW):
+                end = min(self.size, offset + SCAN_WINDOW)
+                with view[offset:end] as window:
+                    digest.update(window)
+                    window_histogram = byte_histogram(window)
+                self.peak_entropy = max(self.peak_entropy, histogram_entropy(window_histogram))
+                if offset < head_end or end > tail_start:
+                    self.match_patterns(max(offset, tail_start) if offset >= head_end else offset, end)
+        self.sha256 = digest.hexdigest()
+
+    def match_patterns(self, start, end):
+        # Only matches starting inside [start, end) count; the overlap lets
+        # a match that crosses into the next window finish.
+        stop = min(self.size, end + SCAN_OVERLAP)
+        for name, pattern in SCAN_PATTERNS.items():
+            for match in pattern.finditer(self.data, start, stop):
+                if match.start() >= end: break
+                self.record_match(name, match.group())
+
+    def record_match(self, name, value):
+        entry = self.matches.setdefault(name, [0, []])
+        entry[0] += 1
+        value = value.decode('utf-8', errors='ignore')
+        if value not in entry[1] and len(entry[1]) < 16:
+            entry[1].append(value)
 
-    def get_hashes(self):
-        # STREAMING HASH (Does not load file into RAM)
-        s = hashlib.sha256()
-        try:
-            with open(self.filepath, 'rb') as f:
-                while chunk := f.read(8192 * 1024): # Read in 8MB chunks
-                    s.update(chunk)
-            return s.hexdigest()
-        except:
-            return "HASH_ERROR"
+    def calculate_entropy(self):
+        # Entropy of a sample from the start of the file, as before
+        return histogram_entropy(byte_histogram(self.data[:ENTROPY_SAMPLE]))
 
     def check_virustotal(self, sha256):
         if not VIRUSTOTAL_API_KEY: return
@@ -149,26 +212,12 @@ class AdvancedAnalyzer:
                     self.vt_result = "[green]Clean (Cloud)[/]"
         except: pass
 
-    def calculate_entropy(self):
-        # Calculate entropy on the buffered data (Head/Tail)
-        if not self.data: return 0
-        entropy = 0
-        # Use a sample for speed on large buffers
-        sample = self.data[:100000] if len(self.data) > 100000 else self.data
-        for x in range(256):
-            p_x = float(sample.count(x)) / len(sample)
-            if p_x > 0: entropy += - p_x * math.log(p_x, 2)
-        return entropy
-
     def analyze_pdf_structure(self):
-        try:
-            text_data = self.data.decode('latin-1', errors='ignore')
-            triggers = {'/JavaScript': 5, '/JS': 5, '/OpenAction': 4, '/Launch': 6, '/URI': 2, '/SubmitForm': 3}
-            for keyword, score in triggers.items():
-                if keyword in text_data:
-                    self.risk_score += score
-                    self.warnings.append(f"PDF Active Content detected: {keyword}")
-        except: pass
+        found = self.matches.get("PDF", [0, []])[1]
+        for keyword, score in PDF_TRIGGERS.items():
+            if keyword in found:
+                self.risk_score += score
+                self.warnings.append(f"PDF Active Content detected: {keyword}")
 
     def analyze_office_macros(self):
         if self.data[:4] == b'PK\x03\x04':
@@ -182,7 +231,7 @@ class AdvancedAnalyzer:
                                 return
             except: pass
         
-        if b'Attribute VB_Name' in self.data:
+        if "VBA" in self.matches:
             self.risk_score += 8
             self.warnings.append("Legacy Office Macro (VBA) Detected")
 
@@ -231,11 +280,11 @@ class AdvancedAnalyzer:
             "application/zip": None 
         }
         
-        # Scan the end of our BUFFER (which corresponds to end of file due to Tail read)
+        # Scan the end of the file
         if mime in eof_signatures and eof_signatures[mime]:
             sig = eof_signatures[mime]
             # Search in the last 1MB of data for performance
-            search_area = self.data[-1048576:] if len(self.data) > 1048576 else self.data
+            search_area = self.data[-1048576:] if self.size > 1048576 else self.data[:]
             end_offset = search_area.rfind(sig)
             
             if end_offset != -1:
@@ -271,44 +320,25 @@ class AdvancedAnalyzer:
                 self.warnings.append("Corrupt Archive or Protected Zip")
 
     def analyze_strings(self):
-        try:
-            # Decode only the buffer
-            text_data = self.data.decode('utf-8', errors='ignore')
-            
-            patterns = {
-                "IPv4": r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
-                "Email": r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-                "URL": r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
-                "Bitcoin Wallet": r'\b(bc1|[13])[a-zA-Z0-9]{25,39}\b',
-                "Private Key": r'-----BEGIN (RSA|DSA|EC|OPENSSH|PGP) PRIVATE KEY-----',
-                "PowerShell Obfuscation": r'(FromBase64String|::Decode|GNwZW|SUVY|IgB8AC|cwB3AGkAdABjAGgA)',
-                "WebShell": r'(passthru|exec|shell_exec|eval\(base64_decode)',
-                "WinAPI (Malware)": r'(VirtualAlloc|CreateRemoteThread|WriteProcessMemory|ShellExecute|URLDownloadToFile)'
-            }
-
-            found_ips = set()
-            
-            for p_name, p_val in patterns.items():
-                matches = re.findall(p_val, text_data, re.IGNORECASE)
-                if matches:
-                    unique_matches = list(set(matches))[:3]
-                    
-                    if p_name == "IPv4":
-                        for ip in unique_matches:
-                            if not ip.startswith(('192.168', '127.0', '10.')): found_ips.add(ip)
-                    elif p_name in ["WebShell", "WinAPI (Malware)", "PowerShell Obfuscation"]:
-                        self.warnings.append(f"Suspicious {p_name} detected: {unique_matches}")
-                        self.risk_score += 4
-                    elif p_name == "Private Key":
-                        self.warnings.append("CRITICAL: Private Cryptographic Key Found!")
-                        self.risk_score += 10
-                    else:
-                        self.indicators.append(f"{p_name}: {len(matches)} found")
-
-            if found_ips:
-                self.indicators.append(f"Public IPs: {', '.join(list(found_ips)[:3])}")
-
-        except Exception: pass
+        found_ips = set()
+        for p_name in STRING_PATTERNS:
+            if p_name not in self.matches: continue
+            count, samples = self.matches[p_name]
+            unique_matches = samples[:3]
+            if p_name == "IPv4":
+                for ip in samples:
+                    if not ip.startswith(('192.168', '127.0', '10.')): found_ips.add(ip)
+            elif p_name in ["WebShell", "WinAPI (Malware)", "PowerShell Obfuscation"]:
+                self.warnings.append(f"Suspicious {p_name} detected: {unique_matches}")
+                self.risk_score += 4
+            elif p_name == "Private Key":
+                self.warnings.append("CRITICAL: Private Cryptographic Key Found!")
+                self.risk_score += 10
+            elif p_name not in ("PDF", "VBA"):
+                self.indicators.append(f"{p_name}: {count} found")
+
+        if found_ips:
+            self.indicators.append(f"Public IPs: {', '.join(sorted(found_ips)[:3])}")
 
     def quarantine_file(self):
         if self.risk_score >= QUARANTINE_THRESHOLD:
@@ -325,17 +355,33 @@ class AdvancedAnalyzer:
     def run(self):
         # Size Check: Only if strictly greater than limit, but we set limit to 50GB
         if self.size > MAX_FILE_SIZE_LIMIT:
-             console.print(f"[red]Skipping {self.filename}: Too massive (>50GB)[/]")
-             return
+             return {"filename": self.filename, "skipped": "Too massive (>50GB)"}
 
-        sha256 = self.get_hashes()
-        console.print(f"[cyan]>> Analyzing {escape(self.filename)}...[/cyan]")
-        
-        self.check_virustotal(sha256)
-        mime, desc = get_file_mime(self.filepath, self.data)
+        try:
+            with open(self.filepath, 'rb') as f:
+                if self.size:
+                    try:
+                        self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (OSError, ValueError):
+                        # Filesystems without mmap support: small files are read instead
+                        if self.size > ANALYSIS_RAM_LIMIT: raise
+                        self.data = f.read()
+                try:
+                    return self.analyze()
+                finally:
+                    if isinstance(self.data, mmap.mmap): self.data.close()
+                    self.data = b""
+        except Exception as e:
+            self.warnings.append(f"Read Error: {str(e)}")
+            return self.report("unknown/data", "Unknown Binary", 0)
+
+    def analyze(self):
+        self.scan()
+        self.check_virustotal(self.sha256)
+        mime, desc = get_file_mime(self.filepath, self.data[:16])
         entropy = self.calculate_entropy()
         
-        if entropy > 7.4 and "zip" not in mime and "image" not in mime:
+        if entropy > HIGH_ENTROPY and "zip" not in mime and "image" not in mime:
              self.warnings.append(f"High Entropy ({entropy:.2f}): Likely Packed/Encrypted payload.")
              self.risk_score += 3
 
@@ -359,53 +405,105 @@ class AdvancedAnalyzer:
         if self.risk_score >= QUARANTINE_THRESHOLD:
             self.quarantine_file()
 
-        self.print_report(sha256, mime, desc, entropy)
-
-    def print_report(self, sha256, mime, desc, entropy):
-        if self.risk_score >= 7:
-            color = "red"
-            verdict = "DANGEROUS"
-            GlobalStats.risky += 1
-        elif self.risk_score >= 4:
-            color = "yellow"
-            verdict = "SUSPICIOUS"
-            GlobalStats.risky += 1
-        else:
-            color = "green"
-            verdict = "CLEAN"
-            GlobalStats.clean += 1
-
-        info_table = Table(show_header=False, box=None)
-        info_table.add_row("Type", f"{mime} ({desc})")
-        info_table.add_row("Entropy", f"{entropy:.3f}")
-        info_table.add_row("Cloud", self.vt_result)
-        
-        details = f"[bold {color} size=16]{verdict}[/] (Score: {self.risk_score})"
-        
-        if self.is_quarantined:
-            details += "\n\n[bold white on red] FILE QUARANTINED [/]"
+        return self.report(mime, desc, entropy)
 
-        if self.warnings:
-            details += "\n\n[bold red]--- THREATS ---[/]"
-            for w in self.warnings: details += f"\n[red]![/] {escape(str(w))}"
-            
-        if self.hidden_data:
-            details += "\n\n[bold magenta]--- HIDDEN DATA/STEGO ---[/]"
-            for h in self.hidden_data: details += f"\n[magenta]*[/] {escape(str(h))}"
-
-        if self.indicators:
-            details += "\n\n[bold blue]--- INTEL ---[/]"
-            for i in self.indicators: details += f"\n[blue]i[/] {escape(str(i))}"
-
-        layout = Layout()
-        layout.split_row(
-            Layout(Panel(info_table, title="File Info")),
-            Layout(Panel(details, title="Analysis Verdict", border_style=color))
-        )
+    def report(self, mime, desc, entropy):
+        # Plain data so it can cross the process pool and go into the cache
+        return {
+            "filename": self.filename, "filepath": self.filepath, "sha256": self.sha256,
+            "mime": mime, "desc": desc, "entropy": entropy, "peak_entropy": self.peak_entropy,
+            "risk_score": self.risk_score, "vt_result": self.vt_result, "is_quarantined": self.is_quarantined,
+            "warnings": self.warnings, "hidden_data": self.hidden_data, "indicators": self.indicators,
+        }
+
+def analyze_file(filepath):
+    # Process pool entry point
+    return AdvancedAnalyzer(filepath).run()
+
+def print_report(report, cached=False):
+    if report.get("skipped"):
+        console.print(f"[red]Skipping {escape(report['filename'])}: {report['skipped']}[/]")
+        return
+    risk_score = report["risk_score"]
+    if risk_score >= 7:
+        color = "red"
+        verdict = "DANGEROUS"
+        GlobalStats.risky += 1
+    elif risk_score >= 4:
+        color = "yellow"
+        verdict = "SUSPICIOUS"
+        GlobalStats.risky += 1
+    else:
+        color = "green"
+        verdict = "CLEAN"
+        GlobalStats.clean += 1
+
+    info_table = Table(show_header=False, box=None)
+    info_table.add_row("Type", f"{report['mime']} ({report['desc']})")
+    info_table.add_row("Entropy", f"{report['entropy']:.3f} (peak window {report['peak_entropy']:.3f})")
+    info_table.add_row("Cloud", report["vt_result"])
+    if cached:
+        info_table.add_row("Scan", "[dim]Unchanged since last scan (cached)[/dim]")
+    
+    details = f"[bold {color} size=16]{verdict}[/] (Score: {risk_score})"
+    
+    if report["is_quarantined"]:
+        details += "\n\n[bold white on red] FILE QUARANTINED [/]"
+
+    if report["warnings"]:
+        details += "\n\n[bold red]--- THREATS ---[/]"
+        for w in report["warnings"]: details += f"\n[red]![/] {escape(str(w))}"
         
-        console.print(Panel(f"[bold]{escape(self.filename)}[/bold]", style=f"on {color} black" if color=="red" else "bold white"))
-        console.print(layout)
-        console.print(f"[dim]SHA256: {sha256}[/dim]\n")
+    if report["hidden_data"]:
+        details += "\n\n[bold magenta]--- HIDDEN DATA/STEGO ---[/]"
+        for h in report["hidden_data"]: details += f"\n[magenta]*[/] {escape(str(h))}"
+
+    if report["indicators"]:
+        details += "\n\n[bold blue]--- INTEL ---[/]"
+        for i in report["indicators"]: details += f"\n[blue]i[/] {escape(str(i))}"
+
+    layout = Layout()
+    layout.split_row(
+        Layout(Panel(info_table, title="File Info")),
+        Layout(Panel(details, title="Analysis Verdict", border_style=color))
+    )
+    
+    console.print(Panel(f"[bold]{escape(report['filename'])}[/bold]", style=f"on {color} black" if color=="red" else "bold white"))
+    console.print(layout)
+    console.print(f"[dim]SHA256: {report['sha256']}[/dim]\n")
+
+# --- Result Cache (skip unchanged files) ---
+def load_scan_cache():
+    try:
+        with open(SCAN_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == SCAN_CACHE_VERSION:
+            return cache
+    except Exception: pass
+    return {"version": SCAN_CACHE_VERSION, "files": {}}
+
+def save_scan_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(SCAN_CACHE_FILE), exist_ok=True)
+        temp = SCAN_CACHE_FILE + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(temp, SCAN_CACHE_FILE)
+    except Exception: pass
+
+def cache_key(st):
+    return [st.st_size, st.st_mtime_ns]
+
+def scan_pool():
+    # Worker processes scan files in parallel; platforms without working
+    # process semaphores (some Android builds) fall back to threads.
+    workers = max(1, min(8, os.cpu_count() or 1))
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pool.submit(int).result()
+        return pool
+    except (ImportError, OSError, NotImplementedError, PermissionError):
+        return ThreadPoolExecutor(max_workers=workers)
 
 # --- Main Loop ---
 def main():
@@ -422,8 +520,51 @@ def main():
         return
 
     console.print(f"[bold]Scanning {len(files)} files...[/bold]\n")
+    cache = load_scan_cache()
+    entries = cache["files"]
+    pending = []
     for f in files:
-        AdvancedAnalyzer(os.path.join(TARGET_DIR, f)).run()
+        path = os.path.join(TARGET_DIR, f)
+        try:
+            key = cache_key(os.stat(path))
+        except OSError:
+            continue
+        entry = entries.get(f)
+        if entry and entry.get("key") == key:
+            print_report(entry["report"], cached=True)
+        else:
+            pending.append((f, path, key))
+
+    if pending:
+        with scan_pool() as pool:
+            futures = {}
+            for f, path, key in pending:
+                console.print(f"[cyan]>> Analyzing {escape(f)}...[/cyan]")
+                futures[pool.submit(analyze_file, path)] = (f, key)
+            for future in as_completed(futures):
+                f, key = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    console.print(f"[red]Scan failed for {escape(f)}: {escape(str(e))}[/]")
+                    continue
+                print_report(report)
+                if report.get("skipped") or report["sha256"] == "HASH_ERROR":
+                    continue
+                # Entries are identified by (size, mtime) plus the stored sha256;
+                # quarantined files are stored under their new name.
+                entries.pop(f, None)
+                name = report["filename"]
+                try:
+                    key = cache_key(os.stat(os.path.join(TARGET_DIR, name)))
+                except OSError:
+                    continue
+                entries[name] = {"key": key, "report": report}
+
+    for name in list(entries):
+        if name not in files and not os.path.exists(os.path.join(TARGET_DIR, name)):
+            del entries[name]
+    save_scan_cache(cache)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
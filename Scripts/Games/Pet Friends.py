@@ -11,12 +11,17 @@ Accessible controls revision: menu actions use lowercase letters or numbers; x c
 """
 
 import curses, time, json, os, random, math, socket, sys, threading, queue, uuid, textwrap, subprocess, shutil, wave, struct, atexit, signal, re
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 
 # ----------------------------- CONFIG -----------------------------
 SAVE_DIR = os.path.join(os.path.expanduser("~"), "Pet Friends")
 SAVE_FILE = os.path.join(SAVE_DIR, "petfriends_save.json")
 SAVE_VERSION = 21
+SAVE_JOURNAL_FILE = SAVE_FILE + ".journal"
+SAVE_DEBOUNCE_SECONDS = 0.75
+SAVE_JOURNAL_COMPACT_RECORDS = 64
+SAVE_JOURNAL_COMPACT_BYTES = 256 * 1024
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 def _safe_int(value, default=0, minimum=None, maximum=None):
@@ -7072,6 +7077,210 @@ def _simulate_lan_battle(host_data, challenger_data, host_multiplier=1.0,
         "log": log[-6:],
     }
 
+def _detach_save_value(value):
+    """Copy JSON-shaped containers so the writer never sees live game objects."""
+    if isinstance(value, dict):
+        return {key: _detach_save_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_detach_save_value(item) for item in value]
+    return value
+
+
+class SaveWriter:
+    """Background save writer with a compact snapshot and an append-only journal.
+
+    The game thread only hands over a detached copy of the save dictionary.
+    The writer coalesces bursts of saves, appends just the top-level fields
+    that changed since the last write, and periodically compacts everything
+    into an atomically replaced snapshot. Each journal record carries a
+    sequence number; the snapshot stores the last sequence it contains, so a
+    crash between compaction and journal truncation never replays stale data.
+    """
+
+    def __init__(self, snapshot_path=SAVE_FILE, journal_path=SAVE_JOURNAL_FILE):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self._condition = threading.Condition()
+        self._pending = None
+        self._pending_since = 0.0
+        self._closing = False
+        self._persisted = {}
+        self._seq = 0
+        self._journal_records = 0
+        self._journal_bytes = 0
+        self._thread = threading.Thread(target=self._run, name="PetFriends-Saver", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- recovery ----------
+    def recover(self):
+        """Return the merged snapshot and journal, or None when no save exists."""
+        data = None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeError, json.JSONDecodeError, TypeError, ValueError):
+            data = None
+        if not isinstance(data, dict):
+            data = None
+        base_seq = _safe_int(data.get("journal_seq", 0), 0, 0) if data else 0
+        seq = base_seq
+        records = 0
+        size = 0
+        try:
+            with open(self.journal_path, "rb") as handle:
+                for raw in handle:
+                    # A torn final line from a crash mid-append is ignored;
+                    # every complete record before it still applies.
+                    try:
+                        record = json.loads(raw.decode("utf-8"))
+                        record_seq = int(record["seq"])
+                        fields = record["fields"]
+                    except (UnicodeError, ValueError, KeyError, TypeError):
+                        break
+                    if not isinstance(fields, dict):
+                        break
+                    size += len(raw)
+                    records += 1
+                    if record_seq <= base_seq:
+                        continue
+                    if data is None:
+                        data = {}
+                    data.update(fields)
+                    seq = max(seq, record_seq)
+            if size < os.path.getsize(self.journal_path):
+                # Drop the torn tail so new records start on a clean line.
+                with open(self.journal_path, "r+b") as handle:
+                    handle.truncate(size)
+        except OSError:
+            pass
+        with self._condition:
+            self._seq = seq
+            self._journal_records = records
+            self._journal_bytes = size
+            if data is not None:
+                self._persisted = {
+                    key: json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                    for key, value in data.items() if key != "journal_seq"
+                }
+        return data
+
+    # ---------- game-thread API ----------
+    def submit(self, data):
+        """Queue a detached save dictionary; newer submissions replace older ones."""
+        with self._condition:
+            if self._pending is None:
+                self._pending_since = time.monotonic()
+            self._pending = data
+            self._condition.notify()
+
+    def close(self):
+        """Flush, compact into a single snapshot and stop the writer thread."""
+        with self._condition:
+            if self._closing:
+                return
+            self._closing = True
+            self._condition.notify()
+        self._thread.join(timeout=5.0)
+
+    # ---------- writer thread ----------
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._pending is not None:
+                        wait = self._pending_since + SAVE_DEBOUNCE_SECONDS - time.monotonic()
+                        if wait <= 0 or self._closing:
+                            break
+                        self._condition.wait(wait)
+                    elif self._closing:
+                        break
+                    else:
+                        self._condition.wait()
+                data, self._pending = self._pending, None
+                closing = self._closing
+            if data is not None:
+                self._write(data, compact=closing)
+            elif closing and self._journal_records:
+                self._compact(dict(self._persisted))
+            if closing:
+                return
+
+    def _write(self, data, compact=False):
+        try:
+            encoded = {
+                key: json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                for key, value in data.items()
+            }
+        except (TypeError, ValueError):
+            return
+        changed = {key: text for key, text in encoded.items() if self._persisted.get(key) != text}
+        if not changed and not compact:
+            return
+        fields = dict(self._persisted)
+        fields.update(encoded)
+        total_bytes = sum(len(text) for text in fields.values())
+        changed_bytes = sum(len(text) for text in changed.values())
+        if (
+            compact
+            or not self._persisted
+            or self._journal_records >= SAVE_JOURNAL_COMPACT_RECORDS
+            or self._journal_bytes + changed_bytes > SAVE_JOURNAL_COMPACT_BYTES
+            or changed_bytes * 2 > total_bytes
+        ):
+            self._compact(fields)
+            return
+        self._seq += 1
+        line = (
+            '{"seq":%d,"fields":{%s}}\n' % (
+                self._seq,
+                ",".join(f"{json.dumps(key)}:{text}" for key, text in changed.items()),
+            )
+        ).encode("utf-8")
+        try:
+            with open(self.journal_path, "ab") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+        except OSError:
+            self._seq -= 1
+            return
+        self._persisted.update(changed)
+        self._journal_records += 1
+        self._journal_bytes += len(line)
+
+    def _compact(self, fields):
+        """Atomically replace the snapshot with every field, then reset the journal."""
+        body = ",".join(f"{json.dumps(key)}:{text}" for key, text in fields.items() if key != "journal_seq")
+        snapshot = ("{" + body + ("," if body else "") + f'"journal_seq":{self._seq}' + "}").encode("utf-8")
+        temp_file = self.snapshot_path + ".tmp"
+        try:
+            with open(temp_file, "wb") as handle:
+                handle.write(snapshot)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_file, self.snapshot_path)
+        except OSError:
+            try:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            except OSError:
+                pass
+            return
+        self._persisted = dict(fields)
+        self._persisted.pop("journal_seq", None)
+        try:
+            with open(self.journal_path, "wb") as handle:
+                handle.flush()
+                os.fsync(handle.fileno())
+        except OSError:
+            return
+        self._journal_records = 0
+        self._journal_bytes = 0
+
+
 class LANManager:
     """Background LAN host, discovery client, and request transport.
 
@@ -7746,6 +7955,7 @@ class Game:
         self.last_trade_combined = False
         self.duplicate_species_merged = 0
 
+        self.save_writer = SaveWriter()
         self.load_game()
         if not self.pets:
             # Every new sanctuary starts with one free Dog and enough coins for
@@ -7898,29 +8108,13 @@ class Game:
                 if self.last_free_link_crate_claim else None
             )
         }
-        try:
-            temp_file = SAVE_FILE + ".tmp"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
-                f.flush()
-                os.fsync(f.fileno())
-            os.replace(temp_file, SAVE_FILE)
-        except (OSError, TypeError, ValueError):
-            try:
-                if os.path.exists(SAVE_FILE + ".tmp"):
-                    os.remove(SAVE_FILE + ".tmp")
-            except OSError:
-                pass
+        # Encoding and disk writes happen on the saver thread; the frame loop
+        # only pays for copying the plain containers above.
+        self.save_writer.submit(_detach_save_value(data))
 
     def load_game(self):
         """Load a save defensively; malformed fields fall back instead of crashing."""
-        if not os.path.exists(SAVE_FILE):
-            return
-        try:
-            with open(SAVE_FILE, "r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except (OSError, UnicodeError, json.JSONDecodeError, TypeError, ValueError):
-            return
+        data = self.save_writer.recover()
         if not isinstance(data, dict):
             return
 
@@ -41125,17 +41319,64 @@ def _animate_portrait(pet, base_lines, frame, reaction="", compact=False):
     return ["".join(row) for row in canvas]
 
 
+# Framed portraits are pure functions of the species, the terminal region and
+# the two animation clocks that actually change glyphs: the v17 blink window
+# and the two-frame fallback drawing. Memoizing them keeps the render loop from
+# re-trimming, re-fitting and re-framing identical art on every tick.
+ART_FRAME_CACHE_LIMIT = 256
+_ART_FRAME_CACHE = OrderedDict()
+
+
+def _art_frame_key(pet, width, max_height, prefer_ultra, frame):
+    """Return the smallest key that fully determines one framed portrait."""
+    frame = int(frame)
+    return (
+        str(pet.species),
+        int(width),
+        int(max_height),
+        bool(prefer_ultra),
+        frame % 32 in (29, 30),
+        frame % 2,
+    )
+
+
+def _cached_art_block(pet, width, max_height, prefer_ultra, frame):
+    """Return (portrait tuple, cache hit) for one animation frame."""
+    key = _art_frame_key(pet, width, max_height, prefer_ultra, frame)
+    cached = _ART_FRAME_CACHE.get(key)
+    if cached is not None:
+        _ART_FRAME_CACHE.move_to_end(key)
+        return cached, True
+    block = tuple(_build_detailed_art(pet, width, max_height, prefer_ultra, frame))
+    _ART_FRAME_CACHE[key] = block
+    while len(_ART_FRAME_CACHE) > ART_FRAME_CACHE_LIMIT:
+        _ART_FRAME_CACHE.popitem(last=False)
+    return block, False
+
+
 def get_detailed_art(game, width, max_height, prefer_ultra=False):
     """Return a complete framed portrait without stretching or mid-art cuts."""
-    if game.active_pet is None:
+    pet = game.active_pet
+    if pet is None:
         return ["No active pet"]
 
-    pet = game.active_pet
+    block, hit = _cached_art_block(pet, width, max_height, prefer_ultra, game.anim_frame)
+    if hit:
+        RENDER_STATS.art_hits += 1
+    else:
+        RENDER_STATS.art_misses += 1
+    # Most reviewed portraits only blink, so the portrait itself is the phase.
+    RENDER_STATS.animate(lambda: _cached_art_block(pet, width, max_height, prefer_ultra, game.anim_frame)[0])
+    return list(block)
+
+
+def _build_detailed_art(pet, width, max_height, prefer_ultra, frame):
+    """Fit, animate and frame one portrait; callers go through the cache."""
     available_inner_height = max(1, max_height - 2)
     portrait = _portrait_for_species(pet, width, available_inner_height, prefer_ultra=prefer_ultra)
     if portrait:
-        portrait = _animate_v17_clear_portrait(portrait, game.anim_frame)
-    compact = _compact_species_art(pet, game.anim_frame)
+        portrait = _animate_v17_clear_portrait(portrait, frame)
+    compact = _compact_species_art(pet, frame)
 
     if portrait and len(portrait) <= available_inner_height:
         art = portrait
@@ -41156,13 +41397,126 @@ def get_detailed_art(game, width, max_height, prefer_ultra=False):
     block.append(border)
     return block
 
+
+# Terminal redraw pacing. curses already sends only changed cells on
+# doupdate(), so the remaining cost is rebuilding the virtual screen in Python.
+# The loop therefore skips frames whose visible inputs have not changed and
+# still repaints on a short heartbeat so timers and network status stay live.
+RENDER_POLL_MS = 250
+RENDER_HEARTBEAT_SECONDS = 1.0
+
+
+class RenderStats:
+    """Rolling frame timings for the optional [ j ] frame-stats overlay."""
+
+    def __init__(self, window=120):
+        self.frame_times = deque(maxlen=window)
+        self.frame_stamps = deque(maxlen=window)
+        self.drawn = 0
+        self.skipped = 0
+        self.art_hits = 0
+        self.art_misses = 0
+        self.last_signature = None
+        self.last_draw = 0.0
+        self.animations = ()  # phase callables of the moving elements in the last frame
+        self._collecting = None
+
+    def animate(self, phase):
+        """Register a moving element of the frame being drawn.
+
+        `phase` takes no arguments and returns what the element would show
+        right now; a tick where every phase is unchanged can be skipped.
+        """
+        if self._collecting is not None:
+            self._collecting.append(phase)
+
+    def signature(self, stdscr, game):
+        h, w = stdscr.getmaxyx()
+        latest = game.messages[-1][0] if game.messages else ""
+        return (
+            h, w, tuple(phase() for phase in self.animations),
+            game.pet_reaction, latest, len(game.messages),
+            getattr(game, "lan_status", ""), getattr(game, "fight_state", ""),
+            game.input_buffer, game.attention_required,
+        )
+
+    def needs_frame(self, stdscr, game, key):
+        """Return True when something visible may have changed since the last frame."""
+        now = time.monotonic()
+        changed = (
+            key != -1
+            or now - self.last_draw >= RENDER_HEARTBEAT_SECONDS
+            or self.signature(stdscr, game) != self.last_signature
+        )
+        if not changed:
+            self.skipped += 1
+        return changed
+
+    def begin(self):
+        self._collecting = []
+
+    def record(self, stdscr, game, started, finished):
+        self.animations, self._collecting = tuple(self._collecting or ()), None
+        self.last_signature = self.signature(stdscr, game)
+        self.drawn += 1
+        self.last_draw = finished
+        self.frame_times.append(finished - started)
+        self.frame_stamps.append(finished)
+
+    def summary(self):
+        times = self.frame_times
+        avg_ms = (sum(times) / len(times) * 1000.0) if times else 0.0
+        max_ms = (max(times) * 1000.0) if times else 0.0
+        stamps = self.frame_stamps
+        span = (stamps[-1] - stamps[0]) if len(stamps) > 1 else 0.0
+        fps = ((len(stamps) - 1) / span) if span > 0 else 0.0
+        lookups = self.art_hits + self.art_misses
+        hit_rate = (100.0 * self.art_hits / lookups) if lookups else 0.0
+        return (
+            f" {fps:4.1f} FPS | frame {avg_ms:4.1f}/{max_ms:4.1f} ms | "
+            f"skipped {self.skipped} | art cache {hit_rate:3.0f}% "
+        )
+
+
+RENDER_STATS = RenderStats()
+
+
+def draw_frame_stats(stdscr, game):
+    """Draw frame-time instrumentation in the top-right corner when enabled."""
+    if not getattr(game, "show_frame_stats", False):
+        return
+    h, w = stdscr.getmaxyx()
+    text = RENDER_STATS.summary()
+    if h < 2 or len(text) >= w:
+        text = text.strip()[:max(0, w - 2)]
+    _safe_addstr(stdscr, 1 if h > 2 else 0, max(0, w - len(text) - 1), text, curses.A_REVERSE)
+
+
+def toggle_frame_stats(game):
+    game.show_frame_stats = not getattr(game, "show_frame_stats", False)
+    game.add_message(f"Frame stats {'ON' if game.show_frame_stats else 'OFF'}.", 1.5)
+    game.sound_manager.play("page")
+
 # ==================== CURSES UI ====================
-def draw_animated_bar(stdscr, y, x, val, max_val, width, cp, tseed, filled_char="=", empty_char=" "):
+def _bar_shimmer(val, max_val, width, tseed):
+    """Return the filled cell that shows the shimmer, or -1 while it is off the bar."""
     # Clamp fill length so invalid external save values can never construct a
     # massive string or draw beyond the intended terminal region.
     filled = int((val / max_val) * width) if max_val > 0 else 0
     filled = max(0, min(width, filled))
     shimmer = int((tseed * 5) % (width + 10)) - 5
+    return shimmer if 0 <= shimmer < filled else -1
+
+
+def animate_bar(game, val, max_val, width, speed):
+    """Register a bar drawn with tseed=game.anim_frame * speed as a moving element."""
+    RENDER_STATS.animate(lambda: _bar_shimmer(val, max_val, width, game.anim_frame * speed))
+
+
+def draw_animated_bar(stdscr, y, x, val, max_val, width, cp, tseed, filled_char="=", empty_char=" "):
+    filled = int((val / max_val) * width) if max_val > 0 else 0
+    filled = max(0, min(width, filled))
+    shimmer = _bar_shimmer(val, max_val, width, tseed)
     bar = []
     for i in range(width):
         ch = filled_char if i < filled else empty_char
@@ -41340,11 +41694,13 @@ def draw_shop(stdscr, game, title, upgrades_dict, player_levels, buy_callback, i
                 words = words[:2] + words[-1:]
             compact_prefix = key_part + "] " + " ".join(words) + " | "
         description_width = width - len(compact_prefix)
-        rendered = (
-            compact_prefix + shop_marquee_window(description, description_width, elapsed)
-            if description_width >= 8 else
-            shop_marquee_window(compact_prefix + description, width, elapsed)
-        )
+        if description_width >= 8:
+            moving, moving_width = description, description_width
+        else:
+            compact_prefix, moving, moving_width = "", compact_prefix + description, width
+        rendered = compact_prefix + shop_marquee_window(moving, moving_width, elapsed)
+        if len(moving.strip()) > moving_width:
+            RENDER_STATS.animate(lambda text=moving, span=moving_width: shop_marquee_window(text, span, shop_marquee_elapsed(game)))
         try:
             stdscr.addstr(grid_top + row, x, rendered[:width].ljust(width), attr)
         except curses.error:
@@ -41778,7 +42134,8 @@ MAIN_CONTROL_TOKENS = (
     "[ l ] Loot", "[ c ] Pets", "[ y ] Buy", "[ d ] Fight", "[ w ] LAN",
     "[ h ] Achievements", "[ r ] Adventure", "[ e ] Prestige", "[ g ] Prestige Shop",
     "[ v ] Boost", "[ n ] Rename", "[ o ] Color", "[ m ] SFX", "[ k ] Music",
-    "[ u ] Mute All", "[ 1 ] Previous Fact", "[ 2 ] Next Fact", "[ i ] Full Fact", "[ z ] Full Portrait", "[ q ] Quit",
+    "[ u ] Mute All", "[ 1 ] Previous Fact", "[ 2 ] Next Fact", "[ i ] Full Fact", "[ z ] Full Portrait",
+    "[ j ] Frame Stats", "[ q ] Quit",
 )
 
 
@@ -41928,7 +42285,9 @@ def draw_full_portrait_screen(stdscr, game):
                     _safe_addstr(stdscr, start_y + offset, max(0, (w - len(line)) // 2), line, attr)
             footer = "[ x / z ] Return  [ 1 / 2 ] Change fact"
             _safe_addstr(stdscr, h - 1, max(0, (w - len(footer)) // 2), footer[:max(1, w - 1)], curses.A_REVERSE)
-            stdscr.refresh()
+            draw_frame_stats(stdscr, game)
+            stdscr.noutrefresh()
+            curses.doupdate()
             key = stdscr.getch()
             if key in (ord('x'), ord('z'), 27):
                 game.sound_manager.play("close")
@@ -41999,7 +42358,7 @@ def _draw_wide_dashboard(stdscr, game):
         "[ f ] Feed", "[ p ] Pet", "[ b ] Bath", "[ t ] Train", "[ s ] Shop", "[ l ] Loot", "[ y ] Buy", "[ c ] Pets",
         "[ d ] Fight", "[ w ] LAN", "[ r ] Adventure", "[ h ] Awards", "[ e ] Prestige", "[ g ] P.Shop",
         "[ 1 / 2 ] Facts", "[ i ] Full Fact", "[ z ] Full Portrait", "[ n ] Name", "[ o ] Color", "[ v ] Boost",
-        "[ m ] SFX", "[ k ] Music", "[ u ] Mute", "[ q ] Quit",
+        "[ m ] SFX", "[ k ] Music", "[ u ] Mute", "[ j ] Frame stats", "[ q ] Quit",
     )
     footer_lines = _pack_tokens_for_width(footer_tokens, w)
     status = _pack_tokens_for_width(_status_tokens(game), w)
@@ -42030,6 +42389,7 @@ def _draw_wide_dashboard(stdscr, game):
         ):
             _safe_addstr(stdscr, row, right_x, f"{label:<11}", curses.A_BOLD)
             draw_animated_bar(stdscr, row, right_x + 11, value, 100, bar_w, colour, game.anim_frame * speed)
+            animate_bar(game, value, 100, bar_w, speed)
             row += 1
         power = int(p.battle_power() * game.battle_power_mult())
         _safe_addstr(stdscr, row, right_x, f"Power {power} | Bond {p.bond_level} | Stage {p.stage + 1}/{len(STAGE_NAMES)}", curses.A_BOLD)
@@ -42044,6 +42404,7 @@ def _draw_wide_dashboard(stdscr, game):
             for line in wrapped[:preview_h]:
                 _safe_addstr(stdscr, row, right_x, line, curses.color_pair(7))
                 row += 1
+    draw_frame_stats(stdscr, game)
     stdscr.noutrefresh()
     curses.doupdate()
 
@@ -42124,6 +42485,7 @@ def draw_ui(stdscr, game):
                 colour,
                 game.anim_frame * seed_scale,
             )
+            animate_bar(game, value, 100, bar_w, seed_scale)
             row += 1
 
         if row < content_bottom:
@@ -42169,6 +42531,7 @@ def draw_ui(stdscr, game):
                     "#",
                     ".",
                 )
+                animate_bar(game, p.age_in_stage, threshold, bar_w, 1.2)
             else:
                 _safe_addstr(
                     stdscr,
@@ -42181,6 +42544,10 @@ def draw_ui(stdscr, game):
 
         pet_center_x = w // 2
         pet_center_y = pet_y + len(art_lines) // 2
+        RENDER_STATS.animate(lambda: tuple(
+            (int(x_offset), int(y_offset), symbol, amount)
+            for x_offset, y_offset, life, symbol, amount in game.particles if life > 0
+        ))
         for x_offset, y_offset, life, symbol, amount in game.particles:
             if life <= 0:
                 continue
@@ -42248,10 +42615,22 @@ def draw_ui(stdscr, game):
     if game.attention_required:
         draw_attention_screen(stdscr, game)
 
+    draw_frame_stats(stdscr, game)
     stdscr.noutrefresh()
     curses.doupdate()
 
 
+def render_frame(stdscr, game, key):
+    """Draw one dashboard frame unless nothing visible changed; return True if drawn."""
+    if not RENDER_STATS.needs_frame(stdscr, game, key):
+        return False
+    started = time.monotonic()
+    RENDER_STATS.begin()
+    draw_ui(stdscr, game)
+    RENDER_STATS.record(stdscr, game, started, time.monotonic())
+    return True
+
+
 def main(stdscr):
     try:
         curses.curs_set(0)
@@ -42267,7 +42646,7 @@ def main(stdscr):
     except (AttributeError, curses.error):
         pass
     stdscr.nodelay(True)
-    stdscr.timeout(250)  # 4 FPS stays responsive while reducing Android terminal flicker
+    stdscr.timeout(RENDER_POLL_MS)  # 4 FPS stays responsive while reducing Android terminal flicker
 
     try:
         curses.start_color()
@@ -42321,12 +42700,13 @@ def main(stdscr):
                 time.sleep(0.18)
                 game.sound_manager.shutdown()
                 game.lan_manager.shutdown()
+                game.save_writer.close()
                 break
             if key == ord('r'):
                 game.complete_attention_check()
             elif key != -1:
                 game.sound_manager.play("error")
-            draw_ui(stdscr, game)
+            render_frame(stdscr, game, key)
             continue
 
         if key != -1:
@@ -42586,6 +42966,7 @@ def main(stdscr):
                 time.sleep(0.18)
                 game.sound_manager.shutdown()
                 game.lan_manager.shutdown()
+                game.save_writer.close()
                 break
             elif key == ord('f'): game.feed()
             elif key == ord('p'): game.pet_action()
@@ -42662,6 +43043,8 @@ def main(stdscr):
                 draw_full_fact_screen(stdscr, game)
             elif key == ord('z'):
                 draw_full_portrait_screen(stdscr, game)
+            elif key == ord('j'):
+                toggle_frame_stats(game)
             elif key == ord('o'):
                 if game.active_pet:
                     game.active_pet.color = (game.active_pet.color % 7) + 1
@@ -42670,8 +43053,9 @@ def main(stdscr):
             else:
                 game.sound_manager.play("error")
 
-        draw_ui(stdscr, game)
-        if random.random() < 0.005: game.save_game()
+        render_frame(stdscr, game, key)
+        if random.random() < 0.005:
+            game.save_game()
 
 if __name__ == "__main__":
     curses.wrapper(main)
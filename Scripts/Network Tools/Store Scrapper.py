@@ -37,6 +37,7 @@ import random
 import shutil
 import signal
 import socket
+import sqlite3
 import hashlib
 import pathlib
 import zipfile
@@ -44,7 +45,9 @@ import threading
 import subprocess
 import traceback
 import importlib
+import zlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass, field, asdict
 from typing import Any, Dict, List, Optional, Set, Tuple
 from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
@@ -119,6 +122,12 @@ DEFAULT_STATE_SAVE_INTERVAL = 2.0
 DEFAULT_CONNECT_TIMEOUT = 6
 DEFAULT_READ_TIMEOUT = 18
 DEFAULT_TIMEOUT_STEP = 8
+DEFAULT_CATEGORY_WORKERS = 3
+DEFAULT_PER_HOST_CONCURRENCY = 8
+DEFAULT_PER_HOST_INTERVAL = 0.05
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+FRONTIER_FILE = "_frontier.sqlite3"
+CACHEABLE_MAX_BYTES = 4 * 1024 * 1024
 
 USER_AGENTS = [
     "Mozilla/5.0 (Linux; Android 13; Mobile) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Mobile Safari/537.36",
@@ -826,6 +835,275 @@ def input_yes_no(prompt: str, default: bool = True) -> bool:
     return value in {"y", "yes", "1", "true"}
 
 
+# ------------------------ frontier / ουρά εγγραφών ------------------------
+
+class HostThrottle:
+    def __init__(self, max_concurrent: int, min_interval: float) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.min_interval = max(0.0, float(min_interval))
+        self.active: Dict[str, int] = {}
+        self.next_at: Dict[str, float] = {}
+        self.cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = (urlparse(url).netloc or "").lower()
+        with self.cond:
+            while self.active.get(host, 0) >= self.max_concurrent:
+                self.cond.wait()
+            self.active[host] = self.active.get(host, 0) + 1
+            now = time.monotonic()
+            start_at = max(now, self.next_at.get(host, 0.0))
+            self.next_at[host] = start_at + self.min_interval
+        try:
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield
+        finally:
+            with self.cond:
+                self.active[host] -= 1
+                if self.active[host] <= 0:
+                    del self.active[host]
+                self.cond.notify_all()
+
+
+class OutputWriter:
+    # All metadata/text output goes through one background thread. Writes are
+    # batched (repeated rewrites of the same file collapse into one) and fsync
+    # happens only at checkpoints instead of after every file.
+    def __init__(self, checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, on_checkpoint=None) -> None:
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.checkpoint_interval = max(0.5, float(checkpoint_interval))
+        self.on_checkpoint = on_checkpoint
+        self.dirty: Set[str] = set()
+        self.last_checkpoint = time.time()
+        self.errors = 0
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def write_json(self, path: str, obj: Any) -> None:
+        self.queue.put(("write", path, json.dumps(obj, indent=2, ensure_ascii=False)))
+
+    def write_text(self, path: str, text: str) -> None:
+        self.queue.put(("write", path, text or ""))
+
+    def append_text(self, path: str, text: str) -> None:
+        self.queue.put(("append", path, text or ""))
+
+    def checkpoint(self) -> None:
+        done = threading.Event()
+        self.queue.put(("checkpoint", done, None))
+        done.wait()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+
+    def _apply(self, ops: List[Tuple[str, Any, Any]]) -> None:
+        last_write = {path: i for i, (kind, path, _) in enumerate(ops) if kind == "write"}
+        for i, (kind, path, data) in enumerate(ops):
+            if kind == "write" and last_write[path] != i:
+                continue
+            try:
+                with open(path, "w" if kind == "write" else "a", encoding="utf-8") as f:
+                    f.write(data)
+                self.dirty.add(path)
+            except OSError:
+                self.errors += 1
+
+    def _sync(self) -> None:
+        for path in self.dirty:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+        self.dirty.clear()
+        if self.on_checkpoint is not None:
+            try:
+                self.on_checkpoint()
+            except Exception:
+                self.errors += 1
+        self.last_checkpoint = time.time()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                item = self.queue.get(timeout=self.checkpoint_interval)
+            except queue.Empty:
+                item = ("tick", None, None)
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < 500:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(nxt)
+            ops: List[Tuple[str, Any, Any]] = []
+            waiters = []
+            stop = False
+            for entry in batch:
+                if entry is None:
+                    stop = True
+                elif entry[0] == "checkpoint":
+                    waiters.append(entry[1])
+                elif entry[0] in ("write", "append"):
+                    ops.append(entry)
+            self._apply(ops)
+            if waiters or stop or time.time() - self.last_checkpoint >= self.checkpoint_interval:
+                self._sync()
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+
+class CrawlFrontier:
+    # Persistent crawl state in SQLite: fetched URLs with their validators and
+    # cached bodies, discovered/saved products and finished categories.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, encoding TEXT,
+                content_type TEXT, body BLOB, file_path TEXT, fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS products (
+                key TEXT PRIMARY KEY, category TEXT, state TEXT, updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS categories (
+                url TEXT PRIMARY KEY, name TEXT, state TEXT, updated_at REAL
+            );
+            """
+        )
+        self.db.commit()
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def begin_run(self) -> bool:
+        resuming = self.get_meta("run_state") == "running"
+        with self.lock:
+            if not resuming:
+                self.db.execute("DELETE FROM products")
+                self.db.execute("DELETE FROM categories")
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('run_state', 'running')")
+            self.db.commit()
+        return resuming
+
+    def finish_run(self) -> None:
+        self.set_meta("run_state", "complete")
+        self.commit()
+
+    def conditional_headers(self, url: str, file_path: str = "") -> Dict[str, str]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, body IS NOT NULL, file_path FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return {}
+        etag, last_modified, has_body, stored_path = row
+        usable = (file_path and stored_path == file_path and os.path.exists(file_path)) or (not file_path and has_body)
+        if not usable:
+            return {}
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def cached_response(self, url: str) -> Optional[requests.Response]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT body, encoding, content_type FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = zlib.decompress(row[0])
+        resp.encoding = row[1] or None
+        resp.url = url
+        if row[2]:
+            resp.headers["Content-Type"] = row[2]
+        return resp
+
+    def remember(self, url: str, resp: requests.Response, file_path: str = "") -> None:
+        etag = resp.headers.get("ETag") or ""
+        last_modified = resp.headers.get("Last-Modified") or ""
+        if not etag and not last_modified:
+            return
+        body = None
+        if not file_path and len(resp.content) <= CACHEABLE_MAX_BYTES:
+            body = zlib.compress(resp.content, 6)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO urls (url, etag, last_modified, encoding, content_type, body, file_path, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, resp.encoding or "", resp.headers.get("Content-Type") or "",
+                 body, file_path or None, time.time()),
+            )
+
+    def mark_product(self, key: str, category: str, state: str) -> None:
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO products (key, category, state, updated_at) VALUES (?, ?, ?, ?)",
+                (key, category, state, time.time()),
+            )
+
+    def saved_product_keys(self) -> Set[str]:
+        with self.lock:
+            rows = self.db.execute("SELECT key FROM products WHERE state = 'saved'").fetchall()
+        return {row[0] for row in rows}
+
+    def recorded_product_keys(self) -> Set[str]:
+        # Every product whose discovery was written out ("found" or already "saved").
+        with self.lock:
+            rows = self.db.execute("SELECT key FROM products").fetchall()
+        return {row[0] for row in rows}
+
+    def mark_category(self, category: "CategoryRecord", state: str) -> None:
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO categories (url, name, state, updated_at) VALUES (?, ?, ?, ?)",
+                (canonicalize_url(category.url), category.name, state, time.time()),
+            )
+
+    def done_categories(self) -> Set[str]:
+        with self.lock:
+            rows = self.db.execute("SELECT url FROM categories WHERE state = 'done'").fetchall()
+        return {row[0] for row in rows}
+
+    def commit(self) -> None:
+        with self.lock:
+            self.db.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+
 # ------------------------------ ζωντανή κατάσταση ------------------------------
 
 class LiveStatus:
@@ -925,6 +1203,18 @@ class ProductRecord:
     extra: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class CategoryStream:
+    name: str
+    directory: str
+    products: List[ProductRecord] = field(default_factory=list)
+    seen_keys: Set[str] = field(default_factory=set)
+    futures: List[Any] = field(default_factory=list)
+    executor: Optional[ThreadPoolExecutor] = None
+    task_index: int = 0
+    saved: int = 0
+
+
 # ------------------------------- κύριος scraper -------------------------------
 
 class StoreScrapper:
@@ -952,6 +1242,7 @@ class StoreScrapper:
             "discovered_categories": 0,
             "discovered_products": 0,
             "downloaded_images": 0,
+            "not_modified": 0,
         }
         self.state_lock = threading.Lock()
         self.stats_lock = threading.Lock()
@@ -963,13 +1254,13 @@ class StoreScrapper:
         self.recorded_discovery_keys: Set[str] = set()
         self.requests_session = self._make_session()
         self.input_mode = self.detect_input_mode(self.base_url)
-        self._active_category_dir = ""
-        self._active_category_name = ""
-        self._active_category_products: List[ProductRecord] = []
-        self._active_category_seen_keys: Set[str] = set()
-        self._active_category_detail_futures = []
-        self._active_category_detail_executor = None
-        self._active_category_task_index = 0
+        self.frontier: Optional[CrawlFrontier] = None
+        self.writer: Optional[OutputWriter] = None
+        self.resuming = False
+        self.throttle = HostThrottle(
+            int(self.config.get("per_host_concurrency", DEFAULT_PER_HOST_CONCURRENCY)),
+            float(self.config.get("per_host_interval", DEFAULT_PER_HOST_INTERVAL)),
+        )
 
     # ---------------------------- συνεδρία/δίκτυο ----------------------------
 
@@ -1055,21 +1346,32 @@ class StoreScrapper:
             headers["Referer"] = referer
         if accept_json:
             headers["Accept"] = "application/json,text/plain,*/*"
+        conditional = self.frontier.conditional_headers(url) if self.frontier else {}
         for attempt in range(1, self.config["retries"] + 1):
             try:
-                resp = self._get_session().get(
-                    url,
-                    timeout=self.request_timeout(attempt, "json" if accept_json else "html"),
-                    allow_redirects=True,
-                    headers=headers,
-                )
+                with self.throttle.slot(url):
+                    resp = self._get_session().get(
+                        url,
+                        timeout=self.request_timeout(attempt, "json" if accept_json else "html"),
+                        allow_redirects=True,
+                        headers={**headers, **conditional},
+                    )
                 self.bump_stat("fetched_pages", 1)
                 self.status.set(http_code=str(resp.status_code))
+                if resp.status_code == 304 and conditional:
+                    cached = self.frontier.cached_response(url)
+                    if cached is not None:
+                        self.bump_stat("not_modified", 1)
+                        return cached
+                    conditional = {}
+                    continue
                 if resp.status_code >= 400:
                     if attempt == self.config["retries"]:
                         return resp
                     human_delay(0.6, 1.2)
                     continue
+                if self.frontier:
+                    self.frontier.remember(url, resp)
                 return resp
             except Exception:
                 if attempt == self.config["retries"]:
@@ -1589,12 +1891,47 @@ class StoreScrapper:
         ensure_dir(self.output_root)
         self.status.set(store=store_folder)
         print(f"[+] Αποθήκευση στο: {self.output_root}")
+        self.frontier = CrawlFrontier(os.path.join(self.output_root, FRONTIER_FILE))
+        self.resuming = self.frontier.begin_run()
+        if self.resuming:
+            self.saved_product_keys.update(self.frontier.saved_product_keys())
+            self.recorded_discovery_keys.update(self.frontier.recorded_product_keys())
+            print(f"[+] Συνέχεια διακοπτόμενης εκτέλεσης: {len(self.saved_product_keys)} προϊόντα είναι ήδη αποθηκευμένα")
+        self.writer = OutputWriter(
+            float(self.config.get("checkpoint_interval", DEFAULT_CHECKPOINT_INTERVAL)),
+            on_checkpoint=self.frontier.commit,
+        )
+
+    def out_json(self, obj: Any, path: str) -> None:
+        if self.writer is not None:
+            self.writer.write_json(path, obj)
+        else:
+            json_dump_sync(obj, path)
+
+    def out_text(self, path: str, text: str) -> None:
+        if self.writer is not None:
+            self.writer.write_text(path, text)
+        else:
+            write_text_sync(path, text)
+
+    def out_append(self, path: str, text: str) -> None:
+        if self.writer is not None:
+            self.writer.append_text(path, text)
+        else:
+            append_text_sync(path, text)
+
+    def close_outputs(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.frontier is not None:
+            self.frontier.close()
+            self.frontier = None
 
     # ---------------------------- product extraction ---------------------------
 
     def scrape_category(self, category: CategoryRecord) -> int:
-        with self.stats_lock:
-            saved_before = int(self.stats.get("saved_products", 0))
+        saved = 0
         self.status.set(phase="scrape-category", category=category.name, page=0)
         category_dir = ensure_dir(os.path.join(self.output_root, slugify(category.name)))
         category_state_path = os.path.join(category_dir, "_category_state.json")
@@ -1609,8 +1946,8 @@ class StoreScrapper:
             # Strategy 2: crawl listing pages + seeds
             self.generic_products_from_category(category, category_dir)
 
-            category_products = list(self._active_category_products)
-            json_dump(
+            category_products = list(self._stream().products)
+            self.out_json(
                 {
                     "category": asdict(category),
                     "discovered_products": [asdict(p) for p in category_products],
@@ -1620,29 +1957,35 @@ class StoreScrapper:
             )
             self.status.set(products_found=int(self.stats.get("discovered_products", 0)))
             self.finish_category_stream()
+            saved = self._stream().saved
+            if self.frontier is not None and not STOPPER.stop:
+                self.frontier.mark_category(category, "done")
+            if self.writer is not None:
+                self.writer.checkpoint()
         finally:
             self.reset_category_stream()
+        return saved
 
-        with self.stats_lock:
-            return int(self.stats.get("saved_products", 0)) - saved_before
+    def _stream(self) -> Optional[CategoryStream]:
+        # Each category runs on its own scheduler thread, so its stream lives in thread-local state.
+        return getattr(self._thread_local, "stream", None)
 
     def begin_category_stream(self, category: CategoryRecord, category_dir: str) -> None:
-        self._active_category_dir = category_dir
-        self._active_category_name = category.name
-        self._active_category_products = []
-        self._active_category_seen_keys = set()
-        self._active_category_detail_futures = []
-        self._active_category_task_index = 0
         workers = max(1, int(self.config.get("product_workers", DEFAULT_PRODUCT_WORKERS)))
-        self._active_category_detail_executor = ThreadPoolExecutor(max_workers=workers)
+        self._thread_local.stream = CategoryStream(
+            name=category.name,
+            directory=category_dir,
+            executor=ThreadPoolExecutor(max_workers=workers),
+        )
 
     def category_stream_limit_reached(self) -> bool:
+        stream = self._stream()
         wanted = int(self.config.get("max_products_per_category", 0) or 0)
-        return wanted > 0 and len(self._active_category_products) >= wanted
+        return stream is not None and wanted > 0 and len(stream.products) >= wanted
 
     def capture_found_product(self, product: ProductRecord) -> bool:
-        category_dir = self._active_category_dir
-        if not category_dir or STOPPER.stop:
+        stream = self._stream()
+        if stream is None or not stream.directory or STOPPER.stop:
             return False
         key = canonicalize_url(product.url) if product.url else clean_text(product.name).lower()
         if not key:
@@ -1653,54 +1996,47 @@ class StoreScrapper:
                 return False
         task_index = 0
         with self.discovery_lock:
-            if key in self._active_category_seen_keys:
+            if key in stream.seen_keys:
                 return False
             if self.category_stream_limit_reached():
                 return False
-            self._active_category_seen_keys.add(key)
-            self._active_category_products.append(product)
-            self._active_category_task_index += 1
-            task_index = self._active_category_task_index
-        self.record_discovered_product(product, category_dir)
-        executor = self._active_category_detail_executor
-        if executor is not None:
-            self._active_category_detail_futures.append(
-                executor.submit(self._process_product_worker, product, task_index, category_dir)
+            stream.seen_keys.add(key)
+            stream.products.append(product)
+            stream.task_index += 1
+            task_index = stream.task_index
+        self.record_discovered_product(product, stream.directory)
+        if stream.executor is not None:
+            stream.futures.append(
+                stream.executor.submit(self._process_product_worker, product, task_index, stream.directory)
             )
         return True
 
     def finish_category_stream(self) -> None:
-        executor = self._active_category_detail_executor
-        futures = list(self._active_category_detail_futures)
-        if executor is None:
+        stream = self._stream()
+        if stream is None or stream.executor is None:
             return
         try:
-            for future in as_completed(futures):
+            for future in as_completed(list(stream.futures)):
                 try:
-                    future.result()
+                    if future.result():
+                        stream.saved += 1
                 except Exception:
                     self.bump_stat("errors", 1)
                     self.status.inc("errors", 1)
         finally:
-            executor.shutdown(wait=True, cancel_futures=False)
-            self._active_category_detail_executor = None
-            self._active_category_detail_futures = []
+            stream.executor.shutdown(wait=True, cancel_futures=False)
+            stream.executor = None
+            stream.futures = []
 
     def reset_category_stream(self) -> None:
-        executor = self._active_category_detail_executor
-        if executor is not None:
-            executor.shutdown(wait=False, cancel_futures=False)
-        self._active_category_dir = ""
-        self._active_category_name = ""
-        self._active_category_products = []
-        self._active_category_seen_keys = set()
-        self._active_category_detail_futures = []
-        self._active_category_detail_executor = None
-        self._active_category_task_index = 0
-
-    def _process_product_worker(self, product: ProductRecord, idx: int, category_dir: str) -> None:
+        stream = self._stream()
+        if stream is not None and stream.executor is not None:
+            stream.executor.shutdown(wait=False, cancel_futures=False)
+        self._thread_local.stream = None
+
+    def _process_product_worker(self, product: ProductRecord, idx: int, category_dir: str) -> bool:
         if STOPPER.stop:
-            return
+            return False
         self.status.set(phase="scrape-product", page=idx, last_item=product.name, current_url=product.url)
         guessed_sources = {"code-guess", "path-guess", "generated-guess"}
         try:
@@ -1711,7 +2047,7 @@ class StoreScrapper:
             elif product.source not in guessed_sources and self.is_valid_product_record(product):
                 to_save = product
             if to_save is not None:
-                self.save_product(to_save)
+                return self.save_product(to_save)
         except Exception:
             self.bump_stat("errors", 1)
             self.status.inc("errors", 1)
@@ -1719,9 +2055,10 @@ class StoreScrapper:
             write_text(err_path, traceback.format_exc())
             try:
                 if product.source not in guessed_sources and self.is_valid_product_record(product):
-                    self.save_product(product)
+                    return self.save_product(product)
             except Exception:
                 pass
+        return False
 
 
     def shopify_products_from_category(self, category: CategoryRecord, category_dir: str) -> List[ProductRecord]:
@@ -2364,16 +2701,24 @@ class StoreScrapper:
         if not url:
             return None
         try:
-            headers = {"Referer": self.root_url}
+            ext = ext_from_url(url, default=".jpg")
+            path = os.path.join(folder, f"image_{index:03d}{ext}")
+            conditional = self.frontier.conditional_headers(canonicalize_url(url), path) if self.frontier else {}
+            headers = {"Referer": self.root_url, **conditional}
             last_error = None
             for attempt in range(1, max(2, int(self.config.get("retries", 2))) + 1):
                 try:
-                    resp = self._get_session().get(
-                        canonicalize_url(url),
-                        timeout=self.request_timeout(attempt, "image"),
-                        allow_redirects=True,
-                        headers=headers,
-                    )
+                    with self.throttle.slot(url):
+                        resp = self._get_session().get(
+                            canonicalize_url(url),
+                            timeout=self.request_timeout(attempt, "image"),
+                            allow_redirects=True,
+                            headers=headers,
+                        )
+                    if resp is not None and resp.status_code == 304 and conditional:
+                        self.bump_stat("not_modified", 1)
+                        self.bump_stat("downloaded_images", 1)
+                        return path
                     if resp is None or resp.status_code >= 400:
                         last_error = None
                         if attempt >= max(2, int(self.config.get("retries", 2))):
@@ -2386,10 +2731,10 @@ class StoreScrapper:
                         raise
             if resp is None or resp.status_code >= 400:
                 return None
-            ext = ext_from_url(url, default=".jpg")
-            path = os.path.join(folder, f"image_{index:03d}{ext}")
             with open(path, "wb") as f:
                 f.write(resp.content)
+            if self.frontier:
+                self.frontier.remember(canonicalize_url(url), resp, path)
             self.bump_stat("downloaded_images", 1)
             return path
         except Exception:
@@ -2412,12 +2757,12 @@ class StoreScrapper:
             discovery_metadata["discovered_at"] = discovered_at
             discovery_metadata["store"] = self.store_name
             discovery_metadata["output_folder"] = product_folder
-            json_dump_sync(discovery_metadata, os.path.join(product_folder, "_discovered.json"))
-            write_text_sync(
+            self.out_json(discovery_metadata, os.path.join(product_folder, "_discovered.json"))
+            self.out_text(
                 os.path.join(product_folder, "FOUND.txt"),
                 f"Εντοπίστηκε: {discovered_at}\nΌνομα: {product.name}\nURL: {product.url}\nΚατηγορία: {product.category}\nΠηγή: {product.source}\nΤιμή: {product.price_text or product.price}\n",
             )
-            append_text_sync(
+            self.out_append(
                 os.path.join(category_dir, "_discovered_products.jsonl"),
                 json.dumps(
                     {
@@ -2433,22 +2778,24 @@ class StoreScrapper:
                     ensure_ascii=False,
                 ) + "\n",
             )
-            append_text_sync(
+            self.out_append(
                 os.path.join(category_dir, "_discovered_products.txt"),
                 f"[{discovered_at}] {product.name} | {product.url} | {product.price_text or product.price}\n",
             )
+            if self.frontier is not None:
+                self.frontier.mark_product(key, product.category, "found")
 
         self.bump_stat("discovered_products", 1)
         self.status.inc("products_found", 1)
         self.status.set(last_item=product.name)
         self.save_global_state(force=True)
 
-    def save_product(self, product: ProductRecord) -> None:
+    def save_product(self, product: ProductRecord) -> bool:
         key = canonicalize_url(product.url or product.name)
         with self.state_lock:
             if key in self.saved_product_keys:
                 self.bump_stat("skipped_duplicates", 1)
-                return
+                return False
             self.saved_product_keys.add(key)
 
         try:
@@ -2459,7 +2806,7 @@ class StoreScrapper:
             metadata["saved_at"] = now_ts()
             metadata["store"] = self.store_name
             metadata["output_folder"] = folder
-            json_dump_sync(metadata, os.path.join(folder, "metadata.json"))
+            self.out_json(metadata, os.path.join(folder, "metadata.json"))
 
             summary = []
             summary.append(f"Όνομα: {product.name}")
@@ -2472,8 +2819,8 @@ class StoreScrapper:
             summary.append("")
             summary.append("Περιγραφή:")
             summary.append(product.description or "")
-            write_text_sync(os.path.join(folder, "summary.txt"), "\n".join(summary).strip() + "\n")
-            write_text_sync(os.path.join(folder, "description.txt"), (product.description or "") + "\n")
+            self.out_text(os.path.join(folder, "summary.txt"), "\n".join(summary).strip() + "\n")
+            self.out_text(os.path.join(folder, "description.txt"), (product.description or "") + "\n")
 
             max_images = self.config["max_images_per_product"]
             image_urls = unique_keep_order(product.images)
@@ -2504,7 +2851,7 @@ class StoreScrapper:
                             image_results[idx] = saved_path
                     downloaded = [image_results[i] for i in sorted(image_results)]
 
-            json_dump_sync(
+            self.out_json(
                 {
                     "downloaded_images": downloaded,
                     "source_image_urls": image_urls,
@@ -2513,11 +2860,14 @@ class StoreScrapper:
                 os.path.join(folder, "images.json"),
             )
 
+            if self.frontier is not None:
+                self.frontier.mark_product(key, product.category, "saved")
             self.bump_stat("saved_products", 1)
             self.status.inc("saved", 1)
             self.status.set(last_item=product.name)
             self.save_global_state(force=True)
             print(f"[+] Αποθηκεύτηκε προϊόν: {product.name}")
+            return True
         except Exception:
             with self.state_lock:
                 self.saved_product_keys.discard(key)
@@ -2540,9 +2890,10 @@ class StoreScrapper:
                 "platform": sorted(self.platform),
                 "stats": dict(self.stats),
                 "notes": list(self.discovery_notes),
+                "resumed": self.resuming,
                 "timestamp": now_ts(),
             }
-            json_dump_sync(snapshot, os.path.join(self.output_root, "_run_state.json"))
+            self.out_json(snapshot, os.path.join(self.output_root, "_run_state.json"))
             self.last_state_save = time.time()
 
     # --------------------------------- run ------------------------------------
@@ -2610,18 +2961,42 @@ class StoreScrapper:
                 if not selected_categories:
                     selected_categories = [CategoryRecord(name="Όλα τα Προϊόντα", url=self.base_url, source="fallback-home")]
 
-                for idx, category in enumerate(selected_categories, start=1):
-                    if STOPPER.stop:
-                        break
-                    print(f"\n[+] Γίνεται scrape της κατηγορίας {idx}/{len(selected_categories)}: {category.name}")
-                    saved_count = self.scrape_category(category)
-                    print(f"[+] Η κατηγορία ολοκληρώθηκε: {category.name} | αποθηκεύτηκαν {saved_count} προϊόντα")
+                done_urls = self.frontier.done_categories() if self.resuming and self.frontier else set()
+                pending = [c for c in selected_categories if canonicalize_url(c.url) not in done_urls]
+                if len(pending) < len(selected_categories):
+                    print(f"[+] Παραλείπονται {len(selected_categories) - len(pending)} κατηγορίες που ολοκληρώθηκαν σε προηγούμενη εκτέλεση")
+                self.scrape_categories(pending)
 
             self.save_global_state(force=True)
             self.write_final_report()
+            if self.frontier is not None and not STOPPER.stop:
+                self.frontier.finish_run()
         finally:
             self.status.set(phase="done")
             self.status.stop()
+            self.close_outputs()
+
+    def scrape_categories(self, categories: List[CategoryRecord]) -> None:
+        if not categories:
+            return
+        total = len(categories)
+
+        def task(idx: int, category: CategoryRecord) -> None:
+            if STOPPER.stop:
+                return
+            print(f"\n[+] Γίνεται scrape της κατηγορίας {idx}/{total}: {category.name}")
+            saved_count = self.scrape_category(category)
+            print(f"[+] Η κατηγορία ολοκληρώθηκε: {category.name} | αποθηκεύτηκαν {saved_count} προϊόντα")
+
+        workers = max(1, min(int(self.config.get("category_workers", DEFAULT_CATEGORY_WORKERS)), total))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(task, idx, category) for idx, category in enumerate(categories, start=1)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    self.bump_stat("errors", 1)
+                    self.status.inc("errors", 1)
 
     def write_final_report(self) -> None:
         report = []
@@ -2636,7 +3011,7 @@ class StoreScrapper:
         report.append("Σημειώσεις:")
         for note in self.discovery_notes:
             report.append(f"- {note}")
-        write_text(os.path.join(self.output_root, "FINAL_REPORT.txt"), "\n".join(report) + "\n")
+        self.out_text(os.path.join(self.output_root, "FINAL_REPORT.txt"), "\n".join(report) + "\n")
 
 
 # ---------------------------------- cli/ui -----------------------------------
@@ -2706,6 +3081,10 @@ def auto_build_config(url: str) -> Dict[str, Any]:
         "max_total_urls": 3000,
         "max_sitemap_urls": 5000,
         "state_save_interval": 0.0,
+        "category_workers": 1 if mode == "category" else DEFAULT_CATEGORY_WORKERS,
+        "per_host_concurrency": max(DEFAULT_PER_HOST_CONCURRENCY, product_workers),
+        "per_host_interval": DEFAULT_PER_HOST_INTERVAL,
+        "checkpoint_interval": DEFAULT_CHECKPOINT_INTERVAL,
     }
 
 
@@ -3,6 +3,7 @@
 import os
 import re
 import sys
+import argparse
 import time
 import json
 import urllib.request
@@ -23,10 +24,15 @@ import threading
 import subprocess
 import secrets
 from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional, List, Dict, Tuple, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import hashlib
 import hmac
+import bisect
+import heapq
+import unicodedata
+from collections import deque
 import ssl
 import tempfile
 import io
@@ -175,6 +181,14 @@ try:
 except Exception:
     qrcode = None
 
+# Optional: Pillow downsizes avatars/previews. Without it the original image is
+# served through the same cached, content-addressed path.
+try:
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:
+    Image = None
+    ImageOps = None
+
 # ---------------------------
 # Paths / logging
 # ---------------------------
@@ -341,6 +355,7 @@ TMP_UPLOAD_DIR = os.path.join(DATA_DIR, "tmp_uploads")    # temporary plain uplo
 PFP_DIR = os.path.join(DATA_DIR, "profile_pics_enc")     # user profile pictures (plaintext)
 DM_FILES_DIR = os.path.join(DATA_DIR, "dm_files_enc")    # DM file exchange (plaintext)
 DISC_FILES_DIR = os.path.join(DATA_DIR, "discussion_files_enc")  # Discussion attachments (plaintext)
+BLOB_DIR = os.path.join(DATA_DIR, "blobs")  # Content-addressed attachment store (see blob_adopt_file)
 FACE_DETECTOR_DIR = _choose_face_detector_output_dir()
 
 DB_PATH = os.path.join(DATA_DIR, "butsystem.db")
@@ -378,7 +393,7 @@ def _migrate_legacy_data():
 
 _migrate_legacy_data()
 
-for d in (BASE_DIR, DATA_DIR, STORAGE_DIR, KEYS_DIR, LOG_DIR, TOR_DIR, ATT_DIR, PFP_DIR, DM_FILES_DIR, DISC_FILES_DIR, FACE_DETECTOR_DIR):
+for d in (BASE_DIR, DATA_DIR, STORAGE_DIR, KEYS_DIR, LOG_DIR, TOR_DIR, ATT_DIR, PFP_DIR, DM_FILES_DIR, DISC_FILES_DIR, BLOB_DIR, FACE_DETECTOR_DIR):
     os.makedirs(d, exist_ok=True)
 
 # ---------------------------
@@ -467,6 +482,216 @@ def _activate_termux_error_monitor():
         print("ERROR MONITOR: No errors detected during startup.")
     sys.stdout.flush()
 
+# ---------------------------
+# Metrics
+# ---------------------------
+# Requests are timed by _MetricsMiddleware (so streamed bodies are included),
+# SQLite statements by the connection class db_connect() uses, everything else
+# through metric_inc(). Read on /admin/metrics and /admin/metrics/prometheus.
+
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+METRICS_SAMPLES = 512  # recent latencies kept per endpoint for p50/p95/p99
+_METRICS_LOCK = threading.Lock()
+_METRICS_STARTED = time.time()
+_METRICS_COUNTERS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+_METRICS_ENDPOINTS: Dict[str, Dict[str, Any]] = {}
+_METRICS_BACKGROUND_DB = [0, 0.0]  # statements run outside a request
+_METRICS_TLS = threading.local()
+
+
+def metric_inc(name: str, n: int = 1, **labels) -> None:
+    """Add n to the counter `name` with the given labels."""
+    key = (name, tuple(sorted(labels.items())))
+    with _METRICS_LOCK:
+        _METRICS_COUNTERS[key] = _METRICS_COUNTERS.get(key, 0) + n
+
+
+def _metrics_db(seconds: float) -> None:
+    acc = getattr(_METRICS_TLS, "db", None)
+    if acc is not None:
+        acc[0] += 1
+        acc[1] += seconds
+        return
+    with _METRICS_LOCK:
+        _METRICS_BACKGROUND_DB[0] += 1
+        _METRICS_BACKGROUND_DB[1] += seconds
+
+
+class _MeteredCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _metrics_db(time.perf_counter() - t0)
+
+    def executemany(self, sql, seq_of_parameters):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _metrics_db(time.perf_counter() - t0)
+
+    def executescript(self, sql_script):
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _metrics_db(time.perf_counter() - t0)
+
+
+class _MeteredConnection(sqlite3.Connection):
+    """Connection whose statements are counted and timed per request."""
+
+    def cursor(self, factory=_MeteredCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute* bypass an overridden cursor(), so route them explicitly.
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def metrics_observe_request(endpoint: str, status: str, seconds: float, nbytes: int, db) -> None:
+    with _METRICS_LOCK:
+        st = _METRICS_ENDPOINTS.get(endpoint)
+        if st is None:
+            st = _METRICS_ENDPOINTS[endpoint] = {
+                "count": 0, "sum": 0.0, "bytes": 0, "db_queries": 0, "db_seconds": 0.0, "status": {},
+                "buckets": [0] * (len(METRICS_BUCKETS) + 1), "samples": deque(maxlen=METRICS_SAMPLES),
+            }
+        st["count"] += 1
+        st["sum"] += seconds
+        st["bytes"] += int(nbytes)
+        st["db_queries"] += db[0]
+        st["db_seconds"] += db[1]
+        code = f"{(status or '5')[0]}xx"
+        st["status"][code] = st["status"].get(code, 0) + 1
+        st["buckets"][bisect.bisect_left(METRICS_BUCKETS, seconds)] += 1
+        st["samples"].append(seconds)
+
+
+def metrics_reset() -> None:
+    global _METRICS_STARTED
+    with _METRICS_LOCK:
+        _METRICS_COUNTERS.clear()
+        _METRICS_ENDPOINTS.clear()
+        _METRICS_BACKGROUND_DB[:] = [0, 0.0]
+        _METRICS_STARTED = time.time()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def metrics_snapshot() -> Dict[str, Any]:
+    """Copy of the current numbers, endpoints sorted by total time spent."""
+    with _METRICS_LOCK:
+        endpoints = {k: dict(v, samples=sorted(v["samples"]), buckets=list(v["buckets"]), status=dict(v["status"]))
+                     for k, v in _METRICS_ENDPOINTS.items()}
+        counters = dict(_METRICS_COUNTERS)
+        background = list(_METRICS_BACKGROUND_DB)
+        started = _METRICS_STARTED
+    rows = []
+    for name, st in endpoints.items():
+        n = max(1, st["count"])
+        rows.append({
+            "endpoint": name,
+            "count": st["count"],
+            "errors": st["status"].get("5xx", 0),
+            "status": st["status"],
+            "buckets": st["buckets"],
+            "sum": st["sum"],
+            "p50_ms": _percentile(st["samples"], 0.50) * 1000,
+            "p95_ms": _percentile(st["samples"], 0.95) * 1000,
+            "p99_ms": _percentile(st["samples"], 0.99) * 1000,
+            "avg_ms": st["sum"] / n * 1000,
+            "bytes": st["bytes"],
+            "db_queries": st["db_queries"],
+            "db_seconds": st["db_seconds"],
+            "db_per_req": st["db_queries"] / n,
+            "db_ms_per_req": st["db_seconds"] / n * 1000,
+        })
+    rows.sort(key=lambda r: r["sum"], reverse=True)
+    return {
+        "endpoints": rows,
+        "counters": sorted(counters.items()),
+        "background_db": background,
+        "uptime": time.time() - started,
+    }
+
+
+def _prom_escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in labels) + "}"
+
+
+def metrics_prometheus_text() -> str:
+    """Prometheus text exposition (format 0.0.4) of metrics_snapshot()."""
+    snap = metrics_snapshot()
+    out = []
+
+    def family(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    family("butsystem_uptime_seconds", "gauge", "Seconds since start or the last metrics reset.")
+    out.append(f"butsystem_uptime_seconds {snap['uptime']:.3f}")
+    family("butsystem_threads", "gauge", "Live Python threads.")
+    out.append(f"butsystem_threads {threading.active_count()}")
+
+    eps = snap["endpoints"]
+    family("butsystem_http_requests_total", "counter", "Requests by endpoint and status class.")
+    for r in eps:
+        for code, n in sorted(r["status"].items()):
+            out.append(f"butsystem_http_requests_total{_prom_labels((('endpoint', r['endpoint']), ('code', code)))} {n}")
+    family("butsystem_http_request_duration_seconds", "histogram", "Time from request start until the response body was sent.")
+    for r in eps:
+        cum = 0
+        for le, n in zip(METRICS_BUCKETS, r["buckets"]):
+            cum += n
+            out.append(f"butsystem_http_request_duration_seconds_bucket{_prom_labels((('endpoint', r['endpoint']), ('le', repr(le))))} {cum}")
+        out.append(f"butsystem_http_request_duration_seconds_bucket{_prom_labels((('endpoint', r['endpoint']), ('le', '+Inf')))} {r['count']}")
+        out.append(f"butsystem_http_request_duration_seconds_sum{_prom_labels((('endpoint', r['endpoint']),))} {r['sum']:.6f}")
+        out.append(f"butsystem_http_request_duration_seconds_count{_prom_labels((('endpoint', r['endpoint']),))} {r['count']}")
+    family("butsystem_http_response_bytes_total", "counter", "Response body bytes sent.")
+    for r in eps:
+        out.append(f"butsystem_http_response_bytes_total{_prom_labels((('endpoint', r['endpoint']),))} {r['bytes']}")
+    family("butsystem_db_queries_total", "counter", "SQLite statements executed (endpoint=\"<background>\" outside requests).")
+    for r in eps:
+        out.append(f"butsystem_db_queries_total{_prom_labels((('endpoint', r['endpoint']),))} {r['db_queries']}")
+    out.append(f'butsystem_db_queries_total{{endpoint="<background>"}} {snap["background_db"][0]}')
+    family("butsystem_db_query_seconds_total", "counter", "Time spent executing SQLite statements.")
+    for r in eps:
+        out.append(f"butsystem_db_query_seconds_total{_prom_labels((('endpoint', r['endpoint']),))} {r['db_seconds']:.6f}")
+    out.append(f'butsystem_db_query_seconds_total{{endpoint="<background>"}} {snap["background_db"][1]:.6f}')
+
+    seen = set()
+    for (name, labels), n in snap["counters"]:
+        if name not in seen:
+            seen.add(name)
+            family(name, "counter", _METRIC_HELP.get(name, name))
+        out.append(f"{name}{_prom_labels(labels)} {n}")
+    return "\n".join(out) + "\n"
+
+
+_METRIC_HELP = {
+    "butsystem_aes_operations_total": "AES-GCM encrypt/decrypt calls by operation.",
+    "butsystem_cache_requests_total": "Cache lookups by cache and result.",
+}
+
 # ---------------------------
 # Crypto helpers (TEXT encryption only; binary files stored plaintext)
 # ---------------------------
@@ -506,6 +731,7 @@ MASTER_KEY = load_or_create_master_key()
 
 def aesgcm_encrypt_stream(src_fp, dst_path: str):
     """File format: MAGIC || NONCE || TAG || CIPHERTEXT"""
+    metric_inc("butsystem_aes_operations_total", op="encrypt_stream")
     nonce = os.urandom(NONCE_LEN)
     cipher = Cipher(algorithms.AES(MASTER_KEY), modes.GCM(nonce))
     encryptor = cipher.encryptor()
@@ -646,6 +872,7 @@ Args:
 Returns:
     Varies.
 """
+    metric_inc("butsystem_aes_operations_total", op="decrypt_stream")
     with open(src_path, "rb") as f:
         hdr = f.read(HDR_LEN)
         if len(hdr) != HDR_LEN or hdr[:len(MAGIC)] != MAGIC:
@@ -680,6 +907,7 @@ Args:
 Returns:
     Varies.
 """
+    metric_inc("butsystem_aes_operations_total", op="encrypt_text")
     nonce = os.urandom(NONCE_LEN)
     cipher = Cipher(algorithms.AES(MASTER_KEY), modes.GCM(nonce))
     enc = cipher.encryptor()
@@ -700,6 +928,7 @@ Args:
 Returns:
     Varies.
 """
+    metric_inc("butsystem_aes_operations_total", op="decrypt_text")
     blob = base64.urlsafe_b64decode(blob_b64.encode("ascii"))
     nonce = blob[:NONCE_LEN]
     tag = blob[NONCE_LEN:NONCE_LEN+TAG_LEN]
@@ -723,7 +952,7 @@ This docstring was expanded to make future maintenance easier.
 Returns:
     Varies.
 """
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=_MeteredConnection)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
@@ -987,6 +1216,10 @@ Returns:
         FOREIGN KEY(dm_id) REFERENCES dm_messages(id) ON DELETE CASCADE
     )
     """)
+    # Chat history pages are keyset scans per direction; attachments are looked up per page.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_dm_messages_pair ON dm_messages(sender, recipient, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_dm_files_dm ON dm_files(dm_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_dm_voice_dm ON dm_voice(dm_id)")
 
     # WebRTC call signaling (simple polling; requires HTTPS for camera/mic in browsers)
     cur.execute("""
@@ -1052,6 +1285,8 @@ Returns:
         FOREIGN KEY(gm_id) REFERENCES group_messages(id) ON DELETE CASCADE
     )
     """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_group_messages_group ON group_messages(group_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_group_voice_gm ON group_voice(gm_id)")
 
     
     # Live location sharing (opt-in)
@@ -1158,6 +1393,37 @@ Returns:
     )
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_file_activity_owner_id ON file_activity(owner, id DESC)")
+
+    # Downscaled image copies (see image_derivative); files live in THUMB_DIR.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS image_derivatives (
+        digest TEXT NOT NULL,
+        px INTEGER NOT NULL,
+        src_path TEXT NOT NULL,
+        bytes INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY(digest, px, src_path)
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_image_derivatives_src ON image_derivatives(src_path)")
+
+    # Shared attachment bytes keyed by SHA-256; a blob lives while any blob_refs row points at it.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS blob_refs (
+        kind TEXT NOT NULL,
+        ref_id INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY(kind, ref_id)
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_blob_refs_digest ON blob_refs(digest)")
     conn.commit()
     conn.close()
 
@@ -1215,6 +1481,7 @@ def set_user_prefs(username: str, accent_key: str, font_key: str, ui_theme_key:
         conn.close()
     except Exception:
         pass
+    invalidate_user_ctx(username, keys=("prefs",))
 
 
 def prefs_css(prefs: Dict[str, str]) -> str:
@@ -1455,6 +1722,65 @@ class _LoopbackProxyFix:
         return self.app(environ, start_response)
 
 app.wsgi_app = _LoopbackProxyFix(app.wsgi_app)
+
+
+class _MeteredBody:
+    """Response iterable that records the request once the server has sent it."""
+
+    def __init__(self, body, environ, status, t0: float, db):
+        self.body = body
+        self.environ = environ
+        self.status = status
+        self.t0 = t0
+        self.db = db
+        self.nbytes = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.nbytes += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self.body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            if getattr(_METRICS_TLS, "db", None) is self.db:
+                _METRICS_TLS.db = None
+            metrics_observe_request(self.environ.get("butsystem.endpoint") or "<unmatched>", self.status[0],
+                                    time.perf_counter() - self.t0, self.nbytes, self.db)
+
+
+class _MetricsMiddleware:
+    def __init__(self, wsgi_app):
+        self.app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        t0 = time.perf_counter()
+        db = _METRICS_TLS.db = [0, 0.0]
+        status = ["500"]
+
+        def _start_response(st, headers, exc_info=None):
+            status[0] = str(st)[:3]
+            return start_response(st, headers, exc_info)
+
+        try:
+            body = self.app(environ, _start_response)
+        except BaseException:
+            _METRICS_TLS.db = None
+            metrics_observe_request(environ.get("butsystem.endpoint") or "<unmatched>", "500", time.perf_counter() - t0, 0, db)
+            raise
+        return _MeteredBody(body, environ, status, t0, db)
+
+
+app.wsgi_app = _MetricsMiddleware(app.wsgi_app)
+
+
+@app.before_request
+def _metrics_tag_endpoint():
+    # Registered before the other hooks so requests they reject are still attributed.
+    request.environ["butsystem.endpoint"] = request.endpoint or "<unmatched>"
 app.secret_key = load_or_create_session_key()
 app.config.update(
     SESSION_COOKIE_HTTPONLY=True,
@@ -1826,7 +2152,8 @@ Returns:
             "settings_appearance_page", "admin_panel", "admin_logs", "profiler", "news",
             "face_detector", "reports", "files", "locations_page"
         }
-        if is_logged_in() or (request.endpoint in sensitive_endpoints):
+        # Versioned thumbnails/avatars (send_image_variant) keep their private cache policy.
+        if (is_logged_in() or (request.endpoint in sensitive_endpoints)) and not getattr(g, "cacheable_media", False):
             resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, private, max-age=0"
             resp.headers["Pragma"] = "no-cache"
             resp.headers["Expires"] = "0"
@@ -3177,6 +3504,12 @@ Returns:
     except Exception:
         return resp
 
+def _user_logout_at(username: str) -> Optional[str]:
+    conn = db_connect()
+    row = conn.execute("SELECT logout_at FROM users WHERE username=?", (username,)).fetchone()
+    conn.close()
+    return row["logout_at"] if row else None
+
 def login_required(fn):
     """login_required.
 
@@ -3212,10 +3545,8 @@ Returns:
             u = current_user()
             login_at = session.get("login_at")
             if u and login_at:
-                conn = db_connect()
-                row = conn.execute("SELECT logout_at FROM users WHERE username=?", (u,)).fetchone()
-                conn.close()
-                if row and row["logout_at"] and row["logout_at"] > login_at:
+                logout_at = user_ctx_get(u, "logout_at", _user_logout_at)
+                if logout_at and logout_at > login_at:
                     session.pop("u", None)
                     session.pop("login_at", None)
                     flash("You were signed out by admin.")
@@ -3241,6 +3572,7 @@ def privacy_panic_active() -> bool:
 def privacy_panic():
     session.pop("privacy_panic_until", None)
     session.modified = True
+    search_index_drop(current_user())
     try:
         log_user_action("privacy_panic", detail="blur_sensitive_content", username=current_user())
     except Exception:
@@ -3492,6 +3824,7 @@ Returns:
     sql = f"UPDATE profiles SET {', '.join(set_parts)} WHERE username=?"
     conn.execute(sql, tuple(params))
     conn.commit()
+    invalidate_user_ctx(username, keys=("profile",))
     
     # Keep a Profiler entry automatically mirrored from "My Profile".
     try:
@@ -3510,6 +3843,8 @@ def set_profile_pic(username: str, file_stream, mime: str):
     ensure_profile_row(username)
     dst = os.path.join(PFP_DIR, f"{username}.bin")
     os.makedirs(os.path.dirname(dst), exist_ok=True)
+    drop_image_derivatives(dst)
+    _AVATAR_VERSIONS.pop(username, None)
 
     total = 0
     try:
@@ -3541,6 +3876,11 @@ def set_profile_pic(username: str, file_stream, mime: str):
     )
     conn.commit()
     conn.close()
+    invalidate_user_ctx(username, keys=("profile",))
+    try:
+        image_derivative(dst, mime, "sm")
+    except Exception:
+        pass
 
 
 def remove_profile_pic(username: str):
@@ -3559,7 +3899,9 @@ Returns:
     ensure_profile_row(username)
     conn = db_connect()
     row = conn.execute("SELECT pic_path FROM profiles WHERE username=?", (username,)).fetchone()
+    _AVATAR_VERSIONS.pop(username, None)
     if row and row["pic_path"] and os.path.exists(row["pic_path"]):
+        drop_image_derivatives(row["pic_path"])
         try:
             os.remove(row["pic_path"])
         except Exception:
@@ -3568,6 +3910,7 @@ Returns:
                  (now_z(), username))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(username, keys=("profile",))
 
 def user_root(username: str) -> str:
     """user_root.
@@ -4227,6 +4570,7 @@ select:-webkit-autofill{
   border-bottom-left-radius: 6px;
 }
 .msg-meta{font-size:.78rem; color: var(--muted);}
+.bubble.search-hit{ outline:2px solid var(--accent); outline-offset:2px; }
 
 .msg-text{ white-space: pre-wrap; }
 
@@ -5299,6 +5643,7 @@ TEMPLATES["weather.html"] = r"""
     status.style.display='none';
     currentCard.style.display='block';
     forecastHeader.style.display='flex';
+    source.textContent=(lang==='el'?'Δεδομένα καιρού: Open-Meteo':'Weather data: Open-Meteo')+(data.updated_at?(lang==='el'?' · Ενημέρωση ':' · Updated ')+new Date(data.updated_at).toLocaleTimeString([], {hour:'2-digit',minute:'2-digit'}):'');
     source.style.display='block';
     document.getElementById('weatherLocationLabel').textContent=place.label||`${n(place.latitude,4)}, ${n(place.longitude,4)}`;
     document.getElementById('weatherIcon').textContent=c.icon||'🌤️';
@@ -5520,6 +5865,12 @@ TEMPLATES["news.html"] = r"""
     if((searchTerm||"").trim()){
       metaStr += ` • ${searchTxt}: "${searchTerm.trim()}"`;
     }
+    if(updatedAt){
+      metaStr += ` • {{ "Updated" if lang=="en" else "Ενημέρωση" }} ${new Date(updatedAt).toLocaleString()}`;
+    }
+    if(refreshing){
+      metaStr += ` • {{ "refreshing…" if lang=="en" else "ανανεώνεται…" }}`;
+    }
     meta.textContent = metaStr;
 
     if(!show.length){
@@ -5549,20 +5900,32 @@ TEMPLATES["news.html"] = r"""
     more.style.display = (items.length > limit) ? "block" : "none";
   }
 
-  async function load(force){
-    list.innerHTML = `<div class="card-soft p-3 small-muted">{{ "Loading…" if lang=="en" else "Φόρτωση…" }}</div>`;
+  let updatedAt = null, refreshing = false, pollTimer = null, polls = 0;
+
+  async function load(force, quiet){
+    if(!quiet){
+      list.innerHTML = `<div class="card-soft p-3 small-muted">{{ "Loading…" if lang=="en" else "Φόρτωση…" }}</div>`;
+      polls = 0;
+    }
+    clearTimeout(pollTimer);
+    const before = updatedAt;
     try{
       const qs = new URLSearchParams();
       qs.set("lang", "{{ lang }}");
       if(force) qs.set("force", "1");
       const r = await fetch("{{ url_for('api_news') }}?" + qs.toString(), {cache:"no-store"});
       const j = await r.json();
-      all = (j && j.items) ? j.items : [];
+      updatedAt = (j && j.updated_at) || null;
+      refreshing = !!(j && j.refreshing);
+      if(!quiet || updatedAt !== before) all = (j && j.items) ? j.items : [];
     }catch(e){
-      all = [];
+      if(!quiet) all = [];
+      refreshing = false;
     }
-    limit = 20;
+    if(!quiet || updatedAt !== before) limit = 20;
     render();
+    // Served from cache; while the server refreshes in the background, check back for the new copy.
+    if(refreshing && polls++ < 20) pollTimer = setTimeout(()=>load(false, true), 3000);
   }
 
   // Categories panel toggle
@@ -5641,8 +6004,8 @@ TEMPLATES["profile_view.html"] = r"""
       <div class="d-flex justify-content-between align-items-start gap-3">
         <div class="d-flex gap-3 align-items-start">
           <div style="width:72px;height:72px;border-radius:16px;overflow:hidden;background:rgba(255,255,255,0.06);display:flex;align-items:center;justify-content:center;">
-            <img src="{{ url_for('profile_pic', username=public.username) }}" alt="Profile picture"
-                 class="pfp-clickable" style="width:72px;height:72px;object-fit:cover;display:block;border-radius:14px;" onclick="toggleImageModal(this.src)"
+            <img src="{{ avatar_url(public.username, 'md') }}" alt="Profile picture"
+                 class="pfp-clickable" style="width:72px;height:72px;object-fit:cover;display:block;border-radius:14px;" onclick="toggleImageModal('{{ avatar_url(public.username, 'lg') }}')"
                  onerror='this.style.display="none";this.parentElement.innerHTML="<span class=&quot;small-muted&quot;>"+{{ _("No pic")|tojson }}+"</span>";'>
           </div>
           <div>
@@ -5947,7 +6310,7 @@ TEMPLATES["profile.html"] = r"""{% extends "base.html" %}
       <h3 class="mb-3">{{ _('Profile Picture') }}</h3>
       {% if my_profile.has_pic %}
         <div class="d-flex align-items-center gap-3 mb-3">
-          <img class="avatar pfp-clickable" style="width:64px;height:64px;" src="{{ url_for('profile_pic', username=user) }}" alt="pfp" onclick="toggleImageModal(this.src)"/>
+          <img class="avatar pfp-clickable" style="width:64px;height:64px;" src="{{ avatar_url(user, 'sm') }}" alt="pfp" onclick="toggleImageModal('{{ avatar_url(user, 'lg') }}')"/>
           <div class="small-muted">{{ _('Visible to logged-in users.') }}</div>
         </div>
         <form method="post" action="{{ url_for('profile_pic_remove') }}">
@@ -5986,6 +6349,7 @@ TEMPLATES["admin.html"] = r"""
   </div>
   <div class="d-flex gap-2 flex-wrap">
     <a class="btn btn-ghost" href="{{ url_for('admin_logs') }}">{{ _('Logs') }}</a>
+    <a class="btn btn-ghost" href="{{ url_for('admin_metrics') }}">{{ _('Metrics') }}</a>
   </div>
 </div>
 
@@ -6165,6 +6529,85 @@ TEMPLATES["admin_logs.html"] = r"""
 {% endblock %}
 """
 
+TEMPLATES["admin_metrics.html"] = r"""
+{% extends "base.html" %}
+{% block content %}
+<div class="d-flex justify-content-between align-items-start gap-2 mb-3 flex-wrap">
+  <div>
+    <h3 class="mb-1">{{ _("Metrics") }}</h3>
+    <div class="small-muted">{{ uptime }} s · {{ total_requests }} {{ _("requests") }} · {{ threads }} {{ _("threads") }} · {{ _("background DB") }}: {{ background_db[0] }} ({{ "%.1f"|format(background_db[1] * 1000) }} ms)</div>
+  </div>
+  <div class="d-flex gap-2 flex-wrap">
+    <a class="btn btn-ghost" href="{{ url_for('admin_metrics_prometheus') }}">{{ _("Prometheus") }}</a>
+    <form method="post" action="{{ url_for('admin_metrics_reset') }}">
+      <input type="hidden" name="csrf_token" value="{{ csrf_token }}">
+      <button class="btn btn-ghost" type="submit">{{ _("Reset") }}</button>
+    </form>
+    <a class="btn btn-ghost" href="{{ url_for('admin_panel') }}">{{ _("Back") }}</a>
+  </div>
+</div>
+<div class="card-soft p-3 mb-3">
+  <div class="fw-semibold mb-2">{{ _("Endpoints") }}</div>
+  {% if endpoints %}
+  <div class="table-responsive">
+    <table class="table table-sm align-middle mb-0">
+      <thead><tr>
+        <th>{{ _("Endpoint") }}</th><th class="text-end">{{ _("Requests") }}</th><th class="text-end">5xx</th>
+        <th class="text-end">p50 ms</th><th class="text-end">p95 ms</th><th class="text-end">p99 ms</th>
+        <th class="text-end">{{ _("DB queries/req") }}</th><th class="text-end">{{ _("DB ms/req") }}</th><th class="text-end">{{ _("Sent") }}</th>
+      </tr></thead>
+      <tbody>
+        {% for r in endpoints %}
+        <tr>
+          <td><code>{{ r.endpoint }}</code></td><td class="text-end">{{ r.count }}</td><td class="text-end">{{ r.errors }}</td>
+          <td class="text-end">{{ "%.1f"|format(r.p50_ms) }}</td><td class="text-end">{{ "%.1f"|format(r.p95_ms) }}</td><td class="text-end">{{ "%.1f"|format(r.p99_ms) }}</td>
+          <td class="text-end">{{ "%.1f"|format(r.db_per_req) }}</td><td class="text-end">{{ "%.2f"|format(r.db_ms_per_req) }}</td><td class="text-end">{{ r.bytes_h }}</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+  </div>
+  {% else %}
+  <div class="small-muted">{{ _("No requests recorded yet.") }}</div>
+  {% endif %}
+</div>
+<div class="row g-3">
+  <div class="col-12 col-lg-6">
+    <div class="card-soft p-3">
+      <div class="fw-semibold mb-2">{{ _("Counters") }}</div>
+      {% if counters %}
+      <table class="table table-sm mb-0">
+        {% for c in counters %}<tr><td><code>{{ c.name }}</code> <span class="small-muted">{{ c.labels }}</span></td><td class="text-end">{{ c.value }}</td></tr>{% endfor %}
+      </table>
+      {% else %}
+      <div class="small-muted">{{ _("No counters yet.") }}</div>
+      {% endif %}
+    </div>
+  </div>
+  <div class="col-12 col-lg-6">
+    <div class="card-soft p-3">
+      <div class="fw-semibold mb-2">{{ _("Sampling profiler") }}</div>
+      {% if profiling %}
+      <div class="small-muted mb-2">{{ _("Running") }}: {{ profile_current }} ({{ profile_remaining }} s {{ _("left") }})</div>
+      {% else %}
+      <form class="row g-2 align-items-end mb-2" method="post" action="{{ url_for('admin_metrics_profile') }}">
+        <input type="hidden" name="csrf_token" value="{{ csrf_token }}">
+        <div class="col-4"><label class="form-label">{{ _("Seconds") }}</label><input class="form-control" type="number" name="seconds" min="1" max="{{ profile_max }}" value="30"></div>
+        <div class="col-4"><label class="form-label">{{ _("Interval (ms)") }}</label><input class="form-control" type="number" name="interval_ms" min="1" max="100" value="10"></div>
+        <div class="col-4 d-grid"><button class="btn btn-accent" type="submit">{{ _("Start") }}</button></div>
+        <div class="col-12"><label class="small-muted"><input type="checkbox" name="idle" value="1"> {{ _("Include idle threads") }}</label></div>
+      </form>
+      {% endif %}
+      <div class="small-muted mb-2">{{ _("Folded stacks for flamegraph.pl or speedscope.") }}</div>
+      {% for p in profiles %}
+      <div><a href="{{ url_for('admin_metrics_profile_download', name=p.name) }}">{{ p.name }}</a> <span class="small-muted">({{ p.size }})</span></div>
+      {% endfor %}
+    </div>
+  </div>
+</div>
+{% endblock %}
+"""
+
 TEMPLATES["files.html"] = r"""
 {% extends "base.html" %}
 {% block content %}
@@ -6286,7 +6729,7 @@ TEMPLATES["files.html"] = r"""
       {% for e in entries %}
         <tr>
           <td><input class="form-check-input bulk-check" type="checkbox" name="entry" value="{{ e.relpath }}"></td>
-          <td>{% if e.is_dir %}📁 <a href="{{ url_for('files', p=e.relpath) }}">{{ e.name }}</a>{% else %}📄 {{ e.name }}{% endif %}{% if e.display_parent %}<div class="small-muted">/{{ e.display_parent }}</div>{% endif %}</td>
+          <td>{% if e.is_dir %}📁 <a href="{{ url_for('files', p=e.relpath) }}">{{ e.name }}</a>{% elif e.category == 'images' %}<img src="{{ url_for('view_file', p=e.relpath, s='xs', v=e.size ~ '-' ~ (e.mtime|int)) }}" alt="" loading="lazy" style="width:32px;height:32px;object-fit:cover;border-radius:6px;vertical-align:middle;margin-right:6px;"> {{ e.name }}{% else %}📄 {{ e.name }}{% endif %}{% if e.display_parent %}<div class="small-muted">/{{ e.display_parent }}</div>{% endif %}</td>
           <td><span class="small-muted">{{ e.category_label }}</span></td>
           <td>{{ e.size_h }}</td>
           <td class="small-muted">{{ e.mtime_h }}</td>
@@ -6403,7 +6846,7 @@ TEMPLATES["chats.html"] = r"""{% extends "base.html" %}
       <a class="user-item text-decoration-none" href="{{ url_for('chat_with', username=me) }}">
         <div class="avatar-wrap {% if has_active_story(me) %}story-ring{% endif %}">
           {% if self_has_pic %}
-            <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=me) }}" alt="" onclick="toggleImageModal(this.src)">
+            <img class="avatar-img pfp-clickable" src="{{ avatar_url(me, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(me, 'lg') }}')">
           {% else %}
             <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
           {% endif %}
@@ -6423,7 +6866,7 @@ TEMPLATES["chats.html"] = r"""{% extends "base.html" %}
           <a class="user-item text-decoration-none" href="{{ url_for('chat_with', username=u.username) }}">
             <div class="avatar-wrap {% if has_active_story(u.username) %}story-ring{% endif %}">
               {% if u.has_pic %}
-                <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+                <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
               {% else %}
                 <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
               {% endif %}
@@ -6449,7 +6892,7 @@ TEMPLATES["chats.html"] = r"""{% extends "base.html" %}
           <a class="user-item text-decoration-none" href="{{ url_for('chat_with', username=u.username) }}">
             <div class="avatar-wrap {% if has_active_story(u.username) %}story-ring{% endif %}">
               {% if u.has_pic %}
-                <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+                <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
               {% else %}
                 <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
               {% endif %}
@@ -6545,7 +6988,7 @@ TEMPLATES["chat_thread.html"] = r"""{% extends "base.html" %}
       <a class="user-item text-decoration-none {% if peer==me %}active{% endif %}" href="{{ url_for('chat_with', username=me) }}">
         <div class="avatar-wrap {% if has_active_story(me) %}story-ring{% endif %}">
           {% if self_has_pic %}
-            <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=me) }}" alt="" onclick="toggleImageModal(this.src)">
+            <img class="avatar-img pfp-clickable" src="{{ avatar_url(me, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(me, 'lg') }}')">
           {% else %}
             <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
           {% endif %}
@@ -6565,7 +7008,7 @@ TEMPLATES["chat_thread.html"] = r"""{% extends "base.html" %}
           <a class="user-item text-decoration-none {% if u.username==peer %}active{% endif %}" href="{{ url_for('chat_with', username=u.username) }}">
             <div class="avatar-wrap {% if has_active_story(u.username) %}story-ring{% endif %}">
               {% if u.has_pic %}
-                <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+                <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
               {% else %}
                 <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
               {% endif %}
@@ -6591,7 +7034,7 @@ TEMPLATES["chat_thread.html"] = r"""{% extends "base.html" %}
           <a class="user-item text-decoration-none {% if u.username==peer %}active{% endif %}" href="{{ url_for('chat_with', username=u.username) }}">
             <div class="avatar-wrap {% if has_active_story(u.username) %}story-ring{% endif %}">
               {% if u.has_pic %}
-                <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+                <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
               {% else %}
                 <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
               {% endif %}
@@ -6637,7 +7080,7 @@ TEMPLATES["chat_thread.html"] = r"""{% extends "base.html" %}
               </audio>
             {% elif m.kind == "file" %}
               {% if m.file_is_image %}
-                <img src="{{ url_for('dm_file_stream', fid=m.file_id) }}" alt="{{ m.file_name }}"/>
+                <a href="{{ url_for('dm_file_stream', fid=m.file_id) }}" target="_blank" rel="noopener"><img src="{{ url_for('dm_file_stream', fid=m.file_id, s='md') }}" alt="{{ m.file_name }}" loading="lazy"/></a>
               {% elif m.file_is_video %}
                 <video controls playsinline preload="metadata">
                   <source src="{{ url_for('dm_file_stream', fid=m.file_id) }}" type="{{ m.file_mime }}">
@@ -7158,6 +7601,9 @@ TEMPLATES["chat_page.html"] = r"""{% extends "base.html" %}
   </div>
 
   <div class="chat-messages" id="msgBox">
+    <div id="olderBar" class="text-center py-2"{% if not has_more %} style="display:none"{% endif %}>
+      <button class="btn btn-ghost btn-sm" type="button" id="olderBtn">{{ _("Load earlier messages") }}</button>
+    </div>
     {% for m in messages %}
       <div class="msg-row {{ 'me' if m.sender==me else 'them' }}">
         <div class="bubble {{ 'me' if m.sender==me else 'them' }}" data-mid="{{ m.id }}" data-kind="{{ m.kind }}" data-sender="{{ m.sender }}">
@@ -7170,7 +7616,7 @@ TEMPLATES["chat_page.html"] = r"""{% extends "base.html" %}
               </audio>
             {% elif m.kind == "file" %}
               {% if m.file_is_image %}
-                <img src="{{ url_for('dm_file_stream', fid=m.file_id) }}" alt="{{ m.file_name }}"/>
+                <a href="{{ url_for('dm_file_stream', fid=m.file_id) }}" target="_blank" rel="noopener"><img src="{{ url_for('dm_file_stream', fid=m.file_id, s='md') }}" alt="{{ m.file_name }}" loading="lazy"/></a>
               {% elif m.file_is_video %}
                 <video controls playsinline preload="metadata">
                   <source src="{{ url_for('dm_file_stream', fid=m.file_id) }}" type="{{ m.file_mime }}">
@@ -7858,6 +8304,65 @@ schedulePoll(50);
   }
   document.querySelectorAll(".bubble[data-mid]").forEach(attachLongPress);
 
+  // Older history: fetched a page at a time when scrolled to the top.
+  const olderBar = document.getElementById("olderBar");
+  const olderBtn = document.getElementById("olderBtn");
+  let oldestId = {{ messages[0].id if messages else 0 }};
+  let hasOlder = {{ 'true' if has_more else 'false' }};
+  let loadingOlder = false;
+  async function loadOlder(){
+    if(loadingOlder || !hasOlder || !oldestId || !box) return;
+    loadingOlder = true;
+    try{
+      const r = await fetch(`/api/dm/{{ peer }}/before?before_id=${encodeURIComponent(oldestId)}&html=1`, {headers: {"Accept":"application/json"}});
+      const data = await r.json().catch(()=>null);
+      if(!r.ok || !data || !data.ok) return;
+      const anchor = olderBar ? olderBar.nextElementSibling : null;
+      const anchorTop = anchor ? anchor.getBoundingClientRect().top : 0;
+      const tmp = document.createElement("div");
+      tmp.innerHTML = (data.messages || []).map(m => m.html || "").join("");
+      const frag = document.createDocumentFragment();
+      while(tmp.firstElementChild) frag.appendChild(tmp.firstElementChild);
+      frag.querySelectorAll(".bubble[data-mid]").forEach(attachLongPress);
+      if(olderBar) olderBar.after(frag); else box.prepend(frag);
+      try{ if(window.butFormatTimes) window.butFormatTimes(box); }catch(e){}
+      // Keep the message the user was looking at in place.
+      if(anchor){
+        const delta = anchor.getBoundingClientRect().top - anchorTop;
+        box.scrollTop += delta;
+        const rest = anchor.getBoundingClientRect().top - anchorTop;
+        if(rest) window.scrollBy(0, rest);
+      }
+      const msgs = data.messages || [];
+      if(msgs.length) oldestId = msgs[0].id;
+      hasOlder = !!data.has_more;
+      if(olderBar && !hasOlder) olderBar.style.display = "none";
+    }catch(e){
+    }finally{
+      loadingOlder = false;
+    }
+  }
+  if(olderBtn) olderBtn.addEventListener("click", loadOlder);
+  if(box) box.addEventListener("scroll", ()=>{ if(box.scrollTop < 120) loadOlder(); }, {passive:true});
+
+  // Search results link to #m<id>: page back until that message is loaded, then show it.
+  async function jumpToHash(){
+    const m = /^#m(\d+)$/.exec(location.hash || "");
+    if(!m || !box) return;
+    const sel = `.bubble[data-mid="${m[1]}"]`;
+    let el = box.querySelector(sel);
+    for(let i = 0; !el && hasOlder && i < 60; i++){
+      if(loadingOlder){ await new Promise(r => setTimeout(r, 100)); continue; }
+      await loadOlder();
+      el = box.querySelector(sel);
+    }
+    if(!el) return;
+    el.scrollIntoView({block: "center"});
+    el.classList.add("search-hit");
+    setTimeout(() => el.classList.remove("search-hit"), 2500);
+  }
+  jumpToHash();
+
   async function apiPost(url, payload){
     const r = await fetch(url, {method:"POST", headers:{"Content-Type":"application/json"}, body: JSON.stringify(payload||{})});
     let data=null; try{ data = await r.json(); }catch(e){}
@@ -8829,6 +9334,9 @@ TEMPLATES["group_chat.html"] = r"""
   </div>
 
   <div class="chat-messages" id="gMsgBox" aria-live="polite">
+    <div id="gOlderBar" class="text-center py-2"{% if not has_more %} style="display:none"{% endif %}>
+      <button class="btn btn-ghost btn-sm" type="button" id="gOlderBtn">{{ _("Load earlier messages") }}</button>
+    </div>
     {% for m in messages %}
       <div class="msg-row {{ 'me' if m.sender==me else 'them' }}">
         <div class="bubble {{ 'me' if m.sender==me else 'them' }}" data-mid="{{ m.id }}" data-kind="{{ m.kind }}" data-sender="{{ m.sender }}">
@@ -8977,6 +9485,59 @@ TEMPLATES["group_chat.html"] = r"""
     gSend();
   });
 
+  // Older history, a page at a time when scrolled to the top.
+  const olderBar = document.getElementById("gOlderBar");
+  const olderBtn = document.getElementById("gOlderBtn");
+  let oldestId = {{ messages[0].id if messages else 0 }};
+  let hasOlder = {{ 'true' if has_more else 'false' }};
+  let loadingOlder = false;
+  async function loadOlder(){
+    if(loadingOlder || !hasOlder || !oldestId) return;
+    loadingOlder = true;
+    try{
+      const res = await fetch(`{{ url_for('api_group_before', gid=g.id) }}?before_id=${encodeURIComponent(oldestId)}`);
+      const j = await res.json().catch(()=>null);
+      if(!j || !j.ok) return;
+      const items = j.items || [];
+      const anchor = olderBar.nextElementSibling;
+      const anchorTop = anchor ? anchor.getBoundingClientRect().top : 0;
+      const frag = document.createDocumentFragment();
+      for(const m of items) frag.appendChild(renderMsg(m));
+      olderBar.after(frag);
+      if(anchor){
+        box.scrollTop += anchor.getBoundingClientRect().top - anchorTop;
+        const rest = anchor.getBoundingClientRect().top - anchorTop;
+        if(rest) window.scrollBy(0, rest);
+      }
+      if(items.length) oldestId = Number(items[0].id);
+      hasOlder = !!j.has_more;
+      if(!hasOlder) olderBar.style.display = "none";
+    }catch(e){
+    }finally{
+      loadingOlder = false;
+    }
+  }
+  olderBtn.addEventListener("click", loadOlder);
+  box.addEventListener("scroll", ()=>{ if(box.scrollTop < 120) loadOlder(); }, {passive:true});
+
+  // Search results link to #m<id>: page back until that message is loaded, then show it.
+  async function jumpToHash(){
+    const m = /^#m(\d+)$/.exec(location.hash || "");
+    if(!m) return;
+    const sel = `.bubble[data-mid="${m[1]}"]`;
+    let el = box.querySelector(sel);
+    for(let i = 0; !el && hasOlder && i < 60; i++){
+      if(loadingOlder){ await new Promise(r => setTimeout(r, 100)); continue; }
+      await loadOlder();
+      el = box.querySelector(sel);
+    }
+    if(!el) return;
+    el.scrollIntoView({block: "center"});
+    el.classList.add("search-hit");
+    setTimeout(() => el.classList.remove("search-hit"), 2500);
+  }
+  jumpToHash();
+
   async function pollNew(){
     const url = `{{ url_for('group_poll', gid=g.id) }}?after=${encodeURIComponent(lastId||0)}`;
     const res = await fetch(url, { method:"GET" });
@@ -10412,6 +10973,52 @@ TEMPLATES["face_detector.html"] = r"""
 
 app.jinja_loader = DictLoader(TEMPLATES)
 
+# ---------------------------
+# Per-user request context cache
+# ---------------------------
+
+# Profile, prefs, admin flag and unread DM counts are needed by every rendered
+# page. They are cached per user and dropped by invalidate_user_ctx() from the
+# write paths; the TTL only bounds staleness for writes made outside the app.
+USER_CTX_TTL = 60  # seconds
+_USER_CTX: Dict[str, Dict[str, Tuple[float, Any]]] = {}
+_USER_CTX_GEN = {"n": 0}
+_USER_CTX_LOCK = threading.Lock()
+
+def user_ctx_get(username: str, key: str, loader):
+    """Return loader(username), cached per (username, key)."""
+    now = time.time()
+    with _USER_CTX_LOCK:
+        hit = _USER_CTX.get(username, {}).get(key)
+        if hit and now - hit[0] < USER_CTX_TTL:
+            fresh = True
+        else:
+            fresh = False
+            gen = _USER_CTX_GEN["n"]
+    metric_inc("butsystem_cache_requests_total", cache="user_ctx", result="hit" if fresh else "miss")
+    if fresh:
+        return hit[1]
+    value = loader(username)
+    with _USER_CTX_LOCK:
+        # Skip the store if an invalidation raced with the load.
+        if gen == _USER_CTX_GEN["n"]:
+            _USER_CTX.setdefault(username, {})[key] = (now, value)
+    return value
+
+def invalidate_user_ctx(*usernames, keys=None) -> None:
+    """Drop cached context entries (all keys unless `keys` is given)."""
+    with _USER_CTX_LOCK:
+        _USER_CTX_GEN["n"] += 1
+        for username in usernames:
+            if not username:
+                continue
+            if keys is None:
+                _USER_CTX.pop(username, None)
+            else:
+                entry = _USER_CTX.get(username) or {}
+                for key in keys:
+                    entry.pop(key, None)
+
 @app.context_processor
 def inject_ctx():
     """inject_ctx.
@@ -10440,8 +11047,20 @@ Returns:
         rel = (rel or "").strip("/")
         return f"{rel}/{name}" if rel else name
     u = current_user()
-    prefs = get_user_prefs(u) if u else dict(DEFAULT_PREFS)
+    prefs = user_ctx_get(u, "prefs", get_user_prefs) if u else dict(DEFAULT_PREFS)
     but_css = BUT_CSS + prefs_css(prefs)
+    # Loaded here rather than in before_request so JSON/API/media responses,
+    # which never render a template, skip the lookups entirely.
+    if u:
+        g.my_profile = type("Obj", (), user_ctx_get(u, "profile", get_profile))()
+        dm_total, dm_by = user_ctx_get(u, "dm_unread", dm_unread_counts)
+    else:
+        g.my_profile = None
+        dm_total, dm_by = 0, {}
+    g.notifs = type("Obj", (), {
+        "dm_total": dm_total,
+        "dm_by_sender": dm_by,
+    })()
     try:
         story_users = _story_active_usernames() if u else set()
     except Exception:
@@ -10458,7 +11077,7 @@ Returns:
         my_profile=getattr(g, "my_profile", None),
         child_path=child_path,
         request=request,
-        is_admin=user_is_admin(current_user()),
+        is_admin=user_ctx_get(u, "is_admin", user_is_admin) if u else False,
         has_active_story=has_active_story,
         story_active_users=story_users,
         log_path=LOG_PATH,
@@ -10480,25 +11099,12 @@ Returns:
     Varies.
 """
     # Presence is scoped by the host used to reach the app (local vs cloudflared vs tor).
+    # Profile and notification counters are filled in by inject_ctx on render.
     g.scope = current_scope()
     u = current_user()
     if u:
-        g.my_profile = type("Obj", (), get_profile(u))()
         mark_online(u, g.scope)
 
-        # Notifications (numbered indicators)
-        dm_total, dm_by = dm_unread_counts(u)
-        g.notifs = type("Obj", (), {
-            "dm_total": dm_total,
-            "dm_by_sender": dm_by,
-        })()
-    else:
-        g.my_profile = None
-        g.notifs = type("Obj", (), {
-            "dm_total": 0,
-            "dm_by_sender": {},
-        })()
-
 # ---------------------------
 # Auth / abuse rate limiting
 # ---------------------------
@@ -10754,10 +11360,15 @@ def api_bootstrap():
 # ---------------------------
 # Weather (Open-Meteo; no API key)
 # ---------------------------
+WEATHER_FORECAST_URL = os.environ.get("BUTSYSTEM_WEATHER_URL") or "https://api.open-meteo.com/v1/forecast"
 _WEATHER_CACHE: Dict[Tuple[float, float], Tuple[float, Dict[str, Any]]] = {}
 _WEATHER_SEARCH_CACHE: Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+_WEATHER_WANTED: Dict[Tuple[float, float], Tuple[float, float, float]] = {}  # key -> (lat, lon, last viewed)
+_WEATHER_INFLIGHT: Dict[Tuple[float, float], threading.Event] = {}
 _WEATHER_LOCK = threading.RLock()
 _WEATHER_TTL = 10 * 60
+_WEATHER_STALE_MAX = 6 * 60 * 60   # older than this is not worth showing while a refresh runs
+_WEATHER_KEEP_WARM = 60 * 60       # keep refreshing a location this long after its last view
 _WEATHER_SEARCH_TTL = 60 * 60
 
 
@@ -10771,6 +11382,46 @@ def _weather_json(url: str, timeout: int = 12) -> Dict[str, Any]:
     return data
 
 
+def _weather_forecast_raw(latitude: float, longitude: float) -> Dict[str, Any]:
+    params = {
+        "latitude": f"{latitude:.6f}", "longitude": f"{longitude:.6f}", "timezone": "auto", "forecast_days": 14,
+        "temperature_unit": "celsius", "wind_speed_unit": "kmh", "precipitation_unit": "mm",
+        "current": "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,surface_pressure,wind_speed_10m,wind_direction_10m,wind_gusts_10m",
+        "daily": "weather_code,temperature_2m_max,temperature_2m_min,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,precipitation_sum,precipitation_probability_max,wind_speed_10m_max,wind_gusts_10m_max,uv_index_max",
+    }
+    return _weather_json(WEATHER_FORECAST_URL + "?" + urllib.parse.urlencode(params))
+
+
+def _weather_refresh(cache_key: Tuple[float, float], latitude: float, longitude: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+    """Fetch one forecast into the cache. Concurrent callers for the same place share one upstream request."""
+    with _WEATHER_LOCK:
+        event = _WEATHER_INFLIGHT.get(cache_key)
+        owner = event is None
+        if owner:
+            event = _WEATHER_INFLIGHT[cache_key] = threading.Event()
+    if not owner:
+        event.wait(20)
+        with _WEATHER_LOCK:
+            return _WEATHER_CACHE.get(cache_key)
+    try:
+        raw = _weather_forecast_raw(latitude, longitude)
+        entry = (time.time(), raw)
+        with _WEATHER_LOCK:
+            _WEATHER_CACHE[cache_key] = entry
+            if len(_WEATHER_CACHE) > 250:
+                oldest = sorted(_WEATHER_CACHE.items(), key=lambda item: item[1][0])[:50]
+                for old_key, _old in oldest:
+                    _WEATHER_CACHE.pop(old_key, None)
+        return entry
+    except Exception as exc:
+        log.warning("Weather forecast refresh failed for %s: %s", cache_key, exc)
+        return None
+    finally:
+        with _WEATHER_LOCK:
+            _WEATHER_INFLIGHT.pop(cache_key, None)
+        event.set()
+
+
 def _weather_code(code: Any, lang: str, is_day: bool = True) -> Tuple[str, str]:
     try:
         code = int(code)
@@ -10906,28 +11557,18 @@ def api_weather_forecast():
     label = str(payload.get("label") or ("Τρέχουσα τοποθεσία" if lang == "el" else "Current location")).strip()[:160]
     cache_key = (round(latitude, 4), round(longitude, 4))
     now = time.time()
-    raw: Dict[str, Any]
     with _WEATHER_LOCK:
+        _WEATHER_WANTED[cache_key] = (latitude, longitude, now)
         cached = _WEATHER_CACHE.get(cache_key)
-        raw = cached[1] if cached and now - cached[0] < _WEATHER_TTL else {}
-    if not raw:
-        params = {
-            "latitude": f"{latitude:.6f}", "longitude": f"{longitude:.6f}", "timezone": "auto", "forecast_days": 14,
-            "temperature_unit": "celsius", "wind_speed_unit": "kmh", "precipitation_unit": "mm",
-            "current": "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,surface_pressure,wind_speed_10m,wind_direction_10m,wind_gusts_10m",
-            "daily": "weather_code,temperature_2m_max,temperature_2m_min,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,precipitation_sum,precipitation_probability_max,wind_speed_10m_max,wind_gusts_10m_max,uv_index_max",
-        }
-        try:
-            raw = _weather_json("https://api.open-meteo.com/v1/forecast?" + urllib.parse.urlencode(params))
-            with _WEATHER_LOCK:
-                _WEATHER_CACHE[cache_key] = (time.time(), raw)
-                if len(_WEATHER_CACHE) > 250:
-                    oldest = sorted(_WEATHER_CACHE.items(), key=lambda item: item[1][0])[:50]
-                    for old_key, _ in oldest:
-                        _WEATHER_CACHE.pop(old_key, None)
-        except Exception as exc:
-            log.exception("Weather forecast failed: %s", exc)
+    if cached and now - cached[0] < _WEATHER_STALE_MAX:
+        if now - cached[0] >= _WEATHER_TTL:
+            kick_background_refresh()
+    else:
+        # First view of this place: there is nothing to serve until one fetch completes.
+        cached = _weather_refresh(cache_key, latitude, longitude)
+        if not cached:
             return jsonify({"ok": False, "error": "weather_unavailable"}), 502
+    fetched_at, raw = cached
     current = raw.get("current") if isinstance(raw.get("current"), dict) else {}
     description, icon = _weather_code(current.get("weather_code"), lang, bool(current.get("is_day", 1)))
     normalized_current = {
@@ -10943,6 +11584,7 @@ def api_weather_forecast():
         "current": normalized_current,
         "daily": _weather_daily_rows(raw, lang),
         "generated_at": now_z(),
+        "updated_at": _utc_z(fetched_at),
         "source": "Open-Meteo",
     })
 
@@ -10951,10 +11593,17 @@ def api_weather_forecast():
 # World News (RSS aggregation; cached)
 # ---------------------------
 
-# Cache is per-language (English/Greek), refreshed every _NEWS_TTL seconds.
+# Cache is per-language (English/Greek). The background refresher below keeps
+# it warm; requests only ever read it.
 _NEWS_CACHE = {"ts": {"en": 0.0, "el": 0.0}, "items": {"en": [], "el": []}}  # in-memory cache
 _NEWS_LOCK = threading.Lock()
 _NEWS_TTL = 20 * 60  # seconds
+_NEWS_KEEP_WARM = 6 * 60 * 60  # keep refreshing a language this long after its last view
+_NEWS_FEED_STATE: Dict[str, Dict[str, Any]] = {}  # feed url -> {"etag", "modified", "items"}
+_NEWS_WANTED: Dict[str, float] = {}  # lang -> last view
+# Point every topic at a stand-in server (e.g. http://127.0.0.1:8000 serving
+# <lang>/<topic>.xml) for offline testing.
+NEWS_FEED_BASE_URL = (os.environ.get("BUTSYSTEM_NEWS_FEEDS") or "").rstrip("/")
 
 # Topics the user asked for (plus similar). We use Google News RSS search to get "worldwide" coverage.
 NEWS_TOPICS = [
@@ -11079,6 +11728,11 @@ def _news_feeds_for_lang(lang: str) -> List[Tuple[str, str, str, str, bool]]:
     lang = "el" if lang == "el" else "en"
     feeds: List[Tuple[str, str, str, str, bool]] = []
 
+    if NEWS_FEED_BASE_URL:
+        for key, labels, _q in NEWS_TOPICS:
+            feeds.append(("Local feed", f"{NEWS_FEED_BASE_URL}/{lang}/{key}.xml", key, labels.get(lang, labels["en"]), False))
+        return feeds
+
     # Direct feeds for English (fast + high quality).
     if lang == "en":
         feeds.extend([
@@ -11099,9 +11753,23 @@ def _news_feeds_for_lang(lang: str) -> List[Tuple[str, str, str, str, bool]]:
 def _norm_space(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "")).strip()
 
-def _parse_rss_items(xml_bytes: bytes, source: str, topic_key: str, topic_label: str, is_google: bool) -> List[Dict[str, str]]:
-    """Parse RSS/Atom bytes into a list of items: {title,url,source,topic_key,topic,published}."""
-    out: List[Dict[str, str]] = []
+def _news_timestamp(published: str) -> float:
+    """Epoch seconds for an RSS (RFC 822) or Atom (ISO 8601) date; 0.0 if unparseable."""
+    published = (published or "").strip()
+    if not published:
+        return 0.0
+    try:
+        return parsedate_to_datetime(published).timestamp()
+    except Exception:
+        pass
+    try:
+        return datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return 0.0
+
+def _parse_rss_items(xml_bytes: bytes, source: str, topic_key: str, topic_label: str, is_google: bool) -> List[Dict[str, Any]]:
+    """Parse RSS/Atom bytes into a list of items: {title,url,source,topic_key,topic,published,ts}."""
+    out: List[Dict[str, Any]] = []
     try:
         import xml.etree.ElementTree as ET
         root = ET.fromstring(xml_bytes)
@@ -11135,6 +11803,7 @@ def _parse_rss_items(xml_bytes: bytes, source: str, topic_key: str, topic_label:
             "topic_key": topic_key,
             "topic": topic_label,
             "published": pub or "",
+            "ts": _news_timestamp(pub),
         })
 
     # RSS 2.0
@@ -11178,15 +11847,40 @@ def _fetch_url(url: str, timeout: int = 7) -> bytes:
     with urllib.request.urlopen(req, timeout=timeout) as r:
         return r.read()
 
-def _fetch_news_uncached(lang: str) -> List[Dict[str, str]]:
+def _fetch_feed(feed: Tuple[str, str, str, str, bool], timeout: int = 7) -> List[Dict[str, Any]]:
+    """Conditional GET of one feed. 304s and upstream failures reuse the last parsed copy."""
+    source, url, tkey, tlabel, is_google = feed
+    state = _NEWS_FEED_STATE.get(url) or {}
+    headers = {
+        "User-Agent": "ButSystem/1.1 (+RSS)",
+        "Accept": "application/xml,text/xml,application/rss+xml,application/atom+xml,*/*",
+    }
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("modified"):
+        headers["If-Modified-Since"] = state["modified"]
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as r:
+            body = r.read()
+            etag, modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            log.debug("News feed %s: HTTP %s", url, e.code)
+        return list(state.get("items") or [])
+    except Exception as e:
+        log.debug("News feed %s failed: %s", url, e)
+        return list(state.get("items") or [])
+    items = _parse_rss_items(body, source, tkey, tlabel, is_google)
+    _NEWS_FEED_STATE[url] = {"etag": etag or "", "modified": modified or "", "items": items}
+    return list(items)
+
+def _fetch_news_uncached(lang: str) -> List[Dict[str, Any]]:
     feeds = _news_feeds_for_lang(lang)
-    items: List[Dict[str, str]] = []
+    items: List[Dict[str, Any]] = []
 
     def fetch_one(feed):
-        source, url, tkey, tlabel, is_google = feed
         try:
-            xmlb = _fetch_url(url, timeout=7)
-            return _parse_rss_items(xmlb, source, tkey, tlabel, is_google)
+            return _fetch_feed(feed, timeout=7)
         except Exception:
             return []
 
@@ -11200,21 +11894,7 @@ def _fetch_news_uncached(lang: str) -> List[Dict[str, str]]:
             except Exception:
                 continue
 
-    def parse_dt(published: str) -> float:
-        published = (published or "").strip()
-        if not published:
-            return 0.0
-        try:
-            from email.utils import parsedate_to_datetime
-            return parsedate_to_datetime(published).timestamp()
-        except Exception:
-            pass
-        try:
-            return datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp()
-        except Exception:
-            return 0.0
-
-    items.sort(key=lambda it: parse_dt(it.get("published") or ""), reverse=True)
+    items.sort(key=lambda it: it.get("ts") or 0.0, reverse=True)
 
     # Deduplicate and keep enough stories from every interest instead of letting popular topics crowd out niche ones.
     seen = set()
@@ -11232,27 +11912,118 @@ def _fetch_news_uncached(lang: str) -> List[Dict[str, str]]:
             break
     return balanced
 
-def get_news_items(lang: str, force: bool = False) -> List[Dict[str, str]]:
-    """Return cached news items (per-language)."""
+def _refresh_news(lang: str) -> None:
+    fresh = _fetch_news_uncached(lang)
+    with _NEWS_LOCK:
+        if fresh or not _NEWS_CACHE["items"].get(lang):
+            _NEWS_CACHE["items"][lang] = fresh
+        _NEWS_CACHE["ts"][lang] = time.time()
+
+def get_news_items(lang: str, force: bool = False) -> List[Dict[str, Any]]:
+    """Return cached news items (per-language) without waiting on upstream feeds.
+
+    A stale or empty cache (or force=True) only schedules a background refresh.
+    """
     lang = "el" if lang == "el" else "en"
     now = time.time()
     with _NEWS_LOCK:
+        _NEWS_WANTED[lang] = now
         ts = float(_NEWS_CACHE["ts"].get(lang, 0.0) or 0.0)
         cached = list(_NEWS_CACHE["items"].get(lang, []) or [])
-        if cached and not force and (now - ts) < _NEWS_TTL:
-            return cached
+    if not ts or (now - ts) >= _NEWS_TTL:
+        kick_background_refresh()
+    elif force and (now - ts) >= 60:
+        kick_background_refresh(news_lang=lang)
+    return cached
+
+def news_cache_status(lang: str) -> Dict[str, Any]:
+    lang = "el" if lang == "el" else "en"
+    with _NEWS_LOCK:
+        ts = float(_NEWS_CACHE["ts"].get(lang, 0.0) or 0.0)
+    with _REFRESHER_LOCK:
+        pending = lang in _REFRESHER["busy"] or lang in _REFRESHER["forced"]
+    return {
+        "updated_at": _utc_z(ts) if ts else None,
+        "age_seconds": int(time.time() - ts) if ts else None,
+        "refreshing": pending or not ts or (time.time() - ts) >= _NEWS_TTL,
+    }
+
+
+# ---------------------------
+# Background refresher (news + weather)
+# ---------------------------
+# One daemon thread refreshes whatever users have looked at recently, shortly
+# before it would expire, so page loads never wait on upstream RSS/Open-Meteo.
+
+_REFRESHER_TICK = 30.0
+_REFRESH_AHEAD = 0.8  # refresh once an entry is this far into its TTL
+_REFRESHER_LOCK = threading.Lock()
+_REFRESHER: Dict[str, Any] = {"thread": None, "wake": threading.Event(), "forced": set(), "busy": set()}
+
+
+def _utc_z(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
+
+
+def kick_background_refresh(news_lang: Optional[str] = None) -> None:
+    """Start the refresher if needed and wake it; news_lang forces that language past its TTL check."""
+    with _REFRESHER_LOCK:
+        if news_lang:
+            _REFRESHER["forced"].add(news_lang)
+        thread = _REFRESHER["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_background_refresh_loop, name="butsystem-refresher", daemon=True)
+            _REFRESHER["thread"] = thread
+            thread.start()
+    _REFRESHER["wake"].set()
 
-    # Refresh outside lock (avoid blocking other requests)
-    try:
-        fresh = _fetch_news_uncached(lang)
-    except Exception:
-        fresh = []
 
+def _background_refresh_once() -> None:
+    now = time.time()
+    with _REFRESHER_LOCK:
+        forced = set(_REFRESHER["forced"])
+        _REFRESHER["forced"].clear()
+        _REFRESHER["busy"].update(forced)
     with _NEWS_LOCK:
-        _NEWS_CACHE["ts"][lang] = time.time()
-        _NEWS_CACHE["items"][lang] = fresh
+        langs = [lang for lang, seen in _NEWS_WANTED.items() if now - seen < _NEWS_KEEP_WARM]
+        ages = {lang: now - float(_NEWS_CACHE["ts"].get(lang, 0.0) or 0.0) for lang in langs}
+    for lang in langs:
+        if lang not in forced and ages[lang] < _NEWS_TTL * _REFRESH_AHEAD:
+            continue
+        with _REFRESHER_LOCK:
+            _REFRESHER["busy"].add(lang)
+        try:
+            _refresh_news(lang)
+        except Exception as exc:
+            log.warning("News refresh (%s) failed: %s", lang, exc)
+        finally:
+            with _REFRESHER_LOCK:
+                _REFRESHER["busy"].discard(lang)
+    with _REFRESHER_LOCK:
+        _REFRESHER["busy"].difference_update(forced)
+
+    due = []
+    with _WEATHER_LOCK:
+        for key, (lat, lon, seen) in list(_WEATHER_WANTED.items()):
+            if now - seen >= _WEATHER_KEEP_WARM:
+                _WEATHER_WANTED.pop(key, None)
+                continue
+            cached = _WEATHER_CACHE.get(key)
+            if not cached or now - cached[0] >= _WEATHER_TTL * _REFRESH_AHEAD:
+                due.append((key, lat, lon))
+    for key, lat, lon in due:
+        _weather_refresh(key, lat, lon)
+
 
-    return list(fresh)
+def _background_refresh_loop() -> None:
+    wake = _REFRESHER["wake"]
+    while True:
+        wake.wait(_REFRESHER_TICK)
+        wake.clear()
+        try:
+            _background_refresh_once()
+        except Exception as exc:
+            log.warning("Background refresh failed: %s", exc)
 
 @app.route("/news")
 @login_required
@@ -11278,7 +12049,7 @@ def api_news():
         items = get_news_items(lang, force=force)
     except Exception:
         items = []
-    return jsonify({"ok": True, "lang": lang, "items": items})
+    return jsonify({"ok": True, "lang": lang, "items": items, **news_cache_status(lang)})
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -11356,6 +12127,8 @@ This docstring was expanded to make future maintenance easier.
 Returns:
     Varies.
 """
+    invalidate_user_ctx(current_user())
+    search_index_drop(current_user())
     session.pop("u", None)
     session.pop("login_at", None)
     flash("Logged out.")
@@ -12129,17 +12902,236 @@ Returns:
         flash("Remove failed.")
     return redirect(url_for("profile"))
 
-@app.route("/profile/pic/<username>")
-@login_required
-def profile_pic(username: str):
-    """Serve a user's profile picture.
+# ---------------------------
+# Image derivatives (avatars, thumbnails, previews)
+# ---------------------------
 
-    New uploads are stored plaintext. If an older encrypted blob exists, we
-    decrypt it on the fly for backwards compatibility.
-    """
-    ensure_profile_row(username)
-    conn = db_connect()
-    row = conn.execute("SELECT pic_path, pic_mime FROM profiles WHERE username=?", (username,)).fetchone()
+THUMB_DIR = os.path.join(DATA_DIR, "thumbs")
+THUMB_SIZES = {"xs": 64, "sm": 160, "md": 480, "lg": 1080}
+THUMB_SOURCE_MAX_BYTES = 40 * 1024 * 1024
+THUMB_STORE_MAX_BYTES = 256 * 1024 * 1024
+THUMB_CACHE_MAX_AGE = 365 * 24 * 3600
+THUMB_SWEEP_INTERVAL = 600  # seconds
+# Animated GIFs and SVG are served as-is.
+_THUMB_RASTER_MIMES = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/bmp", "image/tiff", "image/heic", "image/avif"}
+_THUMB_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+_THUMB_LOCK = threading.Lock()
+_THUMB_KNOWN: set = set()  # (digest, px, src_path) rows already recorded
+_THUMB_SWEEP = {"last": 0.0}
+_AVATAR_VERSIONS: Dict[str, str] = {}
+
+
+def _thumb_source_digest(src_path: str) -> str:
+    """SHA-256 of the (decrypted) source, memoised by path/size/mtime."""
+    st = os.stat(src_path)
+    memo = (src_path, st.st_size, st.st_mtime_ns)
+    with _THUMB_LOCK:
+        hit = _THUMB_DIGESTS.get(memo)
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    if is_encrypted_file(src_path):
+        for chunk in aesgcm_decrypt_generator(src_path):
+            h.update(chunk)
+    else:
+        with open(src_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    digest = h.hexdigest()
+    with _THUMB_LOCK:
+        if len(_THUMB_DIGESTS) > 4096:
+            _THUMB_DIGESTS.clear()
+        _THUMB_DIGESTS[memo] = digest
+    return digest
+
+
+def _thumb_path(digest: str, px: int) -> str:
+    return os.path.join(THUMB_DIR, digest[:2], f"{digest}-{px}")
+
+
+def _thumb_render(src_path: str, px: int, out_path: str) -> None:
+    if is_encrypted_file(src_path):
+        raw = b"".join(aesgcm_decrypt_generator(src_path))
+    else:
+        with open(src_path, "rb") as f:
+            raw = f.read()
+    with Image.open(io.BytesIO(raw)) as im:
+        im.draft("RGB", (px, px))
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((px, px))
+        alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        if alpha:
+            im = im.convert("RGBA")
+            fmt, opts = "PNG", {"optimize": True}
+        else:
+            im = im.convert("RGB")
+            fmt, opts = "JPEG", {"quality": 82, "optimize": True, "progressive": True}
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp = f"{out_path}.{secrets.token_hex(4)}.tmp"
+        im.save(tmp, fmt, **opts)
+    os.replace(tmp, out_path)
+
+
+def image_derivative(src_path: str, mime: str, size: str) -> Optional[Tuple[str, str, str]]:
+    """Return (path, mime, etag) of a size-bucketed copy, or None to serve the source.
+
+    Copies are content-addressed (sha256 of the source + pixel bucket), so the
+    same picture forwarded to several chats is resized once.
+    """
+    px = THUMB_SIZES.get(size or "")
+    if not px or Image is None or (mime or "").lower() not in _THUMB_RASTER_MIMES:
+        return None
+    if os.path.getsize(src_path) > THUMB_SOURCE_MAX_BYTES:
+        return None
+    digest = _thumb_source_digest(src_path)
+    out = _thumb_path(digest, px)
+    created = False
+    if not os.path.exists(out):
+        try:
+            _thumb_render(src_path, px, out)
+        except Exception:
+            return None
+        created = True
+    metric_inc("butsystem_cache_requests_total", cache="image_derivative", result="miss" if created else "hit")
+    key = (digest, px, src_path)
+    with _THUMB_LOCK:
+        known = key in _THUMB_KNOWN
+    if not known:
+        conn = db_connect()
+        conn.execute(
+            "INSERT OR IGNORE INTO image_derivatives(digest, px, src_path, bytes, created_at) VALUES(?,?,?,?,?)",
+            (digest, px, src_path, os.path.getsize(out), now_z()),
+        )
+        conn.commit()
+        conn.close()
+        with _THUMB_LOCK:
+            _THUMB_KNOWN.add(key)
+    if created:
+        _thumb_sweep()
+    with open(out, "rb") as f:
+        head = f.read(8)
+    out_mime = "image/png" if head.startswith(b"\x89PNG") else "image/jpeg"
+    return out, out_mime, f"{digest[:32]}-{px}"
+
+
+def _thumb_forget(conn, rows) -> None:
+    """Delete derivative rows and any file no other source still references."""
+    for r in rows:
+        conn.execute("DELETE FROM image_derivatives WHERE digest=? AND px=? AND src_path=?", (r["digest"], r["px"], r["src_path"]))
+        with _THUMB_LOCK:
+            _THUMB_KNOWN.discard((r["digest"], int(r["px"]), r["src_path"]))
+        left = conn.execute("SELECT 1 FROM image_derivatives WHERE digest=? AND px=? LIMIT 1", (r["digest"], r["px"])).fetchone()
+        if not left:
+            try:
+                os.remove(_thumb_path(r["digest"], int(r["px"])))
+            except Exception:
+                pass
+
+
+def drop_image_derivatives(src_path: str) -> None:
+    """Forget derivatives of a file (or of everything under a folder) that changed or went away."""
+    if not src_path:
+        return
+    try:
+        conn = db_connect()
+        rows = conn.execute(
+            "SELECT digest, px, src_path FROM image_derivatives WHERE src_path=? OR src_path LIKE ?",
+            (src_path, src_path.rstrip(os.sep) + os.sep + "%"),
+        ).fetchall()
+        _thumb_forget(conn, rows)
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
+
+def _thumb_sweep(force: bool = False) -> None:
+    """Drop derivatives whose source vanished, then trim the store to THUMB_STORE_MAX_BYTES."""
+    now = time.time()
+    with _THUMB_LOCK:
+        if not force and now - _THUMB_SWEEP["last"] < THUMB_SWEEP_INTERVAL:
+            return
+        _THUMB_SWEEP["last"] = now
+    conn = db_connect()
+    try:
+        rows = conn.execute("SELECT digest, px, src_path, bytes FROM image_derivatives ORDER BY created_at ASC").fetchall()
+        gone = [r for r in rows if not os.path.exists(r["src_path"])]
+        _thumb_forget(conn, gone)
+        gone_keys = {(r["digest"], r["px"], r["src_path"]) for r in gone}
+        live = [r for r in rows if (r["digest"], r["px"], r["src_path"]) not in gone_keys]
+        total = sum(int(r["bytes"] or 0) for r in {(r["digest"], r["px"]): r for r in live}.values())
+        while live and total > THUMB_STORE_MAX_BYTES:
+            r = live.pop(0)
+            _thumb_forget(conn, [r])
+            if not any(x["digest"] == r["digest"] and x["px"] == r["px"] for x in live):
+                total -= int(r["bytes"] or 0)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def send_image_variant(src_path: str, mime: str, size: str, immutable: bool = False) -> Response:
+    """Serve a resized copy (or the source when resizing is unavailable) with a strong ETag.
+
+    `immutable` is for URLs that change whenever the content does (attachment
+    ids, versioned avatar links); those get a long private cache lifetime.
+    """
+    variant = image_derivative(src_path, mime, size)
+    if variant:
+        path, out_mime, tag = variant
+    else:
+        path, out_mime, tag = src_path, mime, _thumb_source_digest(src_path)[:32]
+    if request.if_none_match.contains(tag):
+        resp = Response(status=304)
+    elif is_encrypted_file(path):
+        resp = Response(aesgcm_decrypt_generator(path), mimetype=out_mime)
+    else:
+        resp = send_file(path, mimetype=out_mime, as_attachment=False, conditional=False, etag=False)
+    resp.set_etag(tag)
+    resp.headers["Cache-Control"] = f"private, max-age={THUMB_CACHE_MAX_AGE}, immutable" if immutable else "private, no-cache"
+    g.cacheable_media = True
+    resp.headers["X-Content-Type-Options"] = "nosniff"
+    return resp
+
+
+def avatar_version(username: str) -> str:
+    """Short content hash of a user's current profile picture ("" if none)."""
+    v = _AVATAR_VERSIONS.get(username)
+    if v is not None:
+        return v
+    v = ""
+    try:
+        conn = db_connect()
+        row = conn.execute("SELECT pic_path FROM profiles WHERE username=?", (username,)).fetchone()
+        conn.close()
+        if row and row["pic_path"] and os.path.exists(row["pic_path"]):
+            v = _thumb_source_digest(row["pic_path"])[:16]
+    except Exception:
+        pass
+    _AVATAR_VERSIONS[username] = v
+    return v
+
+
+def avatar_url(username: str, size: str = "sm") -> str:
+    """Versioned avatar URL; a new picture yields a new URL, so browsers may cache forever."""
+    return url_for("profile_pic", username=username, s=size, v=avatar_version(username) or None)
+
+
+app.jinja_env.globals["avatar_url"] = avatar_url
+
+
+@app.route("/profile/pic/<username>")
+@login_required
+def profile_pic(username: str):
+    """Serve a user's profile picture.
+
+    New uploads are stored plaintext. If an older encrypted blob exists, we
+    decrypt it on the fly for backwards compatibility. `?s=<size>` serves a
+    cached downscaled copy; with a matching `?v=` it is cacheable for a year.
+    """
+    ensure_profile_row(username)
+    conn = db_connect()
+    row = conn.execute("SELECT pic_path, pic_mime FROM profiles WHERE username=?", (username,)).fetchone()
     conn.close()
     if not row or not row["pic_path"] or not os.path.exists(row["pic_path"]):
         abort(404)
@@ -12147,6 +13139,11 @@ def profile_pic(username: str):
     mime = row["pic_mime"] or "image/jpeg"
     sp = row["pic_path"]
 
+    size = request.args.get("s") or ""
+    if size in THUMB_SIZES:
+        version = request.args.get("v") or ""
+        return send_image_variant(sp, mime, size, immutable=bool(version) and version == avatar_version(username))
+
     try:
         if is_encrypted_file(sp):
             gen = aesgcm_decrypt_generator(sp)
@@ -12287,15 +13284,59 @@ def _all_user_folders(username: str, exclude_rel: str = "") -> List[str]:
     return sorted(output, key=str.casefold)
 
 
+# Activity entries are buffered and written by one background thread, a batch per
+# transaction, so bulk operations don't pay a connection + commit each. Trimming to
+# FILE_ACTIVITY_KEEP per owner is done by the retention job (retention_run_once).
+FILE_ACTIVITY_FLUSH_SECONDS = 1.0
+FILE_ACTIVITY_MAX_PENDING = 256  # flush early once this many are waiting
+_ACTIVITY_LOCK = threading.Lock()
+_ACTIVITY_FLUSH_LOCK = threading.Lock()
+_ACTIVITY: Dict[str, Any] = {"thread": None, "wake": threading.Event(), "full": threading.Event(), "pending": []}
+
+
 def _log_file_activity(owner: str, action: str, relpath: str, detail: str = "", actor: Optional[str] = None) -> None:
-    try:
-        conn = db_connect()
-        conn.execute("INSERT INTO file_activity(owner, actor, action, relpath, detail, created_at) VALUES(?,?,?,?,?,?)", (owner, actor or owner, action, safe_relpath(relpath), str(detail or "")[:2000], now_z()))
-        # Keep a useful history without allowing the SQLite table to grow forever.
-        conn.execute("DELETE FROM file_activity WHERE owner=? AND id NOT IN (SELECT id FROM file_activity WHERE owner=? ORDER BY id DESC LIMIT 5000)", (owner, owner))
-        conn.commit(); conn.close()
-    except Exception:
-        pass
+    row = (owner, actor or owner, action, safe_relpath(relpath), str(detail or "")[:2000], now_z())
+    with _ACTIVITY_LOCK:
+        _ACTIVITY["pending"].append(row)
+        full = len(_ACTIVITY["pending"]) >= FILE_ACTIVITY_MAX_PENDING
+        thread = _ACTIVITY["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_file_activity_writer, name="butsystem-activity", daemon=True)
+            _ACTIVITY["thread"] = thread
+            thread.start()
+    _ACTIVITY["wake"].set()
+    if full:
+        _ACTIVITY["full"].set()
+
+
+def file_activity_flush() -> int:
+    """Write buffered activity entries now; returns how many were written."""
+    with _ACTIVITY_FLUSH_LOCK:
+        with _ACTIVITY_LOCK:
+            rows, _ACTIVITY["pending"] = _ACTIVITY["pending"], []
+        if not rows:
+            return 0
+        try:
+            conn = db_connect()
+            try:
+                conn.executemany("INSERT INTO file_activity(owner, actor, action, relpath, detail, created_at) VALUES(?,?,?,?,?,?)", rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            log.warning("file activity: %d entries dropped: %s", len(rows), e)
+            return 0
+        return len(rows)
+
+
+def _file_activity_writer() -> None:
+    while True:
+        _ACTIVITY["wake"].wait()
+        # Collect a batch; cut the window short when the buffer fills up.
+        _ACTIVITY["full"].wait(FILE_ACTIVITY_FLUSH_SECONDS)
+        _ACTIVITY["wake"].clear()
+        _ACTIVITY["full"].clear()
+        file_activity_flush()
 
 
 def _delete_file_metadata(owner: str, relpath: str) -> None:
@@ -12629,6 +13670,7 @@ def delete():
         rel = safe_relpath(rel); parent = "/".join(rel.split("/")[:-1]) if rel else ""
         if not rel: raise ValueError("root")
         target = abs_user_path(current_user(), rel)
+        drop_image_derivatives(target)
         if os.path.isdir(target): shutil.rmtree(target)
         else: os.remove(target)
         _delete_file_metadata(current_user(), rel); _log_file_activity(current_user(), "entry_deleted", rel); flash("Entry deleted.")
@@ -12707,6 +13749,7 @@ def file_bulk_action():
         for rel in entries:
             try:
                 rel = safe_relpath(rel); target = abs_user_path(current_user(), rel)
+                drop_image_derivatives(target)
                 if os.path.isdir(target): shutil.rmtree(target)
                 else: os.remove(target)
                 _delete_file_metadata(current_user(), rel); count += 1
@@ -12851,6 +13894,7 @@ def public_share_download(token: str):
 @app.route("/files/activity")
 @login_required
 def file_activity():
+    file_activity_flush()
     conn = db_connect(); activity = conn.execute("SELECT action, relpath, detail, created_at FROM file_activity WHERE owner=? ORDER BY id DESC LIMIT 300", (current_user(),)).fetchall(); conn.close(); return render_template("file_activity.html", activity=activity)
 
 
@@ -12862,6 +13906,9 @@ def view_file():
         rel = safe_relpath(rel); target = abs_user_path(current_user(), rel)
         if os.path.isdir(target) or not os.path.exists(target): abort(404)
         filename = os.path.basename(target); mime = guess_mime(filename); inline_ok = is_inline_safe(mime, filename)
+        if inline_ok and request.args.get("s") in THUMB_SIZES and mime.lower().startswith("image/"):
+            # Listing links carry v=<size>-<mtime>, so the URL changes whenever the file does.
+            return send_image_variant(target, mime.lower(), request.args.get("s"), immutable=bool(request.args.get("v")))
         if is_encrypted_file(target): response = Response(aesgcm_decrypt_generator(target), mimetype=mime if inline_ok else "application/octet-stream")
         else: response = send_file(target, mimetype=mime if inline_ok else "application/octet-stream", as_attachment=not inline_ok, conditional=True, max_age=0)
         response.headers["Content-Disposition"] = f'{"inline" if inline_ok else "attachment"}; filename="{filename}"'; response.headers["Cache-Control"] = "no-store"; return response
@@ -12934,6 +13981,159 @@ def admin_logs():
     return render_template("admin_logs.html", title="Admin logs", files=files, selected_name=selected_name, selected_content=selected_content)
 
 
+# ---------------------------
+# Admin metrics + sampling profiler
+# ---------------------------
+
+METRICS_TOKEN = (os.environ.get("BUTSYSTEM_METRICS_TOKEN") or "").strip()  # Bearer token for scrapers
+PROFILE_MAX_SECONDS = 300
+_PROFILER: Dict[str, Any] = {"thread": None, "until": 0.0, "name": ""}
+_PROFILER_LOCK = threading.Lock()
+_PROFILE_NAME_RE = re.compile(r"profile-\d{8}-\d{6}\.folded")
+# Leaf frames of threads parked waiting for work; dropped unless idle stacks are requested.
+_PROFILE_IDLE_LEAVES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+    ("selectors.py", "select"), ("socket.py", "accept"), ("socketserver.py", "serve_forever"),
+}
+
+
+def _profile_run(seconds: float, interval: float, path: str, include_idle: bool) -> None:
+    """Sample every thread's stack and write folded stacks (flamegraph.pl / speedscope input)."""
+    me = threading.get_ident()
+    labels: Dict[Any, str] = {}
+    names: Dict[int, str] = {}
+    stacks: Dict[str, int] = {}
+    samples = 0
+    deadline = time.time() + seconds
+    try:
+        while time.time() < deadline:
+            if samples % 50 == 0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in _PROFILE_IDLE_LEAVES:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+                    parts.append(label)
+                    frame = frame.f_back
+                parts.append(names.get(ident) or f"thread-{ident}")
+                key = ";".join(reversed(parts))
+                stacks[key] = stacks.get(key, 0) + 1
+            samples += 1
+            time.sleep(interval)
+        with open(path, "w", encoding="utf-8") as f:
+            for key, n in sorted(stacks.items()):
+                f.write(f"{key} {n}\n")
+        log.info("Profile written: %s (%d samples, %d stacks)", path, samples, len(stacks))
+    except Exception as e:
+        log.warning("Profiler failed: %s", e)
+    finally:
+        with _PROFILER_LOCK:
+            _PROFILER["thread"] = None
+
+
+def profiler_start(seconds: int, interval_ms: int, include_idle: bool = False) -> Optional[str]:
+    """Start a background sampling run; returns the output file name, or None if one is running."""
+    seconds = max(1, min(PROFILE_MAX_SECONDS, int(seconds)))
+    interval = max(1, min(100, int(interval_ms))) / 1000.0
+    with _PROFILER_LOCK:
+        if _PROFILER["thread"] is not None:
+            return None
+        name = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        t = threading.Thread(target=_profile_run, args=(seconds, interval, os.path.join(LOG_DIR, name), include_idle),
+                             name="butsystem-profiler", daemon=True)
+        _PROFILER.update(thread=t, until=time.time() + seconds, name=name)
+    t.start()
+    return name
+
+
+def _metrics_scrape_allowed() -> bool:
+    auth = (request.headers.get("Authorization") or "").strip()
+    if METRICS_TOKEN and auth.startswith("Bearer ") and secrets.compare_digest(auth[7:].strip(), METRICS_TOKEN):
+        return True
+    return is_logged_in() and user_is_admin(current_user())
+
+
+@app.route("/admin/metrics")
+@login_required
+def admin_metrics():
+    require_admin()
+    snap = metrics_snapshot()
+    for r in snap["endpoints"]:
+        r["bytes_h"] = human_size(r["bytes"])
+    counters = [{"name": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": n} for (name, labels), n in snap["counters"]]
+    profiles = []
+    try:
+        for name in sorted(os.listdir(LOG_DIR), reverse=True):
+            if _PROFILE_NAME_RE.fullmatch(name):
+                profiles.append({"name": name, "size": human_size(os.path.getsize(os.path.join(LOG_DIR, name)))})
+    except Exception:
+        profiles = []
+    with _PROFILER_LOCK:
+        running = _PROFILER["thread"] is not None
+        remaining = max(0, int(_PROFILER["until"] - time.time())) if running else 0
+        current = _PROFILER["name"] if running else ""
+    return render_template(
+        "admin_metrics.html", title="Metrics", endpoints=snap["endpoints"], counters=counters,
+        background_db=snap["background_db"], uptime=int(snap["uptime"]), threads=threading.active_count(),
+        total_requests=sum(r["count"] for r in snap["endpoints"]), profiles=profiles,
+        profiling=running, profile_remaining=remaining, profile_current=current, profile_max=PROFILE_MAX_SECONDS,
+    )
+
+
+@app.route("/admin/metrics/prometheus")
+def admin_metrics_prometheus():
+    if not _metrics_scrape_allowed():
+        abort(403)
+    return Response(metrics_prometheus_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.route("/admin/metrics/reset", methods=["POST"])
+@login_required
+def admin_metrics_reset():
+    require_admin()
+    metrics_reset()
+    flash("Metrics reset.")
+    return redirect(url_for("admin_metrics"))
+
+
+@app.route("/admin/metrics/profile", methods=["POST"])
+@login_required
+def admin_metrics_profile():
+    require_admin()
+    try:
+        seconds = int(request.form.get("seconds") or 30)
+        interval_ms = int(request.form.get("interval_ms") or 10)
+    except Exception:
+        seconds, interval_ms = 30, 10
+    name = profiler_start(seconds, interval_ms, include_idle=bool(request.form.get("idle")))
+    if name:
+        log.info("Profiler started by %s for %ss: %s", current_user(), seconds, name)
+        flash("Profiler started.")
+    else:
+        flash("A profile is already running.")
+    return redirect(url_for("admin_metrics"))
+
+
+@app.route("/admin/metrics/profile/<name>")
+@login_required
+def admin_metrics_profile_download(name: str):
+    require_admin()
+    if not _PROFILE_NAME_RE.fullmatch(name or ""):
+        abort(404)
+    path = os.path.join(LOG_DIR, name)
+    if not os.path.isfile(path):
+        abort(404)
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=name)
+
+
 
 
 @app.route("/admin/device_approve", methods=["POST"])
@@ -13032,6 +14232,7 @@ Returns:
     conn.execute("UPDATE users SET is_admin=1, admin_device_id=? WHERE username=?", (DEVICE_ID, u))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(u, keys=("is_admin",))
     flash(f"Promoted @{u} to admin.")
     return redirect(url_for("admin_panel"))
 
@@ -13080,6 +14281,7 @@ Returns:
     conn.execute("UPDATE users SET is_admin=0, admin_device_id=NULL WHERE username=?", (u,))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(u, keys=("is_admin",))
     flash(f"Removed admin from @{u}.")
     return redirect(url_for("admin_panel"))
 
@@ -13107,6 +14309,7 @@ Returns:
     conn.execute("UPDATE users SET logout_at=? WHERE username=?", (now_z(), u))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(u, keys=("logout_at",))
     flash(f"Kicked @{u} (forced logout).")
     return redirect(url_for("admin_panel"))
 
@@ -13146,6 +14349,8 @@ Returns:
     conn.execute("DELETE FROM users WHERE username=?", (u,))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(u)
+    search_forget_user(u)
 
     # Also remove their vault directory (encrypted files)
     try:
@@ -13184,6 +14389,8 @@ def admin_delete_me():
     conn.execute("DELETE FROM users WHERE username=?", (me,))
     conn.commit()
     conn.close()
+    invalidate_user_ctx(me)
+    search_forget_user(me)
 
     session.clear()
     flash("Admin account deleted. If no admins remain, restart to create a new admin.")
@@ -13261,108 +14468,507 @@ Returns:
 
 
 # ---------------------------
-# Chats (DM)
+# Attachment blob store
 # ---------------------------
+# Attachment rows keep a stored_path, but new uploads point it at
+# BLOB_DIR/<aa>/<sha256>.bin and record a (kind, row id) reference, so the same
+# bytes sent to several chats, reacted to from a story or re-shared are kept once.
+
+# blob_refs.kind -> table whose id the reference points at
+_BLOB_KINDS = {
+    "dm_file": "dm_files",
+    "dm_voice": "dm_voice",
+    "group_voice": "group_voice",
+    "discussion_file": "discussion_files",
+    "discussion_voice": "discussion_voice",
+    "story": "stories",
+    "report_att": "report_attachments",
+}
+_BLOB_CHUNK = 1024 * 1024
+_BLOB_NAME_RE = re.compile(r"[0-9a-f]{64}\.bin")
+_BLOB_MAINTENANCE_LOCK = threading.Lock()
 
-def _local_time_str(utc_iso: Optional[str]) -> Optional[str]:
-    """_local_time_str.
-
-Internal helper function.
 
-This docstring was added automatically to improve maintainability.
+def _blob_path(digest: str) -> str:
+    return os.path.join(BLOB_DIR, digest[:2], f"{digest}.bin")
 
-Args:
-    utc_iso: Parameter.
 
-Returns:
-    Varies.
-"""
-    if not utc_iso:
+def _blob_digest_of(path: Optional[str]) -> Optional[str]:
+    """Digest named by a blob-store path, or None for anything else (legacy per-row files)."""
+    try:
+        real = os.path.realpath(str(path or ""))
+        if os.path.dirname(os.path.dirname(real)) != os.path.realpath(BLOB_DIR):
+            return None
+        bn = os.path.basename(real)
+        return bn[:64] if _BLOB_NAME_RE.fullmatch(bn) else None
+    except Exception:
         return None
+
+
+def _blob_tmp_path() -> str:
+    # .part so _cleanup_stale_file_uploads sweeps anything a crash leaves behind
+    os.makedirs(TMP_UPLOAD_DIR, exist_ok=True)
+    return os.path.join(TMP_UPLOAD_DIR, f"blob-{secrets.token_hex(12)}.part")
+
+
+def _remove_stored_file(path: Optional[str]) -> None:
     try:
-        # display as-is (UTC) but friendly; device local could vary; keep consistent
-        dt = datetime.fromisoformat(utc_iso.replace("Z",""))
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        if path and os.path.exists(path):
+            drop_image_derivatives(path)
+            os.remove(path)
     except Exception:
-        return utc_iso
+        pass
+
+
+def blob_adopt_file(conn, kind: str, ref_id: int, tmp_path: str, digest: Optional[str] = None) -> str:
+    """Move a finished temp file into the store and reference it from (kind, ref_id).
+
+    When the content is already stored the temp file is simply dropped. Runs inside the
+    caller's transaction; returns the path to keep in the row's stored_path.
+    """
+    if digest is None:
+        digest = _sha256_file(tmp_path)
+    size = os.path.getsize(tmp_path)
+    path = _blob_path(digest)
+    if conn.execute("SELECT 1 FROM blobs WHERE digest=?", (digest,)).fetchone() and os.path.isfile(path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        conn.execute("INSERT OR REPLACE INTO blobs(digest, size, created_at) VALUES(?,?,?)", (digest, int(size), now_z()))
+    conn.execute("INSERT OR REPLACE INTO blob_refs(kind, ref_id, digest) VALUES(?,?,?)", (kind, int(ref_id), digest))
+    return path
 
-def _dm_store_voice(dm_id: int, file_storage) -> Tuple[int, str]:
-    """Store a DM voice message (plaintext on disk)."""
-    mime = _validate_chat_voice_upload(file_storage)
-    conn = db_connect()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO dm_voice(dm_id, mime, stored_path, created_at) VALUES(?,?,?,?)",
-                (dm_id, mime, "PENDING", now_z()))
-    vid = cur.lastrowid
 
-    stored_path = os.path.join(ATT_DIR, f"dm_voice_{vid}.bin")
+def blob_store_upload(conn, kind: str, ref_id: int, file_storage, max_bytes: int) -> Tuple[str, int]:
+    """Stream an upload into the store, hashing while writing. Raises ValueError("too_large")."""
+    tmp = _blob_tmp_path()
+    h = hashlib.sha256()
     size = 0
     try:
-        size = _save_plain_upload(file_storage, stored_path)
+        stream = file_storage.stream
+        try:
+            stream.seek(0)
+        except Exception:
+            pass
+        with open(tmp, "wb") as f:
+            while True:
+                chunk = stream.read(_BLOB_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("too_large")
+                h.update(chunk)
+                f.write(chunk)
+        return blob_adopt_file(conn, kind, ref_id, tmp, h.hexdigest()), size
     except Exception:
-        # Keep DB row; caller will show error.
-        conn.close()
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
         raise
 
-    # Store final path immediately (no background encryption step).
-    conn.execute("UPDATE dm_voice SET stored_path=? WHERE id=?", (stored_path, vid))
-    conn.execute("UPDATE dm_messages SET has_voice=1 WHERE id=?", (dm_id,))
-    conn.commit()
-    conn.close()
-    return vid, mime
-
-
-    _save_plain_upload(file_storage, tmp_plain)
 
-    def finalize(ok: bool, err: Optional[str]):
-        """finalize.
+def blob_link(conn, kind: str, ref_id: int, src_path: str) -> Tuple[str, int]:
+    """Reference existing server-side bytes from (kind, ref_id).
 
-Route handler or application helper.
+    Stored blobs only gain a reference row, so re-sharing costs no I/O; legacy files are
+    copied in once.
+    """
+    digest = _blob_digest_of(src_path)
+    row = conn.execute("SELECT size FROM blobs WHERE digest=?", (digest,)).fetchone() if digest else None
+    if row and os.path.isfile(_blob_path(digest)):
+        conn.execute("INSERT OR REPLACE INTO blob_refs(kind, ref_id, digest) VALUES(?,?,?)", (kind, int(ref_id), digest))
+        return _blob_path(digest), int(row["size"])
+    tmp = _blob_tmp_path()
+    try:
+        shutil.copyfile(src_path, tmp)
+        size = os.path.getsize(tmp)
+        return blob_adopt_file(conn, kind, ref_id, tmp), int(size)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        raise
 
-This docstring was expanded to make future maintenance easier.
 
-Args:
-    ok: Parameter.
-    err: Parameter.
+def blob_release(conn, kind: str, ref_id: int, path: Optional[str] = None) -> Optional[str]:
+    """Drop (kind, ref_id)'s reference inside the caller's transaction.
 
-Returns:
-    Varies.
-"""
-        c = db_connect()
-        if ok and os.path.exists(stored_path):
-            c.execute("UPDATE dm_voice SET stored_path=? WHERE id=?", (stored_path, vid))
-        c.commit()
-        c.close()
+    Returns the file that is no longer needed (the blob with its last reference, or the
+    row's own file when it was never moved into the store), else None. Nothing is removed
+    here: the caller passes the returned paths to blob_discard_unreferenced() after its
+    commit, so a rolled back transaction never points at a missing file.
+    """
+    row = conn.execute("SELECT digest FROM blob_refs WHERE kind=? AND ref_id=?", (kind, int(ref_id))).fetchone()
+    if not row:
+        if path and not _blob_digest_of(path):
+            return path
+        return None
+    digest = row["digest"]
+    conn.execute("DELETE FROM blob_refs WHERE kind=? AND ref_id=?", (kind, int(ref_id)))
+    if conn.execute("SELECT 1 FROM blob_refs WHERE digest=? LIMIT 1", (digest,)).fetchone():
+        return None
+    conn.execute("DELETE FROM blobs WHERE digest=?", (digest,))
+    return _blob_path(digest)
 
-    _bg_encrypt_file(tmp_plain, stored_path, finalize)
 
-    conn.execute("UPDATE dm_messages SET has_voice=1 WHERE id=?", (dm_id,))
-    conn.commit()
-    conn.close()
-    return vid, mime
+def blob_discard_unreferenced(paths) -> None:
+    """Remove files a failed send wrote or blob_release() let go, with their image derivatives.
 
+    Call it outside any open transaction. Blobs that a row (still or by now again) owns are kept.
+    """
+    paths = [p for p in paths if p]
+    if not paths:
+        return
+    conn = db_connect()
+    try:
+        # Wait out any writer that may be adopting the same digest right now.
+        conn.execute("BEGIN IMMEDIATE")
+        for p in paths:
+            digest = _blob_digest_of(p)
+            if digest and conn.execute("SELECT 1 FROM blobs WHERE digest=?", (digest,)).fetchone():
+                continue
+            # Same connection: a second one would wait on the write lock this one holds.
+            _thumb_forget(conn, conn.execute("SELECT digest, px, src_path FROM image_derivatives WHERE src_path=?", (p,)).fetchall())
+            try:
+                if os.path.exists(p):
+                    os.remove(p)
+            except Exception:
+                pass
+        conn.commit()
+    except Exception:
+        # Leave the file; blob_store_maintenance() collects unowned blobs later.
+        pass
+    finally:
+        conn.close()
 
-def _dm_store_file(dm_id: int, file_storage) -> Dict[str, str]:
-    """Store a regular DM attachment (plaintext on disk)."""
-    filename, mime = _validate_chat_file_upload(file_storage)
 
+def _blob_migrate_row(table: str, kind: str, row_id: int, old: str) -> Optional[bool]:
+    """Move one legacy per-row file into the store. Returns True when it was a duplicate."""
+    real = os.path.realpath(old)
+    if not real.startswith(os.path.realpath(DATA_DIR) + os.sep) or not os.path.isfile(real):
+        return None
+    digest, size = _sha256_file(real), os.path.getsize(real)
+    dst = _blob_path(digest)
     conn = db_connect()
-    cur = conn.cursor()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(f"SELECT stored_path FROM {table} WHERE id=?", (row_id,)).fetchone()
+        if not cur or cur["stored_path"] != old:
+            conn.rollback()
+            return None
+        dup = bool(conn.execute("SELECT 1 FROM blobs WHERE digest=?", (digest,)).fetchone()) and os.path.isfile(dst)
+        if not dup:
+            # Link (or copy) rather than move so readers keep the old path until commit.
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = _blob_tmp_path()
+            try:
+                os.link(real, tmp)
+            except OSError:
+                shutil.copyfile(real, tmp)
+            os.replace(tmp, dst)
+            conn.execute("INSERT OR REPLACE INTO blobs(digest, size, created_at) VALUES(?,?,?)", (digest, int(size), now_z()))
+        conn.execute(f"UPDATE {table} SET stored_path=? WHERE id=?", (dst, row_id))
+        conn.execute("INSERT OR REPLACE INTO blob_refs(kind, ref_id, digest) VALUES(?,?,?)", (kind, row_id, digest))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    _remove_stored_file(real)
+    return dup
+
+
+def blob_store_maintenance() -> Dict[str, int]:
+    """Move legacy attachments into the store (deduplicating), prune references whose
+    rows are gone (FK cascades) and collect blobs nobody references.
+
+    Legacy rows are those whose stored_path is outside BLOB_DIR, so after the first run
+    this is only a few indexed scans.
+    """
+    stats = {"migrated": 0, "deduplicated": 0, "reclaimed_bytes": 0, "collected": 0}
+    if not _BLOB_MAINTENANCE_LOCK.acquire(blocking=False):
+        return stats
+    try:
+        conn = db_connect()
+        try:
+            tables = {r["name"] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+            prefix = os.path.join(BLOB_DIR, "")
+            legacy = []
+            for kind, table in _BLOB_KINDS.items():
+                if table not in tables:
+                    continue
+                conn.execute(f"DELETE FROM blob_refs WHERE kind=? AND ref_id NOT IN (SELECT id FROM {table})", (kind,))
+                for r in conn.execute(
+                    f"SELECT id, stored_path FROM {table} WHERE stored_path!='PENDING' AND substr(stored_path, 1, ?)!=?",
+                    (len(prefix), prefix),
+                ).fetchall():
+                    legacy.append((table, kind, int(r["id"]), r["stored_path"]))
+            conn.commit()
+        finally:
+            conn.close()
+
+        for table, kind, row_id, old in legacy:
+            try:
+                size = os.path.getsize(old) if old and os.path.isfile(old) else 0
+                dup = _blob_migrate_row(table, kind, row_id, old)
+            except Exception as e:
+                log.warning("blob migration failed for %s #%s: %s", table, row_id, e)
+                continue
+            if dup is None:
+                continue
+            stats["migrated"] += 1
+            if dup:
+                stats["deduplicated"] += 1
+                stats["reclaimed_bytes"] += int(size)
+
+        conn = db_connect()
+        released = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            owned = set()
+            for r in conn.execute("SELECT b.digest, (SELECT COUNT(*) FROM blob_refs x WHERE x.digest=b.digest) AS refs FROM blobs b").fetchall():
+                if int(r["refs"]):
+                    owned.add(r["digest"])
+                    continue
+                conn.execute("DELETE FROM blobs WHERE digest=?", (r["digest"],))
+                released.append(_blob_path(r["digest"]))
+            # Files a failed rollback cleanup could not remove.
+            for p in glob.glob(os.path.join(BLOB_DIR, "*", "*.bin")):
+                digest = _blob_digest_of(p)
+                if digest and digest not in owned and p not in released:
+                    released.append(p)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            released = []
+            log.warning("blob collection failed: %s", e)
+        finally:
+            conn.close()
+        blob_discard_unreferenced(released)
+        stats["collected"] += len(released)
+    finally:
+        _BLOB_MAINTENANCE_LOCK.release()
+    if stats["migrated"] or stats["collected"]:
+        log.info("Blob store: moved %d legacy attachments (%d duplicates, %.1f MB reclaimed), collected %d unreferenced blobs",
+                 stats["migrated"], stats["deduplicated"], stats["reclaimed_bytes"] / (1024 * 1024), stats["collected"])
+    return stats
+
+
+# ---------------------------
+# Retention
+# ---------------------------
+# Expiring rows are trimmed by one periodic job rather than on every insert. Ids in
+# these tables only grow, so each rule finds a cutoff id and deletes below it: a
+# rowid (or owner/id index) range instead of a NOT IN scan over the whole history.
+
+RETENTION_INTERVAL = 10 * 60
+FILE_ACTIVITY_KEEP = 5000        # newest entries kept per owner
+CALL_SIGNAL_ENDED_HOURS = 1      # signalling of calls that are no longer active
+CALL_SIGNAL_MAX_HOURS = 24       # any call (abandoned calls stay "active")
+STORY_RETAIN_HOURS = 48          # stories stop being shown after _STORY_ACTIVE_HOURS
+FILE_SHARE_RETAIN_DAYS = 30      # expired or revoked share links
+_RETENTION_LOCK = threading.Lock()
+
+
+def _hours_ago_z(hours: float) -> str:
+    return (datetime.utcnow() - timedelta(hours=hours)).isoformat(timespec="seconds") + "Z"
+
+
+def _retention_cutoff_id(conn, table: str, cutoff_z: str) -> int:
+    """First id created at/after cutoff_z (everything below it is older).
+
+    Walks the rowid from the oldest row and stops at the first recent one, so it only
+    reads the rows that are about to be deleted.
+    """
+    row = conn.execute(f"SELECT id FROM {table} WHERE created_at>=? ORDER BY id LIMIT 1", (cutoff_z,)).fetchone()
+    if row:
+        return int(row["id"])
+    return int(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]) + 1
+
+
+def _retain_file_activity(conn, released: List[Optional[str]]) -> int:
+    removed = 0
+    for r in conn.execute("SELECT DISTINCT owner FROM file_activity").fetchall():
+        cut = conn.execute(
+            "SELECT id FROM file_activity WHERE owner=? ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (r["owner"], FILE_ACTIVITY_KEEP),
+        ).fetchone()
+        if cut:
+            removed += conn.execute("DELETE FROM file_activity WHERE owner=? AND id<=?", (r["owner"], int(cut["id"]))).rowcount
+    return removed
+
+
+def _retain_call_signals(conn, released: List[Optional[str]]) -> int:
+    cut = _retention_cutoff_id(conn, "dm_call_signals", _hours_ago_z(CALL_SIGNAL_ENDED_HOURS))
+    removed = conn.execute(
+        "DELETE FROM dm_call_signals WHERE id<? AND call_id NOT IN (SELECT id FROM dm_calls WHERE status='active')", (cut,)
+    ).rowcount
+    cut = _retention_cutoff_id(conn, "dm_call_signals", _hours_ago_z(CALL_SIGNAL_MAX_HOURS))
+    return removed + conn.execute("DELETE FROM dm_call_signals WHERE id<?", (cut,)).rowcount
+
+
+def _retain_stories(conn, released: List[Optional[str]]) -> int:
+    cut = _retention_cutoff_id(conn, "stories", _hours_ago_z(max(STORY_RETAIN_HOURS, _STORY_ACTIVE_HOURS)))
+    rows = conn.execute("SELECT id, stored_path FROM stories WHERE id<?", (cut,)).fetchall()
+    for r in rows:
+        released.append(blob_release(conn, "story", int(r["id"]), r["stored_path"]))
+    conn.execute("DELETE FROM stories WHERE id<?", (cut,))
+    return len(rows)
+
+
+def _retain_file_shares(conn, released: List[Optional[str]]) -> int:
+    cutoff = _hours_ago_z(FILE_SHARE_RETAIN_DAYS * 24)
+    return conn.execute(
+        "DELETE FROM file_shares WHERE (revoked=1 AND created_at<?) OR (expires_at IS NOT NULL AND expires_at<?)", (cutoff, cutoff)
+    ).rowcount
+
+
+# name -> rule(conn, released) returning rows removed; each runs in its own transaction.
+# Files a rule lets go are appended to released and removed once that transaction commits.
+RETENTION_RULES = {
+    "file_activity": _retain_file_activity,
+    "call_signals": _retain_call_signals,
+    "stories": _retain_stories,
+    "file_shares": _retain_file_shares,
+}
+
+
+def retention_run_once() -> Dict[str, int]:
+    """Apply every retention rule once; returns rows removed per rule."""
+    stats: Dict[str, int] = {}
+    if not _RETENTION_LOCK.acquire(blocking=False):
+        return stats
+    try:
+        file_activity_flush()
+        _stories_tables_init()
+        for name, rule in RETENTION_RULES.items():
+            conn = db_connect()
+            released: List[Optional[str]] = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                stats[name] = int(rule(conn, released))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                released = []
+                log.warning("retention %s failed: %s", name, e)
+            finally:
+                conn.close()
+            blob_discard_unreferenced(released)
+    finally:
+        _RETENTION_LOCK.release()
+    if any(stats.values()):
+        log.info("Retention: %s", ", ".join(f"{k} {v}" for k, v in stats.items() if v))
+    return stats
+
+
+def retention_loop() -> None:
+    while True:
+        retention_run_once()
+        time.sleep(RETENTION_INTERVAL)
+
+
+# ---------------------------
+# Chats (DM)
+# ---------------------------
+
+def _local_time_str(utc_iso: Optional[str]) -> Optional[str]:
+    """_local_time_str.
+
+Internal helper function.
+
+This docstring was added automatically to improve maintainability.
+
+Args:
+    utc_iso: Parameter.
+
+Returns:
+    Varies.
+"""
+    if not utc_iso:
+        return None
+    try:
+        # display as-is (UTC) but friendly; device local could vary; keep consistent
+        dt = datetime.fromisoformat(utc_iso.replace("Z",""))
+        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return utc_iso
+
+def _dm_store_voice(dm_id: int, file_storage) -> Tuple[int, str]:
+    """Store a DM voice message (plaintext on disk)."""
+    mime = _validate_chat_voice_upload(file_storage)
+    conn = db_connect()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO dm_voice(dm_id, mime, stored_path, created_at) VALUES(?,?,?,?)",
+                (dm_id, mime, "PENDING", now_z()))
+    vid = cur.lastrowid
+
+    try:
+        stored_path, _size = blob_store_upload(conn, "dm_voice", vid, file_storage, CHAT_MAX_BYTES)
+    except Exception:
+        # Keep DB row; caller will show error.
+        conn.close()
+        raise
+
+    # Store final path immediately (no background encryption step).
+    conn.execute("UPDATE dm_voice SET stored_path=? WHERE id=?", (stored_path, vid))
+    conn.execute("UPDATE dm_messages SET has_voice=1 WHERE id=?", (dm_id,))
+    conn.commit()
+    conn.close()
+    return vid, mime
+
+
+    _save_plain_upload(file_storage, tmp_plain)
+
+    def finalize(ok: bool, err: Optional[str]):
+        """finalize.
+
+Route handler or application helper.
+
+This docstring was expanded to make future maintenance easier.
+
+Args:
+    ok: Parameter.
+    err: Parameter.
+
+Returns:
+    Varies.
+"""
+        c = db_connect()
+        if ok and os.path.exists(stored_path):
+            c.execute("UPDATE dm_voice SET stored_path=? WHERE id=?", (stored_path, vid))
+        c.commit()
+        c.close()
+
+    _bg_encrypt_file(tmp_plain, stored_path, finalize)
+
+    conn.execute("UPDATE dm_messages SET has_voice=1 WHERE id=?", (dm_id,))
+    conn.commit()
+    conn.close()
+    return vid, mime
+
+
+def _dm_store_file(dm_id: int, file_storage) -> Dict[str, str]:
+    """Store a regular DM attachment (plaintext on disk)."""
+    filename, mime = _validate_chat_file_upload(file_storage)
+
+    conn = db_connect()
+    cur = conn.cursor()
     cur.execute(
         "INSERT INTO dm_files(dm_id, filename, mime, stored_path, size, created_at) VALUES(?,?,?,?,?,?)",
         (dm_id, filename, mime, "PENDING", 0, now_z())
     )
     fid = cur.lastrowid
 
-    stored_path = os.path.join(DM_FILES_DIR, f"dm_file_{fid}.bin")
-
     # Save upload bytes directly (no background encryption).
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
+    try:
+        stored_path, size = blob_store_upload(conn, "dm_file", fid, file_storage, CHAT_MAX_BYTES)
+    except ValueError:
         conn.execute("DELETE FROM dm_files WHERE id=?", (fid,))
         conn.execute("UPDATE dm_messages SET has_file=0 WHERE id=?", (dm_id,))
         conn.commit()
@@ -13384,14 +14990,7 @@ def _discussion_store_voice_tx(conn, msg_id: int, file_storage) -> Tuple[int, st
     cur.execute("INSERT INTO discussion_voice(msg_id, mime, stored_path, created_at) VALUES(?,?,?,?)",
                 (msg_id, mime, "PENDING", now_z()))
     vid = cur.lastrowid
-    stored_path = os.path.join(ATT_DIR, f"discussion_voice_{vid}.bin")
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
-        raise ValueError("too_large")
+    stored_path, _size = blob_store_upload(conn, "discussion_voice", vid, file_storage, CHAT_MAX_BYTES)
     conn.execute("UPDATE discussion_voice SET stored_path=? WHERE id=?", (stored_path, vid))
     conn.execute("UPDATE discussion_messages SET has_voice=1 WHERE id=?", (msg_id,))
     return vid, mime, stored_path
@@ -13406,14 +15005,7 @@ def _discussion_store_file_tx(conn, msg_id: int, file_storage) -> Dict[str, Any]
         (msg_id, filename, mime, "PENDING", 0, now_z()),
     )
     fid = cur.lastrowid
-    stored_path = os.path.join(DISC_FILES_DIR, f"discussion_file_{fid}.bin")
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
-        raise ValueError("too_large")
+    stored_path, size = blob_store_upload(conn, "discussion_file", fid, file_storage, CHAT_MAX_BYTES)
     conn.execute(
         "UPDATE discussion_files SET stored_path=?, size=?, mime=?, filename=? WHERE id=?",
         (stored_path, int(size), mime, filename, fid),
@@ -13439,7 +15031,7 @@ def _discussion_store_remote_gif_tx(conn, msg_id: int, gif_url: str) -> Dict[str
         (msg_id, "gif.gif", "image/gif", "PENDING", 0, now_z()),
     )
     fid = cur.lastrowid
-    stored_path = os.path.join(DISC_FILES_DIR, f"discussion_file_{fid}.bin")
+    tmp_path = _blob_tmp_path()
 
     max_bytes = CHAT_MAX_BYTES  # 33 MB
     size = 0
@@ -13454,40 +15046,48 @@ def _discussion_store_remote_gif_tx(conn, msg_id: int, gif_url: str) -> Dict[str
         },
         method="GET",
     )
-    with _safe_urlopen(req, timeout=12) as resp:
-        ctype = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
-        if ctype:
-            mime = ctype
-        if not (mime == "image/gif" or mime.startswith("video/")):
-            path = (u.path or "").lower()
-            if not (path.endswith(".gif") or path.endswith(".mp4") or path.endswith(".webm")):
-                raise ValueError(f"Unsupported GIF mime: {mime}")
-            if path.endswith(".mp4"):
-                mime = "video/mp4"
-            elif path.endswith(".webm"):
-                mime = "video/webm"
+    try:
+        with _safe_urlopen(req, timeout=12) as resp:
+            ctype = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            if ctype:
+                mime = ctype
+            if not (mime == "image/gif" or mime.startswith("video/")):
+                path = (u.path or "").lower()
+                if not (path.endswith(".gif") or path.endswith(".mp4") or path.endswith(".webm")):
+                    raise ValueError(f"Unsupported GIF mime: {mime}")
+                if path.endswith(".mp4"):
+                    mime = "video/mp4"
+                elif path.endswith(".webm"):
+                    mime = "video/webm"
+                else:
+                    mime = "image/gif"
+
+            if mime == "image/gif":
+                filename = f"gif_{fid}.gif"
+            elif mime == "video/mp4":
+                filename = f"gif_{fid}.mp4"
+            elif mime == "video/webm":
+                filename = f"gif_{fid}.webm"
             else:
-                mime = "image/gif"
-
-        if mime == "image/gif":
-            filename = f"gif_{fid}.gif"
-        elif mime == "video/mp4":
-            filename = f"gif_{fid}.mp4"
-        elif mime == "video/webm":
-            filename = f"gif_{fid}.webm"
-        else:
-            filename = f"file_{fid}"
+                filename = f"file_{fid}"
 
-        with open(stored_path, "wb") as f:
-            while True:
-                chunk = resp.read(64 * 1024)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > max_bytes:
-                    raise ValueError("GIF too large")
-                f.write(chunk)
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = resp.read(64 * 1024)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError("GIF too large")
+                    f.write(chunk)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
 
+    stored_path = blob_adopt_file(conn, "discussion_file", fid, tmp_path)
     conn.execute(
         "UPDATE discussion_files SET stored_path=?, size=?, mime=?, filename=? WHERE id=?",
         (stored_path, int(size), mime, filename, fid),
@@ -13506,14 +15106,7 @@ def _dm_store_voice_tx(conn, dm_id: int, file_storage) -> Tuple[int, str, str]:
     cur.execute("INSERT INTO dm_voice(dm_id, mime, stored_path, created_at) VALUES(?,?,?,?)",
                 (dm_id, mime, "PENDING", now_z()))
     vid = cur.lastrowid
-    stored_path = os.path.join(ATT_DIR, f"dm_voice_{vid}.bin")
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
-        raise ValueError("too_large")
+    stored_path, _size = blob_store_upload(conn, "dm_voice", vid, file_storage, CHAT_MAX_BYTES)
     conn.execute("UPDATE dm_voice SET stored_path=? WHERE id=?", (stored_path, vid))
     conn.execute("UPDATE dm_messages SET has_voice=1 WHERE id=?", (dm_id,))
     return vid, mime, stored_path
@@ -13528,15 +15121,11 @@ def _dm_store_file_tx(conn, dm_id: int, file_storage) -> Dict[str, Any]:
         (dm_id, filename, mime, "PENDING", 0, now_z())
     )
     fid = cur.lastrowid
-    stored_path = os.path.join(DM_FILES_DIR, f"dm_file_{fid}.bin")
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
+    try:
+        stored_path, size = blob_store_upload(conn, "dm_file", fid, file_storage, CHAT_MAX_BYTES)
+    except ValueError:
         conn.execute("DELETE FROM dm_files WHERE id=?", (fid,))
-        raise ValueError("too_large")
+        raise
     conn.execute("UPDATE dm_files SET stored_path=?, size=? WHERE id=?", (stored_path, int(size), fid))
     conn.execute("UPDATE dm_messages SET has_file=1 WHERE id=?", (dm_id,))
     return {"id": fid, "mime": mime, "filename": filename, "size": int(size), "stored_path": stored_path}
@@ -13625,7 +15214,7 @@ def _dm_store_remote_gif_tx(conn, dm_id: int, gif_url: str) -> Dict[str, Any]:
         (dm_id, "gif.gif", "image/gif", "PENDING", 0, now_z())
     )
     fid = cur.lastrowid
-    stored_path = os.path.join(DM_FILES_DIR, f"dm_file_{fid}.bin")
+    tmp_path = _blob_tmp_path()
 
     max_bytes = CHAT_MAX_BYTES  # 33 MB
     size = 0
@@ -13640,40 +15229,48 @@ def _dm_store_remote_gif_tx(conn, dm_id: int, gif_url: str) -> Dict[str, Any]:
         },
         method="GET",
     )
-    with _safe_urlopen(req, timeout=12) as resp:
-        ctype = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
-        if ctype:
-            mime = ctype
-        if not (mime == "image/gif" or mime.startswith("video/")):
-            path = (u.path or "").lower()
-            if not (path.endswith(".gif") or path.endswith(".mp4") or path.endswith(".webm")):
-                raise ValueError(f"Unsupported GIF mime: {mime}")
-            if path.endswith(".mp4"):
-                mime = "video/mp4"
-            elif path.endswith(".webm"):
-                mime = "video/webm"
+    try:
+        with _safe_urlopen(req, timeout=12) as resp:
+            ctype = (resp.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            if ctype:
+                mime = ctype
+            if not (mime == "image/gif" or mime.startswith("video/")):
+                path = (u.path or "").lower()
+                if not (path.endswith(".gif") or path.endswith(".mp4") or path.endswith(".webm")):
+                    raise ValueError(f"Unsupported GIF mime: {mime}")
+                if path.endswith(".mp4"):
+                    mime = "video/mp4"
+                elif path.endswith(".webm"):
+                    mime = "video/webm"
+                else:
+                    mime = "image/gif"
+
+            if mime == "image/gif":
+                filename = f"gif_{fid}.gif"
+            elif mime == "video/mp4":
+                filename = f"gif_{fid}.mp4"
+            elif mime == "video/webm":
+                filename = f"gif_{fid}.webm"
             else:
-                mime = "image/gif"
-
-        if mime == "image/gif":
-            filename = f"gif_{fid}.gif"
-        elif mime == "video/mp4":
-            filename = f"gif_{fid}.mp4"
-        elif mime == "video/webm":
-            filename = f"gif_{fid}.webm"
-        else:
-            filename = f"file_{fid}"
+                filename = f"file_{fid}"
 
-        with open(stored_path, "wb") as f:
-            while True:
-                chunk = resp.read(64 * 1024)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > max_bytes:
-                    raise ValueError("GIF too large")
-                f.write(chunk)
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = resp.read(64 * 1024)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError("GIF too large")
+                    f.write(chunk)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
 
+    stored_path = blob_adopt_file(conn, "dm_file", fid, tmp_path)
     conn.execute("UPDATE dm_files SET stored_path=?, size=?, mime=?, filename=? WHERE id=?",
                  (stored_path, int(size), mime, filename, fid))
     conn.execute("UPDATE dm_messages SET has_file=1 WHERE id=?", (dm_id,))
@@ -13706,7 +15303,7 @@ def _dm_store_remote_gif(dm_id: int, gif_url: str) -> Dict[str, str]:
         (dm_id, "gif.gif", "image/gif", "PENDING", 0, now_z())
     )
     fid = cur.lastrowid
-    stored_path = os.path.join(DM_FILES_DIR, f"dm_file_{fid}.bin")
+    tmp_path = _blob_tmp_path()
     conn.commit()
     conn.close()
 
@@ -13751,7 +15348,7 @@ def _dm_store_remote_gif(dm_id: int, gif_url: str) -> Dict[str, str]:
             else:
                 filename = f"file_{fid}"
 
-            with open(stored_path, "wb") as f:
+            with open(tmp_path, "wb") as f:
                 while True:
                     chunk = resp.read(64 * 1024)
                     if not chunk:
@@ -13762,6 +15359,10 @@ def _dm_store_remote_gif(dm_id: int, gif_url: str) -> Dict[str, str]:
                     f.write(chunk)
     except urllib.error.HTTPError as e:
         # Clean up DB row on failure.
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
         try:
             c = db_connect()
             c.execute("DELETE FROM dm_files WHERE id=?", (fid,))
@@ -13773,8 +15374,8 @@ def _dm_store_remote_gif(dm_id: int, gif_url: str) -> Dict[str, str]:
         raise ValueError(f"GIF download failed ({e.code})") from e
     except Exception:
         try:
-            if os.path.exists(stored_path):
-                os.remove(stored_path)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         except Exception:
             pass
         try:
@@ -13789,6 +15390,7 @@ def _dm_store_remote_gif(dm_id: int, gif_url: str) -> Dict[str, str]:
 
     # Update DB row + message flag.
     conn = db_connect()
+    stored_path = blob_adopt_file(conn, "dm_file", fid, tmp_path)
     conn.execute("UPDATE dm_files SET stored_path=?, size=?, mime=?, filename=? WHERE id=?",
                  (stored_path, int(size), mime, filename, fid))
     conn.execute("UPDATE dm_messages SET has_file=1 WHERE id=?", (dm_id,))
@@ -13826,6 +15428,8 @@ def dm_file_stream(fid: int):
     filename = row["filename"] or f"dm-file-{fid}"
     mime = row["mime"] or guess_mime(filename)
     inline_ok = is_inline_safe(mime, filename)
+    if inline_ok and request.args.get("s") in THUMB_SIZES and mime.lower().startswith("image/"):
+        return send_image_variant(sp, mime.lower(), request.args.get("s"), immutable=True)
 
     try:
         from flask import send_file
@@ -13907,6 +15511,8 @@ def discussion_file_stream(fid: int):
     filename = row["filename"] or f"discussion-file-{fid}"
     mime = row["mime"] or guess_mime(filename)
     inline_ok = is_inline_safe(mime, filename)
+    if inline_ok and request.args.get("s") in THUMB_SIZES and mime.lower().startswith("image/"):
+        return send_image_variant(sp, mime.lower(), request.args.get("s"), immutable=True)
 
     try:
         from flask import send_file
@@ -14024,7 +15630,7 @@ Returns:
         pass
 
     cards, online_count, offline_count = user_cards(g.scope, exclude=me)
-    _dm_total, unread_map = dm_unread_counts(me)
+    _dm_total, unread_map = user_ctx_get(me, "dm_unread", dm_unread_counts)
     # Self-chat ("Saved messages") is always available and should be pinned at the top.
     # We expose `self_has_pic` so templates can show either the profile picture or a fallback avatar.
     try:
@@ -14100,14 +15706,9 @@ Returns:
             WHERE sender=? AND recipient=? AND read_at IS NULL
         """, (now_z(), username, me))
         conn.commit()
+        invalidate_user_ctx(me, keys=("dm_unread",))
 
-        rows = conn.execute("""
-            SELECT id, sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file, edited_at, deleted_at
-            FROM dm_messages
-            WHERE (sender=? AND recipient=?) OR (sender=? AND recipient=?)
-            ORDER BY id ASC
-            LIMIT 400
-        """, (me, username, username, me)).fetchall()
+        rows, has_more = _dm_page_rows(conn, me, username)
     except sqlite3.OperationalError:
         try:
             conn.close()
@@ -14128,14 +15729,9 @@ Returns:
                 WHERE sender=? AND recipient=? AND read_at IS NULL
             """, (now_z(), username, me))
             conn.commit()
+            invalidate_user_ctx(me, keys=("dm_unread",))
 
-            rows = conn.execute("""
-                SELECT id, sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file, edited_at, deleted_at
-                FROM dm_messages
-                WHERE (sender=? AND recipient=?) OR (sender=? AND recipient=?)
-                ORDER BY id ASC
-                LIMIT 400
-            """, (me, username, username, me)).fetchall()
+            rows, has_more = _dm_page_rows(conn, me, username)
         except Exception:
             try:
                 conn.close()
@@ -14144,48 +15740,8 @@ Returns:
             flash("Internal error opening chat. Please try again.")
             return redirect(url_for("chats"))
 
-    msgs = []
-    last_id = 0
-    for r in rows:
-        last_id = max(last_id, int(r["id"]))
-        if r["has_voice"]:
-            v = conn.execute("SELECT id, mime FROM dm_voice WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
-        else:
-            v = None
-        if r["has_file"]:
-            f = conn.execute("SELECT id, filename, mime, size FROM dm_files WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
-        else:
-            f = None
-        try:
-            body = aesgcm_decrypt_text(r["body_enc"])
-        except Exception:
-            body = "[decrypt failed]"
-        msgs.append({
-            "id": r["id"],
-            "sender": r["sender"],
-            "kind": ("deleted" if r["deleted_at"] else ("voice" if r["has_voice"] else ("file" if r["has_file"] else "text"))),
-            "deleted": True if r["deleted_at"] else False,
-            "body": ("[deleted]" if r["deleted_at"] else (body if (not r["has_voice"] and not r["has_file"]) else "")),
-            "created_at_local": _local_time_str(r["created_at"]),
-            "created_at_utc": r["created_at"],
-            "delivered_at_local": _local_time_str(r["delivered_at"]) if (r["sender"] == me and r["delivered_at"]) else None,
-            "delivered_at_utc": (r["delivered_at"] if (r["sender"] == me and r["delivered_at"]) else None),
-            "delivered_at_local": _local_time_str(r["delivered_at"]) if (r["sender"] == me and r["delivered_at"]) else None,
-            "delivered_at_utc": (r["delivered_at"] if (r["sender"] == me and r["delivered_at"]) else None),
-            "read_at_local": _local_time_str(r["read_at"]) if r["sender"] == me else None,
-            "read_at_utc": r["read_at"] if r["sender"] == me else None,
-            "edited_at_local": _local_time_str(r["edited_at"]) if r["edited_at"] else None,
-            "edited_at_utc": r["edited_at"] if r["edited_at"] else None,
-            "voice_id": v["id"] if v else None,
-            "voice_mime": v["mime"] if v else "audio/webm",
-            "file_id": f["id"] if f else None,
-            "file_name": f["filename"] if f else None,
-            "file_mime": f["mime"] if f else None,
-            "file_size_h": human_size(int(f["size"])) if (f and f["size"] is not None) else "",
-            "file_is_image": True if (f and (f["mime"] or "").startswith("image/")) else False,
-            "file_is_video": True if (f and (f["mime"] or "").startswith("video/")) else False,
-            "file_is_audio": True if (f and (f["mime"] or "").startswith("audio/")) else False
-        })
+    msgs = _dm_build_message_dicts(conn, rows, me)
+    last_id = max((int(r["id"]) for r in rows), default=0)
     conn.close()
 
     return render_template(
@@ -14198,25 +15754,55 @@ Returns:
         peer_online=peer_online,
         messages=msgs,
         last_id=last_id,
+        has_more=has_more,
         has_chat_pin=has_chat_pin,
     )
 
 
-def _dm_build_message_dict(conn, r, me: str) -> Dict[str, Any]:
-    """Build a DM message view dict (same logic as chat_with) for one dm_messages row."""
-    if r["has_voice"]:
-        v = conn.execute("SELECT id, mime FROM dm_voice WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
-    else:
-        v = None
-    if r["has_file"]:
-        f = conn.execute("SELECT id, filename, mime, size FROM dm_files WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
-    else:
-        f = None
+# Chat history is paged by message id (keyset): a chat opens with the newest
+# CHAT_PAGE_SIZE messages and older pages load on scroll via before_id.
+CHAT_PAGE_SIZE = 50
+CHAT_PAGE_MAX = 200
+_DM_COLUMNS = "id, sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file, edited_at, deleted_at"
+
+
+def _chat_page_args() -> Tuple[Optional[int], int]:
+    """(before_id, limit) from the query string; before_id None means newest page."""
+    try:
+        before_id = int(request.args.get("before_id") or 0) or None
+    except Exception:
+        before_id = None
+    try:
+        limit = int(request.args.get("limit") or CHAT_PAGE_SIZE)
+    except Exception:
+        limit = CHAT_PAGE_SIZE
+    return before_id, max(1, min(CHAT_PAGE_MAX, limit))
+
+
+def _dm_page_rows(conn, me: str, peer: str, before_id: Optional[int] = None, limit: int = CHAT_PAGE_SIZE):
+    """Newest `limit` DM rows between me and peer below before_id, oldest first, plus a has_more flag.
+
+    Each direction is its own (sender, recipient, id) index range, so a page
+    costs the same however long the conversation is.
+    """
+    bound = int(before_id) if before_id else (1 << 62)
+    pairs = [(me, peer)] if me == peer else [(me, peer), (peer, me)]
+    rows = []
+    for sender, recipient in pairs:
+        rows.extend(conn.execute(
+            f"SELECT {_DM_COLUMNS} FROM dm_messages WHERE sender=? AND recipient=? AND id<? ORDER BY id DESC LIMIT ?",
+            (sender, recipient, bound, limit + 1),
+        ).fetchall())
+    rows.sort(key=lambda r: int(r["id"]), reverse=True)
+    return rows[:limit][::-1], len(rows) > limit
+
+
+def _dm_message_view(r, me: str, v, f) -> Dict[str, Any]:
     try:
         body = aesgcm_decrypt_text(r["body_enc"])
     except Exception:
         body = "[decrypt failed]"
-    msg = {
+    return {
         "id": r["id"],
         "sender": r["sender"],
         "kind": ("deleted" if r["deleted_at"] else ("voice" if r["has_voice"] else ("file" if r["has_file"] else "text"))),
@@ -14224,9 +15810,12 @@ def _dm_build_message_dict(conn, r, me: str) -> Dict[str, Any]:
         "body": ("[deleted]" if r["deleted_at"] else (body if (not r["has_voice"] and not r["has_file"]) else "")),
         "created_at_local": _local_time_str(r["created_at"]),
         "created_at_utc": r["created_at"],
+        "delivered_at_local": _local_time_str(r["delivered_at"]) if (r["sender"] == me and r["delivered_at"]) else None,
+        "delivered_at_utc": (r["delivered_at"] if (r["sender"] == me and r["delivered_at"]) else None),
         "read_at_local": _local_time_str(r["read_at"]) if r["sender"] == me else None,
         "read_at_utc": r["read_at"] if r["sender"] == me else None,
         "edited_at_local": _local_time_str(r["edited_at"]) if r["edited_at"] else None,
+        "edited_at_utc": r["edited_at"] if r["edited_at"] else None,
         "voice_id": v["id"] if v else None,
         "voice_mime": v["mime"] if v else "audio/webm",
         "file_id": f["id"] if f else None,
@@ -14237,7 +15826,37 @@ def _dm_build_message_dict(conn, r, me: str) -> Dict[str, Any]:
         "file_is_video": True if (f and (f["mime"] or "").startswith("video/")) else False,
         "file_is_audio": True if (f and (f["mime"] or "").startswith("audio/")) else False
     }
-    return msg
+
+
+def _latest_by_parent(conn, sql: str, ids: List[int]) -> Dict[int, Any]:
+    """Run `sql` (with one IN (%s) placeholder list, ordered by id) and keep the newest row per parent id."""
+    out: Dict[int, Any] = {}
+    if ids:
+        for row in conn.execute(sql % ",".join("?" * len(ids)), ids).fetchall():
+            out[int(row[1])] = row
+    return out
+
+
+def _dm_build_message_dicts(conn, rows, me: str) -> List[Dict[str, Any]]:
+    """Message view dicts for a page of dm_messages rows, with two attachment queries per page."""
+    voices = _latest_by_parent(conn, "SELECT id, dm_id, mime FROM dm_voice WHERE dm_id IN (%s) ORDER BY id",
+                               [int(r["id"]) for r in rows if r["has_voice"]])
+    files = _latest_by_parent(conn, "SELECT id, dm_id, filename, mime, size FROM dm_files WHERE dm_id IN (%s) ORDER BY id",
+                              [int(r["id"]) for r in rows if r["has_file"]])
+    return [_dm_message_view(r, me, voices.get(int(r["id"])), files.get(int(r["id"]))) for r in rows]
+
+
+def _dm_build_message_dict(conn, r, me: str) -> Dict[str, Any]:
+    """Build a DM message view dict (same logic as chat_with) for one dm_messages row."""
+    if r["has_voice"]:
+        v = conn.execute("SELECT id, mime FROM dm_voice WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
+    else:
+        v = None
+    if r["has_file"]:
+        f = conn.execute("SELECT id, filename, mime, size FROM dm_files WHERE dm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
+    else:
+        f = None
+    return _dm_message_view(r, me, v, f)
 
 
 
@@ -14253,7 +15872,7 @@ _DM_ROW_TEMPLATE = r"""
       </audio>
     {% elif m.kind == 'file' %}
       {% if m.file_is_image %}
-        <img src="{{ url_for('dm_file_stream', fid=m.file_id) }}" alt="{{ m.file_name }}"/>
+        <a href="{{ url_for('dm_file_stream', fid=m.file_id) }}" target="_blank" rel="noopener"><img src="{{ url_for('dm_file_stream', fid=m.file_id, s='md') }}" alt="{{ m.file_name }}" loading="lazy"/></a>
       {% elif m.file_is_video %}
         <video controls playsinline preload="metadata">
           <source src="{{ url_for('dm_file_stream', fid=m.file_id) }}" type="{{ m.file_mime }}">
@@ -14299,9 +15918,20 @@ _GROUP_ROW_TEMPLATE = r"""
 """
 
 
+_ROW_TEMPLATES: Dict[str, Any] = {}
+
+
+def _row_template(source: str):
+    """Compile a row template once; render_template_string would recompile it for every row."""
+    tmpl = _ROW_TEMPLATES.get(source)
+    if tmpl is None:
+        tmpl = _ROW_TEMPLATES[source] = app.jinja_env.from_string(source)
+    return tmpl
+
+
 def _render_dm_row_html(m: Dict[str, Any], me: str) -> str:
     """Render one DM message row to HTML for AJAX updates."""
-    return render_template_string(_DM_ROW_TEMPLATE, m=m, me=me)
+    return _row_template(_DM_ROW_TEMPLATE).render(m=m, me=me)
 
 
 @app.route("/chat/<username>/send", methods=["POST"])
@@ -14397,13 +16027,14 @@ def dm_send(username: str):
             raise ValueError("User not found")
 
         cur = conn.cursor()
+        created_at = now_z()
         cur.execute(
             "INSERT INTO dm_messages(sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file) VALUES(?,?,?,?,NULL,NULL,?,?)",
             (
                 me,
                 username,
                 aesgcm_encrypt_text(body or ""),
-                now_z(),
+                created_at,
                 1 if has_voice else 0,
                 1 if (has_file or has_gif_url) else 0,
             ),
@@ -14424,6 +16055,8 @@ def dm_send(username: str):
             saved_paths.append(info["stored_path"])
 
         conn.commit()
+        invalidate_user_ctx(username, keys=("dm_unread",))
+        search_note_dm(dm_id, me, username, created_at, body)
 
         if is_ajax:
             r = conn.execute(
@@ -14445,12 +16078,7 @@ def dm_send(username: str):
             pass
 
         # Remove any files written before the failure.
-        for sp in saved_paths:
-            try:
-                if sp and os.path.exists(sp):
-                    os.remove(sp)
-            except Exception:
-                pass
+        blob_discard_unreferenced(saved_paths)
 
         log.exception("dm_send failed: %s", e)
         if is_ajax:
@@ -14632,11 +16260,13 @@ Returns:
 
     # Mark as read when the chat tab is open (this endpoint is called by the active chat view).
     try:
-        conn.execute(
+        cur = conn.execute(
             "UPDATE dm_messages SET read_at=? WHERE sender=? AND recipient=? AND read_at IS NULL",
             (now_z(), peer, me),
         )
         conn.commit()
+        if cur.rowcount:
+            invalidate_user_ctx(me, keys=("dm_unread",))
     except Exception:
         pass
 
@@ -14724,6 +16354,34 @@ Returns:
     return jsonify({"ok": True, "messages": out, "status_updates": updates, "server_now": now_z()})
 
 
+@app.route("/api/dm/<peer>/before")
+@login_required
+def api_dm_before(peer: str):
+    """Older DM history for infinite scroll: the page of messages just below before_id.
+
+    Query params: before_id, limit (default CHAT_PAGE_SIZE), html=1 for pre-rendered rows.
+    """
+    me = current_user()
+    peer = peer.strip()
+    if not _chat_lock_is_unlocked(me, "dm", peer):
+        return jsonify(ok=False, locked=True, error="PIN required"), 423
+    before_id, limit = _chat_page_args()
+    want_html = (request.args.get("html") == "1")
+    conn = db_connect()
+    try:
+        rows, has_more = _dm_page_rows(conn, me, peer, before_id, limit)
+        out = _dm_build_message_dicts(conn, rows, me)
+    finally:
+        conn.close()
+    if want_html:
+        for m in out:
+            try:
+                m["html"] = _render_dm_row_html(m, me)
+            except Exception:
+                pass
+    return jsonify(ok=True, messages=out, has_more=has_more)
+
+
 @app.route("/api/group/<int:gid>/since")
 @login_required
 def api_group_since(gid: int):
@@ -14789,7 +16447,7 @@ def api_group_since(gid: int):
         item = dict(m)
         if want_html:
             try:
-                item["html"] = render_template_string(_GROUP_ROW_TEMPLATE, m=m, me=me)
+                item["html"] = _row_template(_GROUP_ROW_TEMPLATE).render(m=m, me=me)
             except Exception:
                 item["html"] = ""
 
@@ -14820,7 +16478,7 @@ Returns:
         return jsonify({"ok": False, "error": "Empty message"}), 400
 
     conn = db_connect()
-    r = conn.execute("SELECT sender, recipient, has_voice, has_file, deleted_at FROM dm_messages WHERE id=?", (mid,)).fetchone()
+    r = conn.execute("SELECT sender, recipient, has_voice, has_file, deleted_at, created_at FROM dm_messages WHERE id=?", (mid,)).fetchone()
     if not r or r["sender"] != me:
         conn.close()
         return jsonify({"ok": False, "error": "Not allowed"}), 403
@@ -14834,6 +16492,7 @@ Returns:
     conn.execute("UPDATE dm_messages SET body_enc=?, edited_at=? WHERE id=?", (aesgcm_encrypt_text(body), now_z(), mid))
     conn.commit()
     conn.close()
+    search_note_dm(mid, me, r["recipient"], r["created_at"], body)
     return jsonify({"ok": True})
 
 @app.route("/api/dm/message/<int:mid>/delete", methods=["POST"])
@@ -14859,23 +16518,16 @@ Returns:
         return jsonify({"ok": False, "error": "Not allowed"}), 403
 
     # Remove attachments from disk + tables
+    released = []
     if r["has_voice"]:
         rows = conn.execute("SELECT id, stored_path FROM dm_voice WHERE dm_id=?", (mid,)).fetchall()
         for vr in rows:
-            try:
-                if vr["stored_path"] and os.path.exists(vr["stored_path"]):
-                    os.remove(vr["stored_path"])
-            except Exception:
-                pass
+            released.append(blob_release(conn, "dm_voice", vr["id"], vr["stored_path"]))
         conn.execute("DELETE FROM dm_voice WHERE dm_id=?", (mid,))
     if r["has_file"]:
         rows = conn.execute("SELECT id, stored_path FROM dm_files WHERE dm_id=?", (mid,)).fetchall()
         for fr in rows:
-            try:
-                if fr["stored_path"] and os.path.exists(fr["stored_path"]):
-                    os.remove(fr["stored_path"])
-            except Exception:
-                pass
+            released.append(blob_release(conn, "dm_file", fr["id"], fr["stored_path"]))
         conn.execute("DELETE FROM dm_files WHERE dm_id=?", (mid,))
 
     conn.execute(
@@ -14884,8 +16536,294 @@ Returns:
     )
     conn.commit()
     conn.close()
+    blob_discard_unreferenced(released)
+    invalidate_user_ctx(r["recipient"], keys=("dm_unread",))
+    search_note_dm(mid, me, r["recipient"], "", None)
     return jsonify({"ok": True})
 
+# ---------------------------
+# Message search (in-memory)
+# ---------------------------
+# Bodies are only stored encrypted, so each user gets a token index over their
+# decrypted DMs, groups and the discussion, held in memory only. It is built in
+# the background after login, kept current by the send/edit/delete paths and
+# dropped on logout, privacy panic or after SEARCH_IDLE_SECONDS unused.
+# Chat locks and group membership are checked per query, against the session.
+
+SEARCH_MAX_HITS = 50
+SEARCH_IDLE_SECONDS = 6 * 3600
+SEARCH_BUILD_BATCH = 500
+SEARCH_PREFIX_TERMS = 2000  # vocabulary entries a single prefix may expand to
+SEARCH_SNIPPET_CHARS = 60
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+_SEARCH_LOCK = threading.Lock()
+
+
+class _SearchIndex:
+    """One user's index: doc key (kind, id) -> (conversation, sender, created_at, text)."""
+
+    __slots__ = ("docs", "postings", "vocab", "ready", "touched", "used")
+
+    def __init__(self):
+        self.docs: Dict[Tuple[str, int], Tuple[str, str, str, str]] = {}
+        self.postings: Dict[str, set] = {}
+        self.vocab: List[str] = []  # sorted tokens for prefix lookups, once ready
+        self.ready = False
+        self.touched: set = set()  # keys updated live while the build runs
+        self.used = time.time()
+
+
+_SEARCH: Dict[str, _SearchIndex] = {}
+
+
+def _search_fold(text: str) -> str:
+    text = (text or "").casefold()
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def _search_tokens(text: str) -> List[str]:
+    return list(dict.fromkeys(t[:40] for t in _SEARCH_TOKEN_RE.findall(_search_fold(text)) if len(t) >= 2))
+
+
+def _search_remove_locked(idx: _SearchIndex, key) -> None:
+    doc = idx.docs.pop(key, None)
+    if doc is None:
+        return
+    for t in _search_tokens(doc[3]):
+        keys = idx.postings.get(t)
+        if keys is None:
+            continue
+        keys.discard(key)
+        if not keys:
+            del idx.postings[t]
+            if idx.ready:
+                i = bisect.bisect_left(idx.vocab, t)
+                if i < len(idx.vocab) and idx.vocab[i] == t:
+                    del idx.vocab[i]
+
+
+def _search_add_locked(idx: _SearchIndex, key, conv: str, sender: str, created_at: str, text: str) -> None:
+    _search_remove_locked(idx, key)
+    tokens = _search_tokens(text)
+    if not tokens:
+        return
+    idx.docs[key] = (conv, sender, created_at, text)
+    for t in tokens:
+        keys = idx.postings.get(t)
+        if keys is None:
+            idx.postings[t] = {key}
+            if idx.ready:
+                bisect.insort(idx.vocab, t)
+        else:
+            keys.add(key)
+
+
+def _search_build(username: str, idx: _SearchIndex) -> None:
+    """Decrypt the user's history a batch at a time and add it (outside the lock)."""
+    _feature_tables_init()
+    sources = [
+        ("dm", "SELECT id, sender, recipient, body_enc, created_at FROM dm_messages "
+               "WHERE (sender=? OR recipient=?) AND id>? AND (deleted_at IS NULL OR deleted_at='') "
+               "AND sender IN (SELECT username FROM users) AND recipient IN (SELECT username FROM users) ORDER BY id LIMIT ?",
+         (username, username)),
+        ("group", "SELECT m.id, m.group_id, m.sender, m.body_enc, m.created_at FROM group_messages m "
+                  "JOIN group_members gm ON gm.group_id=m.group_id AND gm.username=? WHERE m.id>? "
+                  "AND m.sender IN (SELECT username FROM users) ORDER BY m.id LIMIT ?",
+         (username,)),
+        ("discussion", "SELECT id, sender, body_enc, created_at FROM discussion_messages WHERE id>? "
+                       "AND sender IN (SELECT username FROM users) ORDER BY id LIMIT ?", ()),
+    ]
+    conn = db_connect()
+    try:
+        for kind, sql, params in sources:
+            last = 0
+            while True:
+                rows = conn.execute(sql, params + (last, SEARCH_BUILD_BATCH)).fetchall()
+                if not rows:
+                    break
+                last = int(rows[-1]["id"])
+                batch = []
+                for r in rows:
+                    try:
+                        text = aesgcm_decrypt_text(r["body_enc"])
+                    except Exception:
+                        continue
+                    if kind == "dm":
+                        conv = "dm:" + (r["recipient"] if r["sender"] == username else r["sender"])
+                    elif kind == "group":
+                        conv = f"group:{int(r['group_id'])}"
+                    else:
+                        conv = "discussion"
+                    batch.append(((kind, int(r["id"])), conv, r["sender"], r["created_at"], text))
+                with _SEARCH_LOCK:
+                    if _SEARCH.get(username) is not idx:
+                        return  # wiped while building
+                    for key, conv, sender, created_at, text in batch:
+                        if key not in idx.touched:
+                            _search_add_locked(idx, key, conv, sender, created_at, text)
+        with _SEARCH_LOCK:
+            idx.vocab = sorted(idx.postings)
+            idx.touched = set()
+            idx.ready = True
+    except Exception as e:
+        log.warning("search index build for %s failed: %s", username, e)
+        with _SEARCH_LOCK:
+            if _SEARCH.get(username) is idx:
+                del _SEARCH[username]
+    finally:
+        conn.close()
+
+
+def search_index_warm(username: str) -> _SearchIndex:
+    """The user's index, starting a background build if there is none."""
+    now = time.time()
+    with _SEARCH_LOCK:
+        for name in [u for u, x in _SEARCH.items() if now - x.used > SEARCH_IDLE_SECONDS]:
+            del _SEARCH[name]
+        idx = _SEARCH.get(username)
+        if idx is None:
+            idx = _SEARCH[username] = _SearchIndex()
+            threading.Thread(target=_search_build, args=(username, idx), name="butsystem-search", daemon=True).start()
+        idx.used = now
+        return idx
+
+
+def search_index_drop(username: str) -> None:
+    with _SEARCH_LOCK:
+        _SEARCH.pop(username, None)
+
+
+def search_forget_user(username: str) -> None:
+    """Account deletion: drop the user's index and their messages and DMs from everyone else's."""
+    with _SEARCH_LOCK:
+        _SEARCH.pop(username, None)
+        for user, idx in list(_SEARCH.items()):
+            if not idx.ready:
+                # Batches already added may hold the account; rebuild on the next search.
+                del _SEARCH[user]
+                continue
+            for key in [k for k, doc in idx.docs.items() if doc[1] == username or doc[0] == "dm:" + username]:
+                _search_remove_locked(idx, key)
+
+
+def _search_note(kind: str, msg_id: int, sender: str, created_at: str, text: Optional[str], audience: Dict[str, str]) -> None:
+    """Apply a send/edit (text) or delete (text None) to the loaded indexes in audience (user -> conversation)."""
+    key = (kind, int(msg_id))
+    with _SEARCH_LOCK:
+        for user, conv in audience.items():
+            idx = _SEARCH.get(user)
+            if idx is None:
+                continue
+            if not idx.ready:
+                idx.touched.add(key)
+            if text is None:
+                _search_remove_locked(idx, key)
+            else:
+                _search_add_locked(idx, key, conv, sender, created_at, text)
+
+
+def search_note_dm(msg_id: int, sender: str, recipient: str, created_at: str, text: Optional[str]) -> None:
+    if _SEARCH:
+        _search_note("dm", msg_id, sender, created_at, text, {sender: "dm:" + recipient, recipient: "dm:" + sender})
+
+
+def search_note_group(gid: int, msg_id: int, sender: str, created_at: str, text: Optional[str]) -> None:
+    if not _SEARCH:
+        return
+    conn = db_connect()
+    try:
+        members = [r["username"] for r in conn.execute("SELECT username FROM group_members WHERE group_id=?", (int(gid),)).fetchall()]
+    finally:
+        conn.close()
+    _search_note("group", msg_id, sender, created_at, text, {u: f"group:{int(gid)}" for u in members})
+
+
+def search_note_discussion(msg_id: int, sender: str, created_at: str, text: Optional[str]) -> None:
+    if _SEARCH:
+        _search_note("discussion", msg_id, sender, created_at, text, {u: "discussion" for u in list(_SEARCH)})
+
+
+def _search_snippet(text: str, terms: List[str]) -> str:
+    folded = _search_fold(text)
+    pos = min((p for p in (folded.find(t) for t in terms) if p >= 0), default=0)
+    pos = min(pos, len(text))
+    start = max(0, pos - SEARCH_SNIPPET_CHARS)
+    end = min(len(text), pos + SEARCH_SNIPPET_CHARS * 2)
+    return ("…" if start else "") + text[start:end].replace("\n", " ") + ("…" if end < len(text) else "")
+
+
+def search_messages(username: str, query: str, hidden_convs: set, groups: set, limit: int = SEARCH_MAX_HITS) -> List[Dict[str, Any]]:
+    """Newest messages containing every query term (terms match word prefixes)."""
+    terms = _search_tokens(query)
+    if not terms:
+        return []
+    idx = search_index_warm(username)
+    with _SEARCH_LOCK:
+        vocab = idx.vocab if idx.ready else sorted(idx.postings)
+        matches = []
+        for term in terms:
+            keys: set = set()
+            i = bisect.bisect_left(vocab, term)
+            for token in vocab[i:i + SEARCH_PREFIX_TERMS]:
+                if not token.startswith(term):
+                    break
+                keys |= idx.postings[token]
+            if not keys:
+                return []
+            matches.append(keys)
+        matches.sort(key=len)
+        found = matches[0].intersection(*matches[1:])
+
+        def visible(doc) -> bool:
+            conv = doc[0]
+            if conv in hidden_convs:
+                return False
+            return not conv.startswith("group:") or int(conv[6:]) in groups
+
+        docs = idx.docs
+        best = heapq.nlargest(limit, ((docs[k][2], k[1], k) for k in found if visible(docs[k])))
+        hits = [(key, docs[key]) for _, _, key in best]
+    out = []
+    for (kind, msg_id), (conv, sender, created_at, text) in hits:
+        hit = {"kind": kind, "id": msg_id, "sender": sender, "created_at": created_at, "snippet": _search_snippet(text, terms)}
+        if kind == "dm":
+            hit["peer"] = conv[3:]
+            hit["url"] = url_for("chat_with", username=hit["peer"]) + f"#m{msg_id}"
+        elif kind == "group":
+            hit["group_id"] = int(conv[6:])
+            hit["url"] = url_for("group_chat", gid=hit["group_id"]) + f"#m{msg_id}"
+        else:
+            hit["url"] = url_for("discussion") + f"#m{msg_id}"
+        out.append(hit)
+    return out
+
+
+@app.route("/api/search")
+@login_required
+def api_search():
+    me = current_user()
+    q = (request.args.get("q") or "").strip()[:200]
+    if privacy_panic_active():
+        return jsonify(ok=False, error="panic"), 423
+    t0 = time.perf_counter()
+    conn = db_connect()
+    try:
+        unlocked = _session_unlocks()
+        hidden = {
+            f"{r['scope']}:{r['target']}"
+            for r in conn.execute("SELECT scope, target FROM chat_pin_locks WHERE owner=?", (me,)).fetchall()
+            if _lock_session_key(me, r["scope"], r["target"]) not in unlocked
+        }
+        groups = {int(r["group_id"]) for r in conn.execute("SELECT group_id FROM group_members WHERE username=?", (me,)).fetchall()}
+    finally:
+        conn.close()
+    hits = search_messages(me, q, hidden, groups)
+    idx = _SEARCH.get(me)
+    return jsonify(ok=True, q=q, hits=hits, ready=bool(idx and idx.ready), took_ms=round((time.perf_counter() - t0) * 1000, 2))
+
+
 # ---------------------------
 # Video call signaling (WebRTC)
 # ---------------------------
@@ -15325,9 +17263,18 @@ Returns:
     if group_role(gid, me) != "owner":
         abort(403)
     conn = db_connect()
+    # Voice rows go with the FK cascade; release their blobs first.
+    released = [
+        blob_release(conn, "group_voice", vr["id"], vr["stored_path"])
+        for vr in conn.execute(
+            "SELECT v.id, v.stored_path FROM group_voice v JOIN group_messages m ON m.id=v.gm_id WHERE m.group_id=?",
+            (gid,),
+        ).fetchall()
+    ]
     conn.execute("DELETE FROM groups WHERE id=?", (gid,))
     conn.commit()
     conn.close()
+    blob_discard_unreferenced(released)
     flash("Group deleted.")
     return redirect(url_for("groups"))
 
@@ -15494,18 +17441,13 @@ def _group_store_voice(gm_id: int, file_storage) -> Tuple[int, str]:
                 (gm_id, mime, "PENDING", now_z()))
     vid = cur.lastrowid
 
-    stored_path = os.path.join(ATT_DIR, f"group_voice_{vid}.bin")
     try:
-        size = _save_plain_upload(file_storage, stored_path)
-        if int(size) > CHAT_MAX_BYTES:
-            try:
-                os.remove(stored_path)
-            except Exception:
-                pass
-            conn.execute("DELETE FROM group_voice WHERE id=?", (vid,))
-            conn.commit()
-            conn.close()
-            raise ValueError("too_large")
+        stored_path, _size = blob_store_upload(conn, "group_voice", vid, file_storage, CHAT_MAX_BYTES)
+    except ValueError:
+        conn.execute("DELETE FROM group_voice WHERE id=?", (vid,))
+        conn.commit()
+        conn.close()
+        raise
     except Exception:
         conn.close()
         raise
@@ -15550,14 +17492,7 @@ def _group_store_voice_tx(conn, gm_id: int, file_storage) -> Tuple[int, str, str
     cur.execute("INSERT INTO group_voice(gm_id, mime, stored_path, created_at) VALUES(?,?,?,?)",
                 (gm_id, mime, "PENDING", now_z()))
     vid = cur.lastrowid
-    stored_path = os.path.join(ATT_DIR, f"group_voice_{vid}.bin")
-    size = _save_plain_upload(file_storage, stored_path)
-    if int(size) > CHAT_MAX_BYTES:
-        try:
-            os.remove(stored_path)
-        except Exception:
-            pass
-        raise ValueError("too_large")
+    stored_path, _size = blob_store_upload(conn, "group_voice", vid, file_storage, CHAT_MAX_BYTES)
     conn.execute("UPDATE group_voice SET stored_path=? WHERE id=?", (stored_path, vid))
     return vid, mime, stored_path
 
@@ -15722,35 +17657,66 @@ Returns:
                                g=Obj(g_row), my_role=role, members=[type("M", (), m)() for m in members],
                                all_users=all_usernames(), me=me)
 
-    msg_rows = conn.execute("""
-        SELECT id, sender, body_enc, created_at
-        FROM group_messages WHERE group_id=? ORDER BY id ASC LIMIT 400
-    """, (gid,)).fetchall()
+    msg_rows, has_more = _group_page_rows(conn, gid)
+    messages = _group_build_message_dicts(conn, msg_rows)
+    conn.close()
+
+    return render_template("group_chat.html", title="Group chat",
+                           g=Obj(g_row), my_role=role, members=[type("M", (), m)() for m in members],
+                           all_users=all_usernames(), me=me, messages=messages, has_more=has_more,
+                           has_group_pin=has_group_pin)
+
 
+def _group_page_rows(conn, gid: int, before_id: Optional[int] = None, limit: int = CHAT_PAGE_SIZE):
+    """Newest `limit` group messages below before_id, oldest first, plus a has_more flag."""
+    rows = conn.execute(
+        "SELECT id, sender, body_enc, created_at FROM group_messages WHERE group_id=? AND id<? ORDER BY id DESC LIMIT ?",
+        (gid, int(before_id) if before_id else (1 << 62), limit + 1),
+    ).fetchall()
+    return rows[:limit][::-1], len(rows) > limit
+
+
+def _group_build_message_dicts(conn, rows) -> List[Dict[str, Any]]:
+    voices = _latest_by_parent(conn, "SELECT id, gm_id, mime FROM group_voice WHERE gm_id IN (%s) ORDER BY id",
+                               [int(r["id"]) for r in rows])
     messages = []
-    for r in msg_rows:
-        v = conn.execute("SELECT id, mime FROM group_voice WHERE gm_id=? ORDER BY id DESC LIMIT 1", (r["id"],)).fetchone()
-        has_voice = bool(v)
+    for r in rows:
+        v = voices.get(int(r["id"]))
         try:
-            body = aesgcm_decrypt_text(r["body_enc"])
+            body = aesgcm_decrypt_text(r["body_enc"]) if not v else ""
         except Exception:
             body = "[decrypt failed]"
         messages.append({
             "id": r["id"],
             "sender": r["sender"],
-            "kind": "voice" if has_voice else "text",
-            "body": body if not has_voice else "",
+            "kind": "voice" if v else "text",
+            "body": body,
             "created_at_local": _local_time_str(r["created_at"]),
             "created_at_utc": r["created_at"],
             "voice_id": v["id"] if v else None,
-            "voice_mime": v["mime"] if v else "audio/webm"
+            "voice_mime": v["mime"] if v else "audio/webm",
+            "voice_url": (url_for("group_voice_stream", vid=v["id"]) if v else None),
         })
+    return messages
 
-    conn.close()
 
-    return render_template("group_chat.html", title="Group chat",
-                           g=Obj(g_row), my_role=role, members=[type("M", (), m)() for m in members],
-                           all_users=all_usernames(), me=me, messages=messages, has_group_pin=has_group_pin)
+@app.route("/api/group/<int:gid>/before")
+@login_required
+def api_group_before(gid: int):
+    """Older group history for infinite scroll (before_id, limit)."""
+    me = current_user()
+    if not _chat_lock_is_unlocked(me, "group", gid):
+        return jsonify(ok=False, locked=True, error="PIN required"), 423
+    if not group_role(gid, me):
+        abort(403)
+    before_id, limit = _chat_page_args()
+    conn = db_connect()
+    try:
+        rows, has_more = _group_page_rows(conn, gid, before_id, limit)
+        items = _group_build_message_dicts(conn, rows)
+    finally:
+        conn.close()
+    return jsonify(ok=True, items=items, has_more=has_more)
 
 @app.route("/groups/<int:gid>/send", methods=["POST"])
 @login_required
@@ -15805,9 +17771,10 @@ def group_send(gid: int):
     saved_paths = []
     try:
         cur = conn.cursor()
+        created_at = now_z()
         cur.execute(
             "INSERT INTO group_messages(group_id, sender, body_enc, created_at) VALUES(?,?,?,?)",
-            (gid, me, aesgcm_encrypt_text(body or ""), now_z()),
+            (gid, me, aesgcm_encrypt_text(body or ""), created_at),
         )
         gm_id = cur.lastrowid
 
@@ -15816,6 +17783,7 @@ def group_send(gid: int):
             saved_paths.append(sp)
 
         conn.commit()
+        search_note_group(gid, gm_id, me, created_at, body)
 
         if is_ajax:
             r = conn.execute("SELECT id, sender, body_enc, created_at FROM group_messages WHERE id=?", (gm_id,)).fetchone()
@@ -15837,7 +17805,7 @@ def group_send(gid: int):
                 "voice_id": v["id"] if v else None,
                 "voice_mime": v["mime"] if v else "audio/webm",
             }
-            html_row = render_template_string(_GROUP_ROW_TEMPLATE, m=m, me=me)
+            html_row = _row_template(_GROUP_ROW_TEMPLATE).render(m=m, me=me)
             m["voice_url"] = (url_for("group_voice_stream", vid=m["voice_id"]) if m.get("voice_id") else None)
             return jsonify(ok=True, id=gm_id, html=html_row, message=m)
 
@@ -15848,12 +17816,7 @@ def group_send(gid: int):
             conn.rollback()
         except Exception:
             pass
-        for sp in saved_paths:
-            try:
-                if sp and os.path.exists(sp):
-                    os.remove(sp)
-            except Exception:
-                pass
+        blob_discard_unreferenced(saved_paths)
         log.exception("group_send failed: %s", e)
         if is_ajax:
             return jsonify(ok=False, error="Send failed"), 500
@@ -16383,6 +18346,7 @@ def _complete_login_session(username: str, is_admin: bool) -> Response:
     session["login_at"] = now_z()
     session["_csrf"] = secrets.token_urlsafe(32)
     ensure_profile_row(username)
+    search_index_warm(username)
     try:
         prof = get_profile(username)
         if prof.get("nickname") == username and not prof.get("bio") and not prof.get("links"):
@@ -17829,183 +19793,1442 @@ def start_tor_hidden_service(port: int):
         )
         TOR_PROC = proc
 
-        hostname_path = os.path.join(hs_dir, "hostname")
-        deadline = time.time() + 180
-        while time.time() < deadline:
-            if proc.poll() is not None:
-                log.warning("Tor exited unexpectedly while starting hidden service")
-                break
-            if os.path.exists(hostname_path):
-                onion = open(hostname_path, "r", encoding="utf-8").read().strip()
-                if onion.endswith(".onion"):
-                    TOR_ONION = onion
-                    return
-            time.sleep(0.5)
+        hostname_path = os.path.join(hs_dir, "hostname")
+        deadline = time.time() + 180
+        while time.time() < deadline:
+            if proc.poll() is not None:
+                log.warning("Tor exited unexpectedly while starting hidden service")
+                break
+            if os.path.exists(hostname_path):
+                onion = open(hostname_path, "r", encoding="utf-8").read().strip()
+                if onion.endswith(".onion"):
+                    TOR_ONION = onion
+                    return
+            time.sleep(0.5)
+
+        log.warning("Tor started but onion hostname was not found in time")
+    except Exception as e:
+        log.exception("tor start failed: %s", e)
+# ---------------------------
+# First-run: create admin (creator)
+# ---------------------------
+
+def any_admin_exists() -> bool:
+    """any_admin_exists.
+
+Internal helper function.
+
+This docstring was added automatically to improve maintainability.
+
+Returns:
+    Varies.
+"""
+    conn = db_connect()
+    row = conn.execute("SELECT 1 FROM users WHERE is_admin=1 LIMIT 1").fetchone()
+    conn.close()
+    return bool(row)
+
+def prompt_creator_account():
+    """prompt_creator_account.
+
+Route handler or application helper.
+
+This docstring was expanded to make future maintenance easier.
+
+Returns:
+    Varies.
+"""
+    print("[ButSystem] First run: create the CREATOR (admin) account.")
+    while True:
+        u1 = input("Admin username: ").strip()
+        u2 = input("Confirm username: ").strip()
+        if u1 != u2 or not u1:
+            print("Usernames do not match. Try again.\n")
+            continue
+        if not re.fullmatch(r"[A-Za-z0-9_.-]{3,32}", u1):
+            print("Username must be 3-32 chars: letters, numbers, _ . -\n")
+            continue
+
+        p1 = input("Admin password (min 8 chars): ").strip()
+        p2 = input("Confirm password: ").strip()
+        if p1 != p2 or len(p1) < 8:
+            print("Passwords do not match / too short. Try again.\n")
+            continue
+
+        conn = db_connect()
+        try:
+            conn.execute("INSERT INTO users(username, pw_hash, is_admin, created_at, admin_device_id) VALUES(?,?,1,?,?)",
+                         (u1, generate_password_hash(p1), now_z(), DEVICE_ID))
+            conn.commit()
+            conn.close()
+            user_root(u1)
+            ensure_profile_row(u1)
+            try:
+                set_profile(u1, u1, "", [])
+            except Exception:
+                pass
+            print("[ButSystem] Admin created.\n")
+            return
+        except sqlite3.IntegrityError:
+            conn.close()
+            print("That username already exists. Try again.\n")
+
+# ---------------------------
+# WSGI server (threaded, quiet)
+# ---------------------------
+
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+from socketserver import ThreadingMixIn
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        """log_message.
+
+Route handler or application helper.
+
+This docstring was expanded to make future maintenance easier.
+
+Args:
+    self: Parameter.
+    format: Parameter.
+    *args: Parameter.
+
+Returns:
+    Varies.
+"""
+        return
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+_LOCAL_CERT_PATH = os.path.join(KEYS_DIR, "local_https_cert.pem")
+_LOCAL_KEY_PATH = os.path.join(KEYS_DIR, "local_https_key.pem")
+
+def _write_local_https_cert(cert_path: str, key_path: str, san_hosts: list[str]):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = issuer = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, u"ButSystem Local HTTPS")])
+    san_entries = []
+    seen = set()
+    for raw in san_hosts:
+        host = str(raw or "").strip()
+        if not host or host in seen:
+            continue
+        seen.add(host)
+        try:
+            san_entries.append(x509.IPAddress(ipaddress.ip_address(host)))
+            continue
+        except Exception:
+            pass
+        san_entries.append(x509.DNSName(host))
+    now = datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=3650))
+        .add_extension(x509.SubjectAlternativeName(san_entries), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(private_key=key, algorithm=hashes.SHA256())
+    )
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption(),
+        ))
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    try:
+        os.chmod(key_path, 0o600)
+    except Exception:
+        pass
+
+
+def _ensure_local_https_material(lan_ip: str):
+    sans = ["localhost", "127.0.0.1", "::1"]
+    if lan_ip:
+        sans.append(lan_ip)
+    needs_new = True
+    try:
+        if os.path.exists(_LOCAL_CERT_PATH) and os.path.exists(_LOCAL_KEY_PATH):
+            needs_new = False
+    except Exception:
+        needs_new = True
+    if needs_new:
+        _write_local_https_cert(_LOCAL_CERT_PATH, _LOCAL_KEY_PATH, sans)
+    return _LOCAL_CERT_PATH, _LOCAL_KEY_PATH
+
+
+# ---------------------------
+# Pooled HTTP/1.1 engine (--server pool; the default engine is the threaded wsgiref server)
+# ---------------------------
+# One selector thread accepts connections, runs the TLS handshake without
+# blocking and buffers the request head; a bounded pool of workers only ever
+# gets sockets with a complete head waiting, so idle or trickling clients
+# cost a selector slot instead of a worker. Idle keep-alive sockets go back
+# to the selector, and phones that poll every few seconds reuse one TLS
+# connection instead of handshaking per request.
+
+import selectors
+import http.client
+from email.utils import formatdate
+
+SERVER_ENGINE = "threaded"
+POOL_WORKERS = 16
+POOL_QUEUE_MAX = 256             # ready connections waiting for a worker; beyond that: 503
+POOL_MAX_CONNECTIONS = 512       # open sockets (busy + parked)
+POOL_KEEPALIVE_IDLE = 15.0       # seconds an idle keep-alive connection stays parked
+POOL_KEEPALIVE_MAX_REQUESTS = 1000
+POOL_HEAD_TIMEOUT = 10.0         # TLS handshake, and request line + headers (slowloris guard)
+POOL_HEAD_MAX = 256 * 1024       # buffered request head before the selector answers 431
+POOL_IO_TIMEOUT = 30.0           # per recv/send while a body moves
+POOL_DRAIN_MAX = 1024 * 1024     # unread request body drained to keep the connection alive
+POOL_SHUTDOWN_GRACE = 10.0
+
+_HTTP_DATE = {"t": 0, "v": ""}
+
+
+def _http_date() -> str:
+    now = int(time.time())
+    if now != _HTTP_DATE["t"]:
+        _HTTP_DATE["v"] = formatdate(now, usegmt=True)
+        _HTTP_DATE["t"] = now
+    return _HTTP_DATE["v"]
+
+
+class _ConnReader:
+    """Buffered socket reader that can tell whether request bytes are already waiting."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = bytearray()
+        self.deadline = None
+
+    def _fill(self) -> bool:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise socket.timeout("request head deadline")
+        data = self.sock.recv(65536)
+        if not data:
+            return False
+        self.buf += data
+        return True
+
+    def head_ready(self) -> bool:
+        """True once a complete request head (line + headers) is buffered."""
+        buf = self.buf
+        i = 0
+        while i < len(buf) and buf[i] in (10, 13):
+            i += 1  # stray CRLF between requests
+        return buf.find(b"\r\n\r\n", i) >= 0 or buf.find(b"\n\n", i) >= 0
+
+    def readline(self, limit: int = -1) -> bytes:
+        start = 0
+        while True:
+            i = self.buf.find(b"\n", start)
+            if i >= 0:
+                n = i + 1
+                break
+            if 0 <= limit <= len(self.buf):
+                n = limit
+                break
+            start = len(self.buf)
+            if not self._fill():
+                n = len(self.buf)
+                break
+        if 0 <= limit < n:
+            n = limit
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def read_some(self, n: int) -> bytes:
+        """Up to n bytes: from the buffer if anything is there, else one recv."""
+        if not self.buf and not self._fill():
+            return b""
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def read(self, n: int = -1) -> bytes:
+        while (n < 0 or len(self.buf) < n) and self._fill():
+            pass
+        n = len(self.buf) if n < 0 else min(n, len(self.buf))
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+
+class _BodyReader:
+    """wsgi.input bounded by Content-Length."""
+
+    def __init__(self, reader: _ConnReader, length: int):
+        self.reader = reader
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.reader.read_some(size)
+        if not data:
+            raise ConnectionError("client disconnected mid-body")
+        self.remaining -= len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def readline(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        limit = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        line = self.reader.readline(limit)
+        self.remaining -= len(line)
+        return line
+
+    def readlines(self, hint: int = -1) -> List[bytes]:
+        return list(iter(self.readline, b""))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+
+class _PoolConn:
+    __slots__ = ("sock", "addr", "reader", "served", "idle_since", "deadline", "handshaking")
+
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.reader = _ConnReader(sock)
+        self.served = 0
+        self.idle_since = 0.0
+        self.deadline = None  # head must be complete by then; None while idle
+        self.handshaking = False
+
+
+class PooledWSGIServer:
+    """Bounded worker-pool WSGI server with HTTP/1.1 keep-alive.
+
+    Same surface as the socketserver-based engine: serve_forever(),
+    shutdown() (graceful drain) and server_close().
+    """
+
+    _ACCEPT = object()
+    _WAKE = object()
+
+    def __init__(self, host: str, port: int, wsgi_app, ssl_context: Optional[ssl.SSLContext] = None, workers: int = POOL_WORKERS):
+        self.app = wsgi_app
+        self.ssl_context = ssl_context
+        self.max_body = int(app.config.get("MAX_CONTENT_LENGTH") or 0) or None
+        self.listener = socket.create_server((host, port), backlog=POOL_QUEUE_MAX, reuse_port=False)
+        self.listener.setblocking(False)
+        self.server_address = self.listener.getsockname()[:2]
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._jobs: "queue.Queue[Optional[_PoolConn]]" = queue.Queue(maxsize=POOL_QUEUE_MAX)
+        self._lock = threading.Lock()
+        self._to_park: List[_PoolConn] = []
+        self._waiting: set = set()  # in the selector: handshaking, reading a head, or idle
+        self._open = 0
+        self._stopping = threading.Event()
+        self._loop_done = threading.Event()
+        self._workers = [threading.Thread(target=self._worker, name=f"butsystem-http-{i}", daemon=True) for i in range(max(1, int(workers)))]
+        for t in self._workers:
+            t.start()
+
+    # --- selector thread ---
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        sel = self._sel
+        sel.register(self.listener, selectors.EVENT_READ, self._ACCEPT)
+        sel.register(self._wake_r, selectors.EVENT_READ, self._WAKE)
+        last_sweep = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                for key, _ in sel.select(timeout=poll_interval):
+                    if key.data is self._ACCEPT:
+                        self._accept()
+                    elif key.data is self._WAKE:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except (BlockingIOError, OSError):
+                            pass
+                    else:
+                        self._pump(key.data)
+                with self._lock:
+                    parking, self._to_park = self._to_park, []
+                for conn in parking:
+                    try:
+                        conn.sock.setblocking(False)
+                    except Exception:
+                        self._close(conn)
+                        continue
+                    # TLS may already hold the next request's bytes, which the
+                    # selector would never report; pump once right away.
+                    self._pump(conn)
+                now = time.monotonic()
+                if now - last_sweep >= 1.0:
+                    last_sweep = now
+                    for conn in [c for c in self._waiting if self._expired(c, now)]:
+                        self._drop(conn)
+        finally:
+            for conn in list(self._waiting):
+                self._close(conn)
+            self._waiting.clear()
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self._loop_done.set()
+
+    def _accept(self) -> None:
+        for _ in range(64):
+            try:
+                sock, addr = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            with self._lock:
+                full = self._open >= POOL_MAX_CONNECTIONS
+                if not full:
+                    self._open += 1
+            if full:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+                continue
+            sock.setblocking(False)
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except Exception:
+                pass
+            conn = _PoolConn(sock, addr)
+            conn.deadline = time.monotonic() + POOL_HEAD_TIMEOUT
+            if self.ssl_context is not None:
+                try:
+                    conn.sock = self.ssl_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+                except Exception:
+                    self._close(conn)
+                    continue
+                conn.reader = _ConnReader(conn.sock)
+                conn.handshaking = True
+            self._pump(conn)
+
+    def _pump(self, conn: _PoolConn) -> None:
+        """Advance a selector-owned connection without blocking.
+
+        Finishes the TLS handshake, then buffers request bytes; the connection
+        goes to a worker once a whole request head is buffered.
+        """
+        events = selectors.EVENT_READ
+        try:
+            if conn.handshaking:
+                try:
+                    conn.sock.do_handshake()
+                    conn.handshaking = False
+                except ssl.SSLWantReadError:
+                    return self._watch(conn, selectors.EVENT_READ)
+                except ssl.SSLWantWriteError:
+                    return self._watch(conn, selectors.EVENT_WRITE)
+            while len(conn.reader.buf) <= POOL_HEAD_MAX:
+                try:
+                    data = conn.sock.recv(65536)
+                except (ssl.SSLWantReadError, BlockingIOError, InterruptedError):
+                    break
+                except ssl.SSLWantWriteError:
+                    events = selectors.EVENT_WRITE
+                    break
+                if not data:
+                    return self._drop(conn)
+                if conn.deadline is None:
+                    conn.deadline = time.monotonic() + POOL_HEAD_TIMEOUT
+                conn.reader.buf += data
+        except OSError:  # includes ssl.SSLError
+            return self._drop(conn)
+        if conn.reader.head_ready():
+            self._unwatch(conn)
+            conn.deadline = None
+            self._dispatch(conn)
+        elif len(conn.reader.buf) > POOL_HEAD_MAX:
+            self._send_simple(conn, 431, "Request header fields too large")
+            self._drop(conn)
+        else:
+            self._watch(conn, events)
+
+    def _watch(self, conn: _PoolConn, events: int) -> None:
+        try:
+            if conn in self._waiting:
+                self._sel.modify(conn.sock, events, conn)
+            else:
+                self._sel.register(conn.sock, events, conn)
+                self._waiting.add(conn)
+        except Exception:
+            self._drop(conn)
+
+    def _unwatch(self, conn: _PoolConn) -> None:
+        if conn in self._waiting:
+            self._waiting.discard(conn)
+            try:
+                self._sel.unregister(conn.sock)
+            except Exception:
+                pass
+
+    def _drop(self, conn: _PoolConn) -> None:
+        self._unwatch(conn)
+        self._close(conn)
+
+    @staticmethod
+    def _expired(conn: _PoolConn, now: float) -> bool:
+        if conn.deadline is not None:
+            return now > conn.deadline
+        return now - conn.idle_since > POOL_KEEPALIVE_IDLE
+
+    def _dispatch(self, conn: _PoolConn) -> None:
+        try:
+            self._jobs.put_nowait(conn)
+        except queue.Full:
+            self._send_simple(conn, 503, "Server busy", extra="Retry-After: 2\r\n")
+            self._close(conn)
+
+    def _park(self, conn: _PoolConn) -> None:
+        conn.idle_since = time.monotonic()
+        conn.deadline = conn.idle_since + POOL_HEAD_TIMEOUT if conn.reader.buf else None
+        with self._lock:
+            self._to_park.append(conn)
+        try:
+            self._wake_w.send(b"\0")
+        except Exception:
+            pass
+
+    def _close(self, conn: _PoolConn) -> None:
+        try:
+            conn.sock.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._open = max(0, self._open - 1)
+
+    # --- workers ---
+
+    def _worker(self) -> None:
+        while True:
+            conn = self._jobs.get()
+            if conn is None:
+                return
+            self._handle(conn)
+
+    def _handle(self, conn: _PoolConn) -> None:
+        try:
+            while True:
+                keep = self._serve_request(conn)
+                conn.served += 1
+                if not keep or self._stopping.is_set():
+                    break
+                if not conn.reader.head_ready():
+                    self._park(conn)
+                    return
+        except Exception:
+            pass
+        self._close(conn)
+
+    def _send_simple(self, conn: _PoolConn, code: int, text: str, extra: str = "") -> None:
+        body = text.encode("utf-8")
+        head = (
+            f"HTTP/1.1 {code} {http.HTTPStatus(code).phrase}\r\nDate: {_http_date()}\r\n"
+            f"Content-Type: text/plain; charset=utf-8\r\nContent-Length: {len(body)}\r\n{extra}Connection: close\r\n\r\n"
+        )
+        try:
+            conn.sock.sendall(head.encode("latin-1") + body)
+        except Exception:
+            pass
+
+    def _environ(self, conn: _PoolConn, method: str, target: str, version: str, headers, body) -> Dict[str, Any]:
+        path, _, query = target.partition("?")
+        if "://" in path:
+            path = urllib.parse.urlsplit(path).path or "/"
+        environ = {
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "https" if self.ssl_context is not None else "http",
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "SERVER_SOFTWARE": "ButSystem",
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": urllib.parse.unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "REQUEST_URI": target,
+            "RAW_URI": target,
+            "REMOTE_ADDR": str(conn.addr[0]),
+            "REMOTE_PORT": str(conn.addr[1]),
+            "SERVER_NAME": str(self.server_address[0]),
+            "SERVER_PORT": str(self.server_address[1]),
+            "SERVER_PROTOCOL": version,
+        }
+        for key, value in headers.items():
+            if "_" in key:
+                continue  # same header-smuggling guard as werkzeug
+            key = key.upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = "HTTP_" + key
+                if key in environ:
+                    value = f"{environ[key]},{value}"
+            environ[key] = value
+        return environ
+
+    def _serve_request(self, conn: _PoolConn) -> bool:
+        """Read and answer one request. Returns True if the connection may be reused."""
+        sock, reader = conn.sock, conn.reader
+        sock.settimeout(POOL_HEAD_TIMEOUT)
+        reader.deadline = time.monotonic() + POOL_HEAD_TIMEOUT
+        line = reader.readline(65537)
+        if not line:
+            return False
+        if line in (b"\r\n", b"\n"):
+            return True  # stray CRLF between requests
+        if len(line) > 65536:
+            self._send_simple(conn, 414, "URI too long")
+            return False
+        parts = line.decode("latin-1").rstrip("\r\n").split()
+        if len(parts) != 3:
+            self._send_simple(conn, 400, "Bad request")
+            return False
+        method, target, version = parts
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            self._send_simple(conn, 505, "HTTP version not supported")
+            return False
+        try:
+            headers = http.client.parse_headers(reader)
+        except (http.client.HTTPException, ValueError):
+            self._send_simple(conn, 431, "Request header fields too large")
+            return False
+        reader.deadline = None
+
+        tokens = (headers.get("Connection") or "").lower()
+        keep = ("close" not in tokens) if version == "HTTP/1.1" else ("keep-alive" in tokens)
+        keep = keep and conn.served + 1 < POOL_KEEPALIVE_MAX_REQUESTS and not self._stopping.is_set()
+        chunked = "chunked" in (headers.get("Transfer-Encoding") or "").lower()
+        try:
+            length = int(headers.get("Content-Length") or 0)
+            if length < 0 or (chunked and headers.get("Content-Length")):
+                raise ValueError
+        except ValueError:
+            self._send_simple(conn, 400, "Bad Content-Length")
+            return False
+        if self.max_body and length > self.max_body:
+            self._send_simple(conn, 413, "Request entity too large")
+            return False
+        if (headers.get("Expect") or "").lower() == "100-continue":
+            sock.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        sock.settimeout(POOL_IO_TIMEOUT)
+        if chunked:
+            from werkzeug.serving import DechunkedInput
+            body = DechunkedInput(reader)
+            keep = False  # cannot cheaply resync after a partially read chunked body
+        else:
+            body = _BodyReader(reader, length)
+        environ = self._environ(conn, method, target, version, headers, body)
+        if chunked:
+            environ["wsgi.input_terminated"] = True
+
+        st = {"status": None, "headers": None, "sent": False, "chunked": False, "keep": keep}
+
+        def head_bytes() -> bytes:
+            code = int(str(st["status"])[:3])
+            names = {k.lower() for k, _ in st["headers"]}
+            no_body = method == "HEAD" or code in (204, 304) or 100 <= code < 200
+            out = [f"HTTP/1.1 {st['status']}\r\n"]
+            if "content-length" not in names and not no_body:
+                if version == "HTTP/1.1":
+                    st["chunked"] = True
+                    out.append("Transfer-Encoding: chunked\r\n")
+                else:
+                    st["keep"] = False
+            for k, v in st["headers"]:
+                if k.lower() in ("connection", "keep-alive", "transfer-encoding"):
+                    continue
+                out.append(f"{k}: {v}\r\n")
+            if "date" not in names:
+                out.append(f"Date: {_http_date()}\r\n")
+            if st["keep"]:
+                out.append(f"Connection: keep-alive\r\nKeep-Alive: timeout={int(POOL_KEEPALIVE_IDLE)}\r\n")
+            else:
+                out.append("Connection: close\r\n")
+            out.append("\r\n")
+            return "".join(out).encode("latin-1")
+
+        def write(data: bytes) -> None:
+            head = b""
+            if not st["sent"]:
+                head = head_bytes()
+                st["sent"] = True
+            if method == "HEAD":
+                data = b""
+            elif st["chunked"] and data:
+                data = b"%x\r\n%s\r\n" % (len(data), data)
+            if len(data) > 65536:
+                sock.sendall(head)
+                sock.sendall(data)
+            elif head or data:
+                sock.sendall(head + data)
+
+        def start_response(status, response_headers, exc_info=None):
+            if exc_info:
+                try:
+                    if st["sent"]:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                finally:
+                    exc_info = None
+            elif st["status"] is not None:
+                raise AssertionError("Headers already set")
+            st["status"], st["headers"] = status, list(response_headers)
+            return write
+
+        try:
+            result = self.app(environ, start_response)
+            try:
+                for data in result:
+                    if data:
+                        write(data)
+                if not st["sent"]:
+                    write(b"")
+                if st["chunked"] and method != "HEAD":
+                    sock.sendall(b"0\r\n\r\n")
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        except (ConnectionError, socket.timeout, ssl.SSLError):
+            return False
+        except Exception as e:
+            log.exception("Unhandled error in %s %s: %s", method, target, e)
+            if not st["sent"]:
+                self._send_simple(conn, 500, "Internal server error")
+            return False
+
+        if not chunked and body.remaining:
+            if body.remaining > POOL_DRAIN_MAX:
+                return False
+            while body.remaining:
+                body.read(65536)
+        return st["keep"]
+
+    # --- lifecycle ---
+
+    def shutdown(self, grace: float = POOL_SHUTDOWN_GRACE) -> None:
+        """Stop accepting, finish in-flight requests (up to `grace` s), then close."""
+        self._stopping.set()
+        try:
+            self._wake_w.send(b"\0")
+        except Exception:
+            pass
+        deadline = time.monotonic() + grace
+        self._loop_done.wait(max(0.0, deadline - time.monotonic()))
+        for _ in self._workers:
+            try:
+                self._jobs.put(None, timeout=max(0.01, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for t in self._workers:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self.server_close()
+
+    def server_close(self) -> None:
+        for s in (self.listener, self._wake_r, self._wake_w):
+            try:
+                s.close()
+            except Exception:
+                pass
+        try:
+            self._sel.close()
+        except Exception:
+            pass
+
+
+def _local_https_context(lan_ip: str = "") -> ssl.SSLContext:
+    # One long-lived context for the whole process: its session ticket keys
+    # and session cache are what let reconnecting phones resume TLS cheaply.
+    cert_path, key_path = _ensure_local_https_material(lan_ip)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(certfile=cert_path, keyfile=key_path)
+    ctx.options &= ~ssl.OP_NO_TICKET
+    return ctx
+
+
+def start_server(host: str, port: int, use_https: bool = True, lan_ip: str = "", engine: Optional[str] = None, workers: Optional[int] = None):
+    ctx = _local_https_context(lan_ip) if use_https else None
+    if (engine or SERVER_ENGINE) == "pool":
+        return PooledWSGIServer(host, port, app, ssl_context=ctx, workers=workers or POOL_WORKERS)
+    httpd = make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    if ctx is not None:
+        httpd.socket = ctx.wrap_socket(httpd.socket, server_side=True)
+    return httpd
+
+
+def run_server_benchmark(seconds: float = 5.0, clients: int = 20, path: str = "/login", engines=("threaded", "pool"), workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """Drive each engine over loopback HTTPS with persistent clients and print throughput/latency.
+
+    Clients run in this process, so absolute numbers are pessimistic; the
+    comparison between engines is what matters.
+    """
+    tls = ssl.create_default_context()
+    tls.check_hostname = False
+    tls.verify_mode = ssl.CERT_NONE  # local self-signed certificate
+    results: Dict[str, Dict[str, float]] = {}
+    for engine in engines:
+        port = find_free_port(7100)
+        httpd = start_server("127.0.0.1", port, use_https=True, engine=engine, workers=workers)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        lock = threading.Lock()
+        latencies: List[float] = []
+        counters = {"errors": 0, "connections": 0, "peak_threads": threading.active_count()}
+        stop_at = time.perf_counter() + seconds
+
+        def client():
+            mine, conn = [], None
+            while time.perf_counter() < stop_at:
+                if conn is None:
+                    conn = http.client.HTTPSConnection("127.0.0.1", port, context=tls, timeout=15)
+                    with lock:
+                        counters["connections"] += 1
+                t0 = time.perf_counter()
+                try:
+                    conn.request("GET", path)
+                    resp = conn.getresponse()
+                    resp.read()
+                    mine.append(time.perf_counter() - t0)
+                    if resp.will_close:
+                        conn.close()
+                        conn = None
+                except Exception:
+                    with lock:
+                        counters["errors"] += 1
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+            if conn is not None:
+                conn.close()
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(max(1, clients))]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            counters["peak_threads"] = max(counters["peak_threads"], threading.active_count())
+            time.sleep(0.05)
+        try:
+            httpd.shutdown()
+            httpd.server_close()
+        except Exception:
+            pass
+        latencies.sort()
+        n = len(latencies)
+        res = {
+            "requests": n,
+            "rps": n / seconds if seconds else 0.0,
+            "p50_ms": latencies[n // 2] * 1000 if n else 0.0,
+            "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else 0.0,
+            "tls_connections": counters["connections"],
+            "peak_threads": counters["peak_threads"],
+            "errors": counters["errors"],
+        }
+        results[engine] = res
+        print(f"{engine:>9}: {res['rps']:8.1f} req/s   p50 {res['p50_ms']:7.1f} ms   p99 {res['p99_ms']:7.1f} ms   "
+              f"TLS connections {res['tls_connections']:5d}   peak threads {res['peak_threads']:4d}   errors {res['errors']}")
+    return results
+
 
-        log.warning("Tor started but onion hostname was not found in time")
-    except Exception as e:
-        log.exception("tor start failed: %s", e)
 # ---------------------------
-# First-run: create admin (creator)
+# Synthetic load test (--loadtest)
 # ---------------------------
+# run_load_test() serves stand-in news feeds, starts a child ButSystem
+# (--loadtest-child) whose HOME/EXTERNAL_STORAGE point at a temp directory,
+# seeds it, and drives it over loopback HTTPS. Nothing leaves the machine.
+
+LOADTEST_PASSWORD = "loadtest-password"
+LOADTEST_SCENARIOS = ("login", "chat_open", "chat_poll", "group_poll", "dm_send", "upload", "download", "news", "story_view")
+# p95 budgets (ms) for the read hot paths at the default 16 clients; exceeding one fails
+# the run. Login (password hashing) and the write paths (SQLite writer lock) vary too much
+# across machines for a fixed budget and are guarded by --loadtest-baseline instead.
+# Override or extend with --loadtest-thresholds.
+LOADTEST_P95_BUDGET_MS = {
+    "chat_open": 1500, "chat_poll": 500, "group_poll": 150, "download": 200,
+    "news": 100, "story_view": 500, "mixed": 3000,
+}
+LOADTEST_MAX_ERROR_RATE = 0.01
+# Operation weights for the final mixed phase.
+LOADTEST_MIX = {"chat_poll": 40, "group_poll": 15, "chat_open": 10, "dm_send": 10, "news": 8,
+                "story_view": 7, "download": 5, "upload": 3, "login": 2}
+LOADTEST_UPLOAD_BYTES = 128 * 1024
+LOADTEST_MAX_CLIENTS = 20  # scope_capacity_ok() admits 20 non-admin users per link
+
+
+def _loadtest_image() -> bytes:
+    if Image is None:
+        return os.urandom(48 * 1024)
+    buf = io.BytesIO()
+    Image.new("RGB", (720, 1280), (110, 60, 160)).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _loadtest_seed(users: int, messages: int, groups: int) -> Dict[str, Any]:
+    """Fill the (temporary) database: DM rings with history and a file each, groups, one story per user."""
+    from werkzeug.datastructures import FileStorage
+
+    names = [f"load{i:03d}" for i in range(users)]
+    pw_hash = generate_password_hash(LOADTEST_PASSWORD)
+    ts = now_z()
+    peers: Dict[str, List[str]] = {u: [] for u in names}
+    files: Dict[str, List[int]] = {u: [] for u in names}
+    group_ids: Dict[str, List[int]] = {u: [] for u in names}
+    conn = db_connect()
+    conn.executemany("INSERT INTO users(username, pw_hash, is_admin, created_at) VALUES(?,?,0,?)", [(u, pw_hash, ts) for u in names])
+    for i, a in enumerate(names):
+        b = names[(i + 1) % len(names)]
+        if a == b:
+            continue
+        peers[a].append(b)
+        peers[b].append(a)
+        conn.executemany(
+            "INSERT INTO dm_messages(sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file) VALUES(?,?,?,?,?,?,0,0)",
+            [((a, b) if k % 2 == 0 else (b, a)) + (aesgcm_encrypt_text(f"seed message {k} from the load test"), ts, ts, ts) for k in range(messages)],
+        )
+        cur = conn.execute(
+            "INSERT INTO dm_messages(sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file) VALUES(?,?,?,?,?,?,0,1)",
+            (a, b, aesgcm_encrypt_text("attachment"), ts, ts, ts),
+        )
+        dm_id = cur.lastrowid
+        cur = conn.execute(
+            "INSERT INTO dm_files(dm_id, filename, mime, stored_path, size, created_at) VALUES(?,?,?,?,?,?)",
+            (dm_id, "seed.bin", "application/octet-stream", "PENDING", 0, ts),
+        )
+        fid = cur.lastrowid
+        path, size = blob_store_upload(conn, "dm_file", fid, FileStorage(io.BytesIO(os.urandom(256 * 1024)), filename="seed.bin"), CHAT_MAX_BYTES)
+        conn.execute("UPDATE dm_files SET stored_path=?, size=? WHERE id=?", (path, size, fid))
+        files[a].append(fid)
+        files[b].append(fid)
+    size = min(len(names), 8)
+    for gi in range(groups):
+        members = list(dict.fromkeys(names[(gi * size + k) % len(names)] for k in range(size)))
+        cur = conn.execute("INSERT INTO groups(name, owner, created_at) VALUES(?,?,?)", (f"Load group {gi}", members[0], ts))
+        gid = cur.lastrowid
+        conn.executemany("INSERT INTO group_members(group_id, username, role, added_at) VALUES(?,?,?,?)",
+                         [(gid, m, "owner" if m == members[0] else "member", ts) for m in members])
+        conn.executemany("INSERT INTO group_messages(group_id, sender, body_enc, created_at) VALUES(?,?,?,?)",
+                         [(gid, members[k % len(members)], aesgcm_encrypt_text(f"group message {k}"), ts) for k in range(messages)])
+        for m in members:
+            group_ids[m].append(gid)
+    conn.commit()
+    last_dm = conn.execute("SELECT COALESCE(MAX(id), 0) FROM dm_messages").fetchone()[0]
+    last_gm = conn.execute("SELECT COALESCE(MAX(id), 0) FROM group_messages").fetchone()[0]
+    conn.close()
+    _stories_tables_init()
+    image = _loadtest_image()
+    for u in names:
+        ensure_profile_row(u)
+        _story_store_upload(u, FileStorage(io.BytesIO(image), filename="story.jpg", content_type="image/jpeg"))
+    return {"users": names, "peers": peers, "files": files, "groups": group_ids, "last_dm_id": last_dm, "last_group_msg_id": last_gm}
 
-def any_admin_exists() -> bool:
-    """any_admin_exists.
 
-Internal helper function.
+def _loadtest_proc_mem(pid) -> Dict[str, float]:
+    """Current and peak RSS in MB from /proc (empty off Linux)."""
+    out: Dict[str, float] = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except Exception:
+        pass
+    return out
 
-This docstring was added automatically to improve maintainability.
 
-Returns:
-    Varies.
-"""
-    conn = db_connect()
-    row = conn.execute("SELECT 1 FROM users WHERE is_admin=1 LIMIT 1").fetchone()
-    conn.close()
-    return bool(row)
+def _loadtest_child(config: str) -> None:
+    """--loadtest-child: seed this (temporary) instance, serve it, report READY, run until stdin closes."""
+    cfg = json.loads(config)
+    t0 = time.perf_counter()
+    info = _loadtest_seed(int(cfg["users"]), int(cfg["messages"]), int(cfg["groups"]))
+    info["seed_seconds"] = round(time.perf_counter() - t0, 2)
+    info["seed_mem"] = _loadtest_proc_mem("self")
+    port = find_free_port(7300)
+    httpd = start_server("127.0.0.1", port, use_https=True, engine=cfg.get("server"), workers=cfg.get("workers"))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    info.update(port=port, pid=os.getpid(), db_path=DB_PATH, data_dir=DATA_DIR)
+    print("LOADTEST-READY " + json.dumps(info), flush=True)
+    try:
+        sys.stdin.read()
+    finally:
+        httpd.shutdown()
 
-def prompt_creator_account():
-    """prompt_creator_account.
 
-Route handler or application helper.
+def _loadtest_feed_server():
+    """Local RSS stand-in for BUTSYSTEM_NEWS_FEEDS."""
+    import http.server
 
-This docstring was expanded to make future maintenance easier.
+    class FeedHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            items = "".join(
+                f"<item><title>Load test headline {i}</title><link>https://example.invalid/{i}</link>"
+                f"<pubDate>{formatdate(time.time() - i * 600, usegmt=True)}</pubDate></item>" for i in range(30)
+            )
+            body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Load test</title>{items}</channel></rss>'.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
 
-Returns:
-    Varies.
-"""
-    print("[ButSystem] First run: create the CREATOR (admin) account.")
-    while True:
-        u1 = input("Admin username: ").strip()
-        u2 = input("Confirm username: ").strip()
-        if u1 != u2 or not u1:
-            print("Usernames do not match. Try again.\n")
-            continue
-        if not re.fullmatch(r"[A-Za-z0-9_.-]{3,32}", u1):
-            print("Username must be 3-32 chars: letters, numbers, _ . -\n")
-            continue
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
 
-        p1 = input("Admin password (min 8 chars): ").strip()
-        p2 = input("Confirm password: ").strip()
-        if p1 != p2 or len(p1) < 8:
-            print("Passwords do not match / too short. Try again.\n")
-            continue
 
-        conn = db_connect()
-        try:
-            conn.execute("INSERT INTO users(username, pw_hash, is_admin, created_at, admin_device_id) VALUES(?,?,1,?,?)",
-                         (u1, generate_password_hash(p1), now_z(), DEVICE_ID))
-            conn.commit()
-            conn.close()
-            user_root(u1)
-            ensure_profile_row(u1)
+def _loadtest_ip() -> str:
+    return f"10.{secrets.randbelow(256)}.{secrets.randbelow(256)}.{1 + secrets.randbelow(254)}"
+
+
+class _LoadClient:
+    """One simulated user: keep-alive HTTPS connection with its own cookies and CSRF token.
+
+    Requests carry an X-Forwarded-For address (trusted from loopback, as for the
+    tunnel), so per-IP limits apply per simulated user, not to the harness.
+    """
+
+    def __init__(self, port: int, username: str, tls: ssl.SSLContext):
+        self.port = port
+        self.username = username
+        self.tls = tls
+        self.ip = _loadtest_ip()
+        self.conn = None
+        self.cookies: Dict[str, str] = {}
+        self.csrf = ""
+        self.last_status = 0
+
+    def close(self) -> None:
+        if self.conn is not None:
             try:
-                set_profile(u1, u1, "", [])
+                self.conn.close()
             except Exception:
                 pass
-            print("[ButSystem] Admin created.\n")
-            return
-        except sqlite3.IntegrityError:
-            conn.close()
-            print("That username already exists. Try again.\n")
+            self.conn = None
+
+    def request(self, method: str, path: str, body=None, headers: Optional[Dict[str, str]] = None):
+        from http.cookies import SimpleCookie
+
+        h = {"Host": f"127.0.0.1:{self.port}", "X-Forwarded-For": self.ip, "Accept-Encoding": "identity"}
+        if self.cookies:
+            h["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        if method != "GET":
+            h["Origin"] = f"https://127.0.0.1:{self.port}"
+            if self.csrf:
+                h["X-CSRF-Token"] = self.csrf
+        h.update(headers or {})
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPSConnection("127.0.0.1", self.port, context=self.tls, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=h)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Idle keep-alive connections may have been closed by the server.
+                self.close()
+                if attempt:
+                    raise
+        self.last_status = resp.status
+        for value in resp.headers.get_all("Set-Cookie") or []:
+            jar = SimpleCookie()
+            jar.load(value)
+            for key, morsel in jar.items():
+                self.cookies[key] = morsel.value
+        if resp.will_close:
+            self.close()
+        return resp.status, resp.headers, data
+
+    def take_csrf(self, page: bytes) -> None:
+        m = re.search(rb'<meta name="csrf-token" content="([^"]+)"', page or b"")
+        if m:
+            self.csrf = m.group(1).decode("ascii", "replace")
+
+    def login(self) -> bool:
+        _st, _h, page = self.request("GET", "/login")
+        self.take_csrf(page)
+        form = urllib.parse.urlencode({"username": self.username, "password": LOADTEST_PASSWORD, "csrf_token": self.csrf})
+        st, h, _ = self.request("POST", "/login", form, {"Content-Type": "application/x-www-form-urlencoded"})
+        target = urllib.parse.urlsplit(h.get("Location") or "").path
+        if st not in (302, 303) or not target or target.startswith("/login"):
+            return False
+        # Landing page, as a browser would; the new session comes with a new CSRF token.
+        st, _h, page = self.request("GET", target)
+        self.take_csrf(page)
+        return st < 400
+
+
+def _loadtest_ops(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Scenario name -> fn(client) returning True on success."""
+    def first(mapping, c):
+        return (mapping.get(c.username) or [None])[0]
+
+    def login(c):
+        c.ip = _loadtest_ip()  # a fresh address per attempt, like distinct devices
+        return c.login()
+
+    def chat_open(c):
+        return c.request("GET", f"/chat/{first(info['peers'], c)}")[0] == 200
+
+    def chat_poll(c):
+        return c.request("GET", f"/api/dm/{first(info['peers'], c)}/since?after_id={info['last_dm_id']}")[0] == 200
+
+    def group_poll(c):
+        return c.request("GET", f"/api/group/{first(info['groups'], c)}/since?id={info['last_group_msg_id']}")[0] == 200
+
+    def dm_send(c):
+        form = urllib.parse.urlencode({"body": "load test message"})
+        return c.request("POST", f"/chat/{first(info['peers'], c)}/send", form,
+                         {"Content-Type": "application/x-www-form-urlencoded", "X-Requested-With": "XMLHttpRequest"})[0] == 200
+
+    def upload(c):
+        boundary = secrets.token_hex(16)
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="body"\r\n\r\nfile\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="load.bin"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("ascii") + os.urandom(LOADTEST_UPLOAD_BYTES) + f"\r\n--{boundary}--\r\n".encode("ascii")
+        return c.request("POST", f"/chat/{first(info['peers'], c)}/send", body,
+                         {"Content-Type": f"multipart/form-data; boundary={boundary}", "X-Requested-With": "XMLHttpRequest"})[0] == 200
+
+    def download(c):
+        return c.request("GET", f"/dm/file/{first(info['files'], c)}/download")[0] == 200
+
+    def news(c):
+        return c.request("GET", "/api/news")[0] == 200
+
+    def story_view(c):
+        return c.request("GET", f"/stories/view/{first(info['peers'], c)}")[0] == 200
+
+    return {"login": login, "chat_open": chat_open, "chat_poll": chat_poll, "group_poll": group_poll, "dm_send": dm_send,
+            "upload": upload, "download": download, "news": news, "story_view": story_view}
+
+
+def _loadtest_phase(clients: List[_LoadClient], ops: Dict[str, Any], seconds: float, pick) -> Dict[str, float]:
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    t_start = time.perf_counter()
+    stop_at = t_start + seconds
+
+    def worker(c):
+        mine: List[float] = []
+        bad: Dict[str, int] = {}
+        while time.perf_counter() < stop_at:
+            op = pick()
+            t0 = time.perf_counter()
+            try:
+                failure = None if ops[op](c) else f"{op}: HTTP {c.last_status}"
+            except Exception as e:
+                failure = f"{op}: {type(e).__name__}"
+            mine.append(time.perf_counter() - t0)
+            if failure:
+                bad[failure] = bad.get(failure, 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for key, n in bad.items():
+                errors[key] = errors.get(key, 0) + n
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = max(1e-9, time.perf_counter() - t_start)
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "ops": n,
+        "rps": round(n / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round((latencies[-1] if n else 0.0) * 1000, 2),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / n, 4) if n else 0.0,
+        "error_kinds": errors,
+    }
+
+
+def _loadtest_server_stats(info: Dict[str, Any], client: _LoadClient, token: str) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"seed_seconds": info.get("seed_seconds"), "after_seed": info.get("seed_mem") or {}}
+    stats.update(_loadtest_proc_mem(int(info["pid"])))
+    db = info["db_path"]
+    stats["db_bytes"] = sum(os.path.getsize(db + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(db + suffix))
+    total = 0
+    for root, _dirs, names in os.walk(info["data_dir"]):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    stats["data_bytes"] = total
+    endpoints: Dict[str, Dict[str, float]] = {}
+    try:
+        _st, _h, text = client.request("GET", "/admin/metrics/prometheus", headers={"Authorization": f"Bearer {token}"})
+        for m in re.finditer(r'^(butsystem_http_requests_total|butsystem_db_queries_total)\{endpoint="([^"]*)"[^}]*\} (\S+)$',
+                             text.decode("utf-8", "replace"), re.M):
+            ep = endpoints.setdefault(m.group(2), {"requests": 0, "db_queries": 0})
+            ep["requests" if m.group(1) == "butsystem_http_requests_total" else "db_queries"] += int(float(m.group(3)))
+        for ep in endpoints.values():
+            ep["db_queries_per_request"] = round(ep["db_queries"] / ep["requests"], 2) if ep["requests"] else 0.0
+    except Exception as e:
+        stats["metrics_error"] = str(e)
+    stats["endpoints"] = endpoints
+    return stats
+
+
+def _loadtest_check(results: Dict[str, Any], budgets: Dict[str, float], baseline: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Budget, error-rate and baseline regressions, as human-readable lines."""
+    failures = []
+    phases = dict(results["scenarios"], mixed=results["mixed"])
+    base_phases = {}
+    if baseline:
+        base_phases = dict(baseline.get("scenarios") or {}, mixed=baseline.get("mixed") or {})
+    for name, r in phases.items():
+        budget = budgets.get(name)
+        if budget is not None and r["p95_ms"] > budget:
+            failures.append(f"{name}: p95 {r['p95_ms']:.1f} ms exceeds budget {budget} ms")
+        if r["error_rate"] > LOADTEST_MAX_ERROR_RATE:
+            kinds = ", ".join(f"{k} x{v}" for k, v in sorted(r["error_kinds"].items()))
+            failures.append(f"{name}: error rate {r['error_rate']:.2%} ({r['errors']} of {r['ops']}: {kinds})")
+        base = base_phases.get(name) or {}
+        if base.get("p95_ms") and r["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p95 {r['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if base.get("rps") and r["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{name}: {r['rps']:.1f} ops/s vs baseline {base['rps']:.1f} ops/s")
+    return failures
+
+
+def run_load_test(args) -> int:
+    """Seed a throwaway instance, run each scenario then a mixed phase, write JSON. Returns the exit code."""
+    n_clients = max(1, min(int(args.loadtest_clients), LOADTEST_MAX_CLIENTS))
+    users = max(n_clients, int(args.loadtest_users))
+    budgets = dict(LOADTEST_P95_BUDGET_MS)
+    if args.loadtest_thresholds:
+        with open(args.loadtest_thresholds, encoding="utf-8") as f:
+            budgets.update({k: float(v) for k, v in json.load(f).items()})
+    baseline = None
+    if args.loadtest_baseline:
+        with open(args.loadtest_baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    tmp = tempfile.mkdtemp(prefix="butsystem-loadtest-")
+    feeds = _loadtest_feed_server()
+    token = secrets.token_urlsafe(24)
+    home = os.path.join(tmp, "home")
+    os.makedirs(home, exist_ok=True)
+    feed_url = f"http://127.0.0.1:{feeds.server_port}"
+    env = dict(os.environ, HOME=home, EXTERNAL_STORAGE=tmp, BUTSYSTEM_NEWS_FEEDS=feed_url, BUTSYSTEM_WEATHER_URL=feed_url + "/weather",
+               BUTSYSTEM_METRICS_TOKEN=token, NO_PROXY="127.0.0.1,localhost", no_proxy="127.0.0.1,localhost")
+    cfg = {"users": users, "messages": int(args.loadtest_messages), "groups": max(1, users // 4),
+           "server": args.server, "workers": args.workers}
+    child_log_path = os.path.join(tmp, "child.log")
+    child_log = open(child_log_path, "w")
+    print(f"Seeding {users} users, {cfg['messages']} messages per conversation, {cfg['groups']} groups in {tmp} ...")
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--loadtest-child", json.dumps(cfg)],
+                            env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=child_log, text=True)
+    watchdog = threading.Timer(600, proc.kill)
+    watchdog.start()
+    clients: List[_LoadClient] = []
+    try:
+        info = None
+        for line in proc.stdout:
+            if line.startswith("LOADTEST-READY "):
+                info = json.loads(line[len("LOADTEST-READY "):])
+                break
+        watchdog.cancel()
+        if info is None:
+            print(f"Load test server failed to start; see {child_log_path}")
+            args.loadtest_keep = True
+            return 2
+        # Keep draining the child's stdout so it can never block on a full pipe.
+        threading.Thread(target=lambda: [None for _ in proc.stdout], daemon=True).start()
+
+        tls = ssl.create_default_context()
+        tls.check_hostname = False
+        tls.verify_mode = ssl.CERT_NONE  # local self-signed certificate
+        clients = [_LoadClient(info["port"], u, tls) for u in info["users"][:n_clients]]
+        for c in clients:
+            if not c.login():
+                print(f"Login failed for {c.username}; see {child_log_path}")
+                args.loadtest_keep = True
+                return 2
+        ops = _loadtest_ops(info)
+        for c in clients:
+            ops["news"](c)  # first request starts the background feed refresh
+        results: Dict[str, Any] = {
+            "version": 1,
+            "created_at": now_z(),
+            "config": dict(cfg, clients=n_clients, seconds=float(args.loadtest_seconds), python=sys.version.split()[0]),
+            "scenarios": {},
+        }
+        print(f"{'scenario':>12} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        mix = [op for op, weight in LOADTEST_MIX.items() for _ in range(weight)]
+        for name in LOADTEST_SCENARIOS + ("mixed",):
+            pick = (lambda: secrets.choice(mix)) if name == "mixed" else (lambda name=name: name)
+            r = _loadtest_phase(clients, ops, float(args.loadtest_seconds), pick)
+            if name == "mixed":
+                results["mixed"] = r
+            else:
+                results["scenarios"][name] = r
+            print(f"{name:>12} {r['rps']:9.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f} {r['errors']:7d}")
+        results["server"] = _loadtest_server_stats(info, clients[0], token)
+        srv = results["server"]
+        print(f"server: RSS {srv.get('rss_mb', '?')} MB (peak {srv.get('peak_rss_mb', '?')} MB, "
+              f"{srv['after_seed'].get('peak_rss_mb', '?')} MB after seeding), "
+              f"DB {human_size(srv['db_bytes'])}, data {human_size(srv['data_bytes'])}")
+        results["failures"] = _loadtest_check(results, budgets, baseline, float(args.loadtest_tolerance))
+        out = args.loadtest_out or f"loadtest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {out}")
+        for line in results["failures"]:
+            print(f"FAIL {line}")
+        return 1 if results["failures"] else 0
+    finally:
+        watchdog.cancel()
+        for c in clients:
+            c.close()
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=30)
+        except Exception:
+            proc.kill()
+        feeds.shutdown()
+        child_log.close()
+        if not args.loadtest_keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
 
 # ---------------------------
-# WSGI server (threaded, quiet)
+# Self-test (--selftest)
 # ---------------------------
+# Like the load test, the checks run in a child (--selftest-child) whose HOME and
+# EXTERNAL_STORAGE point at a temporary directory, so they never touch real data.
 
-from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
-from socketserver import ThreadingMixIn
+SELFTEST_RETENTION_MAX_SECONDS = 1.0  # the busy timeout alone is 5 s
 
-class QuietHandler(WSGIRequestHandler):
-    def log_message(self, format, *args):
-        """log_message.
 
-Route handler or application helper.
+class _SelftestSkip(Exception):
+    pass
 
-This docstring was expanded to make future maintenance easier.
 
-Args:
-    self: Parameter.
-    format: Parameter.
-    *args: Parameter.
+def _selftest_retention_story_thumbnail() -> None:
+    """An expired story with a thumbnail is retained without stalling and leaves no derivatives."""
+    from werkzeug.datastructures import FileStorage
 
-Returns:
-    Varies.
-"""
-        return
+    if Image is None:
+        raise _SelftestSkip("Pillow is not installed")
+    conn = db_connect()
+    conn.execute("INSERT OR IGNORE INTO users(username, pw_hash, is_admin, created_at) VALUES(?,?,0,?)",
+                 ("selftest", generate_password_hash(secrets.token_hex(8)), now_z()))
+    conn.commit()
+    conn.close()
+    _stories_tables_init()
+    sid = _story_store_upload("selftest", FileStorage(io.BytesIO(_loadtest_image()), filename="story.jpg", content_type="image/jpeg"))
+    conn = db_connect()
+    conn.execute("UPDATE stories SET created_at=? WHERE id=?", (_hours_ago_z(max(STORY_RETAIN_HOURS, _STORY_ACTIVE_HOURS) + 1), sid))
+    conn.commit()
+    path = conn.execute("SELECT stored_path FROM stories WHERE id=?", (sid,)).fetchone()["stored_path"]
+    conn.close()
+    derived = image_derivative(path, "image/jpeg", "md")
+    assert derived and os.path.exists(derived[0]), "no thumbnail was rendered"
 
-class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
-    daemon_threads = True
+    t0 = time.perf_counter()
+    stats = retention_run_once()
+    elapsed = time.perf_counter() - t0
+    conn = db_connect()
+    left = conn.execute("SELECT COUNT(*) FROM image_derivatives").fetchone()[0]
+    story = conn.execute("SELECT 1 FROM stories WHERE id=?", (sid,)).fetchone()
+    conn.close()
+    assert stats.get("stories") == 1 and not story, f"story not retained: {stats}"
+    assert elapsed < SELFTEST_RETENTION_MAX_SECONDS, f"retention took {elapsed:.2f} s"
+    assert left == 0, f"{left} image_derivatives rows left"
+    assert not os.path.exists(path), "story blob left on disk"
+    assert not os.path.exists(derived[0]), "thumbnail left on disk"
 
-_LOCAL_CERT_PATH = os.path.join(KEYS_DIR, "local_https_cert.pem")
-_LOCAL_KEY_PATH = os.path.join(KEYS_DIR, "local_https_key.pem")
 
-def _write_local_https_cert(cert_path: str, key_path: str, san_hosts: list[str]):
-    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-    subject = issuer = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, u"ButSystem Local HTTPS")])
-    san_entries = []
-    seen = set()
-    for raw in san_hosts:
-        host = str(raw or "").strip()
-        if not host or host in seen:
-            continue
-        seen.add(host)
-        try:
-            san_entries.append(x509.IPAddress(ipaddress.ip_address(host)))
-            continue
-        except Exception:
-            pass
-        san_entries.append(x509.DNSName(host))
-    now = datetime.utcnow()
-    cert = (
-        x509.CertificateBuilder()
-        .subject_name(subject)
-        .issuer_name(issuer)
-        .public_key(key.public_key())
-        .serial_number(x509.random_serial_number())
-        .not_valid_before(now - timedelta(days=1))
-        .not_valid_after(now + timedelta(days=3650))
-        .add_extension(x509.SubjectAlternativeName(san_entries), critical=False)
-        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
-        .sign(private_key=key, algorithm=hashes.SHA256())
-    )
-    with open(key_path, "wb") as f:
-        f.write(key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.TraditionalOpenSSL,
-            encryption_algorithm=serialization.NoEncryption(),
-        ))
-    with open(cert_path, "wb") as f:
-        f.write(cert.public_bytes(serialization.Encoding.PEM))
-    try:
-        os.chmod(key_path, 0o600)
-    except Exception:
-        pass
+SELFTESTS = {
+    "retention_story_thumbnail": _selftest_retention_story_thumbnail,
+}
 
 
-def _ensure_local_https_material(lan_ip: str):
-    sans = ["localhost", "127.0.0.1", "::1"]
-    if lan_ip:
-        sans.append(lan_ip)
-    needs_new = True
-    try:
-        if os.path.exists(_LOCAL_CERT_PATH) and os.path.exists(_LOCAL_KEY_PATH):
-            needs_new = False
-    except Exception:
-        needs_new = True
-    if needs_new:
-        _write_local_https_cert(_LOCAL_CERT_PATH, _LOCAL_KEY_PATH, sans)
-    return _LOCAL_CERT_PATH, _LOCAL_KEY_PATH
+def _selftest_child() -> int:
+    failed = 0
+    for name, check in SELFTESTS.items():
+        try:
+            check()
+            print(f"PASS {name}")
+        except _SelftestSkip as e:
+            print(f"SKIP {name}: {e}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {name}: {e or type(e).__name__}")
+    return 1 if failed else 0
 
 
-def start_server(host: str, port: int, use_https: bool = True, lan_ip: str = ""):
-    httpd = make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
-    if use_https:
-        cert_path, key_path = _ensure_local_https_material(lan_ip)
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        ctx.load_cert_chain(certfile=cert_path, keyfile=key_path)
-        httpd.socket = ctx.wrap_socket(httpd.socket, server_side=True)
-    return httpd
+def run_self_test() -> int:
+    tmp = tempfile.mkdtemp(prefix="butsystem-selftest-")
+    try:
+        home = os.path.join(tmp, "home")
+        os.makedirs(home, exist_ok=True)
+        env = dict(os.environ, HOME=home, EXTERNAL_STORAGE=tmp)
+        return subprocess.call([sys.executable, os.path.abspath(__file__), "--selftest-child"], env=env, stdin=subprocess.DEVNULL)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _parse_cli(argv=None):
+    parser = argparse.ArgumentParser(prog="ButSystem")
+    parser.add_argument("--server", choices=("pool", "threaded"), default=SERVER_ENGINE,
+                        help="HTTP engine: the original thread-per-connection server (default) or a bounded worker pool with keep-alive")
+    parser.add_argument("--workers", type=int, default=POOL_WORKERS, help="worker threads for --server pool")
+    parser.add_argument("--bench", action="store_true", help="benchmark both engines on loopback and exit")
+    parser.add_argument("--bench-seconds", type=float, default=5.0)
+    parser.add_argument("--bench-clients", type=int, default=20)
+    parser.add_argument("--bench-path", default="/login")
+    parser.add_argument("--loadtest", action="store_true", help="run the synthetic load test against a temporary instance and exit")
+    parser.add_argument("--loadtest-users", type=int, default=20, help="seeded users")
+    parser.add_argument("--loadtest-clients", type=int, default=16, help=f"concurrent simulated users (max {LOADTEST_MAX_CLIENTS})")
+    parser.add_argument("--loadtest-messages", type=int, default=300, help="seeded messages per conversation and group")
+    parser.add_argument("--loadtest-seconds", type=float, default=5.0, help="duration of each scenario")
+    parser.add_argument("--loadtest-out", default="", help="JSON results path (default loadtest-<time>.json)")
+    parser.add_argument("--loadtest-baseline", default="", help="earlier results JSON to compare against")
+    parser.add_argument("--loadtest-tolerance", type=float, default=0.25, help="allowed p95/throughput regression vs the baseline")
+    parser.add_argument("--loadtest-thresholds", default="", help='JSON {"scenario": p95_ms} overriding the built-in budgets')
+    parser.add_argument("--loadtest-keep", action="store_true", help="keep the temporary data directory")
+    parser.add_argument("--loadtest-child", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--selftest", action="store_true", help="run the built-in checks against a temporary instance and exit")
+    parser.add_argument("--selftest-child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
 
 # ---------------------------
 # Main
@@ -18036,16 +21259,32 @@ This docstring was expanded to make future maintenance easier.
 Returns:
     Varies.
 """
+    args = _parse_cli()
+    if args.bench:
+        run_server_benchmark(args.bench_seconds, args.bench_clients, args.bench_path, workers=args.workers)
+        return
+    if args.loadtest_child:
+        _loadtest_child(args.loadtest_child)
+        return
+    if args.loadtest:
+        sys.exit(run_load_test(args))
+    if args.selftest_child:
+        sys.exit(_selftest_child())
+    if args.selftest:
+        sys.exit(run_self_test())
+
     if not any_admin_exists():
         prompt_creator_account()
 
     pending_requests_bootstrap()
     # approval prompts are handled in the main loop (TTY-safe)
+    threading.Thread(target=blob_store_maintenance, name="butsystem-blobs", daemon=True).start()
+    threading.Thread(target=retention_loop, name="butsystem-retention", daemon=True).start()
 
     port = find_free_port(6969)
     host = "0.0.0.0"
     lan = local_ip()
-    httpd = start_server(host, port, use_https=True, lan_ip=lan)
+    httpd = start_server(host, port, use_https=True, lan_ip=lan, engine=args.server, workers=args.workers)
     threading.Thread(target=httpd.serve_forever, daemon=True).start()
 
     threading.Thread(target=start_cloudflared, args=(port,), daemon=True).start()
@@ -18089,6 +21328,7 @@ Returns:
         httpd.shutdown()
     except Exception:
         pass
+    file_activity_flush()
 
 
 # ---------------------------
@@ -18216,6 +21456,8 @@ def _safe_report_att_path(stored_path: str) -> Optional[str]:
         if not stored_path:
             return None
         real = os.path.realpath(str(stored_path))
+        if _blob_digest_of(real):
+            return real if os.path.isfile(real) else None
         base = os.path.realpath(ATT_DIR)
         if real == base or not real.startswith(base + os.sep):
             return None
@@ -18331,17 +21573,13 @@ def _report_store_attachment(rid: int, file_storage):
         (rid, aesgcm_encrypt_text(filename), aesgcm_encrypt_text(mime), "PENDING", now_z()),
     )
     aid = cur.lastrowid
-    sp = os.path.join(ATT_DIR, f"report_att_{aid}.bin")
     try:
-        size = _save_plain_upload(file_storage, sp)
-        if int(size) > CHAT_MAX_BYTES:
-            try:
-                os.remove(sp)
-            except Exception:
-                pass
+        try:
+            sp, _size = blob_store_upload(conn, "report_att", aid, file_storage, CHAT_MAX_BYTES)
+        except ValueError:
             conn.execute("DELETE FROM report_attachments WHERE id=?", (aid,))
             conn.commit()
-            raise ValueError("too_large")
+            raise
         conn.execute("UPDATE report_attachments SET stored_path=? WHERE id=?", (sp, aid))
         conn.commit()
     finally:
@@ -18483,16 +21721,14 @@ def report_delete(rid: int):
     if not user_is_admin(current_user()):
         abort(403)
     conn = db_connect()
-    rows = conn.execute("SELECT stored_path FROM report_attachments WHERE report_id=?", (rid,)).fetchall()
+    released = [
+        blob_release(conn, "report_att", r["id"], r["stored_path"])
+        for r in conn.execute("SELECT id, stored_path FROM report_attachments WHERE report_id=?", (rid,)).fetchall()
+    ]
     conn.execute("DELETE FROM report_attachments WHERE report_id=?", (rid,))
     conn.execute("DELETE FROM reports WHERE id=?", (rid,))
     conn.commit(); conn.close()
-    for r in rows:
-        try:
-            if r["stored_path"] and os.path.exists(r["stored_path"]):
-                os.remove(r["stored_path"])
-        except Exception:
-            pass
+    blob_discard_unreferenced(released)
     flash("Report deleted.")
     return redirect(url_for("reports"))
 
@@ -18537,7 +21773,7 @@ _DISCUSS_ROW_TEMPLATE = r"""
       </audio>
     {% elif m.kind == "file" %}
       {% if m.file_is_image %}
-        <img src="{{ url_for('discussion_file_stream', fid=m.file_id) }}" alt="{{ m.file_name }}"/>
+        <a href="{{ url_for('discussion_file_stream', fid=m.file_id) }}" target="_blank" rel="noopener"><img src="{{ url_for('discussion_file_stream', fid=m.file_id, s='md') }}" alt="{{ m.file_name }}" loading="lazy"/></a>
       {% elif m.file_is_video %}
         <video controls playsinline preload="metadata">
           <source src="{{ url_for('discussion_file_stream', fid=m.file_id) }}" type="{{ m.file_mime }}">
@@ -18752,12 +21988,13 @@ def discussion_send():
                 pass
 
         cur = conn.cursor()
+        created_at = now_z()
         cur.execute(
             "INSERT INTO discussion_messages(sender, body_enc, created_at, has_voice, has_file) VALUES(?,?,?,?,?)",
             (
                 me,
                 aesgcm_encrypt_text(body or ""),
-                now_z(),
+                created_at,
                 1 if has_voice else 0,
                 1 if (has_file or has_gif_url) else 0,
             ),
@@ -18778,6 +22015,7 @@ def discussion_send():
 
         conn.commit()
         _discussion_mark_sent(me)
+        search_note_discussion(msg_id, me, created_at, body)
 
         if is_ajax:
             r = conn.execute(
@@ -18797,12 +22035,7 @@ def discussion_send():
             conn.rollback()
         except Exception:
             pass
-        for sp in saved_paths:
-            try:
-                if sp and os.path.exists(sp):
-                    os.remove(sp)
-            except Exception:
-                pass
+        blob_discard_unreferenced(saved_paths)
         log.exception("discussion_send failed: %s", e)
         if is_ajax:
             return jsonify(ok=False, error=_("Send failed.")), 500
@@ -18952,7 +22185,7 @@ TEMPLATES["discussion.html"] = r"""
             </audio>
           {% elif m.kind == "file" %}
             {% if m.file_is_image %}
-              <img src="{{ url_for('discussion_file_stream', fid=m.file_id) }}" alt="{{ m.file_name }}"/>
+              <a href="{{ url_for('discussion_file_stream', fid=m.file_id) }}" target="_blank" rel="noopener"><img src="{{ url_for('discussion_file_stream', fid=m.file_id, s='md') }}" alt="{{ m.file_name }}" loading="lazy"/></a>
             {% elif m.file_is_video %}
               <video controls playsinline preload="metadata">
                 <source src="{{ url_for('discussion_file_stream', fid=m.file_id) }}" type="{{ m.file_mime }}">
@@ -19378,7 +22611,12 @@ _STORY_REACTION_MIN_INTERVAL_SEC = 1.5
 _STORY_REACTION_THROTTLE = {}  # (viewer, owner) -> monotonic ts
 _STORY_REACTION_THROTTLE_LOCK = threading.Lock()
 
+_STORIES_TABLES_READY = False
+
 def _stories_tables_init():
+    global _STORIES_TABLES_READY
+    if _STORIES_TABLES_READY:
+        return
     try:
         conn = db_connect()
         conn.execute("""
@@ -19393,6 +22631,7 @@ def _stories_tables_init():
             )
         """)
         conn.commit()
+        _STORIES_TABLES_READY = True
     finally:
         try:
             conn.close()
@@ -19411,6 +22650,8 @@ def _story_safe_path(sp: str) -> Optional[str]:
         if not sp:
             return None
         real = os.path.realpath(str(sp))
+        if _blob_digest_of(real):
+            return real if os.path.isfile(real) else None
         base = os.path.realpath(ATT_DIR)
         if real == base or not real.startswith(base + os.sep):
             return None
@@ -19427,19 +22668,42 @@ def _story_is_media(mime: str) -> Tuple[bool, bool]:
     m = (mime or "").lower()
     return m.startswith("image/"), m.startswith("video/")
 
+# Owners with an active story, cached until the next one of them expires.
+_STORY_OWNERS = {"users": frozenset(), "valid_until": 0.0}
+_STORY_OWNERS_LOCK = threading.Lock()
+
+def _invalidate_story_owners() -> None:
+    with _STORY_OWNERS_LOCK:
+        _STORY_OWNERS["valid_until"] = 0.0
+
 def _story_active_usernames() -> set:
+    now = time.time()
+    with _STORY_OWNERS_LOCK:
+        if now < _STORY_OWNERS["valid_until"]:
+            return set(_STORY_OWNERS["users"])
     _stories_tables_init()
     conn = db_connect()
     try:
         rows = conn.execute(
-            "SELECT DISTINCT owner FROM stories WHERE created_at>=? ORDER BY owner COLLATE NOCASE ASC",
+            "SELECT owner, MAX(created_at) AS last_at FROM stories WHERE created_at>=? GROUP BY owner",
             (_story_cutoff_z(),)
         ).fetchall()
-        return {r["owner"] for r in rows}
     except Exception:
         return set()
     finally:
         conn.close()
+    valid_until = now + USER_CTX_TTL
+    for r in rows:
+        try:
+            last = datetime.strptime(r["last_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+            valid_until = min(valid_until, last + _STORY_ACTIVE_HOURS * 3600)
+        except Exception:
+            pass
+    users = frozenset(r["owner"] for r in rows)
+    with _STORY_OWNERS_LOCK:
+        _STORY_OWNERS["users"] = users
+        _STORY_OWNERS["valid_until"] = valid_until
+    return set(users)
 
 def _story_store_upload(owner: str, file_storage) -> int:
     if not file_storage or not getattr(file_storage, "filename", ""):
@@ -19480,25 +22744,17 @@ def _story_store_upload(owner: str, file_storage) -> int:
             (owner, filename, mime, "PENDING", 0, now_z())
         )
         sid = int(cur.lastrowid)
-        sp = os.path.join(ATT_DIR, f"story_{sid}.bin")
         try:
-            size = int(_save_plain_upload(file_storage, sp))
+            sp, size = blob_store_upload(conn, "story", sid, file_storage, _STORY_MAX_BYTES)
         except Exception:
             try:
                 conn.rollback()
             except Exception:
                 pass
             raise
-        if size > _STORY_MAX_BYTES:
-            try:
-                os.remove(sp)
-            except Exception:
-                pass
-            conn.execute("DELETE FROM stories WHERE id=?", (sid,))
-            conn.commit()
-            raise ValueError("too_large")
         conn.execute("UPDATE stories SET stored_path=?, size=? WHERE id=?", (sp, size, sid))
         conn.commit()
+        _invalidate_story_owners()
         return sid
     finally:
         try:
@@ -19613,7 +22869,7 @@ def _story_reaction_throttle_ok(viewer: str, owner: str) -> bool:
 
 
 def _dm_store_existing_file_tx(conn, dm_id: int, src_path: str, filename: str, mime: str) -> Dict[str, Any]:
-    """Copy an existing server-side file into DM attachments inside an open transaction."""
+    """Attach an existing server-side file to a DM inside an open transaction (shares its blob)."""
     fn = secure_filename(filename or "file") or "file"
     mm = (mime or guess_mime(fn) or "application/octet-stream").strip().lower()
     cur = conn.cursor()
@@ -19622,24 +22878,11 @@ def _dm_store_existing_file_tx(conn, dm_id: int, src_path: str, filename: str, m
         (dm_id, fn, mm, "PENDING", 0, now_z())
     )
     fid = int(cur.lastrowid)
-    dst = os.path.join(DM_FILES_DIR, f"dm_file_{fid}.bin")
-    size = 0
     try:
-        with open(src_path, "rb") as rf, open(dst, "wb") as wf:
-            while True:
-                chunk = rf.read(64 * 1024)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > CHAT_MAX_BYTES:
-                    raise ValueError("too_large")
-                wf.write(chunk)
+        if os.path.getsize(src_path) > CHAT_MAX_BYTES:
+            raise ValueError("too_large")
+        dst, size = blob_link(conn, "dm_file", fid, src_path)
     except Exception:
-        try:
-            if os.path.exists(dst):
-                os.remove(dst)
-        except Exception:
-            pass
         conn.execute("DELETE FROM dm_files WHERE id=?", (fid,))
         raise
 
@@ -19667,26 +22910,24 @@ def _send_story_reaction_dm(sender: str, recipient: str, story_row, reaction_tex
             raise ValueError("recipient_missing")
 
         cur = conn.cursor()
+        created_at = now_z()
         cur.execute(
             "INSERT INTO dm_messages(sender, recipient, body_enc, created_at, delivered_at, read_at, has_voice, has_file) VALUES(?,?,?,?,NULL,NULL,0,1)",
-            (sender, recipient, aesgcm_encrypt_text(body_text), now_z()),
+            (sender, recipient, aesgcm_encrypt_text(body_text), created_at),
         )
         dm_id = int(cur.lastrowid)
         info = _dm_store_existing_file_tx(conn, dm_id, src_path, filename, mime)
         saved_paths.append(info.get("stored_path"))
         conn.commit()
+        invalidate_user_ctx(recipient, keys=("dm_unread",))
+        search_note_dm(dm_id, sender, recipient, created_at, body_text)
         return dm_id
     except Exception:
         try:
             conn.rollback()
         except Exception:
             pass
-        for sp in saved_paths:
-            try:
-                if sp and os.path.exists(sp):
-                    os.remove(sp)
-            except Exception:
-                pass
+        blob_discard_unreferenced(saved_paths)
         raise
     finally:
         try:
@@ -19871,6 +23112,8 @@ def story_media(sid: int):
     is_img, is_vid = _story_is_media(mime)
     if not (is_img or is_vid):
         abort(404)
+    if is_img and request.args.get("s") in THUMB_SIZES:
+        return send_image_variant(sp, mime, request.args.get("s"), immutable=True)
     resp = send_file(sp, mimetype=mime, as_attachment=False, conditional=True, max_age=0)
     resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp.headers["Pragma"] = "no-cache"
@@ -20087,7 +23330,7 @@ TEMPLATES["stories.html"] = r"""
         <div class="d-flex align-items-center gap-2">
           <div class="avatar-wrap story-ring">
             {% if u.has_pic %}
-              <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+              <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
             {% else %}
               <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
             {% endif %}
@@ -20116,7 +23359,7 @@ TEMPLATES["stories.html"] = r"""
           <div class="d-flex align-items-center gap-2">
             <div class="avatar-wrap story-ring">
               {% if u.has_pic %}
-                <img class="avatar-img pfp-clickable" src="{{ url_for('profile_pic', username=u.username) }}" alt="" onclick="toggleImageModal(this.src)">
+                <img class="avatar-img pfp-clickable" src="{{ avatar_url(u.username, 'sm') }}" alt="" onclick="toggleImageModal('{{ avatar_url(u.username, 'lg') }}')">
               {% else %}
                 <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
               {% endif %}
@@ -20164,7 +23407,7 @@ TEMPLATES["story_viewer.html"] = r"""
     <div class="d-flex align-items-center gap-2">
       <div class="avatar-wrap {% if has_active_story(owner) %}story-ring{% endif %}">
         {% if owner_has_pic %}
-          <img class="avatar-img" src="{{ url_for('profile_pic', username=owner) }}" alt="">
+          <img class="avatar-img" src="{{ avatar_url(owner) }}" alt="">
         {% else %}
           <div class="avatar-fallback"><img data-logo class="avatar-img" src="{{ logo_dark }}" alt="logo"></div>
         {% endif %}
@@ -20185,7 +23428,7 @@ TEMPLATES["story_viewer.html"] = r"""
 
   <div class="story-stage">
     {% if story.is_image %}
-      <img src="{{ url_for('story_media', sid=story.id) }}" alt="{{ _('Story') }}">
+      <img src="{{ url_for('story_media', sid=story.id, s='lg') }}" alt="{{ _('Story') }}">
     {% elif story.is_video %}
       <video src="{{ url_for('story_media', sid=story.id) }}" controls autoplay playsinline></video>
     {% else %}
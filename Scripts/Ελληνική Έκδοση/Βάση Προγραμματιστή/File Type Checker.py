@@ -10,14 +10,29 @@ import struct
 import platform
 import shutil
 import json
+import mmap
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+try:
+    import numpy  # Προαιρετικό: πολύ ταχύτερα ιστογράμματα bytes
+except ImportError:
+    numpy = None
+
 # --- Ρυθμίσεις ---
 FOLDER_NAME = "File Type Checker"
 MAX_FILE_SIZE_LIMIT = 50 * 1024 * 1024 * 1024  # Όριο 50 GB
 ANALYSIS_RAM_LIMIT = 200 * 1024 * 1024         # Μόνο 200MB σε RAM για σάρωση προτύπων
 QUARANTINE_THRESHOLD = 7
 VIRUSTOTAL_API_KEY = "" 
+SCAN_WINDOW = 4 * 1024 * 1024                  # Bytes ανά βήμα του ενιαίου περάσματος (hash/μέτρηση/πρότυπα)
+SCAN_OVERLAP = 4096                            # Ένα εύρημα προτύπου μπορεί να εκτείνεται σε δύο παράθυρα
+TAIL_SCAN_SIZE = 10 * 1024 * 1024              # Περιοχή τέλους που σαρώνεται για πρότυπα σε μεγάλα αρχεία
+HIGH_ENTROPY = 7.4
+ENTROPY_SAMPLE = 100000                        # Bytes από την αρχή του αρχείου για την εντροπία
+SCAN_CACHE_VERSION = 2
+SCAN_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "file_type_checker", "results_el.json")
 
 # --- Διασταύρωση πλατφορμών ---
 def get_target_dir():
@@ -80,6 +95,39 @@ def get_file_mime(filepath, data_head):
         
     return "unknown/data", "Άγνωστο δυαδικό"
 
+# --- Σύνολο Προτύπων (ένα regex ανά πρότυπο, ώστε τα επικαλυπτόμενα ευρήματα να μετρούν όλα) ---
+STRING_PATTERNS = {
+    "IPv4": rb'(?i:\b(?:\d{1,3}\.){3}\d{1,3}\b)',
+    "Email": rb'(?i:[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+    "URL": rb'(?i:http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+)',
+    "Πορτοφόλι Bitcoin": rb'(?i:\b(?:bc1|[13])[a-zA-Z0-9]{25,39}\b)',
+    "Προσωπικό Κλειδί": rb'(?i:-----BEGIN (?:RSA|DSA|EC|OPENSSH|PGP) PRIVATE KEY-----)',
+    "Ασαφής PowerShell": rb'(?i:FromBase64String|::Decode|GNwZW|SUVY|IgB8AC|cwB3AGkAdABjAGgA)',
+    "WebShell": rb'(?i:passthru|exec|shell_exec|eval\(base64_decode)',
+    "WinAPI (Malware)": rb'(?i:VirtualAlloc|CreateRemoteThread|WriteProcessMemory|ShellExecute|URLDownloadToFile)',
+    # Λέξεις-κλειδιά δομής (με διάκριση πεζών-κεφαλαίων)
+    "PDF": rb'/JavaScript|/JS|/OpenAction|/Launch|/URI|/SubmitForm',
+    "VBA": rb'Attribute VB_Name',
+}
+SCAN_PATTERNS = {name: re.compile(pattern) for name, pattern in STRING_PATTERNS.items()}
+PDF_TRIGGERS = {'/JavaScript': 5, '/JS': 5, '/OpenAction': 4, '/Launch': 6, '/URI': 2, '/SubmitForm': 3}
+
+def byte_histogram(window):
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(window, dtype=numpy.uint8), minlength=256).tolist()
+    counts = Counter(window)
+    return [counts.get(x, 0) for x in range(256)]
+
+def histogram_entropy(histogram):
+    total = sum(histogram)
+    if not total: return 0
+    entropy = 0
+    for count in histogram:
+        if count:
+            p_x = count / total
+            entropy -= p_x * math.log(p_x, 2)
+    return entropy
+
 # --- Πυρήνας Ανάλυσης ---
 class GlobalStats:
     total = 0
@@ -95,42 +143,57 @@ class AdvancedAnalyzer:
         self.warnings = []
         self.hidden_data = [] 
         self.indicators = [] 
-        self.data = b"" # Buffer ανάλυσης (μερικό)
+        self.data = b"" # Περιεχόμενο αρχείου (mmap) όσο διαρκεί η ανάλυση
         self.vt_result = "Δ/Υ"
         self.is_quarantined = False
         self.is_partial_read = False
-        
-        # --- ΕΥΦΥΗΣ ΦΟΡΤΩΣΗ (Βελτιστοποιημένη για 50GB αρχεία) ---
-        try:
-            with open(filepath, 'rb') as f:
-                if self.size <= ANALYSIS_RAM_LIMIT:
-                    # Μικρό αρχείο: Διάβασμα όλου
-                    self.data = f.read()
-                else:
-                    # Μεγάλο αρχείο: Διάβασμα μόνο αρχής και τέλους
-                    self.is_partial_read = True
-                    head_size = ANALYSIS_RAM_LIMIT - (10 * 1024 * 1024) # Κράτηση 10MB για το τέλος
-                    self.data = f.read(head_size)
-                    
-                    try:
-                        f.seek(- (10 * 1024 * 1024), 2) # Μετάβαση στο τέλος μείον 10MB
-                        self.data += f.read()
-                    except: pass # Το αρχείο μπορεί να είναι μικρότερο από όσο νομίζαμε αν αποτύχει η seek
-                    
-                    self.warnings.append(f"Μεγάλο Αρχείο ({self.size/1024/1024/1024:.2f} GB). Αναλύθηκε μόνο αρχή/τέλος για εξοικονόμηση RAM.")
-        except Exception as e:
-            self.warnings.append(f"Σφάλμα Ανάγνωσης: {str(e)}")
+        self.sha256 = "ΣΦΑΛΜΑ_HASH"
+        self.peak_entropy = 0
+        self.matches = {} # Όνομα προτύπου -> [πλήθος, μοναδικά δείγματα]
+
+    def scan(self):
+        # --- ΕΝΙΑΙΟ ΠΕΡΑΣΜΑ: hash, ιστόγραμμα, εντροπία ανά παράθυρο και πρότυπα ---
+        # Τα μεγάλα αρχεία εξακολουθούν να γίνονται hash και να μετρώνται ολόκληρα·
+        # μόνο η σάρωση προτύπων περιορίζεται σε αρχή/τέλος όπως πριν.
+        head_end = self.size
+        tail_start = self.size
+        if self.size > ANALYSIS_RAM_LIMIT:
+            self.is_partial_read = True
+            head_end = ANALYSIS_RAM_LIMIT - TAIL_SCAN_SIZE
+            tail_start = self.size - TAIL_SCAN_SIZE
+            self.warnings.append(f"Μεγάλο Αρχείο ({self.size/1024/1024/1024:.2f} GB). Η σάρωση προτύπων κάλυψε μόνο αρχή/τέλος.")
+        digest = hashlib.sha256()
+        # Τα views αποδεσμεύονται στην έξοδο· ένα mmap δεν κλείνει όσο υπάρχει εξαγόμενο view.
+        with memoryview(self.data) as view:
+            for offset in range(0, self.size, SCAN_WINDOW):
+                end = min(self.size, offset + SCAN_WINDOW)
+                with view[offset:end] as window:
+                    digest.update(window)
+                    window_histogram = byte_histogram(window)
+                self.peak_entropy = max(self.peak_entropy, histogram_entropy(window_histogram))
+                if offset < head_end or end > tail_start:
+                    self.match_patterns(max(offset, tail_start) if offset >= head_end else offset, end)
+        self.sha256 = digest.hexdigest()
+
+    def match_patterns(self, start, end):
+        # Μετρούν μόνο ευρήματα που ξεκινούν μέσα στο [start, end)· η επικάλυψη επιτρέπει
+        # σε ένα εύρημα που περνά στο επόμενο παράθυρο να ολοκληρωθεί.
+        stop = min(self.size, end + SCAN_OVERLAP)
+        for name, pattern in SCAN_PATTERNS.items():
+            for match in pattern.finditer(self.data, start, stop):
+                if match.start() >= end: break
+                self.record_match(name, match.group())
+
+    def record_match(self, name, value):
+        entry = self.matches.setdefault(name, [0, []])
+        entry[0] += 1
+        value = value.decode('utf-8', errors='ignore')
+        if value not in entry[1] and len(entry[1]) < 16:
+            entry[1].append(value)
 
-    def get_hashes(self):
-        # HASH ΣΕ ΡΕΥΜΑ (Δεν φορτώνει το αρχείο σε RAM)
-        s = hashlib.sha256()
-        try:
-            with open(self.filepath, 'rb') as f:
-                while chunk := f.read(8192 * 1024): # Διάβασμα σε κομμάτια των 8MB
-                    s.update(chunk)
-            return s.hexdigest()
-        except:
-            return "ΣΦΑΛΜΑ_HASH"
+    def calculate_entropy(self):
+        # Εντροπία σε δείγμα από την αρχή του αρχείου, όπως πάντα
+        return histogram_entropy(byte_histogram(self.data[:ENTROPY_SAMPLE]))
 
     def check_virustotal(self, sha256):
         if not VIRUSTOTAL_API_KEY: return
@@ -149,26 +212,12 @@ class AdvancedAnalyzer:
                     self.vt_result = "[green]Καθαρό (Σύννεφο)[/]"
         except: pass
 
-    def calculate_entropy(self):
-        # Υπολογισμός εντροπίας στα buffered δεδομένα (αρχή/τέλος)
-        if not self.data: return 0
-        entropy = 0
-        # Χρήση δείγματος για ταχύτητα σε μεγάλα buffers
-        sample = self.data[:100000] if len(self.data) > 100000 else self.data
-        for x in range(256):
-            p_x = float(sample.count(x)) / len(sample)
-            if p_x > 0: entropy += - p_x * math.log(p_x, 2)
-        return entropy
-
     def analyze_pdf_structure(self):
-        try:
-            text_data = self.data.decode('latin-1', errors='ignore')
-            triggers = {'/JavaScript': 5, '/JS': 5, '/OpenAction': 4, '/Launch': 6, '/URI': 2, '/SubmitForm': 3}
-            for keyword, score in triggers.items():
-                if keyword in text_data:
-                    self.risk_score += score
-                    self.warnings.append(f"Ανίχνευση ενεργού περιεχομένου PDF: {keyword}")
-        except: pass
+        found = self.matches.get("PDF", [0, []])[1]
+        for keyword, score in PDF_TRIGGERS.items():
+            if keyword in found:
+                self.risk_score += score
+                self.warnings.append(f"Ανίχνευση ενεργού περιεχομένου PDF: {keyword}")
 
     def analyze_office_macros(self):
         if self.data[:4] == b'PK\x03\x04':
@@ -182,7 +231,7 @@ class AdvancedAnalyzer:
                                 return
             except: pass
         
-        if b'Attribute VB_Name' in self.data:
+        if "VBA" in self.matches:
             self.risk_score += 8
             self.warnings.append("Ανίχνευση παλαιού τύπου Macro Office (VBA)")
 
@@ -231,11 +280,11 @@ class AdvancedAnalyzer:
             "application/zip": None 
         }
         
-        # Σάρωση του τέλους του BUFFER (που αντιστοιχεί στο τέλος του αρχείου λόγω ανάγνωσης τέλους)
+        # Σάρωση του τέλους του αρχείου
         if mime in eof_signatures and eof_signatures[mime]:
             sig = eof_signatures[mime]
             # Αναζήτηση στα τελευταία 1MB δεδομένων για απόδοση
-            search_area = self.data[-1048576:] if len(self.data) > 1048576 else self.data
+            search_area = self.data[-1048576:] if self.size > 1048576 else self.data[:]
             end_offset = search_area.rfind(sig)
             
             if end_offset != -1:
@@ -271,44 +320,25 @@ class AdvancedAnalyzer:
                 self.warnings.append("Κατεστραμμένο αρχείο ή προστατευμένο ZIP")
 
     def analyze_strings(self):
-        try:
-            # Αποκωδικοποίηση μόνο του buffer
-            text_data = self.data.decode('utf-8', errors='ignore')
-            
-            patterns = {
-                "IPv4": r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
-                "Email": r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-                "URL": r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
-                "Πορτοφόλι Bitcoin": r'\b(bc1|[13])[a-zA-Z0-9]{25,39}\b',
-                "Προσωπικό Κλειδί": r'-----BEGIN (RSA|DSA|EC|OPENSSH|PGP) PRIVATE KEY-----',
-                "Ασαφής PowerShell": r'(FromBase64String|::Decode|GNwZW|SUVY|IgB8AC|cwB3AGkAdABjAGgA)',
-                "WebShell": r'(passthru|exec|shell_exec|eval\(base64_decode)',
-                "WinAPI (Malware)": r'(VirtualAlloc|CreateRemoteThread|WriteProcessMemory|ShellExecute|URLDownloadToFile)'
-            }
-
-            found_ips = set()
-            
-            for p_name, p_val in patterns.items():
-                matches = re.findall(p_val, text_data, re.IGNORECASE)
-                if matches:
-                    unique_matches = list(set(matches))[:3]
-                    
-                    if p_name == "IPv4":
-                        for ip in unique_matches:
-                            if not ip.startswith(('192.168', '127.0', '10.')): found_ips.add(ip)
-                    elif p_name in ["WebShell", "WinAPI (Malware)", "Ασαφής PowerShell"]:
-                        self.warnings.append(f"Ανίχνευση ύποπτου {p_name}: {unique_matches}")
-                        self.risk_score += 4
-                    elif p_name == "Προσωπικό Κλειδί":
-                        self.warnings.append("ΚΡΙΤΙΚΟ: Βρέθηκε Κρυπτογραφικό Προσωπικό Κλειδί!")
-                        self.risk_score += 10
-                    else:
-                        self.indicators.append(f"{p_name}: βρέθηκαν {len(matches)}")
-
-            if found_ips:
-                self.indicators.append(f"Δημόσιες IPs: {', '.join(list(found_ips)[:3])}")
-
-        except Exception: pass
+        found_ips = set()
+        for p_name in STRING_PATTERNS:
+            if p_name not in self.matches: continue
+            count, samples = self.matches[p_name]
+            unique_matches = samples[:3]
+            if p_name == "IPv4":
+                for ip in samples:
+                    if not ip.startswith(('192.168', '127.0', '10.')): found_ips.add(ip)
+            elif p_name in ["WebShell", "WinAPI (Malware)", "Ασαφής PowerShell"]:
+                self.warnings.append(f"Ανίχνευση ύποπτου {p_name}: {unique_matches}")
+                self.risk_score += 4
+            elif p_name == "Προσωπικό Κλειδί":
+                self.warnings.append("ΚΡΙΤΙΚΟ: Βρέθηκε Κρυπτογραφικό Προσωπικό Κλειδί!")
+                self.risk_score += 10
+            elif p_name not in ("PDF", "VBA"):
+                self.indicators.append(f"{p_name}: βρέθηκαν {count}")
+
+        if found_ips:
+            self.indicators.append(f"Δημόσιες IPs: {', '.join(sorted(found_ips)[:3])}")
 
     def quarantine_file(self):
         if self.risk_score >= QUARANTINE_THRESHOLD:
@@ -325,17 +355,33 @@ class AdvancedAnalyzer:
     def run(self):
         # Έλεγχος μεγέθους: Μόνο αν αυστηρά μεγαλύτερο από το όριο (50GB)
         if self.size > MAX_FILE_SIZE_LIMIT:
-             console.print(f"[red]Παράβλεψη {self.filename}: Πολύ μεγάλο (>50GB)[/]")
-             return
+             return {"filename": self.filename, "skipped": "Πολύ μεγάλο (>50GB)"}
 
-        sha256 = self.get_hashes()
-        console.print(f"[cyan]>> Ανάλυση {escape(self.filename)}...[/cyan]")
-        
-        self.check_virustotal(sha256)
-        mime, desc = get_file_mime(self.filepath, self.data)
+        try:
+            with open(self.filepath, 'rb') as f:
+                if self.size:
+                    try:
+                        self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (OSError, ValueError):
+                        # Συστήματα αρχείων χωρίς mmap: τα μικρά αρχεία διαβάζονται κανονικά
+                        if self.size > ANALYSIS_RAM_LIMIT: raise
+                        self.data = f.read()
+                try:
+                    return self.analyze()
+                finally:
+                    if isinstance(self.data, mmap.mmap): self.data.close()
+                    self.data = b""
+        except Exception as e:
+            self.warnings.append(f"Σφάλμα Ανάγνωσης: {str(e)}")
+            return self.report("unknown/data", "Άγνωστο δυαδικό", 0)
+
+    def analyze(self):
+        self.scan()
+        self.check_virustotal(self.sha256)
+        mime, desc = get_file_mime(self.filepath, self.data[:16])
         entropy = self.calculate_entropy()
         
-        if entropy > 7.4 and "zip" not in mime and "image" not in mime:
+        if entropy > HIGH_ENTROPY and "zip" not in mime and "image" not in mime:
              self.warnings.append(f"Υψηλή εντροπία ({entropy:.2f}): Πιθανό συμπιεσμένο/κρυπτογραφημένο περιεχόμενο.")
              self.risk_score += 3
 
@@ -359,53 +405,105 @@ class AdvancedAnalyzer:
         if self.risk_score >= QUARANTINE_THRESHOLD:
             self.quarantine_file()
 
-        self.print_report(sha256, mime, desc, entropy)
-
-    def print_report(self, sha256, mime, desc, entropy):
-        if self.risk_score >= 7:
-            color = "red"
-            verdict = "ΕΠΙΚΙΝΔΥΝΟ"
-            GlobalStats.risky += 1
-        elif self.risk_score >= 4:
-            color = "yellow"
-            verdict = "ΎΠΟΠΤΟ"
-            GlobalStats.risky += 1
-        else:
-            color = "green"
-            verdict = "ΚΑΘΑΡΟ"
-            GlobalStats.clean += 1
-
-        info_table = Table(show_header=False, box=None)
-        info_table.add_row("Τύπος", f"{mime} ({desc})")
-        info_table.add_row("Εντροπία", f"{entropy:.3f}")
-        info_table.add_row("Σύννεφο", self.vt_result)
-        
-        details = f"[bold {color} size=16]{verdict}[/] (Βαθμολογία: {self.risk_score})"
-        
-        if self.is_quarantined:
-            details += "\n\n[bold white on red] Το αρχείο τέθηκε σε καραντίνα [/]"
+        return self.report(mime, desc, entropy)
 
-        if self.warnings:
-            details += "\n\n[bold red]--- ΑΠΕΙΛΕΣ ---[/]"
-            for w in self.warnings: details += f"\n[red]![/] {escape(str(w))}"
-            
-        if self.hidden_data:
-            details += "\n\n[bold magenta]--- ΚΡΥΦΑ ΔΕΔΟΜΕΝΑ/ΣΤΗΓΜΑΤΟΓΡΑΦΙΑ ---[/]"
-            for h in self.hidden_data: details += f"\n[magenta]*[/] {escape(str(h))}"
-
-        if self.indicators:
-            details += "\n\n[bold blue]--- ΠΛΗΡΟΦΟΡΙΕΣ ---[/]"
-            for i in self.indicators: details += f"\n[blue]i[/] {escape(str(i))}"
-
-        layout = Layout()
-        layout.split_row(
-            Layout(Panel(info_table, title="Πληροφορίες Αρχείου")),
-            Layout(Panel(details, title="Απόφαση Ανάλυσης", border_style=color))
-        )
+    def report(self, mime, desc, entropy):
+        # Απλά δεδομένα ώστε να περνούν από το process pool και να αποθηκεύονται στην cache
+        return {
+            "filename": self.filename, "filepath": self.filepath, "sha256": self.sha256,
+            "mime": mime, "desc": desc, "entropy": entropy, "peak_entropy": self.peak_entropy,
+            "risk_score": self.risk_score, "vt_result": self.vt_result, "is_quarantined": self.is_quarantined,
+            "warnings": self.warnings, "hidden_data": self.hidden_data, "indicators": self.indicators,
+        }
+
+def analyze_file(filepath):
+    # Σημείο εισόδου του process pool
+    return AdvancedAnalyzer(filepath).run()
+
+def print_report(report, cached=False):
+    if report.get("skipped"):
+        console.print(f"[red]Παράβλεψη {escape(report['filename'])}: {report['skipped']}[/]")
+        return
+    risk_score = report["risk_score"]
+    if risk_score >= 7:
+        color = "red"
+        verdict = "ΕΠΙΚΙΝΔΥΝΟ"
+        GlobalStats.risky += 1
+    elif risk_score >= 4:
+        color = "yellow"
+        verdict = "ΎΠΟΠΤΟ"
+        GlobalStats.risky += 1
+    else:
+        color = "green"
+        verdict = "ΚΑΘΑΡΟ"
+        GlobalStats.clean += 1
+
+    info_table = Table(show_header=False, box=None)
+    info_table.add_row("Τύπος", f"{report['mime']} ({report['desc']})")
+    info_table.add_row("Εντροπία", f"{report['entropy']:.3f} (μέγιστη ανά παράθυρο {report['peak_entropy']:.3f})")
+    info_table.add_row("Σύννεφο", report["vt_result"])
+    if cached:
+        info_table.add_row("Σάρωση", "[dim]Αμετάβλητο από την προηγούμενη σάρωση (cache)[/dim]")
+    
+    details = f"[bold {color} size=16]{verdict}[/] (Βαθμολογία: {risk_score})"
+    
+    if report["is_quarantined"]:
+        details += "\n\n[bold white on red] Το αρχείο τέθηκε σε καραντίνα [/]"
+
+    if report["warnings"]:
+        details += "\n\n[bold red]--- ΑΠΕΙΛΕΣ ---[/]"
+        for w in report["warnings"]: details += f"\n[red]![/] {escape(str(w))}"
         
-        console.print(Panel(f"[bold]{escape(self.filename)}[/bold]", style=f"on {color} black" if color=="red" else "bold white"))
-        console.print(layout)
-        console.print(f"[dim]SHA256: {sha256}[/dim]\n")
+    if report["hidden_data"]:
+        details += "\n\n[bold magenta]--- ΚΡΥΦΑ ΔΕΔΟΜΕΝΑ/ΣΤΗΓΜΑΤΟΓΡΑΦΙΑ ---[/]"
+        for h in report["hidden_data"]: details += f"\n[magenta]*[/] {escape(str(h))}"
+
+    if report["indicators"]:
+        details += "\n\n[bold blue]--- ΠΛΗΡΟΦΟΡΙΕΣ ---[/]"
+        for i in report["indicators"]: details += f"\n[blue]i[/] {escape(str(i))}"
+
+    layout = Layout()
+    layout.split_row(
+        Layout(Panel(info_table, title="Πληροφορίες Αρχείου")),
+        Layout(Panel(details, title="Απόφαση Ανάλυσης", border_style=color))
+    )
+    
+    console.print(Panel(f"[bold]{escape(report['filename'])}[/bold]", style=f"on {color} black" if color=="red" else "bold white"))
+    console.print(layout)
+    console.print(f"[dim]SHA256: {report['sha256']}[/dim]\n")
+
+# --- Cache Αποτελεσμάτων (παράλειψη αμετάβλητων αρχείων) ---
+def load_scan_cache():
+    try:
+        with open(SCAN_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == SCAN_CACHE_VERSION:
+            return cache
+    except Exception: pass
+    return {"version": SCAN_CACHE_VERSION, "files": {}}
+
+def save_scan_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(SCAN_CACHE_FILE), exist_ok=True)
+        temp = SCAN_CACHE_FILE + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(temp, SCAN_CACHE_FILE)
+    except Exception: pass
+
+def cache_key(st):
+    return [st.st_size, st.st_mtime_ns]
+
+def scan_pool():
+    # Οι διεργασίες σαρώνουν αρχεία παράλληλα· πλατφόρμες χωρίς λειτουργικούς
+    # σημαφόρους διεργασιών (ορισμένα Android) χρησιμοποιούν νήματα.
+    workers = max(1, min(8, os.cpu_count() or 1))
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pool.submit(int).result()
+        return pool
+    except (ImportError, OSError, NotImplementedError, PermissionError):
+        return ThreadPoolExecutor(max_workers=workers)
 
 # --- Κύρια Διαδικασία ---
 def main():
@@ -422,8 +520,51 @@ def main():
         return
 
     console.print(f"[bold]Σάρωση {len(files)} αρχείων...[/bold]\n")
+    cache = load_scan_cache()
+    entries = cache["files"]
+    pending = []
     for f in files:
-        AdvancedAnalyzer(os.path.join(TARGET_DIR, f)).run()
+        path = os.path.join(TARGET_DIR, f)
+        try:
+            key = cache_key(os.stat(path))
+        except OSError:
+            continue
+        entry = entries.get(f)
+        if entry and entry.get("key") == key:
+            print_report(entry["report"], cached=True)
+        else:
+            pending.append((f, path, key))
+
+    if pending:
+        with scan_pool() as pool:
+            futures = {}
+            for f, path, key in pending:
+                console.print(f"[cyan]>> Ανάλυση {escape(f)}...[/cyan]")
+                futures[pool.submit(analyze_file, path)] = (f, key)
+            for future in as_completed(futures):
+                f, key = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    console.print(f"[red]Η σάρωση απέτυχε για {escape(f)}: {escape(str(e))}[/]")
+                    continue
+                print_report(report)
+                if report.get("skipped") or report["sha256"] == "ΣΦΑΛΜΑ_HASH":
+                    continue
+                # Οι εγγραφές ταυτοποιούνται με (μέγεθος, mtime) και το αποθηκευμένο sha256·
+                # τα αρχεία σε καραντίνα αποθηκεύονται με το νέο τους όνομα.
+                entries.pop(f, None)
+                name = report["filename"]
+                try:
+                    key = cache_key(os.stat(os.path.join(TARGET_DIR, name)))
+                except OSError:
+                    continue
+                entries[name] = {"key": key, "report": report}
+
+    for name in list(entries):
+        if name not in files and not os.path.exists(os.path.join(TARGET_DIR, name)):
+            del entries[name]
+    save_scan_cache(cache)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 import argparse
 import base64
+import codecs
 import hashlib
 import hmac
 import html
@@ -18,6 +19,7 @@ import time
 import urllib.parse
 import uuid
 import socket
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -58,6 +60,15 @@ BLOCKED_HOST_PATTERNS = {
 ADLIKE_CLASS_RE = re.compile(r"(?i)(^|[\s\-_])(ad|ads|advert|advertisement|banner|sponsor|sponsored|popup|promoted)([\s\-_]|$)")
 URL_ATTR_RE = re.compile(r'(?i)(\b(?:href|src|action|poster)\s*=\s*)(["\'])(.*?)(\2)')
 FORM_TAG_RE = re.compile(r'(?i)<form\b(?![^>]*\benctype=)([^>]*)>')
+TAG_RE = re.compile(r'''<(/?)([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>''')
+PARTIAL_TAG_RE = re.compile(r'''</?(?:[a-zA-Z][^\s/>]*(?:[^>"']|"[^"]*"|'[^']*')*(?:"[^"]*|'[^']*)?)?\Z''')
+RAW_END_RE = re.compile(r'(?i)</(script|style|textarea|title)\b[^>]*>')
+RAW_TEXT_TAGS = {"script", "style", "textarea", "title"}
+AD_SCRIPT_RE = re.compile(r'(?i)doubleclick|googlesyndication|googletagmanager|google-analytics|adsystem|taboola|outbrain|criteo')
+AD_IFRAME_RE = re.compile(r'(?i)doubleclick|googlesyndication|googletagmanager|adsystem|taboola|outbrain')
+AD_ATTR_RE = re.compile(r'''(?i)(?:id|class)=['"][^'"]*(?:ad-|ads-|advert|advertisement|sponsor|sponsored|popup|promoted)[^'"]*['"]''')
+PRELOAD_LINK_RE = re.compile(r'''(?i)rel=['"](?:preload|prefetch|modulepreload)['"]''')
+META_CHARSET_RE = re.compile(rb'''(?i)<meta[^>]+charset\s*=\s*["']?([a-zA-Z0-9_\-]+)''')
 TITLE_RE = re.compile(r'(?is)<title[^>]*>(.*?)</title>')
 TEXT_CLEAN_RE = re.compile(r'(?is)<(script|style|noscript)[^>]*>.*?</\1>|<!--.*?-->|<[^>]+>')
 REQUEST_TIMEOUT = 18
@@ -67,6 +78,18 @@ BAD_PROXY_TTL = 1800
 MIN_PROXY_POOL = 10
 MAX_PROXY_TRIES = 14
 TOR_SOCKS_PORT = 9050
+STREAM_CHUNK_SIZE = 64 * 1024
+HTML_CHUNK_SIZE = 16 * 1024
+HTML_HOLD_LIMIT = 256 * 1024
+PASSTHROUGH_HEADERS = (
+    "Content-Type", "Content-Length", "Content-Range", "Accept-Ranges",
+    "Content-Disposition", "Last-Modified", "ETag", "X-Free-Internet-Cache",
+)
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_MAX_ENTRY = 32 * 1024 * 1024
+HTTP_CACHE_HEURISTIC_MAX = 86400
+CACHE_HEADER = "X-Free-Internet-Cache"
+UNSTORED_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length", "set-cookie", "age", CACHE_HEADER.lower()}
 
 # ---------------- bootstrap ----------------
 def _run(cmd: List[str]) -> bool:
@@ -102,36 +125,43 @@ def ensure_python_deps() -> None:
         import requests  # noqa: F401
     except Exception:
         missing.append("requests")
+    try:
+        import cryptography  # noqa: F401
+    except Exception:
+        missing.append("cryptography")
     if not missing:
         return
     if is_termux() and which("pkg"):
         _run(["pkg", "update", "-y"])
         _run(["pkg", "install", "-y", "python"])
-    if not _run([sys.executable, "-m", "pip", "install", "--upgrade", *missing]):
+        # Termux ships a prebuilt wheel; building it with pip needs Rust.
+        if "cryptography" in missing and _run(["pkg", "install", "-y", "python-cryptography"]):
+            missing.remove("cryptography")
+    if missing and not _run([sys.executable, "-m", "pip", "install", "--upgrade", *missing]):
         print("Failed to install Python dependencies.")
         print("Try in Termux:")
-        print("  pkg install python")
+        print("  pkg install python python-cryptography")
         print("  pip install flask requests")
         sys.exit(1)
     os.execv(sys.executable, [sys.executable] + sys.argv)
 
 
-def ensure_openssl() -> None:
+def ensure_openssl() -> bool:
+    # Only needed to read vault entries written by the old openssl-based format.
     if which("openssl"):
-        return
+        return True
     if is_termux() and which("pkg"):
-        _run(["pkg", "update", "-y"])
-        if _run(["pkg", "install", "-y", "openssl"]):
-            return
-    print("OpenSSL CLI is required for the vault.")
-    print("Try in Termux: pkg install openssl")
-    sys.exit(1)
+        _run(["pkg", "install", "-y", "openssl"])
+    return bool(which("openssl"))
 
 
 ensure_python_deps()
-ensure_openssl()
 
 import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from flask import Flask, Response, flash, redirect, render_template_string, request, session, url_for, send_file
 
 # ---------------- storage ----------------
@@ -152,6 +182,7 @@ SCREENSHOT_DIR = TOOLS_DIR / "screenshots"
 for p in (BROWSER_DIR, VAULT_DIR, DOWNLOADS_DIR, TOOLS_DIR, SCREENSHOT_DIR):
     p.mkdir(parents=True, exist_ok=True)
 
+HTTP_CACHE_DIR = BROWSER_DIR / "http_cache"
 BOOKMARKS_FILE = BROWSER_DIR / "bookmarks.json"
 HISTORY_FILE = BROWSER_DIR / "history.json"
 PREFS_FILE = BROWSER_DIR / "prefs.json"
@@ -161,7 +192,8 @@ VAULT_DB = VAULT_DIR / "vault.db"
 
 # ---------------- browser state ----------------
 BROWSER_CLIENTS: Dict[str, requests.Session] = {}
-VAULT_KEYS: Dict[str, str] = {}
+VAULT_KEYS: Dict[str, "VaultKey"] = {}
+PREFS_CACHE: Optional[dict] = None
 TOR_PROCESS: Optional[subprocess.Popen] = None
 TOR_STDOUT_PATH = BROWSER_DIR / "tor.log"
 TOR_DATA_DIR = BROWSER_DIR / "tor_data"
@@ -208,7 +240,11 @@ def safe_file_stem(value: str, fallback: str = "file") -> str:
 
 
 def browser_prefs() -> dict:
-    prefs = load_json(PREFS_FILE, {})
+    global PREFS_CACHE
+    prefs = PREFS_CACHE
+    if prefs is None:
+        prefs = load_json(PREFS_FILE, {})
+        PREFS_CACHE = prefs
     merged = {
         "country": prefs.get("country", "US"),
         "engine": prefs.get("engine", "google"),
@@ -224,7 +260,9 @@ def browser_prefs() -> dict:
     return merged
 
 def save_browser_prefs(prefs: dict) -> None:
+    global PREFS_CACHE
     save_json(PREFS_FILE, prefs)
+    PREFS_CACHE = None
 
 
 
@@ -431,40 +469,12 @@ def tor_proxy_dict() -> Dict[str, str]:
     return {"http": f"socks5h://127.0.0.1:{TOR_SOCKS_PORT}", "https": f"socks5h://127.0.0.1:{TOR_SOCKS_PORT}"}
 
 
-def rewrite_html(raw_html: str, base_url: str, prefs: dict, embedded: bool = False) -> str:
-    def repl(match):
-        prefix, quote, value, suffix = match.groups()
-        if not value:
-            return match.group(0)
-        if value.startswith(("javascript:", "data:", "mailto:", "tel:", "#")):
-            return match.group(0)
-        abs_url = urllib.parse.urljoin(base_url, value)
-        abs_url = strip_tracking(abs_url)
-        proxied = url_for("browser_open") + "?url=" + urllib.parse.quote(abs_url, safe="")
-        if embedded:
-            proxied += "&embed=1"
-        return f"{prefix}{quote}{proxied}{suffix}"
-
-    out = URL_ATTR_RE.sub(repl, raw_html)
-    out = FORM_TAG_RE.sub(r'<form\1 enctype="multipart/form-data">', out)
+LITE_VIDEO_NOTE = '<div style="padding:12px;border:1px solid rgba(191,151,255,.34);border-radius:14px;margin:10px 0;">Το βίντεο κρύφτηκε σε Lite mode.</div>'
+BLOCKED_IMAGE_NOTE = '<div style="display:inline-block;padding:8px 10px;border:1px solid rgba(191,151,255,.34);border-radius:12px;font-size:12px;opacity:.8;">Η εικόνα αποκλείστηκε</div>'
 
-    if prefs.get("adblock"):
-        out = re.sub(r"(?is)<script[^>]+(?:doubleclick|googlesyndication|googletagmanager|google-analytics|adsystem|taboola|outbrain|criteo)[^>]*>.*?</script>", "", out)
-        out = re.sub(r"(?is)<iframe[^>]+(?:doubleclick|googlesyndication|googletagmanager|adsystem|taboola|outbrain)[^>]*>.*?</iframe>", "", out)
-        out = re.sub(r"(?is)<[^>]+(?:id|class)=['\"][^'\"]*(?:ad-|ads-|advert|advertisement|sponsor|sponsored|popup|promoted)[^'\"]*['\"][^>]*>.*?</[^>]+>", "", out)
-
-    if prefs.get("lite"):
-        out = re.sub(r"(?is)<script[^>]*>.*?</script>", "", out)
-        out = re.sub(r"(?is)<link[^>]+rel=['\"](?:preload|prefetch|modulepreload)['\"][^>]*>", "", out)
-        out = re.sub(r"(?is)<video[^>]*>.*?</video>", '<div style="padding:12px;border:1px solid rgba(191,151,255,.34);border-radius:14px;margin:10px 0;">Το βίντεο κρύφτηκε σε Lite mode.</div>', out)
-
-    if prefs.get("block_images"):
-        out = re.sub(r"(?is)<img\b[^>]*>", '<div style="display:inline-block;padding:8px 10px;border:1px solid rgba(191,151,255,.34);border-radius:12px;font-size:12px;opacity:.8;">Η εικόνα αποκλείστηκε</div>', out)
-
-    if embedded:
-        return out
 
-    mini = f"""
+def browser_banner(base_url: str) -> str:
+    return f"""
     <style>
     #freeinternet-mini{{position:sticky;top:0;z-index:2147483000;padding:8px 10px;display:flex;gap:8px;align-items:center;flex-wrap:wrap;border-bottom:1px solid rgba(191,151,255,.24);font:12px system-ui,sans-serif;background:rgba(11,8,17,.92);backdrop-filter:blur(10px);color:#f4f1fb}}
     #freeinternet-mini a{{color:inherit;text-decoration:none;padding:7px 10px;border-radius:10px;border:1px solid rgba(191,151,255,.20);background:rgba(255,255,255,.04)}}
@@ -477,12 +487,255 @@ def rewrite_html(raw_html: str, base_url: str, prefs: dict, embedded: bool = Fal
       <span class="url">{html.escape(base_url)}</span>
     </div>
     """
-    body_idx = out.lower().find("<body")
-    if body_idx != -1:
-        close_idx = out.find(">", body_idx)
-        if close_idx != -1:
-            return out[:close_idx+1] + mini + out[close_idx+1:]
-    return mini + out
+
+
+class HtmlRewriter:
+    # Incremental single-pass page rewrite: feed() takes decoded text as it
+    # arrives and returns whatever output is already final, close() flushes
+    # the rest. URL proxying, form enctype, adblock, lite mode and image
+    # blocking are all decided per tag, so the page never has to be held in
+    # memory as a whole (only the head is held until <body> places the banner).
+    def __init__(self, base_url: str, prefs: dict, open_url: str, embedded: bool = False, banner: str = "") -> None:
+        self.base_url = base_url
+        self.open_url = open_url
+        self.embedded = embedded
+        self.adblock = bool(prefs.get("adblock"))
+        self.lite = bool(prefs.get("lite"))
+        self.block_images = bool(prefs.get("block_images"))
+        self.banner = banner
+        self.banner_done = embedded or not banner
+        self.held: List[str] = []
+        self.held_size = 0
+        self.buf = ""
+        self.raw_tag = ""
+        self.raw_open = ""
+        self.skip_until = ""
+        self.skip_note = ""
+        self.title = ""
+
+    def proxied(self, match) -> str:
+        prefix, quote, value, suffix = match.groups()
+        if not value:
+            return match.group(0)
+        if value.startswith(("javascript:", "data:", "mailto:", "tel:", "#")):
+            return match.group(0)
+        abs_url = urllib.parse.urljoin(self.base_url, value)
+        abs_url = strip_tracking(abs_url)
+        proxied = self.open_url + "?url=" + urllib.parse.quote(abs_url, safe="")
+        if self.embedded:
+            proxied += "&embed=1"
+        return f"{prefix}{quote}{proxied}{suffix}"
+
+    def feed(self, text: str) -> str:
+        self.buf += text
+        return self._run(final=False)
+
+    def close(self) -> str:
+        return self._run(final=True)
+
+    def _skip(self, until: str, note: str = "") -> str:
+        self.skip_until = until
+        self.skip_note = note
+        return ""
+
+    def _raw(self, name: str, open_tag: str) -> str:
+        # script/style/textarea/title bodies are not markup; they are kept
+        # whole until their end tag ("" open_tag = element is dropped).
+        self.raw_tag = name
+        self.raw_open = open_tag
+        return ""
+
+    def _tag(self, m) -> str:
+        closing, name, attrs = m.group(1), m.group(2).lower(), m.group(3)
+        tag = m.group(0)
+        if self.skip_until:
+            if closing and self.skip_until in ("*", name):
+                note, self.skip_until, self.skip_note = self.skip_note, "", ""
+                return note
+            return ""
+        if closing:
+            return tag
+        if self.adblock:
+            if name == "script" and AD_SCRIPT_RE.search(attrs):
+                return self._raw(name, "")
+            if name == "iframe" and AD_IFRAME_RE.search(attrs):
+                return self._skip("iframe")
+            if AD_ATTR_RE.search(attrs):
+                return self._skip("*")
+        if self.lite:
+            if name == "script":
+                return self._raw(name, "")
+            if name == "link" and PRELOAD_LINK_RE.search(attrs):
+                return ""
+            if name == "video":
+                return self._skip("video", LITE_VIDEO_NOTE)
+        if self.block_images and name == "img":
+            return BLOCKED_IMAGE_NOTE
+        tag = URL_ATTR_RE.sub(self.proxied, tag)
+        if name == "form":
+            tag = FORM_TAG_RE.sub(r'<form\1 enctype="multipart/form-data">', tag)
+        if name in RAW_TEXT_TAGS:
+            return self._raw(name, tag)
+        if name == "body" and not self.banner_done:
+            self.banner_done = True
+            return tag + self.banner
+        return tag
+
+    def _run(self, final: bool) -> str:
+        buf = self.buf
+        n = len(buf)
+        i = 0
+        out: List[str] = []
+        while i < n:
+            if self.raw_tag:
+                m = RAW_END_RE.search(buf, i)
+                while m and m.group(1).lower() != self.raw_tag:
+                    m = RAW_END_RE.search(buf, m.end())
+                if not m:
+                    if final:
+                        if self.raw_open:
+                            out.append(self.raw_open + URL_ATTR_RE.sub(self.proxied, buf[i:]))
+                        self.raw_tag = ""
+                        i = n
+                    elif not self.raw_open:
+                        i = max(i, n - 16)
+                    break
+                if self.raw_open:
+                    content = buf[i:m.start()]
+                    if self.raw_tag == "title" and not self.title:
+                        self.title = html.unescape(content).strip()[:120]
+                    out.append(self.raw_open + URL_ATTR_RE.sub(self.proxied, content) + m.group(0))
+                self.raw_tag = ""
+                self.raw_open = ""
+                i = m.end()
+                continue
+            lt = buf.find("<", i)
+            if lt == -1:
+                if not self.skip_until:
+                    out.append(buf[i:])
+                i = n
+                break
+            if lt > i and not self.skip_until:
+                out.append(buf[i:lt])
+            i = lt
+            if buf.startswith(("<!", "<?"), i):
+                closer = "-->" if buf.startswith("<!--", i) else ">"
+                end = buf.find(closer, i + 2)
+                if end == -1 and not final:
+                    break
+                end = n if end == -1 else end + len(closer)
+                if not self.skip_until:
+                    out.append(buf[i:end])
+                i = end
+                continue
+            m = TAG_RE.match(buf, i)
+            if m:
+                out.append(self._tag(m))
+                i = m.end()
+                continue
+            if not final and PARTIAL_TAG_RE.match(buf, i):
+                break
+            if not self.skip_until:
+                out.append("<")
+            i += 1
+        self.buf = buf[i:]
+        return self._release("".join(out), final)
+
+    def _release(self, text: str, final: bool) -> str:
+        if not self.banner_done:
+            self.held.append(text)
+            self.held_size += len(text)
+            if not final and self.held_size < HTML_HOLD_LIMIT:
+                return ""
+            self.banner_done = True
+            text = self.banner + "".join(self.held)
+            self.held = []
+        elif self.held:
+            text = "".join(self.held) + text
+            self.held = []
+        return text
+
+
+def html_stream_encoding(resp, head: bytes) -> str:
+    declared = re.search(r'(?i)charset=["\']?([\w\-]+)', resp.headers.get("Content-Type", ""))
+    sniffed = META_CHARSET_RE.search(head[:4096])
+    for candidate in (declared.group(1) if declared else "", sniffed.group(1).decode("ascii") if sniffed else ""):
+        if not candidate:
+            continue
+        try:
+            codecs.lookup(candidate)
+            return candidate
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+def response_chunks(resp, size: int):
+    # Decoded body chunks; when the response is being cached the same chunks
+    # are written to the cache entry, which is only kept if the body completes.
+    sink = getattr(resp, "cache_sink", None)
+    done = False
+    try:
+        for chunk in resp.iter_content(size):
+            if sink is not None:
+                sink.write(chunk)
+            yield chunk
+        done = True
+    finally:
+        if sink is not None:
+            if done:
+                sink.commit()
+            else:
+                sink.abort()
+
+
+def stream_html(resp, rewriter: HtmlRewriter, on_done=None):
+    decoder = None
+    head = b""
+    try:
+        for chunk in response_chunks(resp, HTML_CHUNK_SIZE):
+            if decoder is None:
+                head += chunk
+                if len(head) < 1024:
+                    continue
+                decoder = codecs.getincrementaldecoder(html_stream_encoding(resp, head))(errors="replace")
+                chunk, head = head, b""
+            out = rewriter.feed(decoder.decode(chunk))
+            if out:
+                yield out.encode("utf-8")
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(html_stream_encoding(resp, head))(errors="replace")
+        out = rewriter.feed(decoder.decode(head, final=True)) + rewriter.close()
+        if out:
+            yield out.encode("utf-8")
+        if on_done:
+            on_done(rewriter)
+    finally:
+        resp.close()
+
+
+def passthrough_response(resp, accept_encoding: str = "") -> Response:
+    headers = {name: resp.headers[name] for name in PASSTHROUGH_HEADERS if resp.headers.get(name)}
+    encoding = (resp.headers.get("Content-Encoding") or "").strip().lower()
+    raw = (
+        hasattr(resp.raw, "stream") and getattr(resp, "cache_sink", None) is None
+        and (not encoding or encoding == "identity" or encoding in (accept_encoding or "").lower())
+    )
+    if encoding and raw:
+        headers["Content-Encoding"] = resp.headers["Content-Encoding"]
+    if encoding and not raw:
+        headers.pop("Content-Length", None)
+
+    def generate():
+        try:
+            chunks = resp.raw.stream(STREAM_CHUNK_SIZE, decode_content=False) if raw else response_chunks(resp, STREAM_CHUNK_SIZE)
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+        finally:
+            resp.close()
+
+    return Response(generate(), status=resp.status_code, headers=headers)
 
 def page_title_from_html(raw_html: str, fallback: str) -> str:
     m = TITLE_RE.search(raw_html or "")
@@ -660,11 +913,11 @@ def fetch_proxy_pool(country: str, force_refresh: bool = False) -> List[str]:
     return usable
 
 
-def direct_fetch(sess: requests.Session, method: str, url: str, *, data=None, files=None, stream=False):
-    return sess.request(method, url, data=data, files=files, timeout=REQUEST_TIMEOUT, allow_redirects=True, stream=stream)
+def direct_fetch(sess: requests.Session, method: str, url: str, *, data=None, files=None, stream=False, headers=None):
+    return sess.request(method, url, data=data, files=files, headers=headers, timeout=REQUEST_TIMEOUT, allow_redirects=True, stream=stream)
 
 
-def proxied_fetch(sess: requests.Session, method: str, url: str, country: str, *, data=None, files=None, stream=False):
+def proxied_fetch(sess: requests.Session, method: str, url: str, country: str, *, data=None, files=None, stream=False, headers=None):
     key = country.upper()
     errors = []
     tried = set()
@@ -680,7 +933,7 @@ def proxied_fetch(sess: requests.Session, method: str, url: str, country: str, *
             tried.add(proxy)
             try:
                 resp = sess.request(
-                    method, url, data=data, files=files, timeout=REQUEST_TIMEOUT,
+                    method, url, data=data, files=files, headers=headers, timeout=REQUEST_TIMEOUT,
                     allow_redirects=True, stream=stream, proxies={"http": proxy, "https": proxy}
                 )
                 if resp.status_code in bad_statuses:
@@ -702,15 +955,15 @@ def proxied_fetch(sess: requests.Session, method: str, url: str, country: str, *
     raise RuntimeError(errors[-1] if errors else "Δεν βρέθηκε λειτουργικός proxy. Η εφαρμογή ανανέωσε αυτόματα τη λίστα αλλά δεν βρήκε ακόμη διαθέσιμο proxy.")
 
 
-def tor_fetch(sess: requests.Session, method: str, url: str, *, data=None, files=None, stream=False):
+def tor_fetch(sess: requests.Session, method: str, url: str, *, data=None, files=None, stream=False, headers=None):
     if not tor_running():
         ok, msg = start_tor()
         if not ok and not tor_running():
             raise RuntimeError(msg)
-    return sess.request(method, url, data=data, files=files, timeout=max(REQUEST_TIMEOUT, 30), allow_redirects=True, stream=stream, proxies=tor_proxy_dict())
+    return sess.request(method, url, data=data, files=files, headers=headers, timeout=max(REQUEST_TIMEOUT, 30), allow_redirects=True, stream=stream, proxies=tor_proxy_dict())
 
 
-def browser_fetch(method: str, url: str, *, data=None, files=None, stream=False):
+def routed_fetch(method: str, url: str, *, data=None, files=None, stream=False, headers=None):
     prefs = browser_prefs()
     sess = browser_session()
     country = prefs.get("country", "US")
@@ -720,31 +973,326 @@ def browser_fetch(method: str, url: str, *, data=None, files=None, stream=False)
 
     if not vpn_enabled or mode == "direct":
         session.pop("last_proxy", None)
-        return direct_fetch(sess, method, url, data=data, files=files, stream=stream), "direct"
+        return direct_fetch(sess, method, url, data=data, files=files, stream=stream, headers=headers), "direct"
 
     if tor_enabled:
         try:
             session.pop("last_proxy", None)
-            return tor_fetch(sess, method, url, data=data, files=files, stream=stream), "tor"
+            return tor_fetch(sess, method, url, data=data, files=files, stream=stream, headers=headers), "tor"
         except Exception as e:
             if mode == "strict":
                 raise RuntimeError(str(e))
 
     if mode == "strict":
-        return proxied_fetch(sess, method, url, country, data=data, files=files, stream=stream), "proxy"
+        return proxied_fetch(sess, method, url, country, data=data, files=files, stream=stream, headers=headers), "proxy"
 
     proxy_error = None
     try:
-        return proxied_fetch(sess, method, url, country, data=data, files=files, stream=stream), "proxy"
+        return proxied_fetch(sess, method, url, country, data=data, files=files, stream=stream, headers=headers), "proxy"
     except Exception as e:
         proxy_error = str(e)
 
     session.pop("last_proxy", None)
-    resp = direct_fetch(sess, method, url, data=data, files=files, stream=stream)
+    resp = direct_fetch(sess, method, url, data=data, files=files, stream=stream, headers=headers)
     if proxy_error:
         resp.headers["X-Free-Internet-Fallback"] = "proxy-refresh-failed"
     return resp, "direct"
 
+# ---------------- http cache ----------------
+def cache_control(headers) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            out[name.lower()] = value.strip().strip('"')
+    return out
+
+
+def header_time(headers, name: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(headers.get(name) or "").timestamp()
+    except Exception:
+        return None
+
+
+def cache_lifetime(headers, now: float) -> Optional[float]:
+    # Seconds the response stays fresh; None when it must not be stored.
+    cc = cache_control(headers)
+    if "no-store" in cc:
+        return None
+    date = header_time(headers, "Date") or now
+    if "no-cache" in cc:
+        lifetime = 0.0
+    elif cc.get("max-age", "").isdigit():
+        lifetime = float(cc["max-age"])
+    elif headers.get("Expires"):
+        expires = header_time(headers, "Expires")
+        lifetime = (expires - date) if expires else 0.0
+    elif header_time(headers, "Last-Modified"):
+        lifetime = min(HTTP_CACHE_HEURISTIC_MAX, 0.1 * max(0.0, date - header_time(headers, "Last-Modified")))
+    else:
+        lifetime = 0.0
+    age = headers.get("Age") or ""
+    lifetime -= float(age) if age.isdigit() else 0.0
+    if lifetime <= 0 and not (headers.get("ETag") or headers.get("Last-Modified")):
+        return None
+    return max(0.0, lifetime)
+
+
+class CacheSink:
+    def __init__(self, cache: "HttpCache", key: str, meta: dict) -> None:
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+        self.tmp_path = cache.root / f"{key}.{uuid.uuid4().hex}.tmp"
+        self.fh = None
+        self.size = 0
+        self.failed = False
+
+    def write(self, chunk: bytes) -> None:
+        if self.failed:
+            return
+        self.size += len(chunk)
+        if self.size > HTTP_CACHE_MAX_ENTRY:
+            self.abort()
+            return
+        try:
+            if self.fh is None:
+                self.fh = open(self.tmp_path, "wb")
+            self.fh.write(chunk)
+        except OSError:
+            self.abort()
+
+    def commit(self) -> None:
+        if self.failed:
+            return
+        try:
+            if self.fh is None:
+                self.fh = open(self.tmp_path, "wb")
+            self.fh.close()
+            self.cache.store(self.key, self.meta, self.tmp_path, self.size)
+        except OSError:
+            self.abort()
+
+    def abort(self) -> None:
+        self.failed = True
+        try:
+            if self.fh is not None:
+                self.fh.close()
+            self.tmp_path.unlink()
+        except OSError:
+            pass
+
+
+class HttpCache:
+    # Private on-disk cache for the proxy browser. Bodies are stored decoded
+    # in http_cache/<key>.body, the index (validators, freshness, Vary and
+    # LRU order) in http_cache/index.db. Each client id gets its own partition.
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(root / "index.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                part TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                vary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self.db.commit()
+        for leftover in self.root.glob("*.tmp"):
+            try:
+                leftover.unlink()
+            except OSError:
+                pass
+        self.total = int(self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def key(self, part: str, url: str) -> str:
+        return hashlib.sha256(f"{part}\n{url}".encode("utf-8")).hexdigest()
+
+    def body_path(self, key: str) -> Path:
+        return self.root / f"{key}.body"
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    def lookup(self, part: str, url: str, req_headers) -> Optional[dict]:
+        key = self.key(part, url)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, vary, size, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        vary = json.loads(row[2])
+        if any((req_headers.get(name) or "") != value for name, value in vary.items()):
+            return None
+        if not self.body_path(key).exists():
+            return None
+        return {"key": key, "url": url, "status": row[0], "headers": json.loads(row[1]), "size": row[3], "fresh": row[4] > time.time()}
+
+    def validators(self, entry: dict) -> Dict[str, str]:
+        headers = CaseInsensitiveDict(entry["headers"])
+        out = {}
+        if headers.get("ETag"):
+            out["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            out["If-Modified-Since"] = headers["Last-Modified"]
+        return out
+
+    def response(self, entry: dict, state: str) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.reason = "OK"
+        resp.url = entry["url"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.headers["Content-Length"] = str(entry["size"])
+        resp.headers[CACHE_HEADER] = state
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.raw = open(self.body_path(entry["key"]), "rb")
+        with self.lock:
+            self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry["key"]))
+            self.db.commit()
+        return resp
+
+    def revalidated(self, entry: dict, fresh_headers) -> requests.Response:
+        headers = CaseInsensitiveDict(entry["headers"])
+        for name in ("Cache-Control", "Expires", "Date", "ETag", "Last-Modified", "Age"):
+            if fresh_headers.get(name):
+                headers[name] = fresh_headers[name]
+        now = time.time()
+        lifetime = cache_lifetime(headers, now) or 0.0
+        headers.pop("Age", None)
+        entry["headers"] = dict(headers)
+        with self.lock:
+            self.db.execute(
+                "UPDATE entries SET headers = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(entry["headers"]), now + lifetime, entry["key"]),
+            )
+            self.db.commit()
+        self.count("revalidated")
+        return self.response(entry, "REVALIDATED")
+
+    def attach(self, part: str, url: str, resp: requests.Response, req_headers) -> None:
+        resp.headers[CACHE_HEADER] = "MISS"
+        self.count("misses")
+        if resp.status_code != 200 or resp.history or resp.headers.get("Set-Cookie"):
+            return
+        vary_names = [v.strip() for v in (resp.headers.get("Vary") or "").split(",") if v.strip()]
+        if "*" in vary_names:
+            return
+        length = resp.headers.get("Content-Length") or ""
+        if length.isdigit() and int(length) > HTTP_CACHE_MAX_ENTRY:
+            return
+        now = time.time()
+        lifetime = cache_lifetime(resp.headers, now)
+        if lifetime is None:
+            return
+        meta = {
+            "part": part,
+            "url": url,
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() not in UNSTORED_HEADERS},
+            "vary": {name.lower(): req_headers.get(name) or "" for name in vary_names},
+            "expires_at": now + lifetime,
+        }
+        resp.cache_sink = CacheSink(self, self.key(part, url), meta)
+
+    def store(self, key: str, meta: dict, tmp_path: Path, size: int) -> None:
+        os.replace(tmp_path, self.body_path(key))
+        with self.lock:
+            old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, part, url, status, headers, vary, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, meta["part"], meta["url"], meta["status"], json.dumps(meta["headers"]), json.dumps(meta["vary"]), size, meta["expires_at"], time.time()),
+            )
+            self.total += size - (old[0] if old else 0)
+            self.stats["stored"] += 1
+            self._evict()
+            self.db.commit()
+
+    def _evict(self) -> None:
+        while self.total > self.max_bytes:
+            rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 32").fetchall()
+            if not rows:
+                self.total = 0
+                return
+            for key, size in rows:
+                self._drop(key, size)
+                self.stats["evicted"] += 1
+                if self.total <= self.max_bytes * 0.9:
+                    return
+
+    def _drop(self, key: str, size: int) -> None:
+        self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.total -= size
+        try:
+            self.body_path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self, part: str) -> None:
+        with self.lock:
+            for key, size in self.db.execute("SELECT key, size FROM entries WHERE part = ?", (part,)).fetchall():
+                self._drop(key, size)
+            self.db.commit()
+
+    def summary(self, part: str) -> dict:
+        with self.lock:
+            entries, partitions = self.db.execute("SELECT COUNT(*), COUNT(DISTINCT part) FROM entries").fetchone()
+            client_entries, client_bytes = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE part = ?", (part,)
+            ).fetchone()
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+        stats.update(
+            entries=entries, partitions=partitions, client_entries=client_entries, client_bytes=client_bytes,
+            total_bytes=self.total, max_bytes=self.max_bytes,
+            hit_rate=round(100.0 * (stats["hits"] + stats["revalidated"]) / lookups) if lookups else 0,
+        )
+        return stats
+
+
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES)
+
+
+def browser_fetch(method: str, url: str, *, data=None, files=None, stream=False, headers=None):
+    if method.upper() != "GET" or data or files or (headers and "Range" in headers):
+        return routed_fetch(method, url, data=data, files=files, stream=stream, headers=headers)
+    part = get_client_id()
+    req_headers = CaseInsensitiveDict(browser_session().headers)
+    req_headers.update(headers or {})
+    entry = HTTP_CACHE.lookup(part, url, req_headers)
+    if entry and entry["fresh"]:
+        HTTP_CACHE.count("hits")
+        return HTTP_CACHE.response(entry, "HIT"), "cache"
+    conditional = dict(headers or {})
+    if entry:
+        conditional.update(HTTP_CACHE.validators(entry))
+    resp, route_mode = routed_fetch(method, url, stream=stream, headers=conditional or None)
+    if entry and resp.status_code == 304:
+        resp.close()
+        return HTTP_CACHE.revalidated(entry, resp.headers), route_mode
+    HTTP_CACHE.attach(part, url, resp, req_headers)
+    if not stream and getattr(resp, "cache_sink", None) is not None:
+        resp.cache_sink.write(resp.content)
+        resp.cache_sink.commit()
+    return resp, route_mode
+
 # ---------------- vault ----------------
 def db_connect() -> sqlite3.Connection:
     prefs = browser_prefs()
@@ -814,6 +1362,7 @@ def set_vault_password(password: str) -> None:
     salt = os.urandom(16)
     meta_set("pw_salt", salt)
     meta_set("pw_hash", pbkdf2_hash(password, salt))
+    meta_set("key_salt", os.urandom(16))
 
 
 def verify_vault_password(password: str) -> bool:
@@ -824,24 +1373,60 @@ def verify_vault_password(password: str) -> bool:
     return hmac.compare_digest(digest, pbkdf2_hash(password, salt))
 
 
-def vault_encrypt(master: str, text: str) -> Optional[str]:
+VAULT_TOKEN_PREFIX = "gcm1:"
+VAULT_FIELDS = ("username", "password", "notes")
+OPENSSL_MISSING = "Το OpenSSL CLI χρειάζεται για να διαβαστούν εγγραφές της θυρίδας από παλαιότερη έκδοση (αναβαθμίζονται στην πρώτη ανάγνωση). Στο Termux: pkg install openssl"
+
+
+class VaultOpenSSLMissing(RuntimeError):
+    pass
+
+
+class VaultKey:
+    # Derived once per unlock: PBKDF2 over the master password and key_salt
+    # gives the AES-256-GCM key. Each field gets a random 12-byte nonce, and the
+    # entry id and field name are bound in as associated data, so a token can't
+    # be moved to another entry or field. The master password is kept only to
+    # open legacy openssl tokens.
+    def __init__(self, master: str, salt: bytes) -> None:
+        self.aead = AESGCM(pbkdf2_hash(master, salt))
+        self.master = master
+
+    @staticmethod
+    def _aad(entry_id: int, field: str) -> bytes:
+        return f"{int(entry_id)}:{field}".encode("utf-8")
+
+    def seal(self, text: str, entry_id: int, field: str) -> str:
+        nonce = os.urandom(12)
+        blob = nonce + self.aead.encrypt(nonce, text.encode("utf-8"), self._aad(entry_id, field))
+        return VAULT_TOKEN_PREFIX + base64.urlsafe_b64encode(blob).decode("ascii")
+
+    def open(self, token: str, entry_id: int, field: str) -> str:
+        blob = base64.urlsafe_b64decode(token[len(VAULT_TOKEN_PREFIX):].encode("ascii"))
+        try:
+            return self.aead.decrypt(blob[:12], blob[12:], self._aad(entry_id, field)).decode("utf-8")
+        except InvalidTag:
+            raise ValueError("Entry failed the integrity check.")
+
+
+def vault_unlock(master: str) -> VaultKey:
+    salt = meta_get("key_salt")
+    if not salt:
+        salt = os.urandom(16)
+        meta_set("key_salt", salt)
+    return VaultKey(master, salt)
+
+
+def vault_encrypt(key: VaultKey, text: str, entry_id: int, field: str) -> Optional[str]:
     text = (text or "").strip()
     if not text:
         return None
-    env = os.environ.copy()
-    env["FS_PASS"] = master
-    res = subprocess.run(
-        ["openssl", "enc", "-aes-256-cbc", "-pbkdf2", "-salt", "-a", "-A", "-pass", "env:FS_PASS"],
-        input=text.encode("utf-8"), capture_output=True, env=env, check=False
-    )
-    if res.returncode != 0:
-        raise RuntimeError(res.stderr.decode("utf-8", "ignore") or "Encryption failed")
-    return res.stdout.decode("utf-8").strip()
+    return key.seal(text, entry_id, field)
 
 
-def vault_decrypt(master: str, token: Optional[str]) -> str:
-    if not token:
-        return ""
+def openssl_decrypt(master: str, token: str) -> str:
+    if not which("openssl"):
+        raise VaultOpenSSLMissing(OPENSSL_MISSING)
     env = os.environ.copy()
     env["FS_PASS"] = master
     res = subprocess.run(
@@ -853,13 +1438,60 @@ def vault_decrypt(master: str, token: Optional[str]) -> str:
     return res.stdout.decode("utf-8", "ignore")
 
 
-def vault_master() -> Optional[str]:
+def vault_decrypt(key: VaultKey, token: Optional[str], entry_id: int, field: str) -> str:
+    if not token:
+        return ""
+    if token.startswith(VAULT_TOKEN_PREFIX):
+        return key.open(token, entry_id, field)
+    return openssl_decrypt(key.master, token)
+
+
+def vault_entry_secrets(key: VaultKey, rows, fields=VAULT_FIELDS, migrate: bool = True, skip_errors: bool = False) -> Dict[int, Dict[str, str]]:
+    # Decrypts many entries in one pass. Tokens written by the old openssl
+    # subprocess scheme are re-sealed in place the first time they are read.
+    # With skip_errors, entries that fail to decrypt are left out of the result.
+    out: Dict[int, Dict[str, str]] = {}
+    upgrades = []
+    for row in rows:
+        values = {}
+        pending = []
+        try:
+            for field in fields:
+                token = row[f"{field}_enc"]
+                values[field] = vault_decrypt(key, token, row["id"], field)
+                if migrate and token and not token.startswith(VAULT_TOKEN_PREFIX):
+                    pending.append((field, vault_encrypt(key, values[field], row["id"], field), row["id"]))
+        except Exception:
+            if not skip_errors:
+                raise
+            continue
+        upgrades.extend(pending)
+        out[row["id"]] = values
+    if upgrades:
+        con = db_connect()
+        for field, token, entry_id in upgrades:
+            con.execute(f"UPDATE entries SET {field}_enc=? WHERE id=?", (token, entry_id))
+        con.commit()
+        con.close()
+    return out
+
+
+def vault_has_legacy_entries() -> bool:
+    prefix_len = len(VAULT_TOKEN_PREFIX)
+    clause = " OR ".join(f"({f}_enc IS NOT NULL AND {f}_enc != '' AND substr({f}_enc, 1, {prefix_len}) != ?)" for f in VAULT_FIELDS)
+    con = db_connect()
+    row = con.execute(f"SELECT 1 FROM entries WHERE {clause} LIMIT 1", (VAULT_TOKEN_PREFIX,) * len(VAULT_FIELDS)).fetchone()
+    con.close()
+    return row is not None
+
+
+def vault_key() -> Optional[VaultKey]:
     cid = get_client_id()
     return VAULT_KEYS.get(cid)
 
 
 def vault_unlocked() -> bool:
-    return bool(vault_master())
+    return vault_key() is not None
 
 # ---------------- UI ----------------
 BASE_HTML = r"""
@@ -1014,6 +1646,8 @@ textarea{min-height:120px;resize:vertical}
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
 init_vault_db()
+if vault_has_legacy_entries() and not ensure_openssl():
+    print(OPENSSL_MISSING)
 
 # ---------------- shared helpers ----------------
 def render_page(title: str, body: str):
@@ -1122,7 +1756,7 @@ def about():
       <div class='muted'>Το Free Internet είναι τοπική περιήγηση και θυρίδα για Termux. Τα δεδομένα αποθηκεύονται στο <code>~/Free Internet</code>.</div>
       <div class='grid3'>
         <div class='site'><b>Περιήγηση</b><div class='muted'>Search, proxy routing, Tor option, bookmarks, history, saved pages, and website screenshots.</div></div>
-        <div class='site'><b>Θυρίδα</b><div class='muted'>Encrypted entries powered by the OpenSSL CLI.</div></div>
+        <div class='site'><b>Θυρίδα</b><div class='muted'>Κρυπτογραφημένες εγγραφές (AES-256-GCM μέσω του πακέτου cryptography).</div></div>
         <div class='site'><b>Πακέτα</b><div class='muted'>Python: flask + requests. Τα στιγμιότυπα χρησιμοποιούν τον browser σου και αποθηκεύουν τοπικά αρχεία PNG.</div></div>
       </div>
     </section>
@@ -1483,6 +2117,7 @@ def browser_settings():
               <div class="row">
                 <a class="btn" href="{{ url_for('browser_proxy_refresh') }}">Ανανέωση proxies</a>
                 <a class="btn" href="{{ url_for('browser_update_tools') }}">Ενημέρωση εργαλείων περιήγησης</a>
+                <a class="btn" href="{{ url_for('browser_cache') }}">Κρυφή μνήμη HTTP</a>
                 <a class="btn danger" href="{{ url_for('browser_clear') }}">Καθαρισμός δεδομένων περιήγησης</a>
                 {% if tor_on %}<a class="btn danger" href="{{ url_for('browser_tor_stop') }}">Διακοπή Tor</a>{% endif %}
               </div>
@@ -1572,9 +2207,47 @@ def browser_clear():
     cid = get_client_id()
     if cid in BROWSER_CLIENTS:
         del BROWSER_CLIENTS[cid]
+    HTTP_CACHE.clear(cid)
     flash("Τα cookies και το ιστορικό περιήγησης καθαρίστηκαν.")
     return redirect(url_for("browser_home"))
 
+@app.route("/browser/cache")
+def browser_cache():
+    stats = HTTP_CACHE.summary(get_client_id())
+    body = render_template_string(
+        """
+        <section class="hero stack">
+          <div>
+            <div class="muted small">Περιήγηση</div>
+            <h1 style="margin:0;">Κρυφή μνήμη HTTP</h1>
+            <div class="muted">Οι σελίδες και τα αρχεία τους κρατούνται στον δίσκο και επαληθεύονται ξανά με ETag / Last-Modified, ώστε οι επαναλαμβανόμενες επισκέψεις μέσω Tor ή proxy να αποφεύγουν το αργό βήμα.</div>
+          </div>
+          <div class="grid3">
+            <div class="kpi"><div class="muted small">Επιτυχίες</div><div class="kpiNum">{{ s.hits }}</div></div>
+            <div class="kpi"><div class="muted small">Επαληθευμένα</div><div class="kpiNum">{{ s.revalidated }}</div></div>
+            <div class="kpi"><div class="muted small">Αστοχίες</div><div class="kpiNum">{{ s.misses }}</div></div>
+          </div>
+          <div class="grid3">
+            <div class="kpi"><div class="muted small">Εγγραφές (αυτός ο περιηγητής)</div><div class="kpiNum">{{ s.client_entries }}</div></div>
+            <div class="kpi"><div class="muted small">Μέγεθος (αυτός ο περιηγητής)</div><div class="kpiNum">{{ '%.1f'|format(s.client_bytes / 1048576) }} MB</div></div>
+            <div class="kpi"><div class="muted small">Συνολικό μέγεθος</div><div class="kpiNum">{{ '%.1f'|format(s.total_bytes / 1048576) }} / {{ s.max_bytes // 1048576 }} MB</div></div>
+          </div>
+          <div class="muted small">Ποσοστό επιτυχίας {{ s.hit_rate }}% · {{ s.entries }} εγγραφές από {{ s.partitions }} περιηγητές · {{ s.stored }} αποθηκεύσεις, {{ s.evicted }} αφαιρέσεις από την εκκίνηση.</div>
+          <div class="row">
+            <a class="btn danger" href="{{ url_for('browser_cache_clear') }}">Καθαρισμός cache αυτού του περιηγητή</a>
+            <a class="btn" href="{{ url_for('browser_settings') }}">Πίσω</a>
+          </div>
+        </section>
+        """, s=stats
+    )
+    return render_page("Κρυφή μνήμη HTTP", body)
+
+@app.route("/browser/cache/clear")
+def browser_cache_clear():
+    HTTP_CACHE.clear(get_client_id())
+    flash("Η κρυφή μνήμη HTTP καθαρίστηκε.")
+    return redirect(url_for("browser_cache"))
+
 @app.route("/browser/bookmark")
 def browser_save_bookmark():
     url = strip_tracking(request.args.get("url", "").strip())
@@ -1653,7 +2326,12 @@ def browser_save_page():
         stem = re.sub(r'[^a-zA-Z0-9._-]+', '_', (urllib.parse.urlsplit(target).netloc or 'page') + '_' + str(int(time.time())))[:80]
         ext = '.html' if 'text/html' in ctype else (mimetypes.guess_extension(ctype.split(';')[0].strip()) or '.bin')
         out = DOWNLOADS_DIR / f"{stem}{ext}"
-        out.write_bytes(resp.content)
+        try:
+            with open(out, "wb") as fh:
+                for chunk in response_chunks(resp, STREAM_CHUNK_SIZE):
+                    fh.write(chunk)
+        finally:
+            resp.close()
         flash(f"Αποθηκεύτηκε στο {out.name}.")
     except Exception as e:
         flash(f"Δεν ήταν δυνατή η αποθήκευση της σελίδας: {e}")
@@ -1730,8 +2408,14 @@ def browser_open():
             target = urllib.parse.urlunsplit(split)
             data = None
 
+    upstream_headers = None
+    if method == "GET" and request.headers.get("Range"):
+        upstream_headers = {"Range": request.headers["Range"], "Accept-Encoding": "identity"}
+        if request.headers.get("If-Range"):
+            upstream_headers["If-Range"] = request.headers["If-Range"]
+
     try:
-        resp, route_mode = browser_fetch(method, target, data=data if method == "POST" else None, files=files, stream=True)
+        resp, route_mode = browser_fetch(method, target, data=data if method == "POST" else None, files=files, stream=True, headers=upstream_headers)
     except Exception as e:
         body = f"<section class='card stack'><h2 style='margin:0;'>Σφάλμα περιήγησης</h2><div class='muted'>{html.escape(str(e))}</div><div class='row'><a class='btn' href='{url_for('browser_home')}'>Πίσω</a><a class='btn' href='{url_for('browser_settings')}'>Ρυθμίσεις</a><a class='btn' href='{url_for('browser_tor_start')}'>Εκκίνηση Tor</a></div></section>"
         return render_page("Σφάλμα περιήγησης", body), 502
@@ -1742,27 +2426,34 @@ def browser_open():
     if prefs.get("adblock") and is_blocked_url(final_url):
         return Response("Αποκλείστηκε από τον αποκλεισμό διαφημίσεων.", status=451, content_type="text/plain; charset=utf-8")
 
-    if "text/html" in content_type:
-        raw_html = resp.text
-        title = page_title_from_html(raw_html, final_url)
+    if "text/html" in content_type and resp.status_code != 206:
         embedded = request.args.get("embed") == "1"
         fetch_dest = (request.headers.get("Sec-Fetch-Dest") or "").lower()
         should_log_nav = (not embedded) and (fetch_dest in {"", "document", "iframe"})
-        if should_log_nav:
-            add_history(final_url, title, content_type)
-        if request.args.get("reader") == "1" and not embedded:
-            return reader_html(raw_html, final_url)
-        if request.args.get("source") == "1" and not embedded:
+        if not embedded and (request.args.get("reader") == "1" or request.args.get("source") == "1"):
+            try:
+                raw_html = resp.text
+            finally:
+                resp.close()
+            if should_log_nav:
+                add_history(final_url, page_title_from_html(raw_html, final_url), content_type)
+            if request.args.get("reader") == "1":
+                return reader_html(raw_html, final_url)
             source = html.escape(raw_html)
             page = f"<section class='card stack'><div class='row'><a class='btn' href='{url_for('browser_open')}?url={urllib.parse.quote(final_url, safe='')}'>Πίσω</a></div><textarea class='mono' style='min-height:70vh'>{source}</textarea></section>"
             return render_page("Προβολή πηγαίου κώδικα", page)
-        rewritten = rewrite_html(raw_html, final_url, prefs, embedded=embedded)
-        return rewritten
 
+        banner = "" if embedded else browser_banner(final_url)
+        rewriter = HtmlRewriter(final_url, prefs, url_for("browser_open"), embedded=embedded, banner=banner)
+
+        def finished(rw: HtmlRewriter) -> None:
+            if should_log_nav:
+                add_history(final_url, rw.title or final_url, content_type)
 
-    data_bytes = resp.content
-    headers = {"Content-Type": content_type} if content_type else {}
-    return Response(data_bytes, status=resp.status_code, headers=headers)
+        headers = {CACHE_HEADER: resp.headers[CACHE_HEADER]} if resp.headers.get(CACHE_HEADER) else {}
+        return Response(stream_html(resp, rewriter, finished), content_type="text/html; charset=utf-8", headers=headers)
+
+    return passthrough_response(resp, request.headers.get("Accept-Encoding", ""))
 
 # ---------------- routes: vault ----------------
 @app.route("/vault")
@@ -1776,8 +2467,16 @@ def vault_home():
     con = db_connect()
     rows = con.execute("SELECT * FROM entries ORDER BY updated_at DESC").fetchall()
     con.close()
+    entry_secrets = vault_entry_secrets(vault_key(), rows, fields=("username",), skip_errors=True)
+    unreadable = len(rows) - len(entry_secrets)
+    if unreadable:
+        flash("{n} εγγραφές δεν ήταν δυνατό να αποκρυπτογραφηθούν.".format(n=unreadable) + ("" if which("openssl") else " " + OPENSSL_MISSING))
     if q:
-        rows = [r for r in rows if q in (r['title'] or '').lower() or q in (r['url'] or '').lower()]
+        rows = [
+            r for r in rows
+            if q in (r['title'] or '').lower() or q in (r['url'] or '').lower()
+            or q in entry_secrets.get(r['id'], {}).get('username', '').lower()
+        ]
     body = render_template_string(
         """
         <section class="hero stack">
@@ -1786,19 +2485,19 @@ def vault_home():
             <div class="row"><a class="btn primary" href="{{ url_for('vault_add') }}">Προσθήκη εγγραφής</a><a class="btn" href="{{ url_for('vault_settings') }}">Ρυθμίσεις</a><a class="btn danger" href="{{ url_for('vault_logout') }}">Lock</a></div>
           </div>
           <form class="row" method="get" action="{{ url_for('vault_home') }}">
-            <input name="q" value="{{ q }}" placeholder="Αναζήτηση τίτλου ή URL..." style="flex:1;min-width:240px;">
+            <input name="q" value="{{ q }}" placeholder="Αναζήτηση τίτλου, URL ή ονόματος χρήστη..." style="flex:1;min-width:240px;">
             <button class="btn primary" type="submit">Αναζήτηση</button>
             <a class="btn" href="{{ url_for('vault_home') }}">Καθαρισμός</a>
           </form>
           <div class="grid3">
             <div class="kpi"><div class="muted small">Εμφανιζόμενες εγγραφές</div><div class="num">{{ rows|length }}</div></div>
             <div class="kpi"><div class="muted small">Κατάσταση</div><div class="num" style="font-size:18px;margin-top:12px;">Ξεκλείδωτη</div></div>
-            <div class="kpi"><div class="muted small">Κρυπτογράφηση</div><div class="num" style="font-size:18px;margin-top:12px;">OpenSSL</div></div>
+            <div class="kpi"><div class="muted small">Κρυπτογράφηση</div><div class="num" style="font-size:18px;margin-top:12px;">AES-GCM</div></div>
           </div>
         </section>
         <div class="sep"></div>
-        {% if rows %}<div class="cards">{% for r in rows %}<div class="site stack"><div style="font-weight:900;">{{ r['title'] }}</div><div class="muted small mono">{{ r['url'] }}</div><div class="tinyActions"><a href="{{ url_for('vault_view', entry_id=r['id']) }}">Άνοιγμα</a><a href="{{ url_for('vault_edit', entry_id=r['id']) }}">Επεξεργασία</a><a target="_blank" rel="noreferrer" href="{{ r['url'] }}">Επίσκεψη</a></div></div>{% endfor %}</div>{% else %}<section class="card"><div class="muted">Δεν υπάρχουν εγγραφές ακόμη.</div></section>{% endif %}
-        """, rows=rows, q=q
+        {% if rows %}<div class="cards">{% for r in rows %}<div class="site stack"><div style="font-weight:900;">{{ r['title'] }}</div><div class="muted small mono">{{ r['url'] }}</div>{% if entry_secrets.get(r['id'], {}).get('username') %}<div class="muted small">{{ entry_secrets[r['id']]['username'] }}</div>{% endif %}<div class="tinyActions"><a href="{{ url_for('vault_view', entry_id=r['id']) }}">Άνοιγμα</a><a href="{{ url_for('vault_edit', entry_id=r['id']) }}">Επεξεργασία</a><a target="_blank" rel="noreferrer" href="{{ r['url'] }}">Επίσκεψη</a></div></div>{% endfor %}</div>{% else %}<section class="card"><div class="muted">Δεν υπάρχουν εγγραφές ακόμη.</div></section>{% endif %}
+        """, rows=rows, q=q, entry_secrets=entry_secrets
     )
     return render_page("Θυρίδα", body)
 
@@ -1819,7 +2518,7 @@ def vault_setup():
             return redirect(url_for("vault_login"))
     body = """
     <section class='hero stack'>
-      <div class='pillRow'><span class='badge'>Vault setup</span><span class='badge'>OpenSSL encryption</span></div>
+      <div class='pillRow'><span class='badge'>Vault setup</span><span class='badge'>AES-GCM encryption</span></div>
       <h1 style='margin:0;'>Create vault</h1>
       <div class='muted'>Set one master password for the vault.</div>
       <form method='post' class='grid2'>
@@ -1837,7 +2536,7 @@ def vault_login():
     if request.method == "POST":
         master = request.form.get("master", "")
         if verify_vault_password(master):
-            VAULT_KEYS[get_client_id()] = master
+            VAULT_KEYS[get_client_id()] = vault_unlock(master)
             flash("Η θυρίδα ξεκλειδώθηκε.")
             return redirect(url_for("vault_home"))
         flash("Λάθος κύριος κωδικός.")
@@ -1873,11 +2572,16 @@ def vault_add():
         if not title or not url:
             flash("Ο τίτλος και το URL είναι υποχρεωτικά.")
         else:
-            master = vault_master()
+            key = vault_key()
             con = db_connect()
+            cur = con.execute(
+                "INSERT INTO entries(title,url,created_at,updated_at) VALUES(?,?,?,?)",
+                (title, url, int(time.time()), int(time.time()))
+            )
+            entry_id = cur.lastrowid
             con.execute(
-                "INSERT INTO entries(title,url,username_enc,password_enc,notes_enc,created_at,updated_at) VALUES(?,?,?,?,?,?,?)",
-                (title, url, vault_encrypt(master, username), vault_encrypt(master, password), vault_encrypt(master, notes), int(time.time()), int(time.time()))
+                "UPDATE entries SET username_enc=?, password_enc=?, notes_enc=? WHERE id=?",
+                (vault_encrypt(key, username, entry_id, "username"), vault_encrypt(key, password, entry_id, "password"), vault_encrypt(key, notes, entry_id, "notes"), entry_id)
             )
             con.commit()
             con.close()
@@ -1915,11 +2619,13 @@ def vault_view(entry_id: int):
     if not row:
         flash("Η εγγραφή δεν βρέθηκε.")
         return redirect(url_for("vault_home"))
-    master = vault_master()
+    key = vault_key()
     try:
-        username = vault_decrypt(master, row["username_enc"])
-        password = vault_decrypt(master, row["password_enc"])
-        notes = vault_decrypt(master, row["notes_enc"])
+        values = vault_entry_secrets(key, [row])[row["id"]]
+        username, password, notes = values["username"], values["password"], values["notes"]
+    except VaultOpenSSLMissing:
+        flash(OPENSSL_MISSING)
+        return redirect(url_for("vault_home"))
     except Exception:
         flash("Δεν ήταν δυνατή η αποκρυπτογράφηση της εγγραφής. Ξεκλείδωσε ξανά τη θυρίδα.")
         return redirect(url_for("vault_logout"))
@@ -1955,11 +2661,13 @@ def vault_edit(entry_id: int):
     if not row:
         flash("Η εγγραφή δεν βρέθηκε.")
         return redirect(url_for("vault_home"))
-    master = vault_master()
+    key = vault_key()
     try:
-        username = vault_decrypt(master, row["username_enc"])
-        password = vault_decrypt(master, row["password_enc"])
-        notes = vault_decrypt(master, row["notes_enc"])
+        values = vault_entry_secrets(key, [row])[row["id"]]
+        username, password, notes = values["username"], values["password"], values["notes"]
+    except VaultOpenSSLMissing:
+        flash(OPENSSL_MISSING)
+        return redirect(url_for("vault_home"))
     except Exception:
         flash("Δεν ήταν δυνατή η αποκρυπτογράφηση της εγγραφής. Ξεκλείδωσε ξανά τη θυρίδα.")
         return redirect(url_for("vault_logout"))
@@ -1975,7 +2683,7 @@ def vault_edit(entry_id: int):
             con = db_connect()
             con.execute(
                 "UPDATE entries SET title=?, url=?, username_enc=?, password_enc=?, notes_enc=?, updated_at=? WHERE id=?",
-                (title, url, vault_encrypt(master, username), vault_encrypt(master, password), vault_encrypt(master, notes), int(time.time()), entry_id)
+                (title, url, vault_encrypt(key, username, entry_id, "username"), vault_encrypt(key, password, entry_id, "password"), vault_encrypt(key, notes, entry_id, "notes"), int(time.time()), entry_id)
             )
             con.commit()
             con.close()
@@ -2033,23 +2741,32 @@ def vault_settings():
         else:
             con = db_connect()
             rows = con.execute("SELECT * FROM entries").fetchall()
+            try:
+                entry_secrets = vault_entry_secrets(vault_key(), rows, migrate=False)
+            except VaultOpenSSLMissing:
+                con.close()
+                flash(OPENSSL_MISSING)
+                return redirect(url_for("vault_settings"))
+            except Exception:
+                con.close()
+                flash("Δεν ήταν δυνατή η επανακρυπτογράφηση της θυρίδας.")
+                return redirect(url_for("vault_settings"))
+            key_salt = os.urandom(16)
+            new_key = VaultKey(newp1, key_salt)
+            now = int(time.time())
             for row in rows:
-                try:
-                    username = vault_decrypt(oldp, row["username_enc"])
-                    password = vault_decrypt(oldp, row["password_enc"])
-                    notes = vault_decrypt(oldp, row["notes_enc"])
-                except Exception:
-                    con.close()
-                    flash("Δεν ήταν δυνατή η επανακρυπτογράφηση της θυρίδας.")
-                    return redirect(url_for("vault_settings"))
+                values = entry_secrets[row["id"]]
                 con.execute(
                     "UPDATE entries SET username_enc=?, password_enc=?, notes_enc=?, updated_at=? WHERE id=?",
-                    (vault_encrypt(newp1, username), vault_encrypt(newp1, password), vault_encrypt(newp1, notes), int(time.time()), row["id"])
+                    (vault_encrypt(new_key, values["username"], row["id"], "username"), vault_encrypt(new_key, values["password"], row["id"], "password"), vault_encrypt(new_key, values["notes"], row["id"], "notes"), now, row["id"])
                 )
+            pw_salt = os.urandom(16)
+            for k, v in (("pw_salt", pw_salt), ("pw_hash", pbkdf2_hash(newp1, pw_salt)), ("key_salt", key_salt)):
+                con.execute("INSERT INTO meta(k,v) VALUES(?,?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (k, v))
             con.commit()
             con.close()
-            set_vault_password(newp1)
-            VAULT_KEYS[get_client_id()] = newp1
+            VAULT_KEYS.clear()
+            VAULT_KEYS[get_client_id()] = new_key
             flash("Ο κωδικός της θυρίδας άλλαξε.")
             return redirect(url_for("vault_settings"))
     body = """
@@ -12,6 +12,7 @@ import shutil
 import socket
 import secrets
 import signal
+import tempfile
 import threading
 import mimetypes
 import datetime
@@ -20,6 +21,7 @@ import pathlib
 import logging
 import functools
 import atexit
+from array import array
 from collections import OrderedDict
 
 # Import the only non-stdlib runtime dependencies.
@@ -33,8 +35,8 @@ def _import_runtime_dependencies():
     try:
         from flask import (
             Flask, Blueprint, flash, get_flashed_messages, redirect, g,
-            render_template_string, request, send_from_directory, session,
-            url_for,
+            render_template, render_template_string, request,
+            send_from_directory, session, url_for,
         )
         from flask_socketio import SocketIO, emit, join_room, leave_room
     except ImportError:
@@ -50,8 +52,8 @@ def _import_runtime_dependencies():
 
         from flask import (
             Flask, Blueprint, flash, get_flashed_messages, redirect, g,
-            render_template_string, request, send_from_directory, session,
-            url_for,
+            render_template, render_template_string, request,
+            send_from_directory, session, url_for,
         )
         from flask_socketio import SocketIO, emit, join_room, leave_room
 
@@ -62,6 +64,7 @@ def _import_runtime_dependencies():
         "get_flashed_messages": get_flashed_messages,
         "redirect": redirect,
         "g": g,
+        "render_template": render_template,
         "render_template_string": render_template_string,
         "request": request,
         "send_from_directory": send_from_directory,
@@ -120,13 +123,15 @@ def get_local_ip():
         s.close()
     return IP
 
-def start_server_process(secret_key, verbose_mode, allow_lan=False):
+def start_server_process(secret_key, verbose_mode, allow_lan=False, keep_chat=False):
     """Start the server while keeping the login secret out of argv/environment."""
     cmd = [sys.executable, __file__, "--server"]
     if not verbose_mode:
         cmd.append("--quiet")
     if allow_lan:
         cmd.append("--allow-lan")
+    if keep_chat:
+        cmd.append("--keep-chat")
 
     child_env = os.environ.copy()
     child_env.pop("CONNECTIONS_SECRET_KEY", None)
@@ -435,20 +440,123 @@ def get_file_category(filename):
     return 'Άλλα'
 
 
-def _database_usage_bytes():
-    total = 0
-    try:
-        for path in BASE_DIR.iterdir():
-            try:
-                if path.name.startswith(('.dbchunk-', '.upload-')):
-                    continue
-                if path.is_file() and not path.is_symlink():
-                    total += path.stat().st_size
-            except OSError:
+DB_INDEX_RESCAN_SECONDS = 60
+
+
+class DatabaseIndex:
+    """In-memory listing of BASE_DIR with an incrementally maintained size total.
+
+    Uploads and deletes update the index directly. Files added or removed
+    outside the app (BASE_DIR lives in the user's Downloads folder) are
+    picked up when the directory mtime changes, and a periodic rescan covers
+    in-place edits that do not touch the directory entry.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.total_bytes = 0
+        self.version = 0
+        self._sorted = {}
+        self._dir_mtime_ns = None
+        self._scanned_at = 0.0
+
+    def _dir_mtime(self):
+        try:
+            return self.base_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _rescan_locked(self):
+        entries = {}
+        try:
+            names = [path.name for path in self.base_dir.iterdir()]
+        except OSError:
+            names = []
+        for name in names:
+            if name.startswith(('.dbchunk-', '.upload-')):
                 continue
-    except OSError:
-        pass
-    return total
+            info = get_file_info(name)
+            if info is not None:
+                entries[name] = info
+        self.entries = entries
+        self.total_bytes = sum(info['size'] for info in entries.values())
+        self.version += 1
+        self._sorted.clear()
+        self._dir_mtime_ns = self._dir_mtime()
+        self._scanned_at = time.monotonic()
+
+    def _ensure_fresh_locked(self):
+        if (
+            self._dir_mtime_ns is None
+            or self._dir_mtime() != self._dir_mtime_ns
+            or time.monotonic() - self._scanned_at > DB_INDEX_RESCAN_SECONDS
+        ):
+            self._rescan_locked()
+
+    def _changed_locked(self):
+        self.version += 1
+        self._sorted.clear()
+        # Our own change moved the directory mtime; record it so it does not
+        # look like an external modification.
+        self._dir_mtime_ns = self._dir_mtime()
+
+    def note_own_change(self):
+        """Record a directory change made by the app itself (temp-file churn)."""
+        with self.lock:
+            if self._dir_mtime_ns is not None:
+                self._dir_mtime_ns = self._dir_mtime()
+
+    def add(self, name):
+        with self.lock:
+            if self._dir_mtime_ns is None:
+                self._rescan_locked()
+                return
+            info = get_file_info(name)
+            old = self.entries.pop(name, None)
+            if old is not None:
+                self.total_bytes -= old['size']
+            if info is not None:
+                self.entries[name] = info
+                self.total_bytes += info['size']
+            self._changed_locked()
+
+    def remove(self, name):
+        with self.lock:
+            old = self.entries.pop(name, None)
+            if old is not None:
+                self.total_bytes -= old['size']
+            self._changed_locked()
+
+    def usage_bytes(self):
+        with self.lock:
+            self._ensure_fresh_locked()
+            return self.total_bytes
+
+    def snapshot(self, sort):
+        """Return (entries, names sorted for `sort`); the sort is cached per version."""
+        with self.lock:
+            self._ensure_fresh_locked()
+            names = self._sorted.get(sort)
+            if names is None:
+                entries = self.entries
+                key, reverse = {
+                    "z-a": (lambda n: n.lower(), True),
+                    "oldest": (lambda n: entries[n]["mtime"], False),
+                    "newest": (lambda n: entries[n]["mtime"], True),
+                    "smallest": (lambda n: entries[n]["size"], False),
+                    "biggest": (lambda n: entries[n]["size"], True),
+                }.get(sort, (lambda n: n.lower(), False))
+                names = self._sorted[sort] = tuple(sorted(entries, key=key, reverse=reverse))
+            return dict(self.entries), names
+
+
+DB_INDEX = DatabaseIndex(BASE_DIR)
+
+
+def _database_usage_bytes():
+    return DB_INDEX.usage_bytes()
 
 def _sanitize_upload_name(name):
     name = os.path.basename(str(name or "file")).strip()
@@ -484,6 +592,7 @@ def _db_abort_pending_upload(upload_id):
             temp = BASE_DIR / meta.get('temp_name', '')
             if temp.parent == BASE_DIR and (temp.is_file() or temp.is_symlink()):
                 temp.unlink(missing_ok=True)
+                DB_INDEX.note_own_change()
         except Exception:
             pass
 
@@ -530,6 +639,7 @@ def _db_create_pending_upload(owner_id, filename, expected_size):
         temp = BASE_DIR / temp_name
         with open(temp, 'xb'):
             pass
+        DB_INDEX.note_own_change()
         try:
             os.chmod(temp, 0o600)
         except OSError:
@@ -656,6 +766,7 @@ def _db_complete_upload(upload_id, owner_id):
             except OSError:
                 pass
             DB_PENDING_UPLOADS.pop(upload_id, None)
+            DB_INDEX.add(target.name)
             return target.name, actual_size
 
 def _cleanup_db_pending_uploads():
@@ -1117,33 +1228,17 @@ def index():
     
     search_terms = query.split()
 
-    try:
-        full_contents = [p.name for p in BASE_DIR.iterdir()]
-    except Exception:
-        full_contents = []
-    
-    current_files = []
-    files_info = {}
-    all_filenames = []
-    
-    for item in full_contents:
-        info = get_file_info(item)
-        if info is not None: 
-            all_filenames.append(item)
-            item_lower = item.lower()
-            
-            if not search_terms or all(term in item_lower for term in search_terms):
-                current_files.append(item)
-                files_info[item] = info
-
-    # Sorting logic
-    reverse_map = {"z-a": True, "newest": True, "biggest": True}
-    sort_key_map = {
-        "a-z": lambda p: p.lower(), "z-a": lambda p: p.lower(),
-        "oldest": lambda p: files_info[p]["mtime"], "newest": lambda p: files_info[p]["mtime"],
-        "smallest": lambda p: files_info[p]["size"], "biggest": lambda p: files_info[p]["size"],
-    }
-    current_files.sort(key=sort_key_map.get(sort, lambda p: p.lower()), reverse=reverse_map.get(sort, False))
+    # The index is already sorted for this order; only the name filter runs
+    # per request, and no file is stat()ed here.
+    files_info, sorted_names = DB_INDEX.snapshot(sort)
+    all_filenames = list(files_info)
+    if search_terms:
+        current_files = [
+            name for name in sorted_names
+            if all(term in name.lower() for term in search_terms)
+        ]
+    else:
+        current_files = list(sorted_names)
 
     # Categorization logic
     categorized_files = {cat: [] for cat in list(FILE_CATEGORIES.keys()) + ['Άλλα']}
@@ -1153,14 +1248,14 @@ def index():
         
     messages = get_flashed_messages(with_categories=True)
 
-    return render_template_string(html_template_db, 
-                                  categorized_files=categorized_files, 
-                                  files_info=files_info, 
-                                  request=request, 
-                                  sort=sort,
-                                  all_filenames=all_filenames,
-                                  messages=messages,
-                                  csrf_token=csrf_token)
+    return render_template(compiled_template('database'),
+                           categorized_files=categorized_files,
+                           files_info=files_info,
+                           request=request,
+                           sort=sort,
+                           all_filenames=all_filenames,
+                           messages=messages,
+                           csrf_token=csrf_token)
 
 
 def _db_upload_owner():
@@ -1301,6 +1396,7 @@ def delete_path():
         if full_path.exists() and full_path.is_file() and not full_path.is_symlink() and not item_name.startswith('.upload-'):
             try:
                 full_path.unlink()
+                DB_INDEX.remove(item_name)
                 flash(f"Το αρχείο '{item_name}' διαγράφηκε επιτυχώς.", 'success')
             except Exception as e:
                 flash(f"Σφάλμα κατά τη διαγραφή '{item_name}': {e}", 'error')
@@ -1376,8 +1472,9 @@ def _prepare_chat_file_store():
                 os.chmod(directory, 0o700)
             except OSError:
                 pass
-        # Chat history is in-memory, so leftovers from a prior crashed run are
-        # never valid. Διαγραφή only regular files/symlinks inside our private dir.
+        # Attachments live only for the current run (the text history log is
+        # persisted separately), so leftovers from a prior crashed run are never
+        # valid. Delete only regular files/symlinks inside our private dir.
         for path in CHAT_FILE_DIR.iterdir():
             try:
                 if path.is_file() or path.is_symlink():
@@ -1429,10 +1526,325 @@ def _delete_chat_file(file_id):
 _prepare_chat_file_store()
 atexit.register(_cleanup_chat_file_store)
 
-# In-memory chat history for the current server session (not persisted)
-CHAT_HISTORY = OrderedDict()
-CHAT_HISTORY_MAX = 300  # number of messages to keep
-CHAT_HISTORY_LOCK = threading.Lock()
+# Chat history: an append-only JSONL log in the private runtime directory. Every
+# add, edit and delete is one record with a monotonically increasing cursor.
+# By default the log lives only for the current run (like the one-time key) and
+# is removed on shutdown; --keep-chat keeps it in chat_log/ across restarts.
+# Superseded records are overwritten in place on edit/delete, so the old text
+# does not stay in the file, and the log is compacted to the newest
+# CHAT_LOG_KEEP messages.
+CHAT_LOG_PERSIST = "--keep-chat" in sys.argv
+CHAT_LOG_FILE = CHAT_FILE_DIR.parent / ("chat_log" if CHAT_LOG_PERSIST else "chat_session") / "messages.jsonl"
+CHAT_LOG_KEEP = 2000  # newest messages retained in the log
+CHAT_LOG_COMPACT_SLACK = 500  # extra log records (messages, edits, deletes) tolerated before compacting
+CHAT_HISTORY_MAX = 300  # decoded messages kept hot in memory (and attachments kept)
+CHAT_HISTORY_PAGE = 50  # messages sent on join and per scroll-back page
+CHAT_HISTORY_PAGE_MAX = 100
+CHAT_SYNC_MAX_CHANGES = 500  # larger reconnect gaps fall back to a fresh page
+CHAT_MESSAGE_ID_RE = re.compile(r'^msg_([0-9a-f]{1,12})_[A-Za-z0-9_-]{8,32}$')
+CHAT_HISTORY_LOCK = threading.RLock()
+
+
+class ChatHistoryStore:
+    """Append-only chat log with a compact offset index and a small hot tail.
+
+    Messages are numbered in the order they were sent and the number is part
+    of the message id, so lookups never need an id dictionary. Memory use is
+    two integer arrays (file offset per message and per log record) plus at
+    most CHAT_HISTORY_MAX decoded messages, regardless of history length.
+    After compaction the log starts with a 'base' record giving the message
+    number and cursor that the retained part continues from.
+    """
+
+    def __init__(self, path, hot_size=CHAT_HISTORY_MAX, keep=CHAT_LOG_KEEP):
+        self.path = pathlib.Path(path)
+        self.hot_size = max(1, int(hot_size))
+        self.keep = max(self.hot_size, int(keep))
+        self._writer = None
+        self._reader = None
+        self._load()
+
+    @property
+    def cursor(self):
+        return self.base_seq + len(self.record_offsets)
+
+    @property
+    def last_number(self):
+        return self.base_number + len(self.message_offsets)
+
+    def _load(self):
+        self.base_number = 0                # messages up to this number were compacted away
+        self.base_seq = 0                   # records up to this cursor were compacted away
+        self.message_offsets = array('q')  # message number - base_number - 1 -> offset, -1 once deleted
+        self.record_offsets = array('q')   # cursor - base_seq - 1 -> offset of that log record
+        self.hot = OrderedDict()           # message id -> newest live item
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.chmod(self.path.parent, 0o700)
+        except OSError:
+            pass
+        open(self.path, 'ab').close()
+        try:
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+        self._writer = open(self.path, 'r+b')
+        self._reader = open(self.path, 'rb')
+        offset = 0
+        for raw in self._reader:
+            record = self._decode(raw)
+            if record is not None and record['op'] == 'base' and offset == 0:
+                self.base_seq, self.base_number = max(0, record['seq']), max(0, record['n'])
+            elif record is None or record['seq'] != self.cursor + 1 or not self._index(record, offset):
+                break
+            offset += len(raw)
+        if offset < self.path.stat().st_size:
+            # A torn tail from a crash mid-append; later records are unreachable.
+            self._writer.truncate(offset)
+        for number in range(self.last_number, self.base_number, -1):
+            if len(self.hot) >= self.hot_size:
+                break
+            item = self._read_message(number)
+            if item:
+                self.hot[item['id']] = item
+                self.hot.move_to_end(item['id'], last=False)
+
+    @staticmethod
+    def _decode(raw):
+        try:
+            record = json.loads(raw.decode('utf-8'))
+        except (UnicodeError, ValueError):
+            return None
+        if not isinstance(record, dict) or record.get('op') not in ('base', 'add', 'edit', 'delete'):
+            return None
+        if not isinstance(record.get('seq'), int) or not isinstance(record.get('n'), int):
+            return None
+        return record
+
+    @staticmethod
+    def _encode(record):
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def _index(self, record, offset):
+        number = record['n'] - self.base_number
+        if record['op'] == 'add':
+            if number <= len(self.message_offsets):
+                return False
+            # Messages deleted before a compaction leave gaps in the numbering.
+            while len(self.message_offsets) < number - 1:
+                self.message_offsets.append(-1)
+            self.message_offsets.append(offset)
+        elif 1 <= number <= len(self.message_offsets):
+            self.message_offsets[number - 1] = offset if record['op'] == 'edit' else -1
+        else:
+            return False
+        self.record_offsets.append(offset)
+        return True
+
+    def _append(self, op, number, item=None, message_id=None):
+        record = {'seq': self.cursor + 1, 'op': op, 'n': number}
+        if item is not None:
+            record['item'] = item
+        if message_id is not None:
+            record['id'] = message_id
+        line = self._encode(record)
+        self._writer.seek(0, os.SEEK_END)
+        offset = self._writer.tell()
+        self._writer.write(line)
+        self._writer.flush()
+        self._index(record, offset)
+        return record
+
+    def _scrub(self, offset):
+        """Overwrite a superseded record in place, keeping only its seq/op/n."""
+        if offset < 0:
+            return
+        self._reader.seek(offset)
+        raw = self._reader.readline()
+        record = self._decode(raw)
+        if not record:
+            return
+        blank = self._encode({'seq': record['seq'], 'op': record['op'], 'n': record['n']})
+        if len(blank) > len(raw):
+            return
+        self._writer.seek(offset)
+        self._writer.write(blank[:-1] + b' ' * (len(raw) - len(blank)) + b'\n')
+        self._writer.flush()
+        try:
+            os.fsync(self._writer.fileno())
+        except OSError:
+            pass
+
+    def _live_offset(self, number):
+        index = number - self.base_number - 1
+        if not 0 <= index < len(self.message_offsets):
+            return -1
+        return self.message_offsets[index]
+
+    def _read_record(self, offset):
+        self._reader.seek(offset)
+        return self._decode(self._reader.readline())
+
+    def _read_message(self, number):
+        offset = self._live_offset(number)
+        if offset < 0:
+            return None
+        record = self._read_record(offset)
+        if not record or not isinstance(record.get('item'), dict):
+            return None
+        return record['item']
+
+    @staticmethod
+    def message_number(message_id):
+        match = CHAT_MESSAGE_ID_RE.fullmatch(str(message_id or ''))
+        return int(match.group(1), 16) if match else 0
+
+    def get(self, message_id):
+        item = self.hot.get(message_id)
+        if item is not None:
+            return item
+        item = self._read_message(self.message_number(message_id))
+        return item if item and item.get('id') == message_id else None
+
+    def add(self, item):
+        """Persist a new message; return it and any attachment ids leaving the hot tail."""
+        number = self.last_number + 1
+        stored = dict(item)
+        stored['id'] = f"msg_{number:x}_{secrets.token_urlsafe(12)}"
+        stored['n'] = number
+        stored['cursor'] = self.cursor + 1
+        self._append('add', number, stored)
+        self.hot[stored['id']] = stored
+        evicted_file_ids = []
+        while len(self.hot) > self.hot_size:
+            _old_id, old_item = self.hot.popitem(last=False)
+            if old_item.get('fileId'):
+                evicted_file_ids.append(old_item['fileId'])
+        if len(self.record_offsets) > self.keep + CHAT_LOG_COMPACT_SLACK:
+            self.compact()
+        return stored, evicted_file_ids
+
+    def edit(self, message_id, updated):
+        number = self.message_number(message_id)
+        previous = self._live_offset(number)
+        stored = dict(updated)
+        stored['cursor'] = self.cursor + 1
+        self._append('edit', number, stored)
+        self._scrub(previous)
+        if message_id in self.hot:
+            self.hot[message_id] = stored
+        return stored
+
+    def delete(self, message_id):
+        number = self.message_number(message_id)
+        previous = self._live_offset(number)
+        record = self._append('delete', number, message_id=message_id)
+        self._scrub(previous)
+        self.hot.pop(message_id, None)
+        return record['seq']
+
+    def compact(self):
+        """Rewrite the log with only the newest `keep` live messages.
+
+        The retained messages get new cursors after the current one, so every
+        client cursor falls before the new base and gets a fresh page.
+        """
+        first = max(self.base_number, self.last_number - self.keep) + 1
+        seq = self.cursor
+        temp = self.path.with_name(self.path.name + '.tmp')
+        with open(temp, 'wb') as out:
+            try:
+                os.chmod(temp, 0o600)
+            except OSError:
+                pass
+            out.write(self._encode({'seq': seq, 'op': 'base', 'n': first - 1}))
+            for number in range(first, self.last_number + 1):
+                item = self._read_message(number)
+                if item:
+                    seq += 1
+                    out.write(self._encode({'seq': seq, 'op': 'add', 'n': number, 'item': dict(item, cursor=seq)}))
+            out.flush()
+            os.fsync(out.fileno())
+        self.close()
+        os.replace(temp, self.path)
+        self._load()
+
+    def page_before(self, before=None, limit=CHAT_HISTORY_PAGE):
+        """Return up to `limit` live messages older than message number `before`."""
+        limit = max(1, min(int(limit), CHAT_HISTORY_PAGE_MAX))
+        number = self.last_number if before is None else min(int(before) - 1, self.last_number)
+        items = []
+        while number > self.base_number and len(items) < limit:
+            item = self._read_message(number)
+            if item:
+                items.append(item)
+            number -= 1
+        has_more = any(self.message_offsets[index] >= 0 for index in range(number - self.base_number - 1, -1, -1))
+        items.reverse()
+        return items, has_more
+
+    def changes_after(self, cursor):
+        """Return (items, deleted_ids) changed since `cursor`, or None if the gap is too large."""
+        cursor = max(0, int(cursor))
+        if cursor < self.base_seq or cursor > self.cursor or self.cursor - cursor > CHAT_SYNC_MAX_CHANGES:
+            return None
+        changed_numbers = []
+        deleted = []
+        for seq in range(cursor + 1, self.cursor + 1):
+            record = self._read_record(self.record_offsets[seq - self.base_seq - 1])
+            if not record:
+                continue
+            if record['op'] == 'delete':
+                deleted.append(record.get('id'))
+            elif record['n'] not in changed_numbers:
+                changed_numbers.append(record['n'])
+        items = [item for item in map(self._read_message, sorted(changed_numbers)) if item]
+        return items, [message_id for message_id in deleted if message_id]
+
+    def close(self):
+        for handle in (self._writer, self._reader):
+            try:
+                if handle:
+                    handle.close()
+            except OSError:
+                pass
+
+
+def _close_chat_history():
+    CHAT_HISTORY.close()
+    if not CHAT_LOG_PERSIST:
+        try:
+            CHAT_HISTORY.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+if not CHAT_LOG_PERSIST:
+    try:
+        # Left behind by a run that did not shut down cleanly.
+        CHAT_LOG_FILE.unlink(missing_ok=True)
+    except OSError:
+        pass
+try:
+    CHAT_HISTORY = ChatHistoryStore(CHAT_LOG_FILE)
+except OSError as exc:
+    print(f"ΠΡΟΕΙΔΟΠΟΙΗΣΗ: δεν ήταν δυνατό το άνοιγμα του αρχείου συνομιλίας ({exc})· χρησιμοποιείται προσωρινός φάκελος για αυτή τη συνεδρία.")
+    CHAT_HISTORY = ChatHistoryStore(pathlib.Path(tempfile.mkdtemp(prefix='connections-chat-')) / 'messages.jsonl')
+atexit.register(_close_chat_history)
+
+
+def _public_chat_item(item):
+    """Return a client-safe copy; attachments from earlier runs are marked expired."""
+    public = dict(item)
+    file_id = public.get('fileId')
+    if file_id:
+        with CHAT_FILES_LOCK:
+            available = file_id in CHAT_FILES
+        if not available:
+            for key in ('fileId', 'fileType', 'fileSize'):
+                public.pop(key, None)
+            public['message'] = f"[file] {public.get('filename') or 'αρχείο'} (έληξε)"
+    return public
 
 # --- Register the Database Blueprint ---
 app.register_blueprint(db_blueprint)
@@ -2258,6 +2670,7 @@ function showInfo() {
 
 Σημειώσεις ασφαλείας:
 • Το Cloudflared χρησιμοποιεί HTTPS από τον browser προς το Cloudflare και tunnel από το Cloudflare προς αυτή τη συσκευή· το Cloudflare παραμένει μέρος της αλυσίδας εμπιστοσύνης.
+• Το ιστορικό chat διαγράφεται όταν σταματήσει ο διακομιστής, εκτός αν ξεκίνησε με --keep-chat. Τότε τα 2000 πιο πρόσφατα μηνύματα διατηρούνται χωρίς κρυπτογράφηση (δικαιώματα μόνο για τον κάτοχο) στο ~/.connections_runtime/chat_log/.
 • Η άμεση πρόσβαση LAN είναι απενεργοποιημένη από προεπιλογή. Χρησιμοποιήστε --allow-lan μόνο σε αξιόπιστο Wi‑Fi/hotspot· αυτή η διαδρομή χρησιμοποιεί απλό HTTP.
 • Το Tor αποκρύπτει την τοποθεσία/IP της συσκευής σας, αλλά ο σύνδεσμος .onion πρέπει να ανοίξει με browser που υποστηρίζει Tor.
 
@@ -2359,7 +2772,8 @@ function initializeChat(secretKey) {
             localStorage.setItem("username", username);
         }
         document.querySelectorAll('.secure-watermark').forEach(el => el.setAttribute('data-watermark', username));
-        socket.emit("join", username);
+        // The cursor lets the server send only what changed while we were away.
+        socket.emit("join", { username: username, after: historyCursor });
     });
 
     socket.on('session_info', data => {
@@ -2710,7 +3124,7 @@ function initializeChat(secretKey) {
         startStream(liveCameraFacingMode);
     };
 
-    function renderChatMessage(data) {
+    function renderChatMessage(data, prepend = false) {
         if (!data || !data.id) return;
         if (document.getElementById(data.id)) return;
         const div = document.createElement('div');
@@ -2804,6 +3218,11 @@ function initializeChat(secretKey) {
             div.appendChild(actions);
         }
         
+        if (prepend) {
+            chat.insertBefore(div, chat.firstChild);
+            return;
+        }
+
         const wasAtBottom = chatContainer.scrollHeight - chatContainer.scrollTop - chatContainer.clientHeight < 100;
         
         chat.appendChild(div);
@@ -2813,15 +3232,69 @@ function initializeChat(secretKey) {
         }
     }
 
-    socket.on("chat_history", history => {
-        if (!Array.isArray(history)) return;
-        history.forEach(m => renderChatMessage(m));
+    // History paging: `historyCursor` is the newest log position we have seen
+    // (used to catch up after a reconnect); `oldestMessageNo` is the oldest
+    // message rendered (used to page further back on scroll).
+    let historyCursor = 0;
+    let oldestMessageNo = 0;
+    let historyHasMore = false;
+    let historyLoading = false;
+
+    function noteHistoryCursor(data) {
+        const cursor = Number(data && data.cursor);
+        if (Number.isFinite(cursor) && cursor > historyCursor) historyCursor = cursor;
+    }
+
+    function noteOldestMessage(data) {
+        const number = Number(data && data.n);
+        if (Number.isFinite(number) && number > 0 && (!oldestMessageNo || number < oldestMessageNo)) {
+            oldestMessageNo = number;
+        }
+    }
+
+    socket.on("chat_history", payload => {
+        if (Array.isArray(payload)) {
+            payload.forEach(m => renderChatMessage(m));
+            return;
+        }
+        if (!payload || !Array.isArray(payload.items)) return;
+        historyLoading = false;
+        if (payload.reset) {
+            chat.querySelectorAll('.chat-message[id^="msg_"]').forEach(el => el.remove());
+            oldestMessageNo = 0;
+        }
+        (payload.deleted || []).forEach(id => {
+            const element = document.getElementById(id);
+            if (element) element.remove();
+        });
+        if (payload.direction === 'before') {
+            const previousHeight = chatContainer.scrollHeight;
+            payload.items.slice().reverse().forEach(m => renderChatMessage(m, true));
+            chatContainer.scrollTop += chatContainer.scrollHeight - previousHeight;
+        } else {
+            payload.items.forEach(m => {
+                const contentDiv = document.getElementById(`content-${m.id}`);
+                if (contentDiv && !m.fileType) contentDiv.textContent = `${m.username}: ${m.message}`;
+                else renderChatMessage(m);
+            });
+        }
+        payload.items.forEach(noteOldestMessage);
+        if (payload.direction !== 'after') historyHasMore = !!payload.has_more;
+        noteHistoryCursor(payload);
+    });
+
+    chatContainer.addEventListener('scroll', () => {
+        if (chatContainer.scrollTop > 80 || !historyHasMore || historyLoading || !oldestMessageNo) return;
+        historyLoading = true;
+        socket.emit('chat_history', { before: oldestMessageNo });
     });
 
     socket.on("message", data => {
+        noteHistoryCursor(data);
         renderChatMessage(data);
     });
     socket.on('delete_message', data => {
+        noteHistoryCursor(data);
         const element = document.getElementById(data.id);
         if (element) element.remove();
     });
@@ -2863,6 +3336,7 @@ function initializeChat(secretKey) {
     }
 
     socket.on('message_edited', data => {
+        noteHistoryCursor(data);
         const contentDiv = document.getElementById(`content-${data.id}`);
         if(contentDiv) {
             let prefix = '';
@@ -3361,19 +3835,64 @@ def _emit_action_error(message):
     emit('action_error', {'message': message}, room=request.sid)
 
 def _remember_chat_item(item):
-    evicted_file_ids = []
     with CHAT_HISTORY_LOCK:
-        CHAT_HISTORY[item['id']] = dict(item)
-        while len(CHAT_HISTORY) > CHAT_HISTORY_MAX:
-            _old_id, old_item = CHAT_HISTORY.popitem(last=False)
-            if isinstance(old_item, dict) and old_item.get('fileId'):
-                evicted_file_ids.append(old_item.get('fileId'))
+        stored, evicted_file_ids = CHAT_HISTORY.add(item)
     for file_id in evicted_file_ids:
         _delete_chat_file(file_id)
+    return stored
+
+def _emit_chat_page(before=None, limit=CHAT_HISTORY_PAGE, direction='latest'):
+    with CHAT_HISTORY_LOCK:
+        items, has_more = CHAT_HISTORY.page_before(before, limit)
+        cursor = CHAT_HISTORY.cursor
+    emit("chat_history", {
+        'direction': direction,
+        'items': [_public_chat_item(item) for item in items],
+        'deleted': [],
+        'has_more': has_more,
+        'cursor': cursor,
+        'reset': direction == 'latest',
+    }, room=request.sid)
+
+def _emit_chat_changes(after):
+    with CHAT_HISTORY_LOCK:
+        changes = CHAT_HISTORY.changes_after(after)
+        cursor = CHAT_HISTORY.cursor
+    if changes is None:
+        _emit_chat_page()
+        return
+    items, deleted = changes
+    emit("chat_history", {
+        'direction': 'after',
+        'items': [_public_chat_item(item) for item in items],
+        'deleted': deleted,
+        'cursor': cursor,
+        'reset': False,
+    }, room=request.sid)
+
+# The inline pages are compiled once instead of on every request
+# (render_template_string re-parses and re-compiles its source each call).
+TEMPLATE_SOURCES = {'chat': HTML, 'database': html_template_db}
+_COMPILED_TEMPLATES = {}
+_COMPILED_TEMPLATES_LOCK = threading.Lock()
+
+def compiled_template(name):
+    template = _COMPILED_TEMPLATES.get(name)
+    if template is None:
+        with _COMPILED_TEMPLATES_LOCK:
+            template = _COMPILED_TEMPLATES.get(name)
+            if template is None:
+                template = app.jinja_env.from_string(TEMPLATE_SOURCES[name])
+                _COMPILED_TEMPLATES[name] = template
+    return template
+
+def warm_template_cache():
+    for name in TEMPLATE_SOURCES:
+        compiled_template(name)
 
 @app.route('/')
 def index_chat():
-    return render_template_string(HTML)
+    return render_template(compiled_template('chat'))
 
 @app.route('/health')
 def health_check():
@@ -3860,12 +4379,20 @@ def handle_connect(auth):
     return True
 
 @socketio.on("join")
-def handle_join(username):
+def handle_join(payload):
     global FIRST_JOINED_CLIENT_ID
     user = _current_user()
     if not user or user.get('username') != 'pending':
         return
 
+    # Older clients send the bare username; newer ones also send the history
+    # cursor they already hold so a reconnect only receives what is missing.
+    after = None
+    if isinstance(payload, dict):
+        username = payload.get('username', '')
+        after = payload.get('after')
+    else:
+        username = payload
     safe_username = _clean_username(username)
     with USER_STATE_LOCK:
         if FIRST_JOINED_CLIENT_ID is None:
@@ -3879,9 +4406,10 @@ def handle_join(username):
     }, room=request.sid)
 
     try:
-        with CHAT_HISTORY_LOCK:
-            history = list(CHAT_HISTORY.values())
-        emit("chat_history", history, room=request.sid)
+        if isinstance(after, int) and not isinstance(after, bool) and after > 0:
+            _emit_chat_changes(after)
+        else:
+            _emit_chat_page()
     except Exception:
         pass
 
@@ -3891,6 +4419,22 @@ def handle_join(username):
         'message': f'{safe_username} συνδέθηκε.'
     }, broadcast=True)
 
+@socketio.on("chat_history")
+def handle_chat_history(data):
+    """Page older history (`before` a message number) or catch up (`after` a cursor)."""
+    user = _current_user()
+    if not user or user.get('username') == 'pending' or not isinstance(data, dict):
+        return
+    limit = data.get('limit', CHAT_HISTORY_PAGE)
+    if not isinstance(limit, int) or isinstance(limit, bool):
+        limit = CHAT_HISTORY_PAGE
+    before = data.get('before')
+    after = data.get('after')
+    if isinstance(before, int) and not isinstance(before, bool) and before > 0:
+        _emit_chat_page(before, limit, direction='before')
+    elif isinstance(after, int) and not isinstance(after, bool) and after >= 0:
+        _emit_chat_changes(after)
+
 @socketio.on("message")
 def handle_message(data):
     user = _current_user()
@@ -3910,13 +4454,11 @@ def handle_message(data):
         _emit_action_error(f'Το μήνυμα είναι πολύ μεγάλο. Το μέγιστο είναι {MAX_TEXT_MESSAGE_CHARS} χαρακτήρες.')
         return
 
-    item = {
-        'id': f"msg_{secrets.token_urlsafe(12)}",
+    item = _remember_chat_item({
         'username': user['username'],
         'owner_id': user['client_id'],
         'message': message,
-    }
-    _remember_chat_item(item)
+    })
     emit("message", item, broadcast=True)
 
 @socketio.on("file_message")
@@ -3944,8 +4486,7 @@ def handle_file_message(data):
         meta['claimed'] = True
         file_meta = dict(meta)
 
-    item = {
-        'id': f"msg_{secrets.token_urlsafe(12)}",
+    item = _remember_chat_item({
         'username': user['username'],
         'owner_id': user['client_id'],
         'message': f"[file] {file_meta['filename']}",
@@ -3953,8 +4494,7 @@ def handle_file_message(data):
         'filename': file_meta['filename'],
         'fileType': file_meta['file_type'],
         'fileSize': file_meta['size'],
-    }
-    _remember_chat_item(item)
+    })
     emit("message", item, broadcast=True)
 
 @socketio.on("delete_message")
@@ -3976,13 +4516,12 @@ def handle_delete(data):
         if not owns_message and not user.get('is_moderator'):
             _emit_action_error('Μπορείτε να διαγράψετε μόνο τα δικά σας μηνύματα.')
             return
-        removed = CHAT_HISTORY.pop(message_id, None)
-        if isinstance(removed, dict):
-            file_id_to_delete = removed.get('fileId')
+        file_id_to_delete = item.get('fileId')
+        cursor = CHAT_HISTORY.delete(message_id)
 
     if file_id_to_delete:
         _delete_chat_file(file_id_to_delete)
-    emit("delete_message", {'id': message_id}, broadcast=True)
+    emit("delete_message", {'id': message_id, 'cursor': cursor}, broadcast=True)
 
 @socketio.on("edit_message")
 def handle_edit(data):
@@ -4011,12 +4550,13 @@ def handle_edit(data):
             return
         updated = dict(item)
         updated['message'] = new_message + ' (επεξεργασμένο)'
-        CHAT_HISTORY[message_id] = updated
+        updated = CHAT_HISTORY.edit(message_id, updated)
 
     emit("message_edited", {
         'id': message_id,
         'new_message': new_message,
-        'username': user['username']
+        'username': user['username'],
+        'cursor': updated['cursor'],
     }, broadcast=True)
 
 @socketio.on("join-room")
@@ -4106,6 +4646,7 @@ def on_disconnect():
 if __name__ == '__main__' and "--server" not in sys.argv:
     VERBOSE_MODE = "--verbose" in sys.argv
     ALLOW_LAN = "--allow-lan" in sys.argv
+    KEEP_CHAT = "--keep-chat" in sys.argv
     server_process = None
     tunnel_proc = None
     tor_proc = None
@@ -4119,7 +4660,7 @@ if __name__ == '__main__' and "--server" not in sys.argv:
         SECRET_KEY = secrets.token_urlsafe(32)
 
         # Transfer the key to the child through an anonymous pipe on Termux/POSIX.
-        server_process = start_server_process(SECRET_KEY, VERBOSE_MODE, ALLOW_LAN)
+        server_process = start_server_process(SECRET_KEY, VERBOSE_MODE, ALLOW_LAN, KEEP_CHAT)
         
         # Wait for the single server
         server_ready = wait_for_server("http://localhost:5000/health")
@@ -4157,6 +4698,7 @@ f"""✅ Το Connections είναι πλέον ενεργό!
 🔗 Online (Διαδίκτυο):     {online_url or 'N/A'}
 🏠 Τοπικό (LAN/Hotspot):   {local_url or 'Απενεργοποιημένο από προεπιλογή (χρησιμοποιήστε --allow-lan)'}
 🏠 Τοπικό (Αυτή η συσκευή):    http://127.0.0.1:5000
+💬 Ιστορικό chat:          {'αποθηκεύεται στο ~/.connections_runtime/chat_log/' if KEEP_CHAT else 'μόνο για αυτή τη συνεδρία (χρησιμοποιήστε --keep-chat για διατήρηση)'}
 
 {'⚠️  Η λειτουργία LAN χρησιμοποιεί απλό HTTP· χρησιμοποιήστε την μόνο σε αξιόπιστο δίκτυο.' if ALLOW_LAN else '🔒 Η άμεση έκθεση μέσω LAN είναι ΑΠΕΝΕΡΓΟΠΟΙΗΜΕΝΗ. Cloudflare/Tor συνεχίζουν να λειτουργούν κανονικά.'}
 
@@ -4229,6 +4771,7 @@ if __name__ == '__main__' and "--server" in sys.argv:
 
     print(f"Εκκίνηση διακομιστή Connections (με Βάση Δεδομένων) στη διεύθυνση {BIND_HOST}:5000...")
     try:
+        warm_template_cache()
         socketio.run(
             app, host=BIND_HOST, port=5000,
             debug=False, use_reloader=False, allow_unsafe_werkzeug=True
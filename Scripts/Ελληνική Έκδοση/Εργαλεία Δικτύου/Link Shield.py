@@ -5,9 +5,12 @@ import re
 import socket
 import ssl
 import sys
+import threading
 import time
 import hashlib
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import List, Optional, Tuple, Dict
 USER_AGENT = 'DedSec-LinkShield/5.0 (+safe-url-audit)'
@@ -15,11 +18,97 @@ TIMEOUT = 12
 MAX_REDIRECTS = 18
 PREVIEW_MAX_BYTES = 128000
 CONFIG_FILE = 'linkshield_config_en.json'
+BATCH_WORKERS = 16
+PER_HOST_LIMIT = 2
+DNS_CACHE_TTL = 300
+TLS_CACHE_TTL = 3600
+WHOIS_CACHE_TTL = 86400
+REDIRECT_CACHE_TTL = 900
+BATCH_BASENAME = 'linkshield_batch_report'
 SUSPICIOUS_TLDS = {'zip', 'mov', 'click', 'top', 'xyz', 'work', 'support', 'help', 'lol', 'cam', 'rest', 'cfd', 'gq', 'tk', 'ml', 'cf', 'ga'}
 URL_SHORTENERS = {'bit.ly', 't.co', 'tinyurl.com', 'goo.gl', 'ow.ly', 'is.gd', 'buff.ly', 'rebrand.ly', 'cutt.ly', 'soo.gd', 's.id', 'rb.gy', 'shorturl.at'}
 COMMON_DOMAINS = ['google.com', 'accounts.google.com', 'facebook.com', 'instagram.com', 'paypal.com', 'microsoft.com', 'live.com', 'apple.com', 'amazon.com', 'discord.com', 'steamcommunity.com', 'tiktok.com', 'x.com', 'twitter.com']
 TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'gclid', 'fbclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_', 'spm', 'yclid', '_hsenc', '_hsmi'}
 
+class TTLCache:
+    """Ασφαλής για νήματα μνήμη με λήξη ανά εγγραφή· ταυτόχρονες αστοχίες στο ίδιο κλειδί υπολογίζονται μία φορά."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.data = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get(self, key, default=None):
+        with self.lock:
+            hit = self.data.get(key)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+        return default
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_compute(self, key, compute, keep=lambda value: True):
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key, missing)
+            if value is missing:
+                value = compute()
+                if keep(value):
+                    self.put(key, value)
+        with self.lock:
+            self.key_locks.pop(key, None)
+        return value
+
+class HostLimiter:
+    """Περιορίζει πόσα αιτήματα εκτελούνται ταυτόχρονα προς τον ίδιο host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self.active = {}
+        self.cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, host: str):
+        host = (host or '').lower()
+        with self.cond:
+            while self.active.get(host, 0) >= self.per_host:
+                self.cond.wait()
+            self.active[host] = self.active.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.active[host] -= 1
+                if not self.active[host]:
+                    del self.active[host]
+                self.cond.notify_all()
+DNS_CACHE = TTLCache(DNS_CACHE_TTL)
+TLS_CACHE = TTLCache(TLS_CACHE_TTL)
+WHOIS_CACHE = TTLCache(WHOIS_CACHE_TTL)
+REDIRECT_CACHE = TTLCache(REDIRECT_CACHE_TTL)
+HOST_LIMITER = HostLimiter(PER_HOST_LIMIT)
+_local = threading.local()
+
+def http_session():
+    import requests
+    s = getattr(_local, 'session', None)
+    if s is None:
+        s = requests.Session()
+        s.headers['User-Agent'] = USER_AGENT
+        _local.session = s
+    return s
+
+def url_host(url: str) -> str:
+    return (urllib.parse.urlparse(url).hostname or '').lower()
+
 def ensure_requests() -> bool:
     try:
         import requests
@@ -115,36 +204,40 @@ def load_config() -> Dict:
     except Exception:
         return default
 
+def redirect_hop(url: str, timeout: int=TIMEOUT) -> Optional[str]:
+    """Επιστρέφει το επόμενο URL της αλυσίδας ανακατευθύνσεων ή None όταν το ``url`` δεν ανακατευθύνει."""
+    session = http_session()
+    with HOST_LIMITER.slot(url_host(url)):
+        r = session.head(url, allow_redirects=False, timeout=timeout)
+        r.close()
+        loc = r.headers.get('Location')
+        if r.status_code in (301, 302, 303, 307, 308) and loc:
+            return urllib.parse.urljoin(url, loc)
+        rg = session.get(url, allow_redirects=False, timeout=timeout, stream=True)
+        rg.close()
+        loc2 = rg.headers.get('Location')
+        if rg.status_code in (301, 302, 303, 307, 308) and loc2:
+            return urllib.parse.urljoin(url, loc2)
+    return None
+
 def expand_url(url: str, timeout: int=TIMEOUT, max_hops: int=MAX_REDIRECTS):
-    import requests
     chain = []
     cur = url
-    err = None
-    final = url
     for _ in range(max_hops):
         chain.append(cur)
         try:
-            r = requests.head(cur, allow_redirects=False, timeout=timeout, headers={'User-Agent': USER_AGENT})
-            loc = r.headers.get('Location')
-            if r.status_code in (301, 302, 303, 307, 308) and loc:
-                cur = urllib.parse.urljoin(cur, loc)
-                final = cur
-                continue
-            rg = requests.get(cur, allow_redirects=False, timeout=timeout, stream=True, headers={'User-Agent': USER_AGENT})
-            loc2 = rg.headers.get('Location')
-            if rg.status_code in (301, 302, 303, 307, 308) and loc2:
-                cur = urllib.parse.urljoin(cur, loc2)
-                final = cur
-                continue
-            final = cur
-            return (chain, final, None)
+            nxt = REDIRECT_CACHE.get_or_compute(cur, lambda: redirect_hop(cur, timeout))
         except Exception as e:
-            err = str(e)
-            final = cur
-            return (chain, final, err)
-    return (chain, final, 'Too many redirects')
+            return (chain, cur, str(e))
+        if nxt is None:
+            return (chain, cur, None)
+        cur = nxt
+    return (chain, cur, 'Πάρα πολλές ανακατευθύνσεις')
 
 def dns_resolve(host: str) -> List[str]:
+    return list(DNS_CACHE.get_or_compute(host.lower(), lambda: _dns_resolve(host), keep=bool))
+
+def _dns_resolve(host: str) -> List[str]:
     ips = []
     try:
         infos = socket.getaddrinfo(host, None)
@@ -157,9 +250,12 @@ def dns_resolve(host: str) -> List[str]:
     return ips
 
 def tls_peek(host: str, port: int=443, timeout: int=6) -> Optional[dict]:
+    return TLS_CACHE.get_or_compute((host.lower(), port), lambda: _tls_peek(host, port, timeout), keep=lambda cert: cert is not None)
+
+def _tls_peek(host: str, port: int, timeout: int) -> Optional[dict]:
     try:
         ctx = ssl.create_default_context()
-        with socket.create_connection((host, port), timeout=timeout) as sock:
+        with HOST_LIMITER.slot(host), socket.create_connection((host, port), timeout=timeout) as sock:
             with ctx.wrap_socket(sock, server_hostname=host) as ssock:
                 cert = ssock.getpeercert()
                 out = {}
@@ -176,11 +272,14 @@ def tls_peek(host: str, port: int=443, timeout: int=6) -> Optional[dict]:
         return None
 
 def safe_preview(url: str, timeout: int=TIMEOUT, max_bytes: int=PREVIEW_MAX_BYTES) -> dict:
-    import requests
+    with HOST_LIMITER.slot(url_host(url)):
+        return _safe_preview(url, timeout, max_bytes)
+
+def _safe_preview(url: str, timeout: int, max_bytes: int) -> dict:
     out = {'ok': False}
     t0 = time.time()
     try:
-        r = requests.get(url, timeout=timeout, stream=True, headers={'User-Agent': USER_AGENT})
+        r = http_session().get(url, timeout=timeout, stream=True)
         out['status_code'] = r.status_code
         out['headers'] = {k: v for k, v in r.headers.items()}
         out['content_type'] = (r.headers.get('Content-Type') or '').lower()
@@ -214,6 +313,7 @@ def safe_preview(url: str, timeout: int=TIMEOUT, max_bytes: int=PREVIEW_MAX_BYTE
                     sample += chunk[:max(0, 8192 - len(sample))]
                 if len(sample) >= 8192:
                     break
+        r.close()
         out['title'] = title
         if sample:
             out['sample_sha256_8k'] = hashlib.sha256(sample).hexdigest()
@@ -269,6 +369,9 @@ def chain_domain_hops(chain: List[str]) -> Tuple[List[str], int]:
     return (regs, changes)
 
 def whois_lookup(domain: str) -> Optional[str]:
+    return WHOIS_CACHE.get_or_compute(domain.lower(), lambda: _whois_lookup(domain), keep=lambda txt: txt is not None)
+
+def _whois_lookup(domain: str) -> Optional[str]:
     import subprocess
     if not have('whois'):
         pkg_install('whois')
@@ -463,9 +566,9 @@ def save_json(obj, path: str):
         json.dump(obj, f, ensure_ascii=False, indent=2)
     print(f'[*] Αποθηκεύτηκε: {path}')
 
-def export_markdown(r: ScanResult, path: str):
+def markdown_lines(r: ScanResult, heading: str='# Link Shield Report') -> List[str]:
     lines = []
-    lines.append('# Link Shield Report')
+    lines.append(heading)
     lines.append(f'- Original: `{r.original}`')
     lines.append(f'- Final: `{r.final}`')
     lines.append(f'- Risk: **{r.verdict}** ({r.score}/100)')
@@ -503,22 +606,91 @@ def export_markdown(r: ScanResult, path: str):
         lines.extend(r.whois.splitlines()[:80])
         lines.append('```')
         lines.append('')
+    return lines
+
+def export_markdown(r: ScanResult, path: str):
     with open(path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
+        f.write('\n'.join(markdown_lines(r)))
     print(f'[*] Markdown αποθηκεύτηκε: {path}')
+CSV_FIELDS = ['original', 'final', 'score', 'verdict', 'host', 'registrable', 'chain_domain_changes']
+
+def csv_row(r: dict) -> dict:
+    det = r.get('details', {}) or {}
+    return {'original': r.get('original', ''), 'final': r.get('final', ''), 'score': r.get('score', ''), 'verdict': r.get('verdict', ''), 'host': det.get('host', ''), 'registrable': det.get('registrable', ''), 'chain_domain_changes': det.get('chain_domain_changes', '')}
 
 def export_csv(reports: List[dict], path: str):
     if not reports:
         return
-    fields = ['original', 'final', 'score', 'verdict', 'host', 'registrable', 'chain_domain_changes']
     with open(path, 'w', newline='', encoding='utf-8') as f:
-        w = csv.DictWriter(f, fieldnames=fields)
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
         w.writeheader()
         for r in reports:
-            det = r.get('details', {}) or {}
-            w.writerow({'original': r.get('original', ''), 'final': r.get('final', ''), 'score': r.get('score', ''), 'verdict': r.get('verdict', ''), 'host': det.get('host', ''), 'registrable': det.get('registrable', ''), 'chain_domain_changes': det.get('chain_domain_changes', '')})
+            w.writerow(csv_row(r))
     print(f'[*] CSV αποθηκεύτηκε: {path}')
 
+class BatchWriter:
+    """Προσθέτει κάθε ολοκληρωμένη σάρωση στις αναφορές JSON, CSV και Markdown μόλις είναι έτοιμη.
+
+    Το αρχείο JSON παραμένει έγκυρος πίνακας μετά από κάθε εγγραφή, ώστε μια διακοπτόμενη
+    μαζική σάρωση να αφήνει πίσω της χρήσιμες αναφορές.
+    """
+
+    def __init__(self, base: str):
+        self.paths = {ext: f'{base}.{ext}' for ext in ('json', 'csv', 'md')}
+        self.count = 0
+        self.json_f = open(self.paths['json'], 'w+', encoding='utf-8')
+        self.json_f.write('[\n]')
+        self.csv_f = open(self.paths['csv'], 'w', newline='', encoding='utf-8')
+        self.csv_w = csv.DictWriter(self.csv_f, fieldnames=CSV_FIELDS)
+        self.csv_w.writeheader()
+        self.md_f = open(self.paths['md'], 'w', encoding='utf-8')
+        self.md_f.write('# Αναφορά μαζικής σάρωσης Link Shield\n')
+
+    def add(self, r: ScanResult):
+        self.count += 1
+        entry = json.dumps(r.__dict__, ensure_ascii=False, indent=2)
+        self.json_f.seek(0, os.SEEK_END)
+        self.json_f.seek(self.json_f.tell() - 1)
+        self.json_f.write((',' if self.count > 1 else '') + '\n' + entry + '\n]')
+        self.csv_w.writerow(csv_row(r.__dict__))
+        self.md_f.write('\n---\n\n' + '\n'.join(markdown_lines(r, f'# {self.count}. {r.original}')) + '\n')
+        for f in (self.json_f, self.csv_f, self.md_f):
+            f.flush()
+
+    def close(self):
+        for f in (self.json_f, self.csv_f, self.md_f):
+            f.close()
+        for path in self.paths.values():
+            print(f'[*] Αποθηκεύτηκε: {path}')
+
+def _scan_or_error(url: str, cfg: Dict, do_preview: bool, do_whois: bool) -> ScanResult:
+    try:
+        return scan_one(url, cfg, do_preview=do_preview, do_whois=do_whois)
+    except Exception as e:
+        url = normalize_url(url)
+        return ScanResult(original=url, chain=[url], final=url, expand_error=str(e), score=0, verdict='ΣΦΑΛΜΑ', reasons=[], dns=[], tls=None, preview=None, whois=None, cleaned_url=None, removed_tracking_params=[], details={})
+
+def batch_scan(urls: List[str], cfg: Dict, writer: Optional[BatchWriter]=None, workers: int=BATCH_WORKERS, do_preview: bool=False, do_whois: bool=False) -> List[ScanResult]:
+    """Σαρώνει τα ``urls`` ταυτόχρονα και δίνει κάθε αποτέλεσμα στον ``writer`` μόλις ολοκληρωθεί.
+
+    Ο παραλληλισμός ανά host περιορίζεται από τον HOST_LIMITER· τα DNS, TLS, WHOIS και τα βήματα
+    ανακατεύθυνσης μοιράζονται μεταξύ των URL μέσω των κρυφών μνημών TTL.
+    """
+    results = []
+    total = len(urls)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, total)))
+    try:
+        futures = [pool.submit(_scan_or_error, u, cfg, do_preview, do_whois) for u in urls]
+        for i, fut in enumerate(as_completed(futures), start=1):
+            rr = fut.result()
+            results.append(rr)
+            if writer:
+                writer.add(rr)
+            print(f'[{i}/{total}] {rr.verdict:<10} ({rr.score:>3}/100) {rr.original}')
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
 def load_urls_from_file(path: str) -> List[str]:
     out = []
     with open(path, 'r', encoding='utf-8', errors='ignore') as f:
@@ -575,14 +747,14 @@ def menu():
             if not urls:
                 print('[!] Όχι URLs βρέθηκε.')
                 continue
-            reports = []
-            for i, u in enumerate(urls, start=1):
-                print(f'\n[{i}/{len(urls)}] Σάρωσηning...')
-                rr = scan_one(u, cfg, do_preview=False, do_whois=False)
-                print_result(rr)
-                reports.append(rr.__dict__)
-            save_json(reports, 'linkshield_batch_report.json')
-            export_csv(reports, 'linkshield_batch_report.csv')
+            print(f'[*] Σάρωση {len(urls)} URL ({BATCH_WORKERS} εργάτες, έως {PER_HOST_LIMIT} ανά host)...')
+            writer = BatchWriter(BATCH_BASENAME)
+            try:
+                batch_scan(urls, cfg, writer)
+            except KeyboardInterrupt:
+                print(f'\n[!] Διακόπηκε. {writer.count} αποτελέσματα αποθηκεύτηκαν.')
+            finally:
+                writer.close()
         elif c == '5':
             print('\nConfig αρχείο:', CONFIG_FILE)
             print('Edit allow/deny lists to tune results (auto-created).')